@@ -5,3 +5,7 @@ class AccountsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.accounts'
     verbose_name = 'إدارة المستخدمين'
+
+    def ready(self):
+        from . import audit
+        audit.connect_signals()
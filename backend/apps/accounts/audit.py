@@ -0,0 +1,370 @@
+"""
+Audit Trail - Asynchronous, batched AuditLog writer
+
+Saves and deletes of the audited business models are turned into AuditLog
+entries without adding a synchronous insert to the write path:
+
+* ``post_init`` keeps a copy of each instance's field values, so the diff
+  of an update costs no query.
+* ``post_save`` / ``post_delete`` build the entry (user and IP come from the
+  current request via AuditContextMiddleware) and queue it when the
+  transaction commits; rolled-back writes are never audited.
+* A background thread drains the queue with ``bulk_create``, every
+  AUDIT_BATCH_SIZE entries or AUDIT_FLUSH_INTERVAL_MS milliseconds.
+
+Entries that cannot be written (database error, full queue) are appended to
+logs/audit_spool.jsonl and replayed after the next successful flush; the
+queue is drained on interpreter exit. Only entries still in memory when the
+process is killed are lost.
+"""
+import atexit
+import contextvars
+import json
+import logging
+import queue
+import threading
+import time
+from datetime import date, datetime, time as dt_time
+from decimal import Decimal
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from uuid import UUID
+
+from django.apps import apps
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_ipv46_address
+from django.db import close_old_connections, connection, transaction
+from django.db.models.signals import post_delete, post_init, post_save
+
+from .models import AuditLog
+
+logger = logging.getLogger('apps.accounts.audit')
+
+# Models whose saves and deletes are audited
+AUDITED_MODELS = (
+    'sales.Customer',
+    'sales.Invoice',
+    'sales.Payment',
+    'sales.SalesReturn',
+    'sales.CreditLimitOverride',
+    'purchases.Supplier',
+    'purchases.PurchaseOrder',
+    'purchases.GoodsReceivedNote',
+    'purchases.SupplierPayment',
+    'expenses.Expense',
+    'expenses.ExpenseCategory',
+    'inventory.Product',
+    'inventory.Category',
+    'inventory.Warehouse',
+    'core.Currency',
+    'core.TaxRate',
+    'core.SystemSettings',
+    'accounts.User',
+)
+
+# Fields never written to the diff
+IGNORED_FIELDS = frozenset({'created_at', 'updated_at', 'password', 'last_login'})
+
+# Fields tried in order for AuditLog.object_repr (str() may query relations)
+REPR_FIELDS = (
+    'invoice_number', 'payment_number', 'return_number', 'order_number', 'grn_number',
+    'expense_number', 'code', 'username', 'name', 'key',
+)
+
+# Entries written per bulk_create
+AUDIT_BATCH_SIZE = 200
+
+# Longest time (ms) an entry waits in the queue before being written
+AUDIT_FLUSH_INTERVAL_MS = 500
+
+# Entries held in memory; beyond this new entries go to the spool file
+AUDIT_QUEUE_MAX = 10000
+
+# Spool file for entries that could not be written
+AUDIT_SPOOL_NAME = 'audit_spool.jsonl'
+
+_request_var = contextvars.ContextVar('audit_request', default=None)
+_queue: 'queue.Queue' = queue.Queue(maxsize=AUDIT_QUEUE_MAX)
+_STOP = object()
+_state_lock = threading.Lock()
+_spool_lock = threading.Lock()
+_writer: Optional[threading.Thread] = None
+
+
+def _setting(name: str, default):
+    return getattr(settings, name, default)
+
+
+def _jsonable(value: Any) -> Any:
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, (datetime, date, dt_time)):
+        return value.isoformat()
+    if isinstance(value, (Decimal, UUID)):
+        return str(value)
+    if isinstance(value, (list, tuple)):
+        return [_jsonable(item) for item in value]
+    if isinstance(value, dict):
+        return {str(key): _jsonable(item) for key, item in value.items()}
+    return str(value)
+
+
+def _field_names(model) -> tuple:
+    names = model.__dict__.get('_audit_fields')
+    if names is None:
+        names = tuple(
+            f.attname for f in model._meta.concrete_fields if f.attname not in IGNORED_FIELDS
+        )
+        model._audit_fields = names
+    return names
+
+
+def _values(instance) -> Dict[str, Any]:
+    # Deferred fields are absent from __dict__ and left out of the diff
+    data = instance.__dict__
+    return {name: data[name] for name in _field_names(type(instance)) if name in data}
+
+
+def _object_repr(instance) -> str:
+    for name in REPR_FIELDS:
+        value = instance.__dict__.get(name)
+        if value:
+            return str(value)[:255]
+    return f'{instance._meta.model_name} #{instance.pk}'
+
+
+def _request_context(instance) -> Dict[str, Any]:
+    request = _request_var.get()
+    user_id, ip = None, None
+    if request is not None:
+        # DRF copies the authenticated user onto the Django request
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_authenticated:
+            user_id = user.pk
+        forwarded = request.META.get('HTTP_X_FORWARDED_FOR', '')
+        ip = forwarded.split(',')[0].strip() or request.META.get('REMOTE_ADDR')
+        try:
+            validate_ipv46_address(ip or '')
+        except ValidationError:
+            ip = None
+    if user_id is None:
+        user_id = getattr(instance, 'updated_by_id', None) or getattr(instance, 'created_by_id', None)
+    return {'user_id': user_id, 'ip_address': ip}
+
+
+def _entry(instance, action: str, changes: Optional[Dict]) -> Dict[str, Any]:
+    return {
+        'action': action,
+        'model_name': instance._meta.label,
+        'object_id': str(instance.pk)[:50] if instance.pk is not None else None,
+        'object_repr': _object_repr(instance),
+        'changes': changes,
+        **_request_context(instance),
+    }
+
+
+def _queue_on_commit(entry: Dict[str, Any]) -> None:
+    # Auditing never fails a write that has already committed
+    transaction.on_commit(lambda: AuditWriter.enqueue(entry), robust=True)
+
+
+def _instance_loaded(sender, instance, **kwargs):
+    instance._audit_initial = _values(instance)
+
+
+def _instance_saved(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    if raw or not _setting('AUDIT_LOG_ENABLED', True):
+        return
+    current = _values(instance)
+    if created:
+        changes = {name: _jsonable(value) for name, value in current.items()}
+        action = AuditLog.Action.CREATE
+    else:
+        initial = getattr(instance, '_audit_initial', {})
+        names = [f.attname for f in (sender._meta.get_field(n) for n in update_fields)] \
+            if update_fields else current.keys()
+        changes = {
+            name: [_jsonable(initial[name]), _jsonable(current[name])]
+            for name in names
+            if name in initial and name in current and initial[name] != current[name]
+        }
+        if not changes:
+            return
+        soft_deleted = changes.get('is_deleted', [None, None])[1] is True
+        action = AuditLog.Action.DELETE if soft_deleted else AuditLog.Action.UPDATE
+    instance._audit_initial = current
+    _queue_on_commit(_entry(instance, action, changes))
+
+
+def _instance_deleted(sender, instance, **kwargs):
+    if not _setting('AUDIT_LOG_ENABLED', True):
+        return
+    _queue_on_commit(_entry(instance, AuditLog.Action.DELETE, None))
+
+
+class AuditContextMiddleware:
+    """Makes the current request available to the audit signal handlers."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = _request_var.set(request)
+        try:
+            return self.get_response(request)
+        finally:
+            _request_var.reset(token)
+
+
+class AuditWriter:
+    """
+    Service class for the background AuditLog writer.
+    """
+
+    @staticmethod
+    def enqueue(entry: Dict[str, Any]) -> None:
+        """Queue one entry; with AUDIT_LOG_EAGER (tests) it is written at once."""
+        if _setting('AUDIT_LOG_EAGER', False):
+            AuditWriter.write([entry])
+            return
+        AuditWriter._ensure_started()
+        try:
+            _queue.put_nowait(entry)
+        except queue.Full:
+            AuditWriter._spool([entry])
+
+    @staticmethod
+    def write(entries: List[Dict[str, Any]]) -> bool:
+        """Insert entries with bulk_create; spool them if that fails."""
+        try:
+            AuditLog.objects.bulk_create(
+                [AuditLog(**entry) for entry in entries],
+                batch_size=_setting('AUDIT_BATCH_SIZE', AUDIT_BATCH_SIZE)
+            )
+        except Exception:
+            logger.exception("Could not write %d audit entries; spooling them", len(entries))
+            AuditWriter._spool(entries)
+            return False
+        return True
+
+    @staticmethod
+    def flush(timeout: float = 5.0) -> None:
+        """Block until every queued entry has been written (or timeout)."""
+        deadline = time.monotonic() + timeout
+        while _queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+    @staticmethod
+    def spool_path() -> Path:
+        return Path(settings.LOGS_DIR) / AUDIT_SPOOL_NAME
+
+    @staticmethod
+    def replay_spool() -> int:
+        """Write spooled entries to the database; returns how many were written."""
+        path = AuditWriter.spool_path()
+        with _spool_lock:
+            if not path.exists():
+                return 0
+            pending = path.with_name(path.name + '.replay')
+            path.replace(pending)
+        entries = []
+        with open(pending, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entries.append(json.loads(line))
+                except ValueError:
+                    logger.warning("Skipping unreadable audit spool line")
+        # On failure write() appends the entries to the spool again
+        written = AuditWriter.write(entries) if entries else True
+        pending.unlink()
+        return len(entries) if written else 0
+
+    @staticmethod
+    def stop() -> None:
+        """Write everything still queued and stop the writer thread."""
+        global _writer
+        with _state_lock:
+            writer, _writer = _writer, None
+        if writer is None or not writer.is_alive():
+            return
+        _queue.put(_STOP)
+        writer.join(timeout=10)
+
+    @staticmethod
+    def _spool(entries: List[Dict[str, Any]]) -> None:
+        try:
+            with _spool_lock:
+                with open(AuditWriter.spool_path(), 'a', encoding='utf-8') as f:
+                    for entry in entries:
+                        f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+        except OSError:
+            logger.exception("Could not spool %d audit entries", len(entries))
+
+    @staticmethod
+    def _ensure_started() -> None:
+        global _writer
+        if _writer is not None:
+            return
+        with _state_lock:
+            if _writer is None:
+                _writer = threading.Thread(target=AuditWriter._run, name='ams-audit', daemon=True)
+                _writer.start()
+
+    @staticmethod
+    def _run() -> None:
+        batch_size = _setting('AUDIT_BATCH_SIZE', AUDIT_BATCH_SIZE)
+        interval = _setting('AUDIT_FLUSH_INTERVAL_MS', AUDIT_FLUSH_INTERVAL_MS) / 1000
+        stopping = False
+        while not stopping:
+            item = _queue.get()
+            batch, taken = [], 1
+            if item is _STOP:
+                stopping = True
+            else:
+                batch.append(item)
+            deadline = time.monotonic() + interval
+            while not stopping and len(batch) < batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = _queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                taken += 1
+                if item is _STOP:
+                    stopping = True
+                else:
+                    batch.append(item)
+            if stopping:
+                # Drain whatever is left without waiting
+                while True:
+                    try:
+                        item = _queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    taken += 1
+                    if item is not _STOP:
+                        batch.append(item)
+            try:
+                close_old_connections()
+                if batch and AuditWriter.write(batch):
+                    AuditWriter.replay_spool()
+            except Exception:
+                logger.exception("Audit writer failed")
+            finally:
+                for _ in range(taken):
+                    _queue.task_done()
+        connection.close()
+
+
+def connect_signals() -> None:
+    for label in AUDITED_MODELS:
+        model = apps.get_model(label)
+        post_init.connect(_instance_loaded, sender=model, dispatch_uid=f'audit_init_{label}')
+        post_save.connect(_instance_saved, sender=model, dispatch_uid=f'audit_save_{label}')
+        post_delete.connect(_instance_deleted, sender=model, dispatch_uid=f'audit_delete_{label}')
+
+
+atexit.register(AuditWriter.stop)
@@ -158,6 +158,10 @@ class AuditLog(TimeStampedModel):
         verbose_name = 'سجل المراجعة'
         verbose_name_plural = 'سجلات المراجعة'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['model_name', 'object_id']),
+            models.Index(fields=['created_at']),
+        ]
 
     def __str__(self):
         return f"{self.user} - {self.action} - {self.model_name}"
@@ -8,6 +8,7 @@ from rest_framework_simplejwt.views import TokenObtainPairView
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.filters import SearchFilter, OrderingFilter
 
+from apps.core.pagination import CreatedAtCursorPagination
 from .models import User, AuditLog
 from .serializers import (
     UserSerializer, UserCreateSerializer, 
@@ -78,13 +79,13 @@ class AuditLogViewSet(viewsets.ReadOnlyModelViewSet):
     """
     ViewSet for viewing audit logs.
     
-    Read-only access to audit trail.
+    Read-only access to audit trail. Pages use keyset pagination on
+    (created_at, id), so browsing a long trail never issues OFFSET or COUNT.
     """
-    queryset = AuditLog.objects.all()
+    queryset = AuditLog.objects.select_related('user')
     serializer_class = AuditLogSerializer
     permission_classes = [permissions.IsAdminUser]
-    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
-    filterset_fields = ['user', 'action', 'model_name']
+    pagination_class = CreatedAtCursorPagination
+    filter_backends = [DjangoFilterBackend, SearchFilter]
+    filterset_fields = ['user', 'action', 'model_name', 'object_id']
     search_fields = ['object_repr', 'model_name']
-    ordering_fields = ['created_at']
-    ordering = ['-created_at']
@@ -1,5 +1,6 @@
 from django.contrib import admin
 from .settings_models import SystemSettings, Currency, TaxRate
+from .job_models import BackgroundJob
 
 
 @admin.register(SystemSettings)
@@ -23,3 +24,10 @@ class TaxRateAdmin(admin.ModelAdmin):
     list_filter = ['is_default', 'is_active']
     search_fields = ['name', 'code']
     ordering = ['-is_default', 'name']
+
+
+@admin.register(BackgroundJob)
+class BackgroundJobAdmin(admin.ModelAdmin):
+    list_display = ['id', 'job_type', 'status', 'phase', 'progress', 'created_by', 'created_at', 'finished_at']
+    list_filter = ['job_type', 'status']
+    ordering = ['-created_at']
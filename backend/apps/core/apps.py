@@ -7,4 +7,4 @@ class CoreConfig(AppConfig):
     verbose_name = 'Core'
 
     def ready(self):
-        from . import settings_models
+        from . import settings_models, job_models, version_models, event_models, idempotency_models, backup_jobs, versioning, settings_cache
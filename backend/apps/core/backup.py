@@ -0,0 +1,609 @@
+"""
+Backup Engine - Chunked, compressed per-table database backups and restores
+
+Each model is streamed in primary-key order, in chunks, into its own compact
+NDJSON member (one serialized object per line) inside a zip archive. The
+archive manifest records per-table row counts and SHA-256 checksums.
+
+Incremental backups only contain rows whose ``updated_at`` is newer than the
+previous backup's manifest. Tables without ``updated_at`` (e.g. join tables)
+are always written in full. Hard deletes are not captured by incremental
+backups; the application soft-deletes business records.
+
+Restores verify every table against the manifest before touching the
+database, then load tables in dependency order in batches with constraint
+checks deferred until the end.
+"""
+import hashlib
+import io
+import json
+import logging
+import os
+import shutil
+import tempfile
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional
+
+from django.apps import apps
+from django.conf import settings
+from django.core import serializers
+from django.core.management import call_command
+from django.core.management.color import no_style
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, transaction
+from django.dispatch import Signal
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .exceptions import BusinessException
+
+logger = logging.getLogger('apps.core.backup')
+
+
+BACKUP_FORMAT = 'amsbackup'
+BACKUP_FORMAT_VERSION = 2
+
+MANIFEST_NAME = 'manifest.json'
+LEGACY_METADATA_NAME = 'metadata.json'
+LEGACY_DB_NAME = 'db.json'
+TABLES_DIR = 'tables'
+
+# Rows read per query while streaming a table, and inserted per batch on restore
+BACKUP_CHUNK_SIZE = 2000
+
+# Block size used when copying or hashing archive members
+COPY_BUFFER_SIZE = 1024 * 1024
+
+# Threads used to verify table checksums before a restore
+VERIFY_WORKERS = 4
+
+# Tables that are rebuilt by migrate or hold no business data
+EXCLUDED_MODELS = {
+    'admin.logentry',
+    'sessions.session',
+    'contenttypes.contenttype',
+    'auth.permission',
+    'core.backgroundjob',
+}
+
+ProgressCallback = Callable[[str, int], None]
+
+# Sent after a restore commits; rows are loaded without model signals, so
+# in-process caches listen to this to drop what they hold
+backup_restored = Signal()
+
+
+def backups_dir() -> Path:
+    """Folder holding backup archives, created on first use."""
+    path = Path(settings.BASE_DIR) / 'backups'
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def model_label(model) -> str:
+    return model._meta.label_lower
+
+
+def backup_models() -> List:
+    """
+    Concrete, managed models in foreign-key dependency order.
+
+    Referenced tables come before the tables that point to them, so a
+    restore can insert them in this order.
+    """
+    candidates = [
+        m for m in apps.get_models()
+        if m._meta.managed and not m._meta.proxy and model_label(m) not in EXCLUDED_MODELS
+    ]
+    labels = {model_label(m) for m in candidates}
+
+    deps: Dict[str, set] = {}
+    for model in candidates:
+        label = model_label(model)
+        deps[label] = set()
+        for field in model._meta.concrete_fields:
+            if field.is_relation and field.remote_field:
+                target = model_label(field.remote_field.model)
+                if target != label and target in labels:
+                    deps[label].add(target)
+        for field in model._meta.local_many_to_many:
+            target = model_label(field.remote_field.model)
+            if target != label and target in labels:
+                deps[label].add(target)
+
+    by_label = {model_label(m): m for m in candidates}
+    ordered: List = []
+    done: set = set()
+    pending = sorted(by_label)
+    while pending:
+        ready = [label for label in pending if deps[label] <= done]
+        if not ready:
+            # Dependency cycle: take the first remaining table to break it
+            ready = [pending[0]]
+        for label in ready:
+            ordered.append(by_label[label])
+            done.add(label)
+        pending = [label for label in pending if label not in done]
+    return ordered
+
+
+def _has_updated_at(model) -> bool:
+    try:
+        model._meta.get_field('updated_at')
+        return True
+    except Exception:
+        return False
+
+
+def iter_table_chunks(model, since: Optional[datetime] = None,
+                      chunk_size: int = BACKUP_CHUNK_SIZE) -> Iterator[List]:
+    """Yield lists of model instances in primary-key order (keyset pagination)."""
+    queryset = model._base_manager.all()
+    if since is not None and _has_updated_at(model):
+        queryset = queryset.filter(updated_at__gt=since)
+    queryset = queryset.order_by('pk')
+
+    last_pk = None
+    while True:
+        page = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+        chunk = list(page[:chunk_size])
+        if not chunk:
+            return
+        yield chunk
+        last_pk = chunk[-1].pk
+        if len(chunk) < chunk_size:
+            return
+
+
+def read_manifest(archive_path: Path) -> Optional[Dict]:
+    """Return the manifest (or legacy metadata) stored in a backup archive."""
+    try:
+        with zipfile.ZipFile(archive_path, 'r') as zf:
+            names = set(zf.namelist())
+            name = MANIFEST_NAME if MANIFEST_NAME in names else LEGACY_METADATA_NAME
+            if name not in names:
+                return None
+            with zf.open(name) as f:
+                manifest = json.load(f)
+        if (manifest or {}).get('format') != BACKUP_FORMAT:
+            return None
+        return manifest
+    except Exception:
+        return None
+
+
+def latest_manifest(backups_dir: Path) -> Optional[Dict]:
+    """Manifest of the most recent engine backup in ``backups_dir``."""
+    latest = None
+    for path in backups_dir.glob('*.amsbackup'):
+        manifest = read_manifest(path)
+        if not manifest or manifest.get('version', 1) < BACKUP_FORMAT_VERSION:
+            continue
+        if latest is None or manifest['created_at'] > latest['created_at']:
+            latest = dict(manifest, filename=path.name)
+    return latest
+
+
+class BackupEngine:
+    """Writes and restores chunked NDJSON backup archives."""
+
+    @staticmethod
+    def create_backup(
+        backup_path: Path,
+        created_by: Optional[str] = None,
+        include_media: bool = False,
+        incremental: bool = False,
+        progress: Optional[ProgressCallback] = None,
+        chunk_size: int = BACKUP_CHUNK_SIZE,
+    ) -> Dict:
+        """
+        Write a backup archive to ``backup_path`` and return its manifest.
+
+        Args:
+            backup_path: Destination .amsbackup file
+            created_by: Username stored in the manifest
+            include_media: Also archive MEDIA_ROOT
+            incremental: Only rows changed since the latest backup in the same folder
+            progress: Optional callback ``(phase, percent)``
+        """
+        started_at = timezone.now()
+        base = latest_manifest(backup_path.parent) if incremental else None
+        since = parse_datetime(base['created_at']) if base else None
+
+        models = backup_models()
+        tables = []
+
+        with zipfile.ZipFile(backup_path, 'w', compression=zipfile.ZIP_DEFLATED) as zf:
+            for index, model in enumerate(models):
+                label = model_label(model)
+                if progress:
+                    progress(label, int(index * 100 / max(len(models), 1)))
+                tables.append(BackupEngine._write_table(zf, model, since, chunk_size))
+
+            if include_media:
+                media_root = Path(getattr(settings, 'MEDIA_ROOT', ''))
+                if media_root and media_root.exists():
+                    if progress:
+                        progress('media', 99)
+                    for root, _, files in os.walk(media_root):
+                        for file in files:
+                            fp = Path(root) / file
+                            rel = fp.relative_to(media_root)
+                            zf.write(fp, arcname=str(Path('media') / rel))
+
+            manifest = {
+                'format': BACKUP_FORMAT,
+                'version': BACKUP_FORMAT_VERSION,
+                'kind': 'incremental' if base else 'full',
+                'created_at': started_at.isoformat(),
+                'created_by': created_by,
+                'since': since.isoformat() if since else None,
+                'base_backup': base['filename'] if base else None,
+                'database': {
+                    'engine': settings.DATABASES.get('default', {}).get('ENGINE'),
+                    'name': str(settings.DATABASES.get('default', {}).get('NAME')),
+                    'host': settings.DATABASES.get('default', {}).get('HOST'),
+                },
+                'include_media': include_media,
+                'tables': tables,
+            }
+            zf.writestr(MANIFEST_NAME, json.dumps(manifest, ensure_ascii=False, indent=2))
+
+        if progress:
+            progress('done', 100)
+        return manifest
+
+    @staticmethod
+    def _write_table(zf: zipfile.ZipFile, model, since, chunk_size: int) -> Dict:
+        label = model_label(model)
+        member = f'{TABLES_DIR}/{label}.ndjson'
+        digest = hashlib.sha256()
+        rows = 0
+
+        with zf.open(member, 'w', force_zip64=True) as out:
+            for chunk in iter_table_chunks(model, since, chunk_size):
+                objects = serializers.serialize(
+                    'python', chunk,
+                    use_natural_foreign_keys=True,
+                    use_natural_primary_keys=False,
+                )
+                lines = ''.join(
+                    json.dumps(obj, cls=DjangoJSONEncoder, ensure_ascii=False,
+                               separators=(',', ':')) + '\n'
+                    for obj in objects
+                ).encode('utf-8')
+                digest.update(lines)
+                out.write(lines)
+                rows += len(objects)
+
+        return {
+            'model': label,
+            'member': member,
+            'rows': rows,
+            'sha256': digest.hexdigest(),
+        }
+
+    @staticmethod
+    def verify_backup(archive_path: Path, manifest: Dict) -> None:
+        """
+        Check every table member against the manifest row count and checksum.
+
+        Members are verified in parallel; decompression and hashing release
+        the GIL.
+
+        Raises:
+            BusinessException: When a member is missing or does not match
+        """
+        tables = manifest.get('tables') or []
+
+        def check(table):
+            digest = hashlib.sha256()
+            rows = 0
+            try:
+                with zipfile.ZipFile(archive_path, 'r') as zf, zf.open(table['member'], 'r') as raw:
+                    while True:
+                        block = raw.read(COPY_BUFFER_SIZE)
+                        if not block:
+                            break
+                        digest.update(block)
+                        rows += block.count(b'\n')
+            except KeyError:
+                return table['model']
+            if digest.hexdigest() != table['sha256'] or rows != table['rows']:
+                return table['model']
+            return None
+
+        workers = max(1, min(VERIFY_WORKERS, len(tables)))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            corrupted = [label for label in pool.map(check, tables) if label]
+
+        if corrupted:
+            raise BusinessException(
+                f"ملف النسخة الاحتياطية تالف، الجداول التالية لا تطابق البيانات المسجلة: {', '.join(corrupted)}",
+                'BACKUP_CHECKSUM_MISMATCH',
+            )
+
+    @staticmethod
+    def restore_backup(archive_path: Path, manifest: Dict,
+                       progress: Optional[ProgressCallback] = None,
+                       batch_size: int = BACKUP_CHUNK_SIZE) -> Dict[str, int]:
+        """
+        Verify an engine archive and load its tables into the database.
+
+        A full backup replaces the database contents; an incremental backup
+        is applied on top of the current data. Tables are loaded in manifest
+        (dependency) order in batches, with constraint checks deferred until
+        every table is loaded.
+
+        Returns:
+            Rows loaded per model label
+        """
+        tables = manifest.get('tables') or []
+        if progress:
+            progress('verify', 0)
+        BackupEngine.verify_backup(archive_path, manifest)
+
+        models = [apps.get_model(table['model']) for table in tables]
+        resolver = _NaturalKeyResolver()
+        loaded: Dict[str, int] = {}
+
+        with zipfile.ZipFile(archive_path, 'r') as zf, transaction.atomic():
+            with connection.constraint_checks_disabled():
+                job_owners = {}
+                if manifest.get('kind') != 'incremental':
+                    job_owners = _detach_background_jobs()
+                    _clear_backup_tables()
+                for index, (table, model) in enumerate(zip(tables, models)):
+                    if progress:
+                        progress(table['model'], int(index * 100 / max(len(tables), 1)))
+                    with zf.open(table['member'], 'r') as raw:
+                        rows = 0
+                        for batch in _iter_batches(io.TextIOWrapper(raw, encoding='utf-8'), batch_size):
+                            rows += _load_batch(model, [resolver.resolve(model, row) for row in batch])
+                    loaded[table['model']] = rows
+                    logger.info("Restored %s rows into %s", rows, table['model'])
+                _reattach_background_jobs(job_owners)
+
+            connection.check_constraints(table_names=[m._meta.db_table for m in models])
+
+            with connection.cursor() as cursor:
+                for sql in connection.ops.sequence_reset_sql(no_style(), models):
+                    cursor.execute(sql)
+
+        backup_restored.send(sender=BackupEngine)
+        if progress:
+            progress('done', 100)
+        return loaded
+
+
+    @staticmethod
+    def restore_archive(archive_path: Path, restore_media: bool = True,
+                        replace_media: bool = False,
+                        progress: Optional[ProgressCallback] = None) -> Dict:
+        """
+        Restore an uploaded backup archive (engine or legacy ``db.json`` format).
+
+        Members are streamed out of the archive; nothing is read fully into
+        memory except legacy ``db.json`` files, which loaddata requires.
+
+        Returns:
+            Dict with the archive kind and rows loaded per table
+
+        Raises:
+            BusinessException: When the archive is invalid or corrupted
+        """
+        invalid = BusinessException('ملف النسخة الاحتياطية غير صالح', 'INVALID_BACKUP')
+        try:
+            zf = zipfile.ZipFile(archive_path, 'r')
+        except zipfile.BadZipFile:
+            raise invalid
+
+        with zf, tempfile.TemporaryDirectory() as tmp_dir:
+            names = set(zf.namelist())
+            is_legacy = MANIFEST_NAME not in names
+            if is_legacy and (LEGACY_DB_NAME not in names or LEGACY_METADATA_NAME not in names):
+                raise invalid
+            for name in names:
+                if not _is_safe_member(name):
+                    raise invalid
+
+            manifest = read_manifest(archive_path)
+            if manifest is None:
+                raise invalid
+
+            if is_legacy:
+                if progress:
+                    progress(LEGACY_DB_NAME, 0)
+                db_json_path = Path(tmp_dir) / LEGACY_DB_NAME
+                with zf.open(LEGACY_DB_NAME, 'r') as src, open(db_json_path, 'wb') as out:
+                    shutil.copyfileobj(src, out, COPY_BUFFER_SIZE)
+                call_command('flush', '--noinput')
+                call_command('loaddata', str(db_json_path))
+                backup_restored.send(sender=BackupEngine)
+                loaded = {}
+            else:
+                loaded = BackupEngine.restore_backup(archive_path, manifest, progress=progress)
+
+            call_command('migrate', '--noinput')
+
+            if restore_media:
+                if progress:
+                    progress('media', 99)
+                _restore_media(zf, replace_media)
+
+        if progress:
+            progress('done', 100)
+        return {'kind': manifest.get('kind', 'full'), 'tables': loaded}
+
+
+def _clear_backup_tables() -> None:
+    """
+    Empty every backed-up table, like flush but limited to backup models.
+
+    Tables outside the backup (content types, sessions, background jobs)
+    keep their rows, and the deletion is part of the restore transaction.
+    """
+    tables = []
+    for model in backup_models():
+        tables.append(model._meta.db_table)
+        tables.extend(
+            f.remote_field.through._meta.db_table
+            for f in model._meta.local_many_to_many
+            if f.remote_field.through._meta.auto_created
+        )
+    sql_list = connection.ops.sql_flush(no_style(), tables, reset_sequences=True)
+    connection.ops.execute_sql_flush(sql_list)
+
+
+def _detach_background_jobs() -> Dict[int, List[int]]:
+    """
+    Clear the creator of every background job before the user table is
+    flushed. The flush is raw SQL, so SET_NULL never runs and the jobs
+    (which are not in the backup) would point at users that may be gone.
+
+    Returns:
+        {user_id: [job ids]} for _reattach_background_jobs
+    """
+    jobs = apps.get_model('core', 'BackgroundJob')._base_manager.filter(created_by__isnull=False)
+    owners: Dict[int, List[int]] = {}
+    for job_id, user_id in jobs.values_list('id', 'created_by_id'):
+        owners.setdefault(user_id, []).append(job_id)
+    if owners:
+        jobs.update(created_by=None)
+    return owners
+
+
+def _reattach_background_jobs(owners: Dict[int, List[int]]) -> None:
+    """Give jobs back their creator where the restored data has that user."""
+    if not owners:
+        return
+    BackgroundJob = apps.get_model('core', 'BackgroundJob')
+    User = apps.get_model(settings.AUTH_USER_MODEL)
+    for user_id in User._base_manager.filter(pk__in=list(owners)).values_list('pk', flat=True):
+        BackgroundJob._base_manager.filter(pk__in=owners[user_id]).update(created_by_id=user_id)
+
+
+def _is_safe_member(name: str) -> bool:
+    path = Path(name)
+    return not path.is_absolute() and '..' not in path.parts and ':' not in name
+
+
+def _restore_media(zf: zipfile.ZipFile, replace_media: bool) -> None:
+    media_root = Path(getattr(settings, 'MEDIA_ROOT', ''))
+    members = [m for m in zf.infolist() if m.filename.startswith('media/') and not m.is_dir()]
+    if not media_root or not members:
+        return
+    media_root.mkdir(parents=True, exist_ok=True)
+
+    if replace_media:
+        for root, dirs, files in os.walk(media_root):
+            for file in files:
+                try:
+                    (Path(root) / file).unlink()
+                except Exception:
+                    pass
+            for d in dirs:
+                try:
+                    (Path(root) / d).rmdir()
+                except Exception:
+                    pass
+
+    for member in members:
+        dst = media_root / Path(member.filename).relative_to('media')
+        dst.parent.mkdir(parents=True, exist_ok=True)
+        with zf.open(member, 'r') as src, open(dst, 'wb') as out:
+            shutil.copyfileobj(src, out, COPY_BUFFER_SIZE)
+
+
+def _iter_batches(lines, batch_size: int) -> Iterator[List[Dict]]:
+    batch = []
+    for line in lines:
+        if not line.strip():
+            continue
+        batch.append(json.loads(line))
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _load_batch(model, rows: List[Dict]) -> int:
+    """
+    Insert new rows in bulk and save rows that already exist.
+
+    Rows are inserted raw, like loaddata, so ``auto_now`` timestamps keep
+    their backed-up values.
+    """
+    deserialized = list(serializers.deserialize('python', rows, ignorenonexistent=True))
+    pks = [obj.object.pk for obj in deserialized]
+    existing = set(
+        model._base_manager.filter(pk__in=pks).values_list('pk', flat=True)
+    ) if pks else set()
+
+    new = [obj for obj in deserialized if obj.object.pk not in existing]
+    if new:
+        fields = [f for f in model._meta.local_concrete_fields]
+        instances = [obj.object for obj in new]
+        size = connection.ops.bulk_batch_size(fields, instances) or len(instances)
+        for start in range(0, len(instances), size):
+            model._base_manager._insert(instances[start:start + size], fields=fields, raw=True)
+        _insert_m2m(model, new)
+
+    for obj in deserialized:
+        if obj.object.pk in existing:
+            obj.save()
+    return len(deserialized)
+
+
+def _insert_m2m(model, objects) -> None:
+    for field in model._meta.local_many_to_many:
+        through = field.remote_field.through
+        if not through._meta.auto_created:
+            continue
+        source = field.m2m_field_name()
+        target = field.m2m_reverse_field_name()
+        links = [
+            through(**{f'{source}_id': obj.object.pk, f'{target}_id': related})
+            for obj in objects
+            for related in (obj.m2m_data or {}).get(field.name, [])
+        ]
+        if links:
+            through._base_manager.bulk_create(links, batch_size=BACKUP_CHUNK_SIZE)
+
+
+class _NaturalKeyResolver:
+    """
+    Replaces natural-key references with primary keys before deserializing.
+
+    Lookups are cached, so rows pointing at the same user or content type
+    cost one query in total instead of one per row.
+    """
+
+    def __init__(self):
+        self._cache: Dict = {}
+
+    def resolve(self, model, row: Dict) -> Dict:
+        fields = row.get('fields') or {}
+        for field in model._meta.get_fields():
+            if not field.concrete or not field.is_relation or field.name not in fields:
+                continue
+            value = fields[field.name]
+            related = field.remote_field.model
+            if field.many_to_many:
+                fields[field.name] = [self._lookup(related, v) for v in value or []]
+            elif isinstance(value, list):
+                fields[field.name] = self._lookup(related, value, field.remote_field.field_name)
+        return row
+
+    def _lookup(self, model, value, to_field: str = None):
+        if not isinstance(value, list):
+            return value
+        key = (model._meta.label_lower, to_field, tuple(value))
+        if key not in self._cache:
+            instance = model._default_manager.get_by_natural_key(*value)
+            self._cache[key] = getattr(instance, to_field) if to_field else instance.pk
+        return self._cache[key]
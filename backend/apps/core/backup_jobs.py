@@ -0,0 +1,92 @@
+"""
+Backup Jobs - Backup and restore handlers for the background job runner
+"""
+from datetime import datetime
+from pathlib import Path
+from typing import Dict
+
+from .backup import BackupEngine, backups_dir
+from .jobs import JobContext, register_job
+
+# Uploaded archives waiting for a restore job
+UPLOADS_DIR_NAME = 'uploads'
+
+
+def uploads_dir() -> Path:
+    path = backups_dir() / UPLOADS_DIR_NAME
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def backup_file_info(path: Path) -> Dict:
+    st = path.stat()
+    return {
+        'filename': path.name,
+        'size': st.st_size,
+        'created_at': datetime.fromtimestamp(st.st_mtime).isoformat(),
+        'download_url': f"/api/v1/core/backups/{path.name}/download/",
+    }
+
+
+@register_job('backup', exclusive=True)
+def run_backup(context: JobContext) -> Dict:
+    """
+    Params:
+        include_media: Also archive MEDIA_ROOT
+        incremental: Only rows changed since the previous backup
+        created_by: Username stored in the manifest
+    """
+    params = context.params
+    ts = datetime.now().strftime('%Y%m%d_%H%M%S')
+    backup_path = backups_dir() / f"ams_backup_{ts}_{context.job.pk}.amsbackup"
+
+    try:
+        manifest = BackupEngine.create_backup(
+            backup_path,
+            created_by=params.get('created_by'),
+            include_media=bool(params.get('include_media', False)),
+            incremental=bool(params.get('incremental', False)),
+            progress=context.progress,
+        )
+    except BaseException:
+        if backup_path.exists():
+            try:
+                backup_path.unlink()
+            except Exception:
+                pass
+        raise
+
+    context.set_artifact(backup_path.name)
+    return {
+        **backup_file_info(backup_path),
+        'kind': manifest['kind'],
+        'tables': len(manifest['tables']),
+        'rows': sum(t['rows'] for t in manifest['tables']),
+    }
+
+
+@register_job('restore', exclusive=True)
+def run_restore(context: JobContext) -> Dict:
+    """
+    Params:
+        upload: File name of the uploaded archive in the uploads folder
+        restore_media: Copy media files from the archive
+        replace_media: Remove existing media files first
+    """
+    params = context.params
+    upload_path = uploads_dir() / Path(params['upload']).name
+    try:
+        result = BackupEngine.restore_archive(
+            upload_path,
+            restore_media=bool(params.get('restore_media', True)),
+            replace_media=bool(params.get('replace_media', False)),
+            progress=context.progress,
+        )
+    finally:
+        if upload_path.exists():
+            try:
+                upload_path.unlink()
+            except Exception:
+                pass
+
+    return {'status': 'restored', 'kind': result['kind'], 'tables': result['tables']}
@@ -1,12 +1,7 @@
-import os
-import json
-import zipfile
-import tempfile
+import uuid
 from pathlib import Path
 from datetime import datetime
 
-from django.conf import settings
-from django.core.management import call_command
 from django.http import FileResponse
 
 from rest_framework import status, permissions, viewsets
@@ -14,6 +9,11 @@ from rest_framework.decorators import action
 from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
 from rest_framework.response import Response
 
+from .backup import backups_dir
+from .backup_jobs import uploads_dir
+from .job_serializers import BackgroundJobSerializer
+from .jobs import JobRunner
+
 
 class BackupViewSet(viewsets.ViewSet):
     lookup_value_regex = r'[^/]+'
@@ -25,9 +25,7 @@ class BackupViewSet(viewsets.ViewSet):
         return [permissions.IsAuthenticated()]
 
     def _backups_dir(self) -> Path:
-        backups_dir = Path(settings.BASE_DIR) / 'backups'
-        backups_dir.mkdir(parents=True, exist_ok=True)
-        return backups_dir
+        return backups_dir()
 
     def _safe_backup_path(self, filename: str) -> Path:
         backups_dir = self._backups_dir().resolve()
@@ -59,82 +57,13 @@ class BackupViewSet(viewsets.ViewSet):
         return Response({'results': items})
 
     def create(self, request):
-        include_media = bool(request.data.get('include_media', False))
-        created_by = getattr(request.user, 'username', None)
-
-        ts = datetime.now().strftime('%Y%m%d_%H%M%S')
-        filename = f"ams_backup_{ts}.amsbackup"
-        backup_path = self._backups_dir() / filename
-
-        try:
-            with tempfile.TemporaryDirectory() as tmp_dir:
-                tmp_dir_path = Path(tmp_dir)
-                db_json_path = tmp_dir_path / 'db.json'
-                meta_path = tmp_dir_path / 'metadata.json'
-
-                with open(db_json_path, 'w', encoding='utf-8') as f:
-                    call_command(
-                        'dumpdata',
-                        '--natural-foreign',
-                        '--natural-primary',
-                        '--indent',
-                        '2',
-                        '--exclude',
-                        'admin.logentry',
-                        '--exclude',
-                        'sessions.session',
-                        stdout=f,
-                    )
-
-                metadata = {
-                    'format': 'amsbackup',
-                    'created_at': datetime.now().isoformat(),
-                    'created_by': created_by,
-                    'database': {
-                        'engine': settings.DATABASES.get('default', {}).get('ENGINE'),
-                        'name': settings.DATABASES.get('default', {}).get('NAME'),
-                        'host': settings.DATABASES.get('default', {}).get('HOST'),
-                    },
-                    'include_media': include_media,
-                }
-
-                with open(meta_path, 'w', encoding='utf-8') as f:
-                    json.dump(metadata, f, ensure_ascii=False, indent=2)
-
-                with zipfile.ZipFile(backup_path, 'w', compression=zipfile.ZIP_DEFLATED) as zf:
-                    zf.write(meta_path, arcname='metadata.json')
-                    zf.write(db_json_path, arcname='db.json')
-
-                    if include_media:
-                        media_root = Path(getattr(settings, 'MEDIA_ROOT', ''))
-                        if media_root and media_root.exists():
-                            for root, _, files in os.walk(media_root):
-                                for file in files:
-                                    fp = Path(root) / file
-                                    rel = fp.relative_to(media_root)
-                                    zf.write(fp, arcname=str(Path('media') / rel))
-
-            st = backup_path.stat()
-            return Response(
-                {
-                    'filename': filename,
-                    'size': st.st_size,
-                    'created_at': datetime.fromtimestamp(st.st_mtime).isoformat(),
-                    'download_url': f"/api/v1/core/backups/{filename}/download/",
-                },
-                status=status.HTTP_201_CREATED,
-            )
-
-        except Exception as e:
-            if backup_path.exists():
-                try:
-                    backup_path.unlink()
-                except Exception:
-                    pass
-            return Response(
-                {'detail': 'فشل إنشاء النسخة الاحتياطية', 'code': 'BACKUP_CREATE_FAILED', 'error': str(e)},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            )
+        params = {
+            'include_media': bool(request.data.get('include_media', False)),
+            'incremental': str(request.data.get('incremental', 'false')).lower() == 'true',
+            'created_by': getattr(request.user, 'username', None),
+        }
+        job = JobRunner.submit('backup', params, user=request.user)
+        return Response(BackgroundJobSerializer(job).data, status=status.HTTP_202_ACCEPTED)
 
     @action(detail=True, methods=['get'], url_path='download')
     def download(self, request, pk=None):
@@ -169,92 +98,25 @@ class BackupViewSet(viewsets.ViewSet):
         restore_media = str(request.data.get('restore_media', 'true')).lower() == 'true'
         replace_media = str(request.data.get('replace_media', 'false')).lower() == 'true'
 
+        upload_name = f"{uuid.uuid4().hex}.amsbackup"
         try:
-            with tempfile.TemporaryDirectory() as tmp_dir:
-                tmp_dir_path = Path(tmp_dir)
-                uploaded_path = tmp_dir_path / Path(uploaded.name).name
-                with open(uploaded_path, 'wb') as f:
-                    for chunk in uploaded.chunks():
-                        f.write(chunk)
-
-                with zipfile.ZipFile(uploaded_path, 'r') as zf:
-                    names = set(zf.namelist())
-                    if 'db.json' not in names or 'metadata.json' not in names:
-                        return Response(
-                            {'detail': 'ملف النسخة الاحتياطية غير صالح', 'code': 'INVALID_BACKUP'},
-                            status=400,
-                        )
-
-                    for member in zf.infolist():
-                        member_name = member.filename
-                        if member_name.endswith('/'):
-                            continue
-                        dest = (tmp_dir_path / member_name).resolve()
-                        if tmp_dir_path.resolve() not in dest.parents and dest != tmp_dir_path.resolve():
-                            return Response(
-                                {'detail': 'ملف النسخة الاحتياطية غير صالح', 'code': 'INVALID_BACKUP'},
-                                status=400,
-                            )
-                        dest.parent.mkdir(parents=True, exist_ok=True)
-                        with zf.open(member, 'r') as src, open(dest, 'wb') as out:
-                            out.write(src.read())
-
-                meta_path = tmp_dir_path / 'metadata.json'
-                try:
-                    with open(meta_path, 'r', encoding='utf-8') as f:
-                        meta = json.load(f)
-                    if (meta or {}).get('format') != 'amsbackup':
-                        return Response(
-                            {'detail': 'ملف النسخة الاحتياطية غير صالح', 'code': 'INVALID_BACKUP'},
-                            status=400,
-                        )
-                except Exception:
-                    return Response(
-                        {'detail': 'ملف النسخة الاحتياطية غير صالح', 'code': 'INVALID_BACKUP'},
-                        status=400,
-                    )
-
-                db_json_path = tmp_dir_path / 'db.json'
-
-                call_command('flush', '--noinput')
-                call_command('loaddata', str(db_json_path))
-                call_command('migrate', '--noinput')
-
-                if restore_media:
-                    media_root = Path(getattr(settings, 'MEDIA_ROOT', ''))
-                    extracted_media = tmp_dir_path / 'media'
-                    if media_root and extracted_media.exists():
-                        media_root.mkdir(parents=True, exist_ok=True)
-
-                        if replace_media:
-                            for root, dirs, files in os.walk(media_root):
-                                for file in files:
-                                    try:
-                                        (Path(root) / file).unlink()
-                                    except Exception:
-                                        pass
-                                for d in dirs:
-                                    try:
-                                        (Path(root) / d).rmdir()
-                                    except Exception:
-                                        pass
-
-                        for root, _, files in os.walk(extracted_media):
-                            for file in files:
-                                src = Path(root) / file
-                                rel = src.relative_to(extracted_media)
-                                dst = media_root / rel
-                                dst.parent.mkdir(parents=True, exist_ok=True)
-                                dst.write_bytes(src.read_bytes())
-
-            return Response({'status': 'restored'})
-
+            with open(uploads_dir() / upload_name, 'wb') as f:
+                for chunk in uploaded.chunks():
+                    f.write(chunk)
         except Exception as e:
             return Response(
                 {'detail': 'فشل استعادة النسخة الاحتياطية', 'code': 'RESTORE_FAILED', 'error': str(e)},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR,
             )
 
+        params = {
+            'upload': upload_name,
+            'restore_media': restore_media,
+            'replace_media': replace_media,
+        }
+        job = JobRunner.submit('restore', params, user=request.user)
+        return Response(BackgroundJobSerializer(job).data, status=status.HTTP_202_ACCEPTED)
+
     def destroy(self, request, pk=None):
         try:
             backup_path = self._safe_backup_path(pk)
@@ -0,0 +1,449 @@
+"""
+Service Benchmarks - Timing and query counts for service entry points
+
+Each benchmark wraps one ReportService, SalesService, InventoryService or
+PurchaseService call against the current database (normally one filled by
+``generate_benchmark_data``). Calls that write run inside a transaction that
+is rolled back, so the data is the same for every repetition and every run.
+
+``run_benchmarks`` returns a JSON-serialisable dict; ``compare`` marks the
+entries that got slower or issue more queries than a previous result.
+"""
+import statistics
+import time
+from dataclasses import dataclass
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.db.models import Count, Max
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from apps.core.utils import get_daily_fx
+from apps.inventory.models import Product, StockMovement, Warehouse
+from apps.inventory.services import InventoryService
+from apps.purchases.models import PurchaseOrder, PurchaseOrderItem, Supplier
+from apps.purchases.services import PurchaseService
+from apps.reports.services import ReportService
+from apps.sales.models import Customer, Invoice
+from apps.sales.services import SalesService
+
+# Repetitions per benchmark
+BENCHMARK_REPEAT = 5
+
+# Days covered by report benchmarks, ending at the latest invoice date
+BENCHMARK_PERIOD_DAYS = 90
+
+# A result this many percent slower than the baseline is a regression
+REGRESSION_THRESHOLD = 25
+
+
+@dataclass
+class BenchmarkContext:
+    """Sample records the benchmarks run against."""
+
+    start_date: date
+    end_date: date
+    warehouse_id: int
+    product_id: int
+    customer_id: int
+    supplier_id: int
+    invoice_id: Optional[int]
+    user: Any
+
+
+@dataclass
+class Benchmark:
+    name: str
+    group: str
+    prepare: Callable[[BenchmarkContext], Callable[[], Any]]
+    writes: bool = False
+
+
+BENCHMARKS: List[Benchmark] = []
+
+
+def benchmark(group: str, name: str, writes: bool = False):
+    """
+    Register a benchmark. The decorated function receives the context,
+    does any setup (not timed) and returns the zero-argument call to time.
+    """
+    def decorator(prepare):
+        BENCHMARKS.append(Benchmark(f'{group}.{name}', group, prepare, writes))
+        return prepare
+    return decorator
+
+
+class _Rollback(Exception):
+    pass
+
+
+def build_context(period_days: int = BENCHMARK_PERIOD_DAYS) -> BenchmarkContext:
+    """Pick the busiest records so the benchmarks see realistic volumes."""
+    end_date = Invoice.objects.aggregate(latest=Max('invoice_date'))['latest'] or timezone.localdate()
+
+    def busiest(model, relation, **filters):
+        row = (model.objects.filter(is_deleted=False, **filters)
+               .annotate(n=Count(relation)).order_by('-n', 'id').values_list('id', flat=True).first())
+        if row is None:
+            raise ValueError(f'No {model.__name__} rows; run generate_benchmark_data first')
+        return row
+
+    return BenchmarkContext(
+        start_date=end_date - timedelta(days=period_days - 1),
+        end_date=end_date,
+        warehouse_id=busiest(Warehouse, 'invoices'),
+        product_id=busiest(Product, 'invoice_items', is_active=True),
+        customer_id=busiest(Customer, 'invoices'),
+        supplier_id=busiest(Supplier, 'purchase_orders'),
+        invoice_id=Invoice.objects.filter(
+            status__in=[Invoice.Status.CONFIRMED, Invoice.Status.PARTIAL, Invoice.Status.PAID]
+        ).order_by('-invoice_date', '-id').values_list('id', flat=True).first(),
+        user=get_user_model().objects.filter(is_superuser=True).order_by('id').first(),
+    )
+
+
+def _run(bench: Benchmark, context: BenchmarkContext, repeat: int) -> Dict[str, Any]:
+    timings, queries = [], []
+    for _ in range(repeat):
+        try:
+            with transaction.atomic():
+                call = bench.prepare(context)
+                with CaptureQueriesContext(connection) as captured:
+                    started = time.perf_counter()
+                    call()
+                    timings.append((time.perf_counter() - started) * 1000)
+                queries.append(len(captured))
+                if bench.writes:
+                    raise _Rollback
+        except _Rollback:
+            pass
+        except Exception as e:
+            return {'name': bench.name, 'group': bench.group, 'error': f'{type(e).__name__}: {e}'}
+
+    return {
+        'name': bench.name,
+        'group': bench.group,
+        'runs': repeat,
+        'first_ms': round(timings[0], 3),
+        'median_ms': round(statistics.median(timings), 3),
+        'min_ms': round(min(timings), 3),
+        'max_ms': round(max(timings), 3),
+        'queries': queries[-1],
+        'queries_first': queries[0],
+    }
+
+
+def run_benchmarks(
+    repeat: int = BENCHMARK_REPEAT,
+    only: Optional[Iterable[str]] = None,
+    period_days: int = BENCHMARK_PERIOD_DAYS,
+    log: Callable[[str], None] = None,
+) -> Dict[str, Any]:
+    """
+    Run the registered benchmarks.
+
+    Args:
+        repeat: Repetitions per benchmark
+        only: Substrings; run only benchmarks whose name contains one of them
+        period_days: Length of the report period
+        log: Progress callback
+
+    Returns:
+        Dict with the environment, the sample context and one result per benchmark
+    """
+    context = build_context(period_days)
+    only = list(only or [])
+    results = []
+    for bench in BENCHMARKS:
+        if only and not any(part in bench.name for part in only):
+            continue
+        result = _run(bench, context, max(1, repeat))
+        if log:
+            log(f"{bench.name}: " + (result['error'] if 'error' in result else
+                                     f"{result['median_ms']} ms, {result['queries']} queries"))
+        results.append(result)
+
+    return {
+        'generated_at': timezone.now().isoformat(),
+        'database': connection.vendor,
+        'repeat': repeat,
+        'context': {
+            'start_date': context.start_date.isoformat(),
+            'end_date': context.end_date.isoformat(),
+            'invoices': Invoice.objects.count(),
+            'products': Product.objects.count(),
+            'stock_movements': StockMovement.objects.count(),
+        },
+        'results': results,
+    }
+
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any],
+            threshold: float = REGRESSION_THRESHOLD) -> List[str]:
+    """
+    Annotate ``report`` results with the baseline figures.
+
+    Returns:
+        Names of benchmarks slower than ``threshold`` percent or issuing more queries
+    """
+    previous = {result['name']: result for result in baseline.get('results', []) if 'error' not in result}
+    regressions = []
+    for result in report['results']:
+        before = previous.get(result['name'])
+        if before is None or 'error' in result:
+            continue
+        change = (result['median_ms'] - before['median_ms']) / before['median_ms'] * 100 if before['median_ms'] else 0
+        result['baseline_median_ms'] = before['median_ms']
+        result['baseline_queries'] = before['queries']
+        result['change_pct'] = round(change, 1)
+        result['regression'] = change > threshold or result['queries'] > before['queries']
+        if result['regression']:
+            regressions.append(result['name'])
+    report['regressions'] = regressions
+    return regressions
+
+
+# Reports
+
+@benchmark('reports', 'dashboard_summary')
+def _dashboard(ctx):
+    return lambda: ReportService.get_dashboard_summary(ctx.start_date, ctx.end_date)
+
+
+@benchmark('reports', 'sales_report')
+def _sales_report(ctx):
+    return lambda: ReportService.get_sales_report(ctx.start_date, ctx.end_date, 'day')
+
+
+@benchmark('reports', 'profit_report')
+def _profit_report(ctx):
+    return lambda: ReportService.get_profit_report(ctx.start_date, ctx.end_date)
+
+
+@benchmark('reports', 'inventory_report')
+def _inventory_report(ctx):
+    return lambda: ReportService.get_inventory_report()
+
+
+@benchmark('reports', 'inventory_report_as_of')
+def _inventory_report_as_of(ctx):
+    return lambda: ReportService.get_inventory_report(as_of=ctx.start_date)
+
+
+@benchmark('reports', 'customer_report')
+def _customer_report(ctx):
+    return lambda: ReportService.get_customer_report(ctx.start_date, ctx.end_date)
+
+
+@benchmark('reports', 'customer_statement')
+def _report_customer_statement(ctx):
+    return lambda: ReportService.get_customer_statement(ctx.customer_id, ctx.start_date, ctx.end_date)
+
+
+@benchmark('reports', 'receivables_report')
+def _receivables(ctx):
+    return lambda: ReportService.get_receivables_report()
+
+
+@benchmark('reports', 'aging_report')
+def _aging(ctx):
+    return lambda: ReportService.get_aging_report(ctx.end_date)
+
+
+@benchmark('reports', 'suppliers_report')
+def _suppliers_report(ctx):
+    return lambda: ReportService.get_suppliers_report(ctx.start_date, ctx.end_date)
+
+
+@benchmark('reports', 'expenses_report')
+def _expenses_report(ctx):
+    return lambda: ReportService.get_expenses_report(ctx.start_date, ctx.end_date)
+
+
+# Sales
+
+def _sale_items(ctx, count: int = 3) -> List[Dict[str, Any]]:
+    product_ids = list(Product.objects.filter(
+        is_active=True, is_deleted=False,
+        stock_levels__warehouse_id=ctx.warehouse_id, stock_levels__quantity__gte=10
+    ).order_by('id').values_list('id', flat=True)[:count])
+    return [{'product_id': product_id, 'quantity': Decimal('1')} for product_id in product_ids]
+
+
+def _draft_invoice(ctx) -> Invoice:
+    return SalesService.create_invoice(
+        customer_id=ctx.customer_id, warehouse_id=ctx.warehouse_id,
+        invoice_date=ctx.end_date, items=_sale_items(ctx), invoice_type='credit',
+        user=ctx.user, override_credit_limit=True, override_reason='benchmark',
+    )
+
+
+@benchmark('sales', 'create_invoice', writes=True)
+def _create_invoice(ctx):
+    items = _sale_items(ctx)
+    return lambda: SalesService.create_invoice(
+        customer_id=ctx.customer_id, warehouse_id=ctx.warehouse_id,
+        invoice_date=ctx.end_date, items=items, invoice_type='credit',
+        user=ctx.user, override_credit_limit=True, override_reason='benchmark',
+    )
+
+
+@benchmark('sales', 'confirm_invoice', writes=True)
+def _confirm_invoice(ctx):
+    invoice = _draft_invoice(ctx)
+    return lambda: SalesService.confirm_invoice(invoice.id, user=ctx.user)
+
+
+@benchmark('sales', 'receive_payment', writes=True)
+def _receive_payment(ctx):
+    invoice = SalesService.confirm_invoice(_draft_invoice(ctx).id, user=ctx.user)
+    return lambda: SalesService.receive_payment(
+        customer_id=ctx.customer_id, payment_date=ctx.end_date,
+        amount=invoice.total_amount, payment_method='cash', auto_allocate=True, user=ctx.user,
+    )
+
+
+@benchmark('sales', 'create_sales_return', writes=True)
+def _create_sales_return(ctx):
+    invoice = SalesService.confirm_invoice(_draft_invoice(ctx).id, user=ctx.user)
+    items = [{'invoice_item_id': item.id, 'quantity': Decimal('1')} for item in invoice.items.all()]
+    return lambda: SalesService.create_sales_return(
+        invoice.id, ctx.end_date, items, reason='benchmark', user=ctx.user
+    )
+
+
+@benchmark('sales', 'cancel_invoice', writes=True)
+def _cancel_invoice(ctx):
+    invoice = SalesService.confirm_invoice(_draft_invoice(ctx).id, user=ctx.user)
+    return lambda: SalesService.cancel_invoice(invoice.id, reason='benchmark', user=ctx.user)
+
+
+@benchmark('sales', 'customer_statement')
+def _customer_statement(ctx):
+    return lambda: SalesService.get_customer_statement(ctx.customer_id, ctx.start_date, ctx.end_date)
+
+
+@benchmark('sales', 'invoice_profit')
+def _invoice_profit(ctx):
+    return lambda: SalesService.get_invoice_profit(ctx.invoice_id)
+
+
+# Inventory
+
+@benchmark('inventory', 'product_by_barcode')
+def _product_by_barcode(ctx):
+    barcode = Product.objects.filter(pk=ctx.product_id).values_list('barcode', flat=True).first()
+    return lambda: InventoryService.get_product_by_barcode(barcode or '')
+
+
+@benchmark('inventory', 'product_stock')
+def _product_stock(ctx):
+    return lambda: InventoryService.get_product_stock(ctx.product_id)
+
+
+@benchmark('inventory', 'low_stock_products')
+def _low_stock(ctx):
+    return lambda: InventoryService.get_low_stock_products()
+
+
+@benchmark('inventory', 'stock_valuation_average')
+def _valuation_average(ctx):
+    return lambda: InventoryService.get_stock_valuation(method='average')
+
+
+@benchmark('inventory', 'stock_valuation_fifo')
+def _valuation_fifo(ctx):
+    return lambda: InventoryService.get_stock_valuation(method='fifo')
+
+
+@benchmark('inventory', 'add_stock', writes=True)
+def _add_stock(ctx):
+    return lambda: InventoryService.add_stock(
+        ctx.product_id, ctx.warehouse_id, Decimal('5'), Decimal('100'),
+        StockMovement.SourceType.ADJUSTMENT, user=ctx.user,
+    )
+
+
+@benchmark('inventory', 'deduct_stock', writes=True)
+def _deduct_stock(ctx):
+    return lambda: InventoryService.deduct_stock(
+        ctx.product_id, ctx.warehouse_id, Decimal('1'), StockMovement.SourceType.ADJUSTMENT, user=ctx.user,
+    )
+
+
+@benchmark('inventory', 'adjust_stock', writes=True)
+def _adjust_stock(ctx):
+    return lambda: InventoryService.adjust_stock(
+        ctx.product_id, ctx.warehouse_id, Decimal('3'), 'add', 'benchmark', user=ctx.user,
+    )
+
+
+# Purchases
+
+def _purchase_items(ctx, count: int = 5) -> List[Dict[str, Any]]:
+    product_ids = Product.objects.filter(
+        is_active=True, is_deleted=False
+    ).order_by('id').values_list('id', flat=True)[:count]
+    return [
+        {'product_id': product_id, 'quantity': Decimal('10'), 'unit_price': Decimal('2.50')}
+        for product_id in product_ids
+    ]
+
+
+def _new_order(ctx, items, rates) -> PurchaseOrder:
+    usd_to_syp_old, usd_to_syp_new = rates
+    return PurchaseService.create_purchase_order(
+        supplier_id=ctx.supplier_id, warehouse_id=ctx.warehouse_id,
+        order_date=ctx.end_date, items=items, user=ctx.user,
+        usd_to_syp_old_snapshot=usd_to_syp_old, usd_to_syp_new_snapshot=usd_to_syp_new,
+    )
+
+
+def _approved_order(ctx) -> PurchaseOrder:
+    order = _new_order(ctx, _purchase_items(ctx), get_daily_fx(ctx.end_date))
+    return PurchaseService.approve_purchase_order(order.id, user=ctx.user)
+
+
+@benchmark('purchases', 'create_purchase_order', writes=True)
+def _create_purchase_order(ctx):
+    items, rates = _purchase_items(ctx), get_daily_fx(ctx.end_date)
+    return lambda: _new_order(ctx, items, rates)
+
+
+@benchmark('purchases', 'receive_goods', writes=True)
+def _receive_goods(ctx):
+    order = _approved_order(ctx)
+    items = [
+        {'po_item_id': item_id, 'quantity': quantity}
+        for item_id, quantity in PurchaseOrderItem.objects.filter(
+            purchase_order=order
+        ).values_list('id', 'quantity')
+    ]
+    return lambda: PurchaseService.receive_goods(order.id, ctx.end_date, items, user=ctx.user)
+
+
+@benchmark('purchases', 'supplier_payment', writes=True)
+def _supplier_payment(ctx):
+    return lambda: PurchaseService.make_supplier_payment(
+        supplier_id=ctx.supplier_id, payment_date=ctx.end_date,
+        amount=Decimal('10.00'), payment_method='cash', user=ctx.user,
+    )
+
+
+@benchmark('purchases', 'supplier_statement')
+def _supplier_statement(ctx):
+    return lambda: PurchaseService.get_supplier_statement(ctx.supplier_id, ctx.start_date, ctx.end_date)
+
+
+@benchmark('purchases', 'reorder_suggestions')
+def _reorder_suggestions(ctx):
+    return lambda: PurchaseService.get_reorder_suggestions(include_all=True)
+
+
+@benchmark('purchases', 'draft_reorder_purchase_orders', writes=True)
+def _draft_reorder(ctx):
+    return lambda: PurchaseService.draft_reorder_purchase_orders(ctx.warehouse_id, user=ctx.user)
@@ -0,0 +1,574 @@
+"""
+Benchmark Data Generator - Production-scale synthetic data
+
+Creates a catalog (categories, multi-unit products, warehouses), customers
+and suppliers, then replays a configurable number of days of trading:
+purchase orders with goods received notes, cash and credit invoices,
+payments with allocations, sales returns, expenses, the stock movements
+they cause and a daily exchange rate. Every table is written with
+``bulk_create``; one day's rows are inserted together.
+
+The output depends only on the options and the random seed, so two runs
+against empty databases produce the same rows. Codes carry a prefix so the
+data can live next to real records.
+"""
+import random
+from contextlib import contextmanager
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Callable, Dict, List, Optional
+
+from django.db import transaction
+from django.utils import timezone
+
+from apps.core.settings_models import DailyExchangeRate
+from apps.core.utils import to_usd
+from apps.expenses.models import Expense, ExpenseCategory
+from apps.inventory.models import (
+    Category, Product, ProductUnit, Stock, StockMovement, Unit, Warehouse
+)
+from apps.purchases.models import (
+    GoodsReceivedNote, GRNItem, PurchaseOrder, PurchaseOrderItem, Supplier, SupplierPayment
+)
+from apps.sales.models import (
+    Customer, Invoice, InvoiceItem, Payment, PaymentAllocation, SalesReturn, SalesReturnItem
+)
+
+# Rows per INSERT statement
+BENCHMARK_BATCH_SIZE = 2000
+
+# Opening quantity per product and warehouse, in base units
+OPENING_STOCK = Decimal('10000')
+
+# Units every product can be sold in: (name, symbol, conversion factor, share of products)
+BENCHMARK_UNITS = (
+    ('قطعة', 'قطعة', Decimal('1'), 1.0),
+    ('علبة', 'علبة', Decimal('12'), 0.5),
+    ('كرتون', 'كرتون', Decimal('48'), 0.25),
+)
+
+CENT = Decimal('0.01')
+
+# Models whose timestamps are set from the simulated day
+TIMESTAMPED_MODELS = (
+    PurchaseOrder, PurchaseOrderItem, GoodsReceivedNote, GRNItem, SupplierPayment,
+    Invoice, InvoiceItem, Payment, PaymentAllocation, SalesReturn, SalesReturnItem,
+    Expense, StockMovement,
+)
+
+
+def _money(value) -> Decimal:
+    return Decimal(value).quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+@contextmanager
+def _manual_timestamps(models):
+    """Let bulk_create keep the created_at/updated_at values set on the rows."""
+    saved = []
+    for model in models:
+        for name in ('created_at', 'updated_at'):
+            field = model._meta.get_field(name)
+            saved.append((field, field.auto_now, field.auto_now_add))
+            field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+class BenchmarkDataGenerator:
+    """
+    Bulk generator for benchmark datasets.
+
+    Usage:
+        counts = BenchmarkDataGenerator(seed=7, products=5000, days=730).generate()
+    """
+
+    def __init__(
+        self,
+        seed: int = 42,
+        products: int = 2000,
+        customers: int = 500,
+        suppliers: int = 50,
+        warehouses: int = 2,
+        categories: int = 40,
+        days: int = 730,
+        invoices_per_day: int = 40,
+        max_items: int = 5,
+        purchase_orders_per_week: int = 10,
+        expenses_per_day: int = 3,
+        return_rate: float = 0.02,
+        end_date: Optional[date] = None,
+        prefix: str = 'BM',
+        batch_size: int = BENCHMARK_BATCH_SIZE,
+        user=None,
+        log: Callable[[str], None] = None,
+    ):
+        self.rng = random.Random(seed)
+        self.options = {
+            'products': products, 'customers': customers, 'suppliers': suppliers,
+            'warehouses': warehouses, 'categories': categories,
+        }
+        self.days = days
+        self.invoices_per_day = invoices_per_day
+        self.max_items = max(1, max_items)
+        self.purchase_orders_per_week = purchase_orders_per_week
+        self.expenses_per_day = expenses_per_day
+        self.return_rate = return_rate
+        self.end_date = end_date or timezone.localdate()
+        self.start_date = self.end_date - timedelta(days=days - 1)
+        self.prefix = prefix
+        self.batch_size = batch_size
+        self.user = user
+        self.log = log or (lambda message: None)
+
+        self.counts: Dict[str, int] = {}
+        self.numbers: Dict[str, int] = {}
+        self.balances: Dict[tuple, Decimal] = {}
+        self.rates: Dict[date, tuple] = {}
+        self.pending_payments: Dict[date, List[Invoice]] = {}
+        self.recent_items: List[InvoiceItem] = []
+        self.customer_balances: Dict[int, List[Decimal]] = {}
+        self.supplier_balances: Dict[int, List[Decimal]] = {}
+
+    def generate(self) -> Dict[str, int]:
+        """Create the dataset and return the number of rows per model."""
+        with transaction.atomic(), _manual_timestamps(TIMESTAMPED_MODELS):
+            self._reference_data()
+            self._exchange_rates()
+            self._catalog()
+            self._parties()
+            self._opening_stock()
+            day = self.start_date
+            while day <= self.end_date:
+                self._simulate_day(day)
+                if day.day == 1:
+                    self.log(f'{day}: {self.counts.get("Invoice", 0)} invoices')
+                day += timedelta(days=1)
+            self._closing_balances()
+
+        self._rebuild_derived_data()
+        return dict(sorted(self.counts.items()))
+
+    # Helpers
+
+    def _code(self, kind: str, width: int = 7) -> str:
+        self.numbers[kind] = self.numbers.get(kind, 0) + 1
+        return f'{self.prefix}-{kind}-{self.numbers[kind]:0{width}d}'
+
+    def _bulk(self, model, rows: list) -> list:
+        if rows:
+            model.objects.bulk_create(rows, batch_size=self.batch_size)
+            self.counts[model.__name__] = self.counts.get(model.__name__, 0) + len(rows)
+        return rows
+
+    def _moment(self, day: date) -> datetime:
+        """Timestamps within a day, increasing so rows sort in creation order."""
+        self.numbers['second'] = self.numbers.get('second', 0) + 1
+        offset = timedelta(hours=8, seconds=self.numbers['second'] % 36000)
+        return timezone.make_aware(datetime.combine(day, time()) + offset)
+
+    def _stamp(self, row, day: date):
+        row.created_at = row.updated_at = self._moment(day)
+        row.created_by = self.user
+        return row
+
+    def _movement(self, day, product_id, warehouse_id, movement_type, source_type,
+                  quantity, unit_cost, reference_number, reference_type) -> StockMovement:
+        key = (product_id, warehouse_id)
+        before = self.balances.get(key, Decimal('0'))
+        after = before + quantity if movement_type in (
+            StockMovement.MovementType.IN, StockMovement.MovementType.RETURN
+        ) else before - quantity
+        self.balances[key] = after
+        return self._stamp(StockMovement(
+            product_id=product_id, warehouse_id=warehouse_id,
+            movement_type=movement_type, source_type=source_type,
+            quantity=quantity, unit_cost=unit_cost,
+            reference_number=reference_number, reference_type=reference_type,
+            balance_before=before, balance_after=after,
+        ), day)
+
+    # Setup
+
+    def _reference_data(self):
+        self.units = []
+        for name, symbol, factor, share in BENCHMARK_UNITS:
+            unit, _ = Unit.objects.get_or_create(name=name, defaults={'symbol': symbol})
+            self.units.append((unit, factor, share))
+
+        self.warehouses = self._bulk(Warehouse, [
+            Warehouse(name=f'مستودع {n}', code=self._code('WH', 2), created_by=self.user)
+            for n in range(1, self.options['warehouses'] + 1)
+        ])
+
+        roots = max(1, self.options['categories'] // 5)
+        parents = self._bulk(Category, [
+            Category(name=f'{self.prefix} فئة {n}', sort_order=n, created_by=self.user)
+            for n in range(1, roots + 1)
+        ])
+        children = self._bulk(Category, [
+            Category(name=f'{self.prefix} فئة {n}', parent=parents[n % roots],
+                     sort_order=n, created_by=self.user)
+            for n in range(roots + 1, self.options['categories'] + 1)
+        ])
+        self.categories = children or parents
+
+        self.expense_categories = [
+            ExpenseCategory.objects.get_or_create(name=f'{self.prefix} {name}')[0]
+            for name in ('إيجارات', 'رواتب', 'مرافق', 'نقل', 'صيانة')
+        ]
+
+    def _exchange_rates(self):
+        existing = dict(
+            (rate_date, (old, new)) for rate_date, old, new in DailyExchangeRate.objects.filter(
+                rate_date__range=(self.start_date, self.end_date)
+            ).values_list('rate_date', 'usd_to_syp_old', 'usd_to_syp_new')
+        )
+        rows = []
+        new_rate = Decimal('13000')
+        day = self.start_date
+        while day <= self.end_date:
+            new_rate = _money(new_rate * Decimal(str(1 + self.rng.uniform(-0.005, 0.006))))
+            if day in existing:
+                self.rates[day] = existing[day]
+            else:
+                self.rates[day] = (new_rate * 100, new_rate)
+                rows.append(DailyExchangeRate(
+                    rate_date=day, usd_to_syp_old=new_rate * 100, usd_to_syp_new=new_rate
+                ))
+            day += timedelta(days=1)
+        self._bulk(DailyExchangeRate, rows)
+
+    def _catalog(self):
+        rng = self.rng
+        products = []
+        for n in range(1, self.options['products'] + 1):
+            cost = _money(rng.randint(50, 20000) * 100)
+            sale = _money(cost * Decimal(str(rng.uniform(1.15, 1.6))))
+            taxable = rng.random() < 0.7
+            products.append(Product(
+                name=f'{self.prefix} منتج {n}', code=self._code('P'),
+                barcode=f'{self.prefix}{n:010d}',
+                category=rng.choice(self.categories), unit=self.units[0][0],
+                cost_price=cost, sale_price=sale,
+                wholesale_price=_money(sale * Decimal('0.95')), minimum_price=cost,
+                is_taxable=taxable, tax_rate=Decimal('15.00') if taxable else Decimal('0.00'),
+                minimum_stock=Decimal(rng.randint(5, 50)),
+                reorder_point=Decimal(rng.randint(20, 100)),
+                created_by=self.user,
+            ))
+        self.products = self._bulk(Product, products)
+
+        product_units = []
+        for product in self.products:
+            for index, (unit, factor, share) in enumerate(self.units):
+                if index and rng.random() >= share:
+                    continue
+                product_units.append(ProductUnit(
+                    product=product, unit=unit, conversion_factor=factor,
+                    is_base_unit=index == 0,
+                    sale_price=_money(product.sale_price * factor),
+                    cost_price=_money(product.cost_price * factor),
+                    barcode=f'{product.barcode}-{index}' if index else None,
+                    created_by=self.user,
+                ))
+        self._bulk(ProductUnit, product_units)
+        self.product_units: Dict[int, List[ProductUnit]] = {}
+        for product_unit in product_units:
+            self.product_units.setdefault(product_unit.product_id, []).append(product_unit)
+
+    def _parties(self):
+        rng = self.rng
+        self.customers = self._bulk(Customer, [
+            Customer(
+                name=f'{self.prefix} عميل {n}', code=self._code('C', 6),
+                customer_type=rng.choice(Customer.CustomerType.values),
+                credit_limit=_money(rng.randint(0, 100) * 1000000),
+                created_by=self.user,
+            )
+            for n in range(1, self.options['customers'] + 1)
+        ])
+        self.suppliers = self._bulk(Supplier, [
+            Supplier(
+                name=f'{self.prefix} مورد {n}', code=self._code('S', 6),
+                payment_terms=rng.choice((0, 15, 30, 60)),
+                created_by=self.user,
+            )
+            for n in range(1, self.options['suppliers'] + 1)
+        ])
+        for customer in self.customers:
+            self.customer_balances[customer.id] = [Decimal('0'), Decimal('0')]
+        for supplier in self.suppliers:
+            self.supplier_balances[supplier.id] = [Decimal('0'), Decimal('0')]
+
+    def _opening_stock(self):
+        self._bulk(StockMovement, [
+            self._movement(
+                self.start_date, product.id, warehouse.id,
+                StockMovement.MovementType.IN, StockMovement.SourceType.OPENING,
+                OPENING_STOCK, product.cost_price, 'OPENING', 'opening'
+            )
+            for product in self.products for warehouse in self.warehouses
+        ])
+
+    # Daily activity
+
+    def _simulate_day(self, day: date):
+        movements: List[StockMovement] = []
+        self._purchases(day, movements)
+        self._sales(day, movements)
+        self._returns(day, movements)
+        self._due_payments(day)
+        self._expenses(day)
+        self._bulk(StockMovement, movements)
+
+    def _purchases(self, day: date, movements: list):
+        rng = self.rng
+        expected = self.purchase_orders_per_week / 7
+        count = int(expected) + (rng.random() < expected - int(expected))
+        if not count:
+            return
+        old_rate, new_rate = self.rates[day]
+        orders, lines = [], []
+        for _ in range(count):
+            order = self._stamp(PurchaseOrder(
+                order_number=self._code('PO'), supplier=rng.choice(self.suppliers),
+                warehouse=rng.choice(self.warehouses), order_date=day,
+                status=PurchaseOrder.Status.RECEIVED, transaction_currency='USD',
+                fx_rate_date=day, usd_to_syp_old_snapshot=old_rate, usd_to_syp_new_snapshot=new_rate,
+                approved_by=self.user, approved_at=self._moment(day),
+            ), day)
+            subtotal = Decimal('0')
+            for product in rng.sample(self.products, min(rng.randint(1, self.max_items * 2), len(self.products))):
+                product_unit = rng.choice(self.product_units[product.id])
+                quantity = Decimal(rng.randint(5, 100))
+                unit_price = max(_money(product.cost_price * product_unit.conversion_factor / old_rate), CENT)
+                subtotal += quantity * unit_price
+                lines.append((order, self._stamp(PurchaseOrderItem(
+                    product=product, product_unit=product_unit, quantity=quantity,
+                    base_quantity=quantity * product_unit.conversion_factor,
+                    received_quantity=quantity, unit_price=unit_price,
+                ), day)))
+            order.subtotal = order.total_amount = order.total_amount_usd = _money(subtotal)
+            orders.append(order)
+        self._bulk(PurchaseOrder, orders)
+        for order, line in lines:
+            line.purchase_order = order
+        self._bulk(PurchaseOrderItem, [line for _, line in lines])
+
+        notes = {order.pk: self._stamp(GoodsReceivedNote(
+            grn_number=self._code('GRN'), purchase_order=order, received_date=day,
+            received_by=self.user,
+        ), day) for order in orders}
+        self._bulk(GoodsReceivedNote, list(notes.values()))
+        grn_items = []
+        for order, line in lines:
+            grn = notes[order.pk]
+            grn_items.append(self._stamp(GRNItem(
+                grn=grn, po_item=line, product=line.product, quantity_received=line.quantity
+            ), day))
+            movements.append(self._movement(
+                day, line.product_id, order.warehouse_id,
+                StockMovement.MovementType.IN, StockMovement.SourceType.PURCHASE,
+                line.base_quantity, _money(line.unit_price * old_rate / line.product_unit.conversion_factor),
+                grn.grn_number, 'GRN'
+            ))
+        self._bulk(GRNItem, grn_items)
+
+        payments = []
+        for order in orders:
+            balance = self.supplier_balances[order.supplier_id]
+            balance[0] += _money(order.total_amount_usd * old_rate)
+            balance[1] += order.total_amount_usd
+            if rng.random() < 0.6:
+                payments.append(self._stamp(SupplierPayment(
+                    payment_number=self._code('SP'), supplier_id=order.supplier_id,
+                    purchase_order=order, payment_date=day, transaction_currency='USD',
+                    fx_rate_date=day, usd_to_syp_old_snapshot=old_rate, usd_to_syp_new_snapshot=new_rate,
+                    amount=order.total_amount_usd, amount_usd=order.total_amount_usd,
+                ), day))
+                balance[0] -= _money(order.total_amount_usd * old_rate)
+                balance[1] -= order.total_amount_usd
+                order.paid_amount = order.paid_amount_usd = order.total_amount_usd
+        if payments:
+            self._bulk(SupplierPayment, payments)
+            PurchaseOrder.objects.bulk_update(
+                [p.purchase_order for p in payments], ['paid_amount', 'paid_amount_usd'],
+                batch_size=self.batch_size
+            )
+
+    def _sales(self, day: date, movements: list):
+        rng = self.rng
+        old_rate, new_rate = self.rates[day]
+        rates = {'usd_to_syp_old': old_rate, 'usd_to_syp_new': new_rate}
+        invoices, lines = [], []
+        for _ in range(rng.randint(0, 2 * self.invoices_per_day)):
+            warehouse = rng.choice(self.warehouses)
+            invoice_type = Invoice.InvoiceType.CASH if rng.random() < 0.6 else Invoice.InvoiceType.CREDIT
+            invoice = self._stamp(Invoice(
+                invoice_number=self._code('INV'), invoice_type=invoice_type,
+                customer=rng.choice(self.customers), warehouse=warehouse, invoice_date=day,
+                due_date=day + timedelta(days=30) if invoice_type == Invoice.InvoiceType.CREDIT else None,
+                transaction_currency='SYP_OLD', fx_rate_date=day,
+                usd_to_syp_old_snapshot=old_rate, usd_to_syp_new_snapshot=new_rate,
+            ), day)
+            items = []
+            for product in rng.sample(self.products, min(rng.randint(1, self.max_items), len(self.products))):
+                product_unit = rng.choice(self.product_units[product.id])
+                quantity = Decimal(rng.randint(1, 5))
+                base_quantity = quantity * product_unit.conversion_factor
+                if self.balances.get((product.id, warehouse.id), Decimal('0')) < base_quantity:
+                    continue
+                items.append(self._stamp(InvoiceItem(
+                    product=product, product_unit=product_unit, quantity=quantity,
+                    base_quantity=base_quantity, unit_price=product_unit.sale_price,
+                    cost_price=product_unit.cost_price, tax_rate=product.tax_rate,
+                ), day))
+                movements.append(self._movement(
+                    day, product.id, warehouse.id,
+                    StockMovement.MovementType.OUT, StockMovement.SourceType.SALE,
+                    base_quantity, product.cost_price, invoice.invoice_number, 'invoice'
+                ))
+            if not items:
+                continue
+            invoice.subtotal = _money(sum(item.subtotal for item in items))
+            invoice.tax_amount = _money(sum(item.tax_amount for item in items))
+            invoice.total_amount = invoice.subtotal + invoice.tax_amount
+            invoice.total_amount_usd = to_usd(invoice.total_amount, 'SYP_OLD', **rates)
+
+            share = Decimal('1') if invoice_type == Invoice.InvoiceType.CASH else rng.choice(
+                (Decimal('1'), Decimal('0.5'), Decimal('0'))
+            )
+            invoice.paid_amount = _money(invoice.total_amount * share)
+            invoice.paid_amount_usd = to_usd(invoice.paid_amount, 'SYP_OLD', **rates)
+            invoice.status = (
+                Invoice.Status.PAID if share == 1 else
+                Invoice.Status.PARTIAL if share else Invoice.Status.CONFIRMED
+            )
+            if invoice.paid_amount:
+                pay_day = day if invoice_type == Invoice.InvoiceType.CASH else day + timedelta(days=rng.randint(7, 60))
+                if pay_day > self.end_date:
+                    pay_day = self.end_date
+                self.pending_payments.setdefault(pay_day, []).append(invoice)
+            if invoice_type == Invoice.InvoiceType.CREDIT:
+                balance = self.customer_balances[invoice.customer_id]
+                balance[0] += invoice.total_amount
+                balance[1] += invoice.total_amount_usd
+            invoices.append(invoice)
+            lines.extend((invoice, item) for item in items)
+
+        self._bulk(Invoice, invoices)
+        for invoice, item in lines:
+            item.invoice = invoice
+        items = self._bulk(InvoiceItem, [item for _, item in lines])
+        self.recent_items = (self.recent_items + items)[-500:]
+
+    def _due_payments(self, day: date):
+        invoices = self.pending_payments.pop(day, [])
+        if not invoices:
+            return
+        old_rate, new_rate = self.rates[day]
+        payments = [self._stamp(Payment(
+            payment_number=self._code('REC'), customer_id=invoice.customer_id, invoice=invoice,
+            payment_date=day, transaction_currency='SYP_OLD', fx_rate_date=day,
+            usd_to_syp_old_snapshot=old_rate, usd_to_syp_new_snapshot=new_rate,
+            amount=invoice.paid_amount, amount_usd=invoice.paid_amount_usd,
+            payment_method=Payment.PaymentMethod.CASH, received_by=self.user,
+        ), day) for invoice in invoices]
+        self._bulk(Payment, payments)
+        self._bulk(PaymentAllocation, [self._stamp(PaymentAllocation(
+            payment=payment, invoice_id=payment.invoice_id,
+            amount=payment.amount, amount_usd=payment.amount_usd,
+        ), day) for payment in payments])
+        for invoice in invoices:
+            if invoice.invoice_type == Invoice.InvoiceType.CREDIT:
+                balance = self.customer_balances[invoice.customer_id]
+                balance[0] -= invoice.paid_amount
+                balance[1] -= invoice.paid_amount_usd
+
+    def _returns(self, day: date, movements: list):
+        rng = self.rng
+        candidates = [item for item in self.recent_items if item.invoice.invoice_date < day]
+        count = sum(rng.random() < self.return_rate for _ in range(self.invoices_per_day))
+        if not candidates or not count:
+            return
+        old_rate, new_rate = self.rates[day]
+        returns, lines = [], []
+        for item in rng.sample(candidates, min(count, len(candidates))):
+            self.recent_items.remove(item)
+            invoice = item.invoice
+            quantity = Decimal('1')
+            total = _money(quantity * item.unit_price)
+            returns.append(self._stamp(SalesReturn(
+                return_number=self._code('RET'), original_invoice=invoice, return_date=day,
+                transaction_currency='SYP_OLD', fx_rate_date=day,
+                usd_to_syp_old_snapshot=old_rate, usd_to_syp_new_snapshot=new_rate,
+                total_amount=total,
+                total_amount_usd=to_usd(total, 'SYP_OLD', usd_to_syp_old=old_rate, usd_to_syp_new=new_rate),
+                reason='مرتجع تجريبي',
+            ), day))
+            lines.append(self._stamp(SalesReturnItem(
+                invoice_item=item, product_id=item.product_id, quantity=quantity,
+                unit_price=item.unit_price,
+            ), day))
+            movements.append(self._movement(
+                day, item.product_id, invoice.warehouse_id,
+                StockMovement.MovementType.RETURN, StockMovement.SourceType.RETURN,
+                quantity * item.product_unit.conversion_factor,
+                _money(item.cost_price / item.product_unit.conversion_factor),
+                returns[-1].return_number, 'SalesReturn'
+            ))
+            balance = self.customer_balances[invoice.customer_id]
+            balance[0] -= total
+            balance[1] -= returns[-1].total_amount_usd
+        self._bulk(SalesReturn, returns)
+        for sales_return, line in zip(returns, lines):
+            line.sales_return = sales_return
+        self._bulk(SalesReturnItem, lines)
+
+    def _expenses(self, day: date):
+        rng = self.rng
+        expenses = []
+        for _ in range(rng.randint(0, 2 * self.expenses_per_day)):
+            amount = _money(rng.randint(1, 500) * 10000)
+            approved = rng.random() < 0.9
+            expenses.append(self._stamp(Expense(
+                expense_number=self._code('EXP'), category=rng.choice(self.expense_categories),
+                expense_date=day, amount=amount, total_amount=amount,
+                description='مصروف تجريبي', is_approved=approved,
+                approved_by=self.user if approved else None,
+            ), day))
+        self._bulk(Expense, expenses)
+
+    # Totals
+
+    def _closing_balances(self):
+        self._bulk(Stock, [
+            Stock(product_id=product_id, warehouse_id=warehouse_id, quantity=quantity)
+            for (product_id, warehouse_id), quantity in sorted(self.balances.items())
+        ])
+        for customer in self.customers:
+            customer.current_balance, customer.current_balance_usd = self.customer_balances[customer.id]
+        Customer.objects.bulk_update(
+            self.customers, ['current_balance', 'current_balance_usd'], batch_size=self.batch_size
+        )
+        for supplier in self.suppliers:
+            supplier.current_balance, supplier.current_balance_usd = self.supplier_balances[supplier.id]
+        Supplier.objects.bulk_update(
+            self.suppliers, ['current_balance', 'current_balance_usd'], batch_size=self.batch_size
+        )
+
+    def _rebuild_derived_data(self):
+        """bulk_create sends no signals: rebuild cost layers and drop caches."""
+        from apps.core.versioning import DataVersionService
+        from apps.inventory.categories import CategoryTreeService
+        from apps.inventory.costing import CostLayerService
+        from apps.inventory.units import UnitConversionService
+
+        self.log('Rebuilding cost layers...')
+        CostLayerService.rebuild([product.id for product in self.products], batch_size=self.batch_size)
+        UnitConversionService.clear()
+        CategoryTreeService.invalidate()
+        DataVersionService.bump()
@@ -18,6 +18,7 @@ from .exceptions import (
     ValidationException,
     DatabaseException,
 )
+from .profiling import profile_service
 
 # Configure logger for error handling
 logger = logging.getLogger('apps.core.decorators')
@@ -188,12 +189,14 @@ def handle_service_error(func: Callable) -> Callable:
         func: The service method to wrap
         
     Returns:
-        Wrapped function with error handling
+        Wrapped function with error handling (and profiling when enabled)
     """
+    profiled = profile_service(func)
+
     @wraps(func)
     def wrapper(*args, **kwargs):
         try:
-            return func(*args, **kwargs)
+            return profiled(*args, **kwargs)
         
         except BusinessException:
             # Re-raise BusinessException subclasses as-is
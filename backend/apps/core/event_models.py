@@ -0,0 +1,45 @@
+"""
+Change Event Models - Published business events read by event streams
+"""
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+
+
+class ChangeEvent(models.Model):
+    """
+    A business event (invoice confirmed, payment received, stock changed)
+    published for live clients. The auto-increment id is the stream cursor,
+    so every server process sees the same ordered feed.
+    """
+
+    event_type = models.CharField(
+        max_length=50,
+        db_index=True,
+        verbose_name='نوع الحدث'
+    )
+    payload = models.JSONField(
+        default=dict,
+        encoder=DjangoJSONEncoder,
+        verbose_name='البيانات'
+    )
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        db_index=True,
+        verbose_name='تاريخ الإنشاء'
+    )
+
+    class Meta:
+        verbose_name = 'حدث تغيير'
+        verbose_name_plural = 'أحداث التغيير'
+        ordering = ['id']
+
+    def __str__(self):
+        return f"{self.id} {self.event_type}"
+
+    def as_dict(self):
+        return {
+            'id': self.id,
+            'type': self.event_type,
+            'payload': self.payload,
+            'created_at': self.created_at,
+        }
@@ -0,0 +1,114 @@
+"""
+Change Event Views - Long-poll and Server-Sent Events feeds
+"""
+import json
+import time
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+from rest_framework import permissions, renderers, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.response import Response
+
+from .events import EVENT_TYPES, EVENT_WAIT_MAX, EventService
+
+# Default long-poll wait in seconds
+EVENT_POLL_TIMEOUT = 25
+
+# An SSE connection is closed after this many seconds; clients reconnect
+EVENT_STREAM_MAX_SECONDS = 300
+
+# Seconds between keep-alive comments on an idle SSE connection
+EVENT_STREAM_KEEPALIVE = 15
+
+# Reconnect delay suggested to SSE clients, in milliseconds
+EVENT_STREAM_RETRY_MS = 3000
+
+
+class EventStreamRenderer(renderers.BaseRenderer):
+    """Lets content negotiation accept ``text/event-stream`` requests."""
+
+    media_type = 'text/event-stream'
+    format = 'sse'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return json.dumps(data, cls=DjangoJSONEncoder).encode(self.charset)
+
+
+def _format_event(event) -> str:
+    data = json.dumps(event.as_dict(), cls=DjangoJSONEncoder, ensure_ascii=False)
+    return f"id: {event.id}\nevent: {event.event_type}\ndata: {data}\n\n"
+
+
+class ChangeEventViewSet(viewsets.ViewSet):
+    """
+    Live change feed.
+
+    GET /events/?after=<id>&timeout=<s>&types=a,b long-polls: it returns as
+    soon as events newer than ``after`` exist, or an empty list after the
+    timeout. Without ``after`` it returns the current cursor at once.
+
+    GET /events/stream/ sends the same feed as Server-Sent Events, resuming
+    from the ``Last-Event-ID`` header or ``after``.
+    """
+
+    permission_classes = [permissions.IsAuthenticated]
+
+    def _parse(self, request):
+        params = request.query_params
+        try:
+            after = params.get('after', request.headers.get('Last-Event-ID'))
+            after = int(after) if after not in (None, '') else None
+            timeout = float(params.get('timeout', EVENT_POLL_TIMEOUT))
+        except ValueError:
+            return None, None, None, Response(
+                {'detail': 'معاملات غير صالحة', 'code': 'INVALID_PARAMS'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        types = [t for t in params.get('types', '').split(',') if t]
+        unknown = set(types) - set(EVENT_TYPES)
+        if unknown:
+            return None, None, None, Response(
+                {'detail': f'نوع حدث غير معروف: {", ".join(sorted(unknown))}', 'code': 'INVALID_EVENT_TYPE'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return after, min(max(timeout, 0), EVENT_WAIT_MAX), types or None, None
+
+    def list(self, request):
+        after, timeout, types, error = self._parse(request)
+        if error:
+            return error
+        if after is None:
+            return Response({'events': [], 'last_id': EventService.last_id()})
+
+        events = EventService.wait(after, timeout, types)
+        return Response({
+            'events': [event.as_dict() for event in events],
+            'last_id': events[-1].id if events else after,
+        })
+
+    @action(detail=False, methods=['get'], renderer_classes=[renderers.JSONRenderer, EventStreamRenderer])
+    def stream(self, request):
+        after, _, types, error = self._parse(request)
+        if error:
+            return error
+        if after is None:
+            after = EventService.last_id()
+
+        def generate(after):
+            started = time.monotonic()
+            yield f"retry: {EVENT_STREAM_RETRY_MS}\n\n"
+            while time.monotonic() - started < EVENT_STREAM_MAX_SECONDS:
+                events = EventService.wait(after, EVENT_STREAM_KEEPALIVE, types)
+                if not events:
+                    yield ": keep-alive\n\n"
+                    continue
+                for event in events:
+                    after = event.id
+                    yield _format_event(event)
+
+        response = StreamingHttpResponse(generate(after), content_type='text/event-stream; charset=utf-8')
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'
+        return response
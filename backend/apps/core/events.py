@@ -0,0 +1,178 @@
+"""
+Change Events - In-process pub/sub with a database feed
+
+Services publish business events (invoice confirmed, payment received,
+stock changed, low stock crossed). Events raised inside a transaction are
+buffered per savepoint and written as ChangeEvent rows when it commits, one
+insert per savepoint level, so rolled-back work (including a rolled-back
+savepoint) never reaches clients. Waiters in the same process are
+woken immediately; waiters in other server processes pick the rows up on
+their next database check, so several workers share one ordered feed.
+
+Clients read the feed by long-polling or as Server-Sent Events
+(see event_views.py), passing the id of the last event they saw.
+"""
+import threading
+import time
+import weakref
+from datetime import timedelta
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from django.db import transaction
+from django.utils import timezone
+
+from .event_models import ChangeEvent
+
+EVENT_INVOICE_CONFIRMED = 'invoice-confirmed'
+EVENT_PAYMENT_RECEIVED = 'payment-received'
+EVENT_STOCK_CHANGED = 'stock-changed'
+EVENT_LOW_STOCK_CROSSED = 'low-stock-crossed'
+
+EVENT_TYPES = (
+    EVENT_INVOICE_CONFIRMED,
+    EVENT_PAYMENT_RECEIVED,
+    EVENT_STOCK_CHANGED,
+    EVENT_LOW_STOCK_CROSSED,
+)
+
+# Seconds between database checks while waiting (events from other processes)
+EVENT_DB_POLL_INTERVAL = 2.0
+
+# Longest wait a client may ask for, in seconds
+EVENT_WAIT_MAX = 60
+
+# Events returned per read
+EVENT_FETCH_LIMIT = 500
+
+# Events older than this are pruned
+EVENT_RETENTION = timedelta(days=1)
+
+# Prune once every this many flushes
+EVENT_PRUNE_EVERY = 200
+
+Event = Tuple[str, Dict[str, Any]]
+
+_condition = threading.Condition()
+_enrichers: List[Callable[[List[Event]], List[Event]]] = []
+_flush_count = 0
+
+
+def register_enricher(func: Callable[[List[Event]], List[Event]]) -> Callable:
+    """
+    Register a function that derives extra events from a committed batch
+    (e.g. low-stock crossings from stock changes). It runs once per batch,
+    so it can load what it needs with one query.
+    """
+    _enrichers.append(func)
+    return func
+
+
+class _EventBatch:
+    """Events published at one savepoint level, written when it commits."""
+
+    def __init__(self):
+        self.events: List[Event] = []
+
+    def write(self):
+        _write(self.events)
+
+
+# Open batches of this thread's transaction, keyed by the savepoint stack they
+# were published under. Only weak references are kept: Django drops the
+# on_commit callback of a savepoint that rolls back (and of a rolled-back
+# transaction), which frees its batch, so a later publish never joins events
+# that will not be written.
+_batches = threading.local()
+
+
+def _pending_batch() -> Optional[_EventBatch]:
+    connection = transaction.get_connection()
+    if not connection.in_atomic_block:
+        return None
+    open_batches = getattr(_batches, 'by_savepoint', None)
+    if open_batches is None:
+        open_batches = _batches.by_savepoint = weakref.WeakValueDictionary()
+    key = tuple(connection.savepoint_ids)
+    batch = open_batches.get(key)
+    if batch is None:
+        batch = open_batches[key] = _EventBatch()
+        # The feed is a side effect: a failed write is logged, never raised
+        # into work that has already committed
+        transaction.on_commit(batch.write, robust=True)
+    return batch
+
+
+def _write(events: List[Event]) -> None:
+    global _flush_count
+    if not events:
+        return
+    for enrich in _enrichers:
+        events = events + enrich(events)
+    ChangeEvent.objects.bulk_create([
+        ChangeEvent(event_type=event_type, payload=payload) for event_type, payload in events
+    ])
+
+    _flush_count += 1
+    if _flush_count % EVENT_PRUNE_EVERY == 0:
+        EventService.prune()
+    with _condition:
+        _condition.notify_all()
+
+
+class EventService:
+    """
+    Service class for publishing and reading change events.
+    """
+
+    @staticmethod
+    def publish(event_type: str, payload: Dict[str, Any]) -> None:
+        """Publish an event; inside a transaction it is sent on commit."""
+        EventService.publish_many([(event_type, payload)])
+
+    @staticmethod
+    def publish_many(events: Iterable[Event]) -> None:
+        events = list(events)
+        batch = _pending_batch()
+        if batch is None:
+            transaction.on_commit(lambda: _write(events), robust=True)
+        else:
+            batch.events.extend(events)
+
+    @staticmethod
+    def last_id() -> int:
+        """Id of the newest event, the starting cursor for new clients."""
+        return ChangeEvent.objects.order_by('-id').values_list('id', flat=True).first() or 0
+
+    @staticmethod
+    def since(after: int, event_types: Optional[Iterable[str]] = None,
+              limit: int = EVENT_FETCH_LIMIT) -> List[ChangeEvent]:
+        """Events newer than the ``after`` cursor, oldest first."""
+        queryset = ChangeEvent.objects.filter(id__gt=after)
+        if event_types:
+            queryset = queryset.filter(event_type__in=list(event_types))
+        return list(queryset.order_by('id')[:limit])
+
+    @staticmethod
+    def wait(after: int, timeout: float, event_types: Optional[Iterable[str]] = None) -> List[ChangeEvent]:
+        """
+        Block until events newer than ``after`` exist or ``timeout`` passes.
+
+        Publishes in this process wake the waiter at once; the database is
+        re-checked every EVENT_DB_POLL_INTERVAL seconds for other processes.
+        """
+        deadline = time.monotonic() + min(max(timeout, 0), EVENT_WAIT_MAX)
+        while True:
+            events = EventService.since(after, event_types)
+            remaining = deadline - time.monotonic()
+            if events or remaining <= 0:
+                return events
+            with _condition:
+                _condition.wait(min(EVENT_DB_POLL_INTERVAL, remaining))
+
+    @staticmethod
+    def prune() -> int:
+        """Delete events older than EVENT_RETENTION."""
+        deleted, _ = ChangeEvent.objects.filter(
+            created_at__lt=timezone.now() - EVENT_RETENTION
+        ).delete()
+        return deleted
@@ -0,0 +1,196 @@
+"""
+Idempotency Keys - Safe retries of document-creating POST requests
+
+A client sends ``Idempotency-Key: <unique value per user action>`` with a
+POST that creates a document (invoice, payment, goods receipt). The first
+request claims the key and runs normally; its successful response is stored
+in the same transaction as the work it did. A retry with the same key (after
+a timeout, a token refresh or a double click) gets the stored response back
+with ``Idempotent-Replayed: true`` and the service is not run again.
+
+* The same key with a different request body is rejected (422).
+* A retry that arrives while the first request is still running gets 409;
+  the client waits and retries.
+* Failed requests release their key, so the user can correct and resend.
+* Keys expire after IDEMPOTENCY_KEY_TTL and are pruned periodically.
+
+Requests without the header are processed as before.
+"""
+import hashlib
+import json
+from datetime import timedelta
+from functools import wraps
+from typing import Callable, Tuple
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+
+from .idempotency_models import IdempotencyKey
+
+# Request header carrying the key (as found in request.META)
+IDEMPOTENCY_HEADER = 'HTTP_IDEMPOTENCY_KEY'
+
+# Response header marking a replayed response
+IDEMPOTENCY_REPLAYED_HEADER = 'Idempotent-Replayed'
+
+# Longest key accepted
+IDEMPOTENCY_KEY_MAX_LENGTH = 100
+
+# How long a stored response can be replayed
+IDEMPOTENCY_KEY_TTL = timedelta(hours=24)
+
+# A request still marked in progress after this long is treated as crashed
+IDEMPOTENCY_LOCK_TIMEOUT = timedelta(minutes=5)
+
+# Prune expired keys once every this many claims
+IDEMPOTENCY_PRUNE_EVERY = 500
+
+_claim_count = 0
+
+
+def _error(message: str, code: str, http_status: int) -> Response:
+    return Response({'detail': message, 'code': code}, status=http_status)
+
+
+def _request_hash(request) -> str:
+    body = json.dumps(request.data, sort_keys=True, cls=DjangoJSONEncoder, ensure_ascii=False)
+    payload = f'{request.method} {request.path}\n{body}'
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class IdempotencyService:
+    """
+    Service class for claiming, completing and releasing idempotency keys.
+    """
+
+    @staticmethod
+    def claim(user, key: str, request_hash: str) -> Tuple[IdempotencyKey, bool]:
+        """
+        Claim ``key`` for ``user``.
+
+        Returns (record, claimed). ``claimed`` is False when another request
+        already holds the key; the record then tells whether that request
+        finished (status_code set) and what it sent.
+        """
+        global _claim_count
+        _claim_count += 1
+        if _claim_count % IDEMPOTENCY_PRUNE_EVERY == 0:
+            IdempotencyService.prune()
+
+        now = timezone.now()
+        fields = {
+            'request_hash': request_hash,
+            'status_code': None,
+            'response_body': None,
+            'created_at': now,
+            'expires_at': now + IDEMPOTENCY_KEY_TTL,
+        }
+        for _ in range(2):
+            try:
+                # Committed at once (outside any request transaction), so a
+                # concurrent retry sees the key as taken
+                with transaction.atomic():
+                    return IdempotencyKey.objects.create(user=user, key=key, **fields), True
+            except IntegrityError:
+                pass
+
+            record = IdempotencyKey.objects.filter(user=user, key=key).first()
+            if record is None:
+                continue  # released in the meantime
+            stale = record.status_code is None and record.created_at < now - IDEMPOTENCY_LOCK_TIMEOUT
+            if record.expires_at > now and not stale:
+                return record, False
+
+            # Expired or abandoned: take it over unless another retry just did
+            taken = IdempotencyKey.objects.filter(
+                pk=record.pk, created_at=record.created_at
+            ).update(**fields)
+            if taken:
+                for name, value in fields.items():
+                    setattr(record, name, value)
+                return record, True
+            return IdempotencyKey.objects.get(pk=record.pk), False
+        return IdempotencyKey.objects.get(user=user, key=key), False
+
+    @staticmethod
+    def complete(record: IdempotencyKey, response: Response) -> None:
+        """Store the response of a finished request for replay."""
+        # Encoded the way the JSON renderer does, so the replay is identical
+        body = json.loads(json.dumps(response.data, cls=JSONEncoder))
+        IdempotencyKey.objects.filter(pk=record.pk).update(
+            status_code=response.status_code,
+            response_body=body,
+        )
+
+    @staticmethod
+    def release(record: IdempotencyKey) -> None:
+        """Forget a key whose request failed, so it can be sent again."""
+        IdempotencyKey.objects.filter(pk=record.pk, created_at=record.created_at).delete()
+
+    @staticmethod
+    def prune() -> int:
+        """Delete expired keys."""
+        deleted, _ = IdempotencyKey.objects.filter(expires_at__lt=timezone.now()).delete()
+        return deleted
+
+
+def idempotent(view_method: Callable) -> Callable:
+    """
+    Make a POST view method honour the Idempotency-Key header.
+
+    Usage:
+        class InvoiceViewSet(viewsets.ModelViewSet):
+            @idempotent
+            def create(self, request, *args, **kwargs):
+                ...
+
+    The view and the storing of its response run in one transaction, so a
+    document is never committed without the response that replays it.
+    """
+    @wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        key = request.META.get(IDEMPOTENCY_HEADER, '').strip()
+        if not key:
+            return view_method(self, request, *args, **kwargs)
+        if len(key) > IDEMPOTENCY_KEY_MAX_LENGTH:
+            return _error(
+                f'مفتاح عدم التكرار طويل جداً (الحد الأقصى {IDEMPOTENCY_KEY_MAX_LENGTH} حرفاً)',
+                'IDEMPOTENCY_KEY_INVALID', status.HTTP_400_BAD_REQUEST
+            )
+
+        request_hash = _request_hash(request)
+        record, claimed = IdempotencyService.claim(request.user, key, request_hash)
+        if not claimed:
+            if record.request_hash != request_hash:
+                return _error(
+                    'تم استخدام مفتاح عدم التكرار مع طلب مختلف',
+                    'IDEMPOTENCY_KEY_REUSED', status.HTTP_422_UNPROCESSABLE_ENTITY
+                )
+            if record.status_code is None:
+                return _error(
+                    'الطلب نفسه قيد المعالجة. يرجى الانتظار ثم المحاولة مرة أخرى.',
+                    'IDEMPOTENCY_REQUEST_IN_PROGRESS', status.HTTP_409_CONFLICT
+                )
+            return Response(
+                record.response_body,
+                status=record.status_code,
+                headers={IDEMPOTENCY_REPLAYED_HEADER: 'true'}
+            )
+
+        try:
+            with transaction.atomic():
+                response = view_method(self, request, *args, **kwargs)
+                if status.is_success(response.status_code):
+                    IdempotencyService.complete(record, response)
+        except Exception:
+            IdempotencyService.release(record)
+            raise
+        if not status.is_success(response.status_code):
+            IdempotencyService.release(record)
+        return response
+
+    return wrapper
@@ -0,0 +1,58 @@
+"""
+Idempotency Models - Stored responses of retried POST requests
+"""
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+
+
+class IdempotencyKey(models.Model):
+    """
+    Client-supplied Idempotency-Key of a document-creating POST. Holds a
+    hash of the request and, once it succeeded, the response, so a retry
+    with the same key gets the stored response instead of a second document.
+    A row without status_code is a request still being processed.
+    """
+
+    key = models.CharField(
+        max_length=100,
+        verbose_name='المفتاح'
+    )
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='المستخدم'
+    )
+    request_hash = models.CharField(
+        max_length=64,
+        verbose_name='بصمة الطلب'
+    )
+    status_code = models.PositiveSmallIntegerField(
+        null=True,
+        blank=True,
+        verbose_name='رمز الاستجابة'
+    )
+    response_body = models.JSONField(
+        null=True,
+        blank=True,
+        encoder=DjangoJSONEncoder,
+        verbose_name='الاستجابة'
+    )
+    created_at = models.DateTimeField(
+        verbose_name='تاريخ الإنشاء'
+    )
+    expires_at = models.DateTimeField(
+        db_index=True,
+        verbose_name='تاريخ الانتهاء'
+    )
+
+    class Meta:
+        verbose_name = 'مفتاح عدم التكرار'
+        verbose_name_plural = 'مفاتيح عدم التكرار'
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'key'], name='core_idempotency_user_key'),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id}: {self.key}"
@@ -0,0 +1,100 @@
+"""
+Background Job Models - Long running operations tracked in the database
+"""
+from django.db import models
+from django.conf import settings
+from apps.core.models import TimeStampedModel
+
+
+class BackgroundJob(TimeStampedModel):
+    """
+    A long running operation (backup, restore, report rebuild) executed by
+    the local job runner. Clients poll the job for progress and its result.
+    """
+
+    class Status(models.TextChoices):
+        PENDING = 'pending', 'في الانتظار'
+        RUNNING = 'running', 'قيد التنفيذ'
+        SUCCEEDED = 'succeeded', 'مكتملة'
+        FAILED = 'failed', 'فشلت'
+        CANCELLED = 'cancelled', 'ملغاة'
+
+    FINISHED_STATUSES = (Status.SUCCEEDED, Status.FAILED, Status.CANCELLED)
+
+    job_type = models.CharField(
+        max_length=50,
+        db_index=True,
+        verbose_name='نوع المهمة'
+    )
+    status = models.CharField(
+        max_length=20,
+        choices=Status.choices,
+        default=Status.PENDING,
+        db_index=True,
+        verbose_name='الحالة'
+    )
+    phase = models.CharField(
+        max_length=100,
+        blank=True,
+        default='',
+        verbose_name='المرحلة'
+    )
+    progress = models.PositiveSmallIntegerField(
+        default=0,
+        verbose_name='نسبة التقدم'
+    )
+    params = models.JSONField(
+        default=dict,
+        blank=True,
+        verbose_name='المعاملات'
+    )
+    result = models.JSONField(
+        null=True,
+        blank=True,
+        verbose_name='النتيجة'
+    )
+    artifact = models.CharField(
+        max_length=255,
+        blank=True,
+        default='',
+        verbose_name='الملف الناتج'
+    )
+    error = models.TextField(
+        blank=True,
+        default='',
+        verbose_name='الخطأ'
+    )
+    cancel_requested = models.BooleanField(
+        default=False,
+        verbose_name='طلب الإلغاء'
+    )
+    started_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='وقت البدء'
+    )
+    finished_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='وقت الانتهاء'
+    )
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='background_jobs',
+        verbose_name='أنشئ بواسطة'
+    )
+
+    class Meta:
+        verbose_name = 'مهمة خلفية'
+        verbose_name_plural = 'المهام الخلفية'
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.job_type} #{self.pk} ({self.status})"
+
+    @property
+    def is_finished(self) -> bool:
+        return self.status in self.FINISHED_STATUSES
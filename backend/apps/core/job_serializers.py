@@ -0,0 +1,29 @@
+"""
+Background Job Serializers
+"""
+from rest_framework import serializers
+from .job_models import BackgroundJob
+from .jobs import JobRunner
+
+
+class BackgroundJobSerializer(serializers.ModelSerializer):
+    """Serializer for BackgroundJob polling."""
+
+    status_display = serializers.CharField(source='get_status_display', read_only=True)
+    is_finished = serializers.BooleanField(read_only=True)
+
+    class Meta:
+        model = BackgroundJob
+        fields = [
+            'id', 'job_type', 'status', 'status_display', 'is_finished',
+            'phase', 'progress', 'result', 'artifact', 'error',
+            'cancel_requested', 'created_at', 'started_at', 'finished_at',
+        ]
+        read_only_fields = fields
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        live = JobRunner.live_progress(instance)
+        if live is not None:
+            data['phase'], data['progress'] = live
+        return data
@@ -0,0 +1,28 @@
+"""
+Background Job Views - Polling and cancellation of background jobs
+"""
+from rest_framework import permissions, viewsets
+from rest_framework.decorators import action
+from rest_framework.response import Response
+
+from .job_models import BackgroundJob
+from .job_serializers import BackgroundJobSerializer
+from .jobs import JobRunner
+
+
+class BackgroundJobViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    ViewSet for polling background jobs.
+
+    GET /jobs/{id}/ returns status, phase, progress and the result once done.
+    POST /jobs/{id}/cancel/ requests cancellation.
+    """
+    queryset = BackgroundJob.objects.select_related('created_by')
+    serializer_class = BackgroundJobSerializer
+    permission_classes = [permissions.IsAdminUser]
+    filterset_fields = ['job_type', 'status']
+
+    @action(detail=True, methods=['post'])
+    def cancel(self, request, pk=None):
+        job = JobRunner.cancel(self.get_object())
+        return Response(self.get_serializer(job).data)
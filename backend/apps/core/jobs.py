@@ -0,0 +1,238 @@
+"""
+Background Job Runner - Runs long operations off the request thread
+
+Jobs are stored as BackgroundJob rows and executed by a small thread pool
+inside the server process; no external broker is needed. Handlers are
+registered per job type and receive a JobContext for progress reporting
+and cancellation.
+
+Live progress is also kept in memory, because handlers that run inside a
+database transaction (e.g. restore) cannot publish progress rows that other
+connections can read until the transaction commits.
+"""
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional, Tuple
+
+from django.conf import settings
+from django.db import close_old_connections, connection
+from django.utils import timezone
+
+from .exceptions import BusinessException, NotFoundException
+from .job_models import BackgroundJob
+
+logger = logging.getLogger('apps.core.jobs')
+
+# Minimum seconds between progress writes to the database
+PROGRESS_WRITE_INTERVAL = 0.5
+
+_HANDLERS: Dict[str, Tuple[Callable, bool]] = {}
+_LIVE_PROGRESS: Dict[int, Tuple[str, int]] = {}
+_CANCEL_EVENTS: Dict[int, threading.Event] = {}
+_STATE_LOCK = threading.Lock()
+_EXCLUSIVE_LOCK = threading.Lock()
+_EXECUTOR: Optional[ThreadPoolExecutor] = None
+_PROCESS_STARTED_AT = timezone.now()
+
+
+class JobCancelled(Exception):
+    """Raised inside a handler when the job was cancelled."""
+
+
+def register_job(job_type: str, exclusive: bool = False):
+    """
+    Register a handler for a job type.
+
+    Args:
+        job_type: Name stored in BackgroundJob.job_type
+        exclusive: Never run at the same time as another exclusive job
+            (backup and restore must not overlap)
+    """
+    def decorator(func: Callable[['JobContext'], Optional[Dict]]):
+        _HANDLERS[job_type] = (func, exclusive)
+        return func
+    return decorator
+
+
+class JobContext:
+    """Passed to job handlers for parameters, progress and cancellation."""
+
+    def __init__(self, job: BackgroundJob):
+        self.job = job
+        self.params = job.params or {}
+        self._last_write = 0.0
+
+    def progress(self, phase: str, percent: int) -> None:
+        """Report progress; raises JobCancelled when cancellation was requested."""
+        percent = max(0, min(100, int(percent)))
+        with _STATE_LOCK:
+            _LIVE_PROGRESS[self.job.pk] = (phase, percent)
+
+        now = time.monotonic()
+        if not connection.in_atomic_block and now - self._last_write >= PROGRESS_WRITE_INTERVAL:
+            self._last_write = now
+            BackgroundJob.objects.filter(pk=self.job.pk).update(
+                phase=phase[:100], progress=percent, updated_at=timezone.now()
+            )
+        self.check_cancelled()
+
+    def check_cancelled(self) -> None:
+        event = _CANCEL_EVENTS.get(self.job.pk)
+        if event is not None and event.is_set():
+            raise JobCancelled()
+        if not connection.in_atomic_block and BackgroundJob.objects.filter(
+            pk=self.job.pk, cancel_requested=True
+        ).exists():
+            raise JobCancelled()
+
+    def set_artifact(self, artifact: str) -> None:
+        self.job.artifact = artifact
+
+
+class JobRunner:
+    """Submits, runs and cancels background jobs."""
+
+    @staticmethod
+    def submit(job_type: str, params: Dict = None, user=None) -> BackgroundJob:
+        """
+        Create a job and queue it on the worker pool.
+
+        With BACKGROUND_JOBS_EAGER enabled (tests) the job runs immediately
+        on the calling thread.
+        """
+        if job_type not in _HANDLERS:
+            raise NotFoundException('نوع المهمة', job_type)
+
+        job = BackgroundJob.objects.create(
+            job_type=job_type,
+            params=params or {},
+            created_by=user if getattr(user, 'is_authenticated', False) else None,
+        )
+        with _STATE_LOCK:
+            _CANCEL_EVENTS[job.pk] = threading.Event()
+
+        if getattr(settings, 'BACKGROUND_JOBS_EAGER', False):
+            JobRunner.run_job(job.pk)
+            job.refresh_from_db()
+        else:
+            JobRunner._get_executor().submit(JobRunner._run_in_worker, job.pk)
+        return job
+
+    @staticmethod
+    def cancel(job: BackgroundJob) -> BackgroundJob:
+        """Request cancellation; pending jobs are cancelled immediately."""
+        if job.is_finished:
+            return job
+        # Conditional updates: the worker may start or finish the job meanwhile,
+        # and its status must not be overwritten from this (possibly stale) copy
+        now = timezone.now()
+        jobs = BackgroundJob.objects.filter(pk=job.pk)
+        jobs.filter(status=BackgroundJob.Status.PENDING).update(
+            status=BackgroundJob.Status.CANCELLED, cancel_requested=True, finished_at=now, updated_at=now
+        )
+        jobs.filter(
+            status__in=[BackgroundJob.Status.PENDING, BackgroundJob.Status.RUNNING]
+        ).update(cancel_requested=True, updated_at=now)
+        event = _CANCEL_EVENTS.get(job.pk)
+        if event is not None:
+            event.set()
+        job.refresh_from_db()
+        return job
+
+    @staticmethod
+    def live_progress(job: BackgroundJob) -> Optional[Tuple[str, int]]:
+        """In-memory (phase, percent) of a running job, if this process runs it."""
+        if job.status != BackgroundJob.Status.RUNNING:
+            return None
+        with _STATE_LOCK:
+            return _LIVE_PROGRESS.get(job.pk)
+
+    @staticmethod
+    def run_job(job_id: int) -> None:
+        """Execute a job on the current thread and record its outcome."""
+        job = BackgroundJob.objects.get(pk=job_id)
+        if job.is_finished:
+            return
+        handler, exclusive = _HANDLERS[job.job_type]
+        context = JobContext(job)
+
+        lock = _EXCLUSIVE_LOCK if exclusive else None
+        if lock is not None:
+            lock.acquire()
+        started_at = timezone.now()
+        # Only a pending job starts; one cancelled while it waited stays cancelled
+        if not BackgroundJob.objects.filter(pk=job.pk, status=BackgroundJob.Status.PENDING).update(
+            status=BackgroundJob.Status.RUNNING, started_at=started_at, updated_at=started_at
+        ):
+            if lock is not None:
+                lock.release()
+            with _STATE_LOCK:
+                _CANCEL_EVENTS.pop(job.pk, None)
+            return
+        job.status = BackgroundJob.Status.RUNNING
+        job.started_at = started_at
+        try:
+            context.check_cancelled()
+            job.result = handler(context)
+            job.status = BackgroundJob.Status.SUCCEEDED
+            job.phase = 'done'
+            job.progress = 100
+        except JobCancelled:
+            job.status = BackgroundJob.Status.CANCELLED
+            job.cancel_requested = True
+        except BusinessException as e:
+            job.status = BackgroundJob.Status.FAILED
+            job.error = e.message
+            job.result = {'code': e.code}
+        except Exception as e:
+            logger.exception("Background job %s (%s) failed", job.pk, job.job_type)
+            job.status = BackgroundJob.Status.FAILED
+            job.error = str(e)
+        finally:
+            if lock is not None:
+                lock.release()
+            live = _LIVE_PROGRESS.get(job.pk)
+            if live and job.status != BackgroundJob.Status.SUCCEEDED:
+                job.phase, job.progress = live[0][:100], live[1]
+            job.finished_at = timezone.now()
+            # A full save re-creates the row if a legacy restore flushed it
+            job.save()
+            with _STATE_LOCK:
+                _LIVE_PROGRESS.pop(job.pk, None)
+                _CANCEL_EVENTS.pop(job.pk, None)
+
+    @staticmethod
+    def _run_in_worker(job_id: int) -> None:
+        close_old_connections()
+        try:
+            JobRunner.run_job(job_id)
+        except Exception:
+            logger.exception("Background job %s could not be run", job_id)
+        finally:
+            connection.close()
+
+    @staticmethod
+    def _get_executor() -> ThreadPoolExecutor:
+        global _EXECUTOR
+        with _STATE_LOCK:
+            if _EXECUTOR is None:
+                JobRunner._fail_interrupted_jobs()
+                _EXECUTOR = ThreadPoolExecutor(
+                    max_workers=getattr(settings, 'BACKGROUND_JOB_WORKERS', 2),
+                    thread_name_prefix='ams-job',
+                )
+            return _EXECUTOR
+
+    @staticmethod
+    def _fail_interrupted_jobs() -> None:
+        """Jobs left unfinished by a previous server process can never complete."""
+        BackgroundJob.objects.filter(
+            status__in=[BackgroundJob.Status.PENDING, BackgroundJob.Status.RUNNING],
+            created_at__lt=_PROCESS_STARTED_AT,
+        ).update(
+            status=BackgroundJob.Status.FAILED,
+            error='توقفت المهمة بسبب إعادة تشغيل الخادم',
+            finished_at=timezone.now(),
+        )
@@ -0,0 +1,64 @@
+"""
+Management command to time service entry points and emit JSON
+"""
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.core.benchmark import (
+    BENCHMARK_PERIOD_DAYS, BENCHMARK_REPEAT, REGRESSION_THRESHOLD, compare, run_benchmarks
+)
+
+
+class Command(BaseCommand):
+    help = 'Time and count queries for report, sales, inventory and purchase services'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=BENCHMARK_REPEAT,
+                            help='Repetitions per benchmark')
+        parser.add_argument('--only', action='append', metavar='NAME',
+                            help='Run only benchmarks whose name contains NAME (repeatable)')
+        parser.add_argument('--period-days', type=int, default=BENCHMARK_PERIOD_DAYS,
+                            help='Days covered by report benchmarks')
+        parser.add_argument('--output', metavar='FILE', help='Write the JSON here instead of stdout')
+        parser.add_argument('--baseline', metavar='FILE',
+                            help='Earlier bench output to compare against')
+        parser.add_argument('--threshold', type=float, default=REGRESSION_THRESHOLD,
+                            help='Percent slowdown counted as a regression')
+        parser.add_argument('--fail-on-regression', action='store_true',
+                            help='Exit with an error when a regression is found')
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options['baseline']:
+            try:
+                with open(options['baseline'], encoding='utf-8') as f:
+                    baseline = json.load(f)
+            except (OSError, ValueError) as e:
+                raise CommandError(f'Cannot read baseline: {e}')
+
+        try:
+            report = run_benchmarks(
+                repeat=options['repeat'],
+                only=options['only'],
+                period_days=options['period_days'],
+                log=self.stderr.write,
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        regressions = compare(report, baseline, options['threshold']) if baseline else []
+
+        output = json.dumps(report, indent=2, ensure_ascii=False)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as f:
+                f.write(output)
+            self.stderr.write(f"Wrote {len(report['results'])} results to {options['output']}")
+        else:
+            self.stdout.write(output)
+
+        if regressions:
+            message = f"Regressions: {', '.join(regressions)}"
+            if options['fail_on_regression']:
+                raise CommandError(message)
+            self.stderr.write(self.style.WARNING(message))
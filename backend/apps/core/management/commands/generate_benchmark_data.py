@@ -0,0 +1,74 @@
+"""
+Management command to bulk-generate a production-scale benchmark dataset
+"""
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from apps.core.benchmark_data import BENCHMARK_BATCH_SIZE, BenchmarkDataGenerator
+
+
+class Command(BaseCommand):
+    help = 'Bulk-create a deterministic synthetic dataset for benchmarking'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', type=int, default=42, help='Random seed')
+        parser.add_argument('--products', type=int, default=2000)
+        parser.add_argument('--customers', type=int, default=500)
+        parser.add_argument('--suppliers', type=int, default=50)
+        parser.add_argument('--warehouses', type=int, default=2)
+        parser.add_argument('--categories', type=int, default=40)
+        parser.add_argument('--days', type=int, default=730, help='Days of trading history')
+        parser.add_argument('--invoices-per-day', type=int, default=40)
+        parser.add_argument('--max-items', type=int, default=5, help='Most lines per invoice')
+        parser.add_argument('--purchase-orders-per-week', type=int, default=10)
+        parser.add_argument('--expenses-per-day', type=int, default=3)
+        parser.add_argument('--return-rate', type=float, default=0.02,
+                            help='Share of invoice lines returned')
+        parser.add_argument('--end-date', help='Last simulated day as YYYY-MM-DD (default: today)')
+        parser.add_argument('--prefix', default='BM', help='Prefix for generated codes and names')
+        parser.add_argument('--batch-size', type=int, default=BENCHMARK_BATCH_SIZE,
+                            help='Rows written per bulk insert')
+
+    def handle(self, *args, **options):
+        end_date = None
+        if options['end_date']:
+            end_date = parse_date(options['end_date'])
+            if end_date is None:
+                raise CommandError(f"Invalid date: {options['end_date']}")
+        if options['days'] < 1 or options['products'] < 1 or options['customers'] < 1 \
+                or options['suppliers'] < 1 or options['warehouses'] < 1:
+            raise CommandError('Volumes must be at least 1')
+
+        generator = BenchmarkDataGenerator(
+            seed=options['seed'],
+            products=options['products'],
+            customers=options['customers'],
+            suppliers=options['suppliers'],
+            warehouses=options['warehouses'],
+            categories=max(1, options['categories']),
+            days=options['days'],
+            invoices_per_day=options['invoices_per_day'],
+            max_items=options['max_items'],
+            purchase_orders_per_week=options['purchase_orders_per_week'],
+            expenses_per_day=options['expenses_per_day'],
+            return_rate=options['return_rate'],
+            end_date=end_date,
+            prefix=options['prefix'],
+            batch_size=options['batch_size'],
+            user=get_user_model().objects.filter(is_superuser=True).order_by('id').first(),
+            log=self.stdout.write,
+        )
+
+        self.stdout.write(f'Generating {options["days"]} days of data...')
+        started = time.perf_counter()
+        counts = generator.generate()
+        elapsed = time.perf_counter() - started
+
+        for model, count in counts.items():
+            self.stdout.write(f'  {model}: {count}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Created {sum(counts.values())} rows in {elapsed:.1f}s'
+        ))
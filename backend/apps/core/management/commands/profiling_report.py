@@ -0,0 +1,121 @@
+"""
+Management command to summarise the query profiling log into a top-N report
+"""
+import json
+import statistics
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+SORT_KEYS = ('total_ms', 'p95_ms', 'avg_ms', 'max_ms', 'avg_queries', 'count')
+
+
+def _percentile(values, percent):
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, round(percent / 100 * len(ordered) + 0.5) - 1))
+    return ordered[index]
+
+
+def summarise(records, kind=None):
+    """Group profile records by kind and name and compute timing statistics."""
+    groups = {}
+    for record in records:
+        if kind and record.get('kind') != kind:
+            continue
+        groups.setdefault((record.get('kind'), record.get('name')), []).append(record)
+
+    rows = []
+    for (record_kind, name), items in groups.items():
+        walls = [item['wall_ms'] for item in items]
+        duplicates = {}
+        for item in items:
+            for entry in item.get('duplicates', []):
+                duplicates[entry['sql']] = max(duplicates.get(entry['sql'], 0), entry['count'])
+        rows.append({
+            'kind': record_kind,
+            'name': name,
+            'count': len(items),
+            'total_ms': round(sum(walls), 1),
+            'avg_ms': round(statistics.mean(walls), 1),
+            'p95_ms': round(_percentile(walls, 95), 1),
+            'max_ms': round(max(walls), 1),
+            'avg_db_ms': round(statistics.mean(item['db_ms'] for item in items), 1),
+            'avg_queries': round(statistics.mean(item['queries'] for item in items), 1),
+            'max_queries': max(item['queries'] for item in items),
+            'slow': sum(1 for item in items if item.get('slow')),
+            'duplicates': [
+                {'sql': sql, 'count': count}
+                for sql, count in sorted(duplicates.items(), key=lambda entry: -entry[1])
+            ],
+        })
+    return rows
+
+
+class Command(BaseCommand):
+    help = 'Report the slowest endpoints and service methods from logs/profiling.log'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--file', help='Profiling log (default: LOGS_DIR/profiling.log)')
+        parser.add_argument('--include-rotated', action='store_true',
+                            help='Also read rotated files (profiling.log.1, .2, ...)')
+        parser.add_argument('--top', type=int, default=20, help='Rows to show')
+        parser.add_argument('--sort', choices=SORT_KEYS, default='total_ms')
+        parser.add_argument('--kind', choices=['request', 'service'],
+                            help='Only requests or only service methods')
+        parser.add_argument('--slow-only', action='store_true',
+                            help='Only profiles marked slow')
+        parser.add_argument('--json', action='store_true', help='Emit JSON')
+
+    def handle(self, *args, **options):
+        path = Path(options['file'] or Path(settings.LOGS_DIR) / 'profiling.log')
+        paths = [path]
+        if options['include_rotated']:
+            paths += sorted(path.parent.glob(f'{path.name}.*'))
+        if not any(p.exists() for p in paths):
+            raise CommandError(f'No profiling log at {path}; set PROFILING_ENABLED to collect one')
+
+        records, skipped = [], 0
+        for p in paths:
+            if not p.exists():
+                continue
+            with open(p, encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        skipped += 1
+                        continue
+                    if options['slow_only'] and not record.get('slow'):
+                        continue
+                    records.append(record)
+
+        rows = sorted(summarise(records, options['kind']), key=lambda row: -row[options['sort']])
+        rows = rows[:options['top']]
+
+        if options['json']:
+            self.stdout.write(json.dumps(
+                {'profiles': len(records), 'skipped_lines': skipped, 'rows': rows},
+                indent=2, ensure_ascii=False
+            ))
+            return
+
+        self.stdout.write(f'{len(records)} profiles, top {len(rows)} by {options["sort"]}')
+        self.stdout.write(
+            f'{"kind":<8} {"name":<48} {"count":>6} {"total ms":>10} {"avg ms":>8} '
+            f'{"p95 ms":>8} {"max ms":>8} {"queries":>8} {"N+1":>4}'
+        )
+        for row in rows:
+            self.stdout.write(
+                f'{row["kind"]:<8} {row["name"][:48]:<48} {row["count"]:>6} {row["total_ms"]:>10} '
+                f'{row["avg_ms"]:>8} {row["p95_ms"]:>8} {row["max_ms"]:>8} {row["avg_queries"]:>8} '
+                f'{len(row["duplicates"]):>4}'
+            )
+        flagged = [row for row in rows if row['duplicates']]
+        if flagged:
+            self.stdout.write('\nRepeated statements (possible N+1):')
+            for row in flagged:
+                for entry in row['duplicates'][:3]:
+                    self.stdout.write(f'  {row["name"]}: x{entry["count"]} {entry["sql"][:150]}')
+        if skipped:
+            self.stdout.write(self.style.WARNING(f'Skipped {skipped} unreadable lines'))
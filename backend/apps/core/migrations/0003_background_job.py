@@ -0,0 +1,41 @@
+# Generated by Django 5.0.14 on 2026-10-18 21:19
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_daily_exchange_rate'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BackgroundJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='تاريخ الإنشاء')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='تاريخ التحديث')),
+                ('job_type', models.CharField(db_index=True, max_length=50, verbose_name='نوع المهمة')),
+                ('status', models.CharField(choices=[('pending', 'في الانتظار'), ('running', 'قيد التنفيذ'), ('succeeded', 'مكتملة'), ('failed', 'فشلت'), ('cancelled', 'ملغاة')], db_index=True, default='pending', max_length=20, verbose_name='الحالة')),
+                ('phase', models.CharField(blank=True, default='', max_length=100, verbose_name='المرحلة')),
+                ('progress', models.PositiveSmallIntegerField(default=0, verbose_name='نسبة التقدم')),
+                ('params', models.JSONField(blank=True, default=dict, verbose_name='المعاملات')),
+                ('result', models.JSONField(blank=True, null=True, verbose_name='النتيجة')),
+                ('artifact', models.CharField(blank=True, default='', max_length=255, verbose_name='الملف الناتج')),
+                ('error', models.TextField(blank=True, default='', verbose_name='الخطأ')),
+                ('cancel_requested', models.BooleanField(default=False, verbose_name='طلب الإلغاء')),
+                ('started_at', models.DateTimeField(blank=True, null=True, verbose_name='وقت البدء')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='وقت الانتهاء')),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='background_jobs', to=settings.AUTH_USER_MODEL, verbose_name='أنشئ بواسطة')),
+            ],
+            options={
+                'verbose_name': 'مهمة خلفية',
+                'verbose_name_plural': 'المهام الخلفية',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
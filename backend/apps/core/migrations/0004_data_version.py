@@ -0,0 +1,26 @@
+# Generated by Django 5.0.14 on 2026-10-18 22:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_background_job'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DataVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=50, unique=True, verbose_name='المفتاح')),
+                ('version', models.BigIntegerField(default=0, verbose_name='الإصدار')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='تاريخ التحديث')),
+            ],
+            options={
+                'verbose_name': 'إصدار البيانات',
+                'verbose_name_plural': 'إصدارات البيانات',
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.0.14 on 2026-10-18 22:53
+
+import django.core.serializers.json
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_data_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChangeEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('event_type', models.CharField(db_index=True, max_length=50, verbose_name='نوع الحدث')),
+                ('payload', models.JSONField(default=dict, encoder=django.core.serializers.json.DjangoJSONEncoder, verbose_name='البيانات')),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True, verbose_name='تاريخ الإنشاء')),
+            ],
+            options={
+                'verbose_name': 'حدث تغيير',
+                'verbose_name_plural': 'أحداث التغيير',
+                'ordering': ['id'],
+            },
+        ),
+    ]
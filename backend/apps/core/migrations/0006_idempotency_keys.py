@@ -0,0 +1,38 @@
+# Generated by Django 5.0.14 on 2026-10-18 23:47
+
+import django.core.serializers.json
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_change_events'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IdempotencyKey',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=100, verbose_name='المفتاح')),
+                ('request_hash', models.CharField(max_length=64, verbose_name='بصمة الطلب')),
+                ('status_code', models.PositiveSmallIntegerField(blank=True, null=True, verbose_name='رمز الاستجابة')),
+                ('response_body', models.JSONField(blank=True, encoder=django.core.serializers.json.DjangoJSONEncoder, null=True, verbose_name='الاستجابة')),
+                ('created_at', models.DateTimeField(verbose_name='تاريخ الإنشاء')),
+                ('expires_at', models.DateTimeField(db_index=True, verbose_name='تاريخ الانتهاء')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='المستخدم')),
+            ],
+            options={
+                'verbose_name': 'مفتاح عدم التكرار',
+                'verbose_name_plural': 'مفاتيح عدم التكرار',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='idempotencykey',
+            constraint=models.UniqueConstraint(fields=('user', 'key'), name='core_idempotency_user_key'),
+        ),
+    ]
@@ -1,6 +1,23 @@
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.pagination import CursorPagination, PageNumberPagination
 
 
 class StandardResultsSetPagination(PageNumberPagination):
     page_size_query_param = 'page_size'
     max_page_size = 1000
+
+
+class CreatedAtCursorPagination(CursorPagination):
+    """
+    Keyset pagination on (created_at, id), newest first.
+
+    Pages are fetched with ``created_at < <cursor>`` instead of OFFSET and
+    no COUNT(*) is issued, so deep pages cost the same as the first one.
+    """
+    ordering = ('-created_at', '-id')
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+
+    def get_ordering(self, request, queryset, view):
+        # Cursors are only valid for the fixed keyset ordering, so
+        # ?ordering= from OrderingFilter is ignored here
+        return self.ordering
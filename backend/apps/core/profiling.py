@@ -0,0 +1,200 @@
+"""
+Query Profiling - Per-request and per-service SQL and timing profiles
+
+Opt-in (settings.PROFILING_ENABLED). While a profile is open every SQL
+statement on the thread's connection is timed through a database execute
+wrapper. A finished profile records the wall time, query count, total DB
+time, the slowest statements and statements repeated with only their
+parameters changing (N+1 fingerprints).
+
+Profiles are written as one JSON object per line to the 'apps.profiling'
+logger (logs/profiling.log); the ``profiling_report`` command aggregates
+that file. In DEBUG mode the request profile is also returned in the
+X-Query-Profile and Server-Timing response headers.
+"""
+import json
+import logging
+import re
+import time
+from contextlib import contextmanager
+from functools import wraps
+from typing import Any, Callable, Dict, List, Optional
+
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+
+logger = logging.getLogger('apps.profiling')
+
+# Requests or service calls at least this slow (ms) are marked slow
+PROFILING_SLOW_MS = 500
+
+# A statement repeated this many times in one profile is reported as N+1
+PROFILING_DUPLICATE_THRESHOLD = 5
+
+# Slowest statements kept per profile
+PROFILING_SLOWEST = 5
+
+# Longest SQL text written to the log
+PROFILING_SQL_MAX_LENGTH = 500
+
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b|%s|\?")
+_IN_LISTS = re.compile(r'\((?:\s*\?\s*,)+\s*\?\s*\)')
+_SPACES = re.compile(r'\s+')
+
+
+def profiling_enabled() -> bool:
+    return getattr(settings, 'PROFILING_ENABLED', False)
+
+
+def fingerprint(sql: str) -> str:
+    """SQL with literals, parameters and IN lists replaced, for grouping repeats."""
+    sql = _LITERALS.sub('?', sql)
+    sql = _IN_LISTS.sub('(?...)', sql)
+    return _SPACES.sub(' ', sql).strip()
+
+
+class QueryProfile:
+    """Statements and timings collected while a profile is open."""
+
+    def __init__(self, kind: str, name: str):
+        self.kind = kind
+        self.name = name
+        self.statements: List[tuple] = []
+        self.started = time.perf_counter()
+        self.wall_ms: Optional[float] = None
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.statements.append((sql, (time.perf_counter() - started) * 1000))
+
+    def finish(self):
+        self.wall_ms = (time.perf_counter() - self.started) * 1000
+
+    @property
+    def query_count(self) -> int:
+        return len(self.statements)
+
+    @property
+    def db_ms(self) -> float:
+        return sum(duration for _, duration in self.statements)
+
+    def duplicates(self) -> List[Dict[str, Any]]:
+        counts: Dict[str, int] = {}
+        for sql, _ in self.statements:
+            key = fingerprint(sql)
+            counts[key] = counts.get(key, 0) + 1
+        threshold = getattr(settings, 'PROFILING_DUPLICATE_THRESHOLD', PROFILING_DUPLICATE_THRESHOLD)
+        return sorted(
+            ({'sql': sql[:PROFILING_SQL_MAX_LENGTH], 'count': count}
+             for sql, count in counts.items() if count >= threshold),
+            key=lambda entry: -entry['count']
+        )
+
+    def slowest(self) -> List[Dict[str, Any]]:
+        ranked = sorted(self.statements, key=lambda statement: -statement[1])[:PROFILING_SLOWEST]
+        return [{'sql': sql[:PROFILING_SQL_MAX_LENGTH], 'ms': round(ms, 3)} for sql, ms in ranked]
+
+    def as_dict(self, **extra) -> Dict[str, Any]:
+        wall_ms = self.wall_ms if self.wall_ms is not None else 0.0
+        return {
+            'timestamp': timezone.now().isoformat(),
+            'kind': self.kind,
+            'name': self.name,
+            'wall_ms': round(wall_ms, 3),
+            'db_ms': round(self.db_ms, 3),
+            'queries': self.query_count,
+            'slow': wall_ms >= getattr(settings, 'PROFILING_SLOW_MS', PROFILING_SLOW_MS),
+            'duplicates': self.duplicates(),
+            'slowest': self.slowest(),
+            **extra,
+        }
+
+    def header(self) -> str:
+        return (f'queries={self.query_count}; db_ms={self.db_ms:.1f}; '
+                f'wall_ms={self.wall_ms or 0:.1f}; duplicates={len(self.duplicates())}')
+
+
+@contextmanager
+def profile_block(kind: str, name: str):
+    """Collect a profile for the enclosed code (statements on this thread only)."""
+    profile = QueryProfile(kind, name)
+    try:
+        with connection.execute_wrapper(profile):
+            yield profile
+    finally:
+        profile.finish()
+
+
+def write_profile(profile: QueryProfile, **extra) -> None:
+    logger.info(json.dumps(profile.as_dict(**extra), ensure_ascii=False, default=str))
+
+
+def profile_service(func: Callable) -> Callable:
+    """
+    Decorator that profiles a service method when profiling is enabled.
+
+    Applied by handle_service_error, so every service entry point is
+    covered; it costs one settings lookup per call when disabled.
+    """
+    name = func.__qualname__
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        if not profiling_enabled():
+            return func(*args, **kwargs)
+        profile = QueryProfile('service', name)
+        try:
+            with connection.execute_wrapper(profile):
+                return func(*args, **kwargs)
+        finally:
+            profile.finish()
+            write_profile(profile)
+
+    return wrapper
+
+
+class QueryProfilingMiddleware:
+    """
+    Profiles each request when settings.PROFILING_ENABLED is true.
+
+    Requests are named by method and URL name (e.g. ``POST invoice-confirm``)
+    so the report groups every call of an endpoint together.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not profiling_enabled():
+            return self.get_response(request)
+
+        with profile_block('request', request.path) as profile:
+            response = self.get_response(request)
+        profile.name = self._endpoint(request)
+
+        user = getattr(request, 'user', None)
+        write_profile(
+            profile,
+            method=request.method,
+            path=request.path,
+            status=response.status_code,
+            user_id=user.pk if user is not None and user.is_authenticated else None,
+        )
+        if settings.DEBUG:
+            response['X-Query-Profile'] = profile.header()
+            response['Server-Timing'] = (
+                f'db;dur={profile.db_ms:.1f};desc="{profile.query_count} queries", '
+                f'app;dur={profile.wall_ms:.1f}'
+            )
+        return response
+
+    @staticmethod
+    def _endpoint(request) -> str:
+        match = getattr(request, 'resolver_match', None)
+        if match is not None and (match.view_name or match.route):
+            return f'{request.method} {match.view_name or match.route}'
+        return f'{request.method} {request.path}'
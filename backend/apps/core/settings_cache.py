@@ -0,0 +1,216 @@
+"""
+Settings Cache - Process-local copy of system settings, currencies and tax rates
+
+The three settings tables are small and read on nearly every request (app
+context, price conversion, tax defaults), so each worker process keeps one
+snapshot of all of them. The snapshot is tagged with a version stamp stored
+in the database (``DataVersion`` key 'settings'); a worker re-reads the
+stamp at most every SETTINGS_CACHE_CHECK_INTERVAL seconds and reloads the
+snapshot when it moved. Saves and deletes of SystemSettings, Currency and
+TaxRate bump the stamp once per committed transaction, so every worker sees
+the change on its next check. Snapshots are also reloaded after
+SETTINGS_CACHE_MAX_AGE seconds, covering writes that send no signals
+(``QuerySet.update``, restores, manual SQL).
+
+Business code reads settings through ``SettingsCache``'s typed accessors
+instead of querying the tables.
+"""
+import copy
+import threading
+import time
+from decimal import Decimal, InvalidOperation
+from typing import Dict, List, Optional
+
+from django.conf import settings as django_settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .backup import backup_restored
+from .settings_models import Currency, SystemSettings, TaxRate
+from .versioning import increment_version, read_version
+
+SETTINGS_VERSION_KEY = 'settings'
+
+# Seconds a worker trusts its snapshot before re-reading the version stamp
+SETTINGS_CACHE_CHECK_INTERVAL = 2.0
+
+# Seconds a snapshot is used at most, even when the stamp did not move
+SETTINGS_CACHE_MAX_AGE = 300
+
+# Setting values read as true by get_bool
+TRUE_VALUES = frozenset({'1', 'true', 'yes', 'on'})
+
+
+class SettingsSnapshot:
+    """All settings rows as of one version of the stamp."""
+
+    __slots__ = (
+        'version', 'loaded_at', 'values', 'currencies', 'primary_currency', 'default_tax_rate', 'tax_enabled',
+    )
+
+    def __init__(self, version: int):
+        self.version = version
+        self.loaded_at = time.monotonic()
+        self.values: Dict[str, str] = dict(SystemSettings.objects.values_list('key', 'value'))
+        self.currencies: Dict[str, Currency] = {
+            currency.code: currency for currency in Currency.objects.all()
+        }
+        # Meta ordering puts the primary first, matching ``.filter(...).first()``
+        self.primary_currency: Optional[Currency] = next(
+            (c for c in self.currencies.values() if c.is_primary and c.is_active), None
+        )
+        tax_rates = list(TaxRate.objects.all())
+        default = next((t for t in tax_rates if t.is_default and t.is_active), None)
+        self.default_tax_rate: Decimal = default.rate if default else Decimal('0.00')
+        self.tax_enabled: bool = any(t.is_active and t.rate > 0 for t in tax_rates)
+
+
+_lock = threading.Lock()
+_state = {'snapshot': None, 'checked_at': 0.0}
+# Per-thread flag: settings were written in the still-open transaction
+_local = threading.local()
+
+
+def _check_interval() -> float:
+    return getattr(django_settings, 'SETTINGS_CACHE_CHECK_INTERVAL', SETTINGS_CACHE_CHECK_INTERVAL)
+
+
+def _snapshot() -> SettingsSnapshot:
+    if getattr(_local, 'dirty', False):
+        if transaction.get_connection().in_atomic_block:
+            # Uncommitted writes are visible to this transaction only; never cache them
+            return SettingsSnapshot(read_version(SETTINGS_VERSION_KEY))
+        _local.dirty = False
+
+    now = time.monotonic()
+    snapshot = _state['snapshot']
+    if snapshot is not None and now - _state['checked_at'] < _check_interval():
+        return snapshot
+
+    version = read_version(SETTINGS_VERSION_KEY)
+    if snapshot is None or snapshot.version != version or now - snapshot.loaded_at >= SETTINGS_CACHE_MAX_AGE:
+        snapshot = SettingsSnapshot(version)
+    with _lock:
+        _state['snapshot'] = snapshot
+        _state['checked_at'] = now
+    return snapshot
+
+
+def _committed() -> None:
+    increment_version(SETTINGS_VERSION_KEY)
+    _local.dirty = False
+    with _lock:
+        _state['snapshot'] = None
+
+
+class SettingsCache:
+    """
+    Service class for cached settings, currency and tax lookups.
+
+    Returned Currency instances are copies; changing them does not change
+    the cache.
+    """
+
+    @staticmethod
+    def get(key: str, default: Optional[str] = None) -> Optional[str]:
+        """Raw value of a system setting."""
+        return _snapshot().values.get(key, default)
+
+    @staticmethod
+    def get_bool(key: str, default: bool = False) -> bool:
+        value = SettingsCache.get(key)
+        if value is None:
+            return default
+        return value.strip().lower() in TRUE_VALUES
+
+    @staticmethod
+    def get_int(key: str, default: int = 0) -> int:
+        value = SettingsCache.get(key)
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            return default
+
+    @staticmethod
+    def get_decimal(key: str, default: Decimal = Decimal('0')) -> Decimal:
+        value = SettingsCache.get(key)
+        try:
+            return Decimal(value)
+        except (TypeError, ValueError, InvalidOperation):
+            return default
+
+    @staticmethod
+    def primary_currency() -> Optional[Currency]:
+        """The active primary currency, or None."""
+        currency = _snapshot().primary_currency
+        return copy.copy(currency) if currency is not None else None
+
+    @staticmethod
+    def currency(code: str) -> Optional[Currency]:
+        """Currency by code (active or not), or None."""
+        currency = _snapshot().currencies.get(code)
+        return copy.copy(currency) if currency is not None else None
+
+    @staticmethod
+    def active_currencies() -> List[Currency]:
+        return [copy.copy(c) for c in _snapshot().currencies.values() if c.is_active]
+
+    @staticmethod
+    def convert(amount: Decimal, from_currency, to_currency) -> Decimal:
+        """Convert amount between currencies (codes or instances); see Currency.convert."""
+        return Currency.convert(amount, from_currency, to_currency)
+
+    @staticmethod
+    def default_tax_rate() -> Decimal:
+        """Rate of the active default tax, or 0.00."""
+        return _snapshot().default_tax_rate
+
+    @staticmethod
+    def tax_enabled() -> bool:
+        """Whether any active tax rate is above zero."""
+        return _snapshot().tax_enabled
+
+    @staticmethod
+    def version() -> int:
+        return _snapshot().version
+
+    @staticmethod
+    def invalidate() -> None:
+        """
+        Drop this worker's snapshot and bump the stamp when the current
+        transaction commits, so other workers reload too.
+
+        Repeated calls inside one transaction are coalesced into one bump.
+        """
+        with _lock:
+            _state['snapshot'] = None
+        connection = transaction.get_connection()
+        if connection.in_atomic_block:
+            _local.dirty = True
+            if any(entry[1] is _committed for entry in connection.run_on_commit):
+                return
+        transaction.on_commit(_committed)
+
+    @staticmethod
+    def clear() -> None:
+        """Drop this worker's snapshot without bumping the stamp."""
+        _local.dirty = False
+        with _lock:
+            _state['snapshot'] = None
+            _state['checked_at'] = 0.0
+
+
+@receiver(post_save, sender=SystemSettings)
+@receiver(post_delete, sender=SystemSettings)
+@receiver(post_save, sender=Currency)
+@receiver(post_delete, sender=Currency)
+@receiver(post_save, sender=TaxRate)
+@receiver(post_delete, sender=TaxRate)
+def _settings_changed(sender, **kwargs):
+    SettingsCache.invalidate()
+
+
+@receiver(backup_restored)
+def _backup_restored(sender, **kwargs):
+    SettingsCache.invalidate()
@@ -35,11 +35,9 @@ class SystemSettings(TimeStampedModel):
 
     @classmethod
     def get_setting(cls, key: str, default=None):
-        """Get a setting value by key."""
-        try:
-            return cls.objects.get(key=key).value
-        except cls.DoesNotExist:
-            return default
+        """Get a setting value by key (cached, see SettingsCache)."""
+        from .settings_cache import SettingsCache
+        return SettingsCache.get(key, default)
 
     @classmethod
     def set_setting(cls, key: str, value: str, description: str = ''):
@@ -109,8 +107,17 @@ class Currency(TimeStampedModel):
 
     @classmethod
     def get_primary(cls):
-        """Get the primary currency."""
-        return cls.objects.filter(is_primary=True, is_active=True).first()
+        """Get the primary currency (cached, see SettingsCache)."""
+        from .settings_cache import SettingsCache
+        return SettingsCache.primary_currency()
+
+    @classmethod
+    def _cached(cls, code: str):
+        from .settings_cache import SettingsCache
+        currency = SettingsCache.currency(code)
+        if currency is None:
+            raise cls.DoesNotExist(f"Currency matching code '{code}' does not exist.")
+        return currency
 
     @classmethod
     def convert(cls, amount: Decimal, from_currency, to_currency) -> Decimal:
@@ -125,9 +132,9 @@ class Currency(TimeStampedModel):
         
         # Convert to primary currency first, then to target
         if isinstance(from_currency, str):
-            from_currency = cls.objects.get(code=from_currency)
+            from_currency = cls._cached(from_currency)
         if isinstance(to_currency, str):
-            to_currency = cls.objects.get(code=to_currency)
+            to_currency = cls._cached(to_currency)
         
         # Validate exchange rates are positive and non-zero
         if from_currency.exchange_rate <= 0:
@@ -221,11 +228,12 @@ class TaxRate(TimeStampedModel):
 
     @classmethod
     def get_default(cls):
-        """Get the default tax rate."""
-        tax = cls.objects.filter(is_default=True, is_active=True).first()
-        return tax.rate if tax else Decimal('0.00')
+        """Get the default tax rate (cached, see SettingsCache)."""
+        from .settings_cache import SettingsCache
+        return SettingsCache.default_tax_rate()
 
     @classmethod
     def is_tax_enabled(cls):
-        """Check if tax is enabled (has active tax rate > 0)."""
-        return cls.objects.filter(is_active=True, rate__gt=0).exists()
+        """Check if tax is enabled (has active tax rate > 0; cached, see SettingsCache)."""
+        from .settings_cache import SettingsCache
+        return SettingsCache.tax_enabled()
@@ -5,6 +5,9 @@ from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from .settings_views import SystemSettingsViewSet, CurrencyViewSet, TaxRateViewSet, AppContextViewSet, DailyExchangeRateViewSet
 from .backup_views import BackupViewSet
+from .job_views import BackgroundJobViewSet
+from .version_views import DataVersionViewSet
+from .event_views import ChangeEventViewSet
 
 router = DefaultRouter()
 router.register('settings', SystemSettingsViewSet)
@@ -13,6 +16,9 @@ router.register('taxes', TaxRateViewSet)
 router.register('app-context', AppContextViewSet, basename='app-context')
 router.register('daily-exchange-rates', DailyExchangeRateViewSet)
 router.register('backups', BackupViewSet, basename='backups')
+router.register('jobs', BackgroundJobViewSet)
+router.register('data-version', DataVersionViewSet, basename='data-version')
+router.register('events', ChangeEventViewSet, basename='events')
 
 urlpatterns = [
     path('', include(router.urls)),
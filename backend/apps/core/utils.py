@@ -139,6 +139,23 @@ def get_date_range(period: str) -> tuple:
 from datetime import timedelta
 
 
+def day_bounds(day: date) -> tuple:
+    """
+    Half-open datetime range [start, end) covering a calendar day.
+    
+    Filtering ``created_at >= start AND created_at < end`` keeps the indexed
+    column bare, unlike ``created_at__date`` which wraps it in a function
+    and forces a scan.
+    
+    Returns:
+        Tuple of timezone-aware (start, end) datetimes
+    """
+    from django.utils import timezone
+    start = timezone.make_aware(datetime.combine(day, datetime.min.time()))
+    end = timezone.make_aware(datetime.combine(day + timedelta(days=1), datetime.min.time()))
+    return start, end
+
+
 def arabic_number(number) -> str:
     """
     Convert Western Arabic numerals to Eastern Arabic numerals.
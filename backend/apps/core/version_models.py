@@ -0,0 +1,33 @@
+"""
+Data Version Models - Change counter for client polling
+"""
+from django.db import models
+
+
+class DataVersion(models.Model):
+    """
+    Counter bumped by every committed business write (invoices, payments,
+    returns, expenses, stock). Clients poll it and only refetch dashboards
+    and lists when it changes.
+    """
+
+    key = models.CharField(
+        max_length=50,
+        unique=True,
+        verbose_name='المفتاح'
+    )
+    version = models.BigIntegerField(
+        default=0,
+        verbose_name='الإصدار'
+    )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name='تاريخ التحديث'
+    )
+
+    class Meta:
+        verbose_name = 'إصدار البيانات'
+        verbose_name_plural = 'إصدارات البيانات'
+
+    def __str__(self):
+        return f"{self.key}: {self.version}"
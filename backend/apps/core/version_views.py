@@ -0,0 +1,21 @@
+"""
+Data Version Views - Cheap change polling for clients
+"""
+from rest_framework import permissions, viewsets
+from rest_framework.response import Response
+
+from .versioning import DataVersionService
+
+
+class DataVersionViewSet(viewsets.ViewSet):
+    """
+    GET /data-version/ returns ``{"version": n}``.
+
+    Clients poll this instead of reloading dashboards and lists; the number
+    only changes when business data was written.
+    """
+
+    permission_classes = [permissions.IsAuthenticated]
+
+    def list(self, request):
+        return Response({'version': DataVersionService.current()})
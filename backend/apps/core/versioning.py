@@ -0,0 +1,95 @@
+"""
+Data Versioning - A change counter that lets clients poll cheaply
+
+Saves and deletes of the tracked models bump a single database counter once
+per committed transaction. Clients poll the counter and only request heavy
+payloads (dashboard, lists) when it moved; servers key caches on it, so any
+number of polling clients cost one computation per change.
+
+Bulk writes (``bulk_create``, ``QuerySet.update``) send no model signals;
+code doing them calls ``DataVersionService.bump()`` itself.
+"""
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save
+
+from .backup import backup_restored
+from .version_models import DataVersion
+
+DATA_VERSION_KEY = 'data'
+
+# Models whose writes change dashboard and list data
+TRACKED_MODELS = (
+    'sales.Invoice',
+    'sales.Payment',
+    'sales.SalesReturn',
+    'sales.Customer',
+    'purchases.PurchaseOrder',
+    'purchases.Supplier',
+    'expenses.Expense',
+    'inventory.Product',
+    'inventory.StockMovement',
+)
+
+
+def increment_version(key: str) -> None:
+    """Increment the counter stored under ``key``, creating it on first use."""
+    updated = DataVersion.objects.filter(key=key).update(version=F('version') + 1)
+    if not updated:
+        try:
+            with transaction.atomic():
+                DataVersion.objects.create(key=key, version=1)
+        except IntegrityError:
+            DataVersion.objects.filter(key=key).update(version=F('version') + 1)
+
+
+def read_version(key: str) -> int:
+    """Current value of the counter stored under ``key`` (0 before the first write)."""
+    return DataVersion.objects.filter(key=key).values_list('version', flat=True).first() or 0
+
+
+def _increment():
+    increment_version(DATA_VERSION_KEY)
+
+
+class DataVersionService:
+    """
+    Service class for the data change counter.
+    """
+
+    @staticmethod
+    def current() -> int:
+        """Current data version (0 before the first write)."""
+        return read_version(DATA_VERSION_KEY)
+
+    @staticmethod
+    def bump() -> None:
+        """
+        Bump the version when the current transaction commits.
+
+        Repeated calls inside one transaction are coalesced into one update;
+        outside a transaction the counter is bumped immediately.
+        """
+        connection = transaction.get_connection()
+        if connection.in_atomic_block and any(
+            entry[1] is _increment for entry in connection.run_on_commit
+        ):
+            return
+        # A failed bump is logged; it must not fail the write that committed
+        transaction.on_commit(_increment, robust=True)
+
+
+def _tracked_model_changed(sender, **kwargs):
+    if kwargs.get('raw'):
+        return
+    DataVersionService.bump()
+
+
+for _label in TRACKED_MODELS:
+    post_save.connect(_tracked_model_changed, sender=_label, dispatch_uid=f'data_version_save_{_label}')
+    post_delete.connect(_tracked_model_changed, sender=_label, dispatch_uid=f'data_version_delete_{_label}')
+
+
+@backup_restored.connect
+def _backup_restored(sender, **kwargs):
+    DataVersionService.bump()
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Category, Unit, ProductUnit, Warehouse, Product, Stock, StockMovement
+from .models import Category, Unit, ProductUnit, Warehouse, Product, Stock, StockMovement, StockReservation
 
 
 @admin.register(Category)
@@ -56,3 +56,12 @@ class StockMovementAdmin(admin.ModelAdmin):
     search_fields = ['product__name', 'reference_number', 'notes']
     readonly_fields = ['created_at']
     ordering = ['-created_at']
+
+
+@admin.register(StockReservation)
+class StockReservationAdmin(admin.ModelAdmin):
+    list_display = ['product', 'warehouse', 'quantity', 'reference_type', 'reference_id', 'status', 'expires_at']
+    list_filter = ['status', 'warehouse', 'reference_type']
+    search_fields = ['product__name', 'product__code']
+    readonly_fields = ['created_at', 'updated_at']
+    ordering = ['-created_at']
@@ -0,0 +1,124 @@
+"""
+Moving-Average Cost - Per product and warehouse, updated on receipt
+
+Every movement that adds stock at a known cost (goods receipts, sales
+returns, invoice cancellations) moves the average cost of its Stock row:
+
+    average = (on_hand * average + quantity * unit_cost) / (on_hand + quantity)
+
+once in USD and once in old Syrian pounds at the document's exchange rate.
+The averages are changed on the locked Stock row in the same pass as the
+quantity, and each change is recorded in AverageCostHistory. Stock leaving
+at the average does not move it, so invoices read the current average from
+the Stock row instead of recomputing it from the movement history.
+"""
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Dict, Iterable, List, Optional
+
+from django.utils import timezone
+
+from apps.core.exceptions import ValidationException
+from apps.core.utils import get_daily_fx
+from .models import AverageCostHistory, Stock
+
+ZERO = Decimal('0')
+
+# Precision of stored averages
+AVERAGE_COST_PLACES = Decimal('0.0001')
+
+
+def _blend(on_hand: Decimal, average: Decimal, quantity: Decimal, unit_cost: Decimal) -> Decimal:
+    # Stock without a known average (or none on hand) takes the new cost
+    if on_hand <= 0 or average <= 0:
+        return unit_cost.quantize(AVERAGE_COST_PLACES, ROUND_HALF_UP)
+    total = on_hand * average + quantity * unit_cost
+    return (total / (on_hand + quantity)).quantize(AVERAGE_COST_PLACES, ROUND_HALF_UP)
+
+
+class AverageCostService:
+    """
+    Service class for moving-average costs.
+    """
+
+    @staticmethod
+    def current_syp_rate() -> Optional[Decimal]:
+        """Today's USD to old-pound rate, used when a document has none."""
+        try:
+            return get_daily_fx(timezone.localdate())[0]
+        except ValidationException:
+            return None
+
+    @staticmethod
+    def receive(stock: Stock, quantity: Decimal, unit_cost: Optional[Decimal],
+                usd_to_syp_old: Optional[Decimal] = None) -> Optional[AverageCostHistory]:
+        """
+        Blend an inbound quantity into the averages of a locked Stock row.
+
+        Must be called before ``stock.quantity`` is increased. The caller
+        saves the Stock row and the returned (unsaved) history record, once
+        its movement exists; see record().
+
+        Args:
+            stock: Stock row, locked for update
+            quantity: Base-unit quantity received
+            unit_cost: USD cost per base unit
+            usd_to_syp_old: Exchange rate of the document
+
+        Returns:
+            History record, or None when the line carries no cost
+        """
+        if quantity <= 0 or not unit_cost or unit_cost <= 0:
+            return None
+        unit_cost = Decimal(unit_cost)
+        on_hand = max(stock.quantity, ZERO)
+        stock.average_cost = _blend(on_hand, stock.average_cost, quantity, unit_cost)
+
+        unit_cost_syp = None
+        if usd_to_syp_old:
+            unit_cost_syp = (unit_cost * usd_to_syp_old).quantize(AVERAGE_COST_PLACES, ROUND_HALF_UP)
+            stock.average_cost_syp = _blend(on_hand, stock.average_cost_syp, quantity, unit_cost_syp)
+
+        return AverageCostHistory(
+            product_id=stock.product_id,
+            warehouse_id=stock.warehouse_id,
+            quantity=quantity,
+            unit_cost=unit_cost,
+            unit_cost_syp=unit_cost_syp,
+            quantity_after=stock.quantity + quantity,
+            average_cost=stock.average_cost,
+            average_cost_syp=stock.average_cost_syp,
+        )
+
+    @staticmethod
+    def record(pairs: Iterable[tuple]) -> None:
+        """Save (history, movement) pairs once the movements are saved."""
+        history = []
+        for entry, movement in pairs:
+            if entry is not None:
+                entry.movement = movement
+                history.append(entry)
+        if history:
+            AverageCostHistory.objects.bulk_create(history)
+
+    @staticmethod
+    def get_average_costs(product_ids: Iterable[int], warehouse_id: int) -> Dict[int, Decimal]:
+        """
+        Current USD average cost per base unit of several products in one
+        warehouse, in one query (products without an average are absent).
+        """
+        product_ids = list(product_ids)
+        if not product_ids:
+            return {}
+        return dict(
+            Stock.objects.filter(
+                warehouse_id=warehouse_id, product_id__in=product_ids, average_cost__gt=0
+            ).values_list('product_id', 'average_cost')
+        )
+
+    @staticmethod
+    def history(product_id: int, warehouse_id: int = None, limit: int = 100) -> List[AverageCostHistory]:
+        """Latest average cost changes of a product, newest first."""
+        entries = AverageCostHistory.objects.filter(product_id=product_id)
+        if warehouse_id:
+            entries = entries.filter(warehouse_id=warehouse_id)
+        return list(entries.order_by('-id')[:limit])
@@ -0,0 +1,194 @@
+"""
+Category Tree - Cached category hierarchy
+
+The whole category table is read with one query and assembled in Python
+from ``parent_id`` links; product counts come from one grouped query. Each
+worker process keeps the result (nested tree, full paths, child and product
+counts) tagged with a version stamp stored in the database (``DataVersion``
+key 'catalog'). A worker re-reads the stamp at most every
+CATEGORY_TREE_CHECK_INTERVAL seconds and rebuilds when it moved; category
+writes, and product writes that change a product's category or whether it
+is counted, bump the stamp when they commit.
+"""
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from apps.core.backup import backup_restored
+from apps.core.versioning import increment_version, read_version
+from .models import Category, Product
+
+CATALOG_VERSION_KEY = 'catalog'
+
+# Seconds a worker trusts its tree before re-reading the version stamp
+CATEGORY_TREE_CHECK_INTERVAL = 2.0
+
+# Seconds a tree is used at most, even when the stamp did not move
+CATEGORY_TREE_MAX_AGE = 600
+
+# Product fields the tree's product counts depend on
+PRODUCT_TREE_FIELDS = ('category_id', 'is_active', 'is_deleted')
+
+PATH_SEPARATOR = ' > '
+
+
+def _build() -> Dict[str, Any]:
+    rows = list(Category.objects.order_by('sort_order', 'name', 'id').values(
+        'id', 'name', 'name_en', 'parent_id', 'is_active', 'is_deleted'
+    ))
+    product_counts = dict(
+        Product.objects.filter(is_active=True, is_deleted=False, category__isnull=False)
+        .values_list('category_id').annotate(count=Count('id')).values_list('category_id', 'count')
+    )
+    by_id = {row['id']: row for row in rows}
+
+    # Full path of every category, walking parents iteratively (cycle-safe)
+    paths: Dict[int, str] = {}
+    for row in rows:
+        chain, seen, current = [], set(), row
+        while current is not None and current['id'] not in seen and current['id'] not in paths:
+            seen.add(current['id'])
+            chain.append(current)
+            current = by_id.get(current['parent_id'])
+        prefix = paths.get(current['id']) if current is not None else None
+        for node in reversed(chain):
+            prefix = f"{prefix}{PATH_SEPARATOR}{node['name']}" if prefix else node['name']
+            paths[node['id']] = prefix
+
+    # Active children per parent, in display order
+    children: Dict[Optional[int], List[int]] = {}
+    for row in rows:
+        if row['is_active'] and not row['is_deleted']:
+            children.setdefault(row['parent_id'], []).append(row['id'])
+
+    def subtree(category_id: int, ancestors: frozenset) -> Dict[str, Any]:
+        row = by_id[category_id]
+        ancestors = ancestors | {category_id}
+        return {
+            'id': row['id'],
+            'name': row['name'],
+            'name_en': row['name_en'],
+            'children': [
+                subtree(child_id, ancestors)
+                for child_id in children.get(category_id, []) if child_id not in ancestors
+            ],
+        }
+
+    return {
+        'tree': [subtree(category_id, frozenset()) for category_id in children.get(None, [])],
+        'paths': paths,
+        'children_counts': {parent_id: len(ids) for parent_id, ids in children.items() if parent_id},
+        'product_counts': product_counts,
+    }
+
+
+_lock = threading.Lock()
+_state = {'data': None, 'version': None, 'loaded_at': 0.0, 'checked_at': None}
+
+
+def _check_interval() -> float:
+    return getattr(settings, 'CATEGORY_TREE_CHECK_INTERVAL', CATEGORY_TREE_CHECK_INTERVAL)
+
+
+def _committed() -> None:
+    increment_version(CATALOG_VERSION_KEY)
+    CategoryTreeService.clear()
+
+
+class CategoryTreeService:
+    """
+    Service class for the cached category hierarchy.
+    """
+
+    @staticmethod
+    def _data() -> Dict[str, Any]:
+        now = time.monotonic()
+        with _lock:
+            data, checked_at = _state['data'], _state['checked_at']
+            cached_version, loaded_at = _state['version'], _state['loaded_at']
+        if data is not None and checked_at is not None and now - checked_at < _check_interval():
+            return data
+
+        version = read_version(CATALOG_VERSION_KEY)
+        if data is None or cached_version != version or now - loaded_at >= CATEGORY_TREE_MAX_AGE:
+            # The stamp is read first, so the tree is never tagged newer than its rows
+            data = _build()
+            with _lock:
+                _state.update(data=data, version=version, loaded_at=now, checked_at=now)
+        else:
+            with _lock:
+                _state['checked_at'] = now
+        return data
+
+    @staticmethod
+    def tree() -> List[Dict[str, Any]]:
+        """Active root categories with nested active children."""
+        return CategoryTreeService._data()['tree']
+
+    @staticmethod
+    def full_path(category_id: int) -> Optional[str]:
+        """Names from the root to the category, joined by ' > '."""
+        return CategoryTreeService._data()['paths'].get(category_id)
+
+    @staticmethod
+    def children_count(category_id: int) -> int:
+        """Number of active child categories."""
+        return CategoryTreeService._data()['children_counts'].get(category_id, 0)
+
+    @staticmethod
+    def products_count(category_id: int) -> int:
+        """Number of active products in the category."""
+        return CategoryTreeService._data()['product_counts'].get(category_id, 0)
+
+    @staticmethod
+    def invalidate() -> None:
+        """
+        Drop this worker's tree and bump the stamp when the current
+        transaction commits, so other workers rebuild too.
+        """
+        CategoryTreeService.clear()
+        # Readers may cache the uncommitted rows meanwhile; the commit drops them again
+        transaction.on_commit(_committed, robust=True)
+
+    @staticmethod
+    def clear() -> None:
+        """Drop this worker's tree without bumping the stamp."""
+        with _lock:
+            _state.update(data=None, checked_at=None)
+
+
+def _product_tree_state(product: Product) -> tuple:
+    # Read from __dict__ so deferred fields are not loaded
+    return tuple(product.__dict__.get(name) for name in PRODUCT_TREE_FIELDS)
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=Product)
+def _catalog_changed(sender, **kwargs):
+    CategoryTreeService.invalidate()
+
+
+@receiver(post_init, sender=Product)
+def _product_loaded(sender, instance, **kwargs):
+    instance._category_tree_state = _product_tree_state(instance)
+
+
+@receiver(post_save, sender=Product)
+def _product_saved(sender, instance, created, **kwargs):
+    state = _product_tree_state(instance)
+    if created or state != getattr(instance, '_category_tree_state', None):
+        instance._category_tree_state = state
+        CategoryTreeService.invalidate()
+
+
+@receiver(backup_restored)
+def _backup_restored(sender, **kwargs):
+    increment_version(CATALOG_VERSION_KEY)
+    CategoryTreeService.clear()
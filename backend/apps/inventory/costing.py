@@ -0,0 +1,462 @@
+"""
+Cost Layer Engine - FIFO and LIFO inventory costing
+
+Every stock movement that adds stock opens a CostLayer; every movement that
+removes stock consumes open layers, oldest first for FIFO and newest first
+for LIFO. Layers are maintained as movements are recorded, so valuation and
+cost of goods sold at any date are aggregates over the layer tables instead
+of a replay of the movement history.
+"""
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from django.db import transaction
+from django.db.models import DecimalField, ExpressionWrapper, F, Sum
+from django.utils import timezone
+
+from apps.core.exceptions import ValidationException
+from .models import CostLayer, CostLayerConsumption, Product, StockMovement
+
+METHODS = (CostLayerConsumption.Method.FIFO, CostLayerConsumption.Method.LIFO)
+
+ZERO = Decimal('0')
+
+# Open layers fetched per query while consuming stock
+LAYER_FETCH_SIZE = 50
+
+# Rows written per bulk insert while rebuilding
+REBUILD_BATCH_SIZE = 5000
+
+
+def _check_method(method: str) -> str:
+    if method not in METHODS:
+        raise ValidationException(f'طريقة التقييم غير مدعومة: {method}', 'method')
+    return method
+
+
+def _value(quantity_field: str) -> ExpressionWrapper:
+    return ExpressionWrapper(
+        F(quantity_field) * F('unit_cost'),
+        output_field=DecimalField(max_digits=28, decimal_places=4),
+    )
+
+
+def _day_start(value) -> datetime:
+    if isinstance(value, datetime):
+        return value
+    return timezone.make_aware(datetime.combine(value, time.min))
+
+
+def movement_delta(movement) -> Decimal:
+    """Signed stock change of a movement (adjustments store the target quantity)."""
+    return movement.balance_after - movement.balance_before
+
+
+class _Layer:
+    """Unsaved layer record used while replaying history."""
+    __slots__ = ('movement_id', 'received_at', 'quantity', 'unit_cost',
+                 'remaining_fifo', 'remaining_lifo', 'pk')
+
+    def __init__(self, movement_id, received_at, quantity, unit_cost):
+        self.movement_id = movement_id
+        self.received_at = received_at
+        self.quantity = quantity
+        self.unit_cost = unit_cost
+        self.remaining_fifo = quantity
+        self.remaining_lifo = quantity
+        self.pk = None
+
+
+class _LayerReplay:
+    """
+    In-memory FIFO/LIFO replay of the movements of one product/warehouse.
+
+    Plain records are used instead of model instances, which are only
+    built when a batch is written; model construction dominates the cost
+    of a rebuild otherwise.
+    """
+
+    def __init__(self, product_id: int, warehouse_id: int, fallback_cost: Decimal):
+        self.product_id = product_id
+        self.warehouse_id = warehouse_id
+        self.fallback_cost = fallback_cost
+        self.layers: List[_Layer] = []
+        # (layer or None, movement_id, method, consumed_at, quantity, unit_cost)
+        self.consumptions: List[tuple] = []
+        self._fifo_index = 0
+        self._lifo_stack: List[_Layer] = []
+
+    def apply(self, movement_id: int, created_at, delta: Decimal, unit_cost: Decimal):
+        if delta > 0:
+            layer = _Layer(movement_id, created_at, delta, unit_cost or self.fallback_cost)
+            self.layers.append(layer)
+            self._lifo_stack.append(layer)
+        elif delta < 0:
+            self._consume_fifo(movement_id, created_at, -delta)
+            self._consume_lifo(movement_id, created_at, -delta)
+
+    def _consume_fifo(self, movement_id, created_at, quantity):
+        fifo = CostLayerConsumption.Method.FIFO
+        layers = self.layers
+        while quantity > 0 and self._fifo_index < len(layers):
+            layer = layers[self._fifo_index]
+            take = min(layer.remaining_fifo, quantity)
+            layer.remaining_fifo -= take
+            quantity -= take
+            self.consumptions.append((layer, movement_id, fifo, created_at, take, layer.unit_cost))
+            if layer.remaining_fifo <= 0:
+                self._fifo_index += 1
+        if quantity > 0:
+            self.consumptions.append((None, movement_id, fifo, created_at, quantity, self.fallback_cost))
+
+    def _consume_lifo(self, movement_id, created_at, quantity):
+        lifo = CostLayerConsumption.Method.LIFO
+        stack = self._lifo_stack
+        while quantity > 0 and stack:
+            layer = stack[-1]
+            take = min(layer.remaining_lifo, quantity)
+            layer.remaining_lifo -= take
+            quantity -= take
+            self.consumptions.append((layer, movement_id, lifo, created_at, take, layer.unit_cost))
+            if layer.remaining_lifo <= 0:
+                stack.pop()
+        if quantity > 0:
+            self.consumptions.append((None, movement_id, lifo, created_at, quantity, self.fallback_cost))
+
+    def layer_models(self) -> List[CostLayer]:
+        return [
+            CostLayer(
+                product_id=self.product_id,
+                warehouse_id=self.warehouse_id,
+                movement_id=layer.movement_id,
+                received_at=layer.received_at,
+                quantity=layer.quantity,
+                unit_cost=layer.unit_cost,
+                remaining_fifo=layer.remaining_fifo,
+                remaining_lifo=layer.remaining_lifo,
+            )
+            for layer in self.layers
+        ]
+
+    def consumption_models(self) -> List[CostLayerConsumption]:
+        # Layers must be saved first so their primary keys are known
+        return [
+            CostLayerConsumption(
+                layer_id=layer.pk if layer is not None else None,
+                movement_id=movement_id,
+                product_id=self.product_id,
+                warehouse_id=self.warehouse_id,
+                method=method,
+                consumed_at=consumed_at,
+                quantity=quantity,
+                unit_cost=unit_cost,
+            )
+            for layer, movement_id, method, consumed_at, quantity, unit_cost in self.consumptions
+        ]
+
+
+class CostLayerService:
+    """
+    Service class for FIFO/LIFO cost layers.
+    """
+
+    @staticmethod
+    def apply_movement(movement: StockMovement, fallback_cost: Decimal = None) -> None:
+        """
+        Update the cost layers for a newly recorded stock movement.
+
+        Stock increases open a layer at the movement unit cost; decreases
+        consume open layers for both FIFO and LIFO.
+
+        Args:
+            movement: The saved StockMovement
+            fallback_cost: Cost used when the movement has no unit cost or
+                stock leaves without an open layer (defaults to the
+                product cost price)
+        """
+        delta = movement_delta(movement)
+        if delta == 0:
+            return
+
+        def cost():
+            if fallback_cost is not None:
+                return fallback_cost
+            return Product.objects.filter(pk=movement.product_id).values_list(
+                'cost_price', flat=True
+            ).first() or ZERO
+
+        if delta > 0:
+            CostLayer.objects.create(
+                product_id=movement.product_id,
+                warehouse_id=movement.warehouse_id,
+                movement=movement,
+                received_at=movement.created_at,
+                quantity=delta,
+                unit_cost=movement.unit_cost or cost(),
+                remaining_fifo=delta,
+                remaining_lifo=delta,
+            )
+            return
+
+        for method in METHODS:
+            CostLayerService._consume(movement, -delta, method, cost)
+
+    @staticmethod
+    def apply_movements(movements: List[StockMovement]) -> None:
+        """
+        Update the cost layers for several saved movements at once.
+
+        Layers for stock increases are bulk inserted; decreases are applied
+        one by one through apply_movement.
+        """
+        inbound = [m for m in movements if movement_delta(m) > 0]
+        uncosted = {m.product_id for m in inbound if not m.unit_cost}
+        costs = dict(
+            Product.objects.filter(pk__in=uncosted).values_list('id', 'cost_price')
+        ) if uncosted else {}
+
+        CostLayer.objects.bulk_create([
+            CostLayer(
+                product_id=m.product_id,
+                warehouse_id=m.warehouse_id,
+                movement=m,
+                received_at=m.created_at,
+                quantity=movement_delta(m),
+                unit_cost=m.unit_cost or costs.get(m.product_id) or ZERO,
+                remaining_fifo=movement_delta(m),
+                remaining_lifo=movement_delta(m),
+            )
+            for m in inbound
+        ])
+        for movement in movements:
+            if movement_delta(movement) < 0:
+                CostLayerService.apply_movement(movement)
+
+    @staticmethod
+    def _consume(movement: StockMovement, quantity: Decimal, method: str,
+                 fallback_cost: Callable[[], Decimal]) -> None:
+        field = f'remaining_{method}'
+        order = ('received_at', 'id') if method == CostLayerConsumption.Method.FIFO \
+            else ('-received_at', '-id')
+        open_layers = CostLayer.objects.select_for_update().filter(
+            product_id=movement.product_id,
+            warehouse_id=movement.warehouse_id,
+            **{f'{field}__gt': 0}
+        ).order_by(*order)
+
+        consumptions = []
+        updated = []
+        offset = 0
+        while quantity > 0:
+            batch = list(open_layers[offset:offset + LAYER_FETCH_SIZE])
+            if not batch:
+                break
+            offset += len(batch)
+            for layer in batch:
+                take = min(getattr(layer, field), quantity)
+                setattr(layer, field, getattr(layer, field) - take)
+                quantity -= take
+                updated.append(layer)
+                consumptions.append(CostLayerConsumption(
+                    layer=layer,
+                    movement=movement,
+                    product_id=movement.product_id,
+                    warehouse_id=movement.warehouse_id,
+                    method=method,
+                    consumed_at=movement.created_at,
+                    quantity=take,
+                    unit_cost=layer.unit_cost,
+                ))
+                if quantity <= 0:
+                    break
+
+        if quantity > 0:
+            consumptions.append(CostLayerConsumption(
+                layer=None,
+                movement=movement,
+                product_id=movement.product_id,
+                warehouse_id=movement.warehouse_id,
+                method=method,
+                consumed_at=movement.created_at,
+                quantity=quantity,
+                unit_cost=fallback_cost(),
+            ))
+
+        if updated:
+            CostLayer.objects.bulk_update(updated, [field])
+        CostLayerConsumption.objects.bulk_create(consumptions)
+
+    @staticmethod
+    def layer_totals(method: str, warehouse_id: int = None, as_of=None,
+                     product_ids: Iterable[int] = None) -> Dict[Tuple[int, int], Tuple[Decimal, Decimal]]:
+        """
+        Quantity and value held in cost layers per (product, warehouse).
+
+        Without ``as_of`` the open remaining quantities are used. With a
+        date or datetime the totals are those at the end of that day:
+        received layer value minus consumed layer value up to that moment.
+        """
+        field = f'remaining_{_check_method(method)}'
+        filters = {}
+        if warehouse_id:
+            filters['warehouse_id'] = warehouse_id
+        if product_ids is not None:
+            filters['product_id__in'] = list(product_ids)
+
+        if as_of is None:
+            rows = CostLayer.objects.filter(**filters, **{f'{field}__gt': 0}).values(
+                'product_id', 'warehouse_id'
+            ).annotate(qty=Sum(field), value=Sum(_value(field))).order_by()
+            return {
+                (r['product_id'], r['warehouse_id']): (r['qty'] or ZERO, r['value'] or ZERO)
+                for r in rows
+            }
+
+        end = _day_start(as_of + timedelta(days=1)) if isinstance(as_of, date) \
+            and not isinstance(as_of, datetime) else as_of
+        inbound = CostLayer.objects.filter(**filters, received_at__lt=end).values(
+            'product_id', 'warehouse_id'
+        ).annotate(qty=Sum('quantity'), value=Sum(_value('quantity'))).order_by()
+        consumed = CostLayerConsumption.objects.filter(
+            **filters, method=method, layer__isnull=False, consumed_at__lt=end
+        ).values('product_id', 'warehouse_id').annotate(
+            qty=Sum('quantity'), value=Sum(_value('quantity'))
+        ).order_by()
+
+        totals = {
+            (r['product_id'], r['warehouse_id']): (r['qty'] or ZERO, r['value'] or ZERO)
+            for r in inbound
+        }
+        for r in consumed:
+            key = (r['product_id'], r['warehouse_id'])
+            qty, value = totals.get(key, (ZERO, ZERO))
+            totals[key] = (qty - (r['qty'] or ZERO), value - (r['value'] or ZERO))
+        return totals
+
+    @staticmethod
+    def get_cogs(method: str, date_from: date = None, date_to: date = None,
+                 warehouse_id: int = None,
+                 source_type: Optional[str] = StockMovement.SourceType.SALE) -> Dict[str, Any]:
+        """
+        Cost of goods sold for a period from the layer consumptions.
+
+        Args:
+            method: 'fifo' or 'lifo'
+            date_from: First day included
+            date_to: Last day included
+            warehouse_id: Optional warehouse filter
+            source_type: Movement source counted (sales by default, None for all)
+        """
+        consumptions = CostLayerConsumption.objects.filter(method=_check_method(method))
+        if date_from:
+            consumptions = consumptions.filter(consumed_at__gte=_day_start(date_from))
+        if date_to:
+            consumptions = consumptions.filter(consumed_at__lt=_day_start(date_to + timedelta(days=1)))
+        if warehouse_id:
+            consumptions = consumptions.filter(warehouse_id=warehouse_id)
+        if source_type:
+            consumptions = consumptions.filter(movement__source_type=source_type)
+
+        rows = consumptions.values('product_id', 'product__name').annotate(
+            qty=Sum('quantity'), cost=Sum(_value('quantity'))
+        ).order_by('product__name')
+
+        items = [
+            {
+                'product_id': r['product_id'],
+                'product_name': r['product__name'],
+                'quantity': r['qty'],
+                'cost': r['cost'],
+            }
+            for r in rows
+        ]
+        return {
+            'method': method,
+            'date_from': date_from,
+            'date_to': date_to,
+            'total_quantity': sum((i['quantity'] for i in items), ZERO),
+            'total_cost': sum((i['cost'] for i in items), ZERO),
+            'items': items,
+        }
+
+    @staticmethod
+    def replay(movements: Iterable[Dict], product_costs: Dict[int, Decimal],
+               flush: Callable[[List[_LayerReplay]], None],
+               batch_size: int = REBUILD_BATCH_SIZE) -> Dict[str, int]:
+        """
+        Replay movements ordered by (product, warehouse, created_at, id).
+
+        Completed product/warehouse groups are handed to ``flush`` once they
+        hold about ``batch_size`` layers and consumptions.
+        """
+        counts = {'movements': 0, 'layers': 0, 'consumptions': 0}
+        groups: List[_LayerReplay] = []
+        pending = 0
+        current: Optional[_LayerReplay] = None
+
+        for m in movements:
+            key = (m['product_id'], m['warehouse_id'])
+            if current is None or (current.product_id, current.warehouse_id) != key:
+                if current is not None:
+                    groups.append(current)
+                    counts['layers'] += len(current.layers)
+                    counts['consumptions'] += len(current.consumptions)
+                    pending += len(current.layers) + len(current.consumptions)
+                    if pending >= batch_size:
+                        flush(groups)
+                        groups, pending = [], 0
+                current = _LayerReplay(key[0], key[1], product_costs.get(key[0], ZERO))
+            current.apply(m['id'], m['created_at'], m['balance_after'] - m['balance_before'], m['unit_cost'])
+            counts['movements'] += 1
+
+        if current is not None:
+            groups.append(current)
+            counts['layers'] += len(current.layers)
+            counts['consumptions'] += len(current.consumptions)
+        if groups:
+            flush(groups)
+        return counts
+
+    @staticmethod
+    @transaction.atomic
+    def rebuild(product_ids: Iterable[int] = None, batch_size: int = REBUILD_BATCH_SIZE) -> Dict[str, int]:
+        """
+        Recreate the cost layers from the stock movement history.
+
+        Args:
+            product_ids: Limit the rebuild to these products
+            batch_size: Rows written per bulk insert
+
+        Returns:
+            Counts of movements replayed and layers/consumptions written
+        """
+        movements = StockMovement.objects.all()
+        layers_qs = CostLayer.objects.all()
+        consumptions_qs = CostLayerConsumption.objects.all()
+        if product_ids is not None:
+            product_ids = list(product_ids)
+            movements = movements.filter(product_id__in=product_ids)
+            layers_qs = layers_qs.filter(product_id__in=product_ids)
+            consumptions_qs = consumptions_qs.filter(product_id__in=product_ids)
+
+        consumptions_qs.delete()
+        layers_qs.delete()
+
+        product_costs = dict(Product.objects.values_list('id', 'cost_price'))
+
+        def flush(groups):
+            layers = [layer for group in groups for layer in group.layer_models()]
+            CostLayer.objects.bulk_create(layers, batch_size=batch_size)
+            saved = iter(layers)
+            for group in groups:
+                for record in group.layers:
+                    record.pk = next(saved).pk
+            consumptions = [c for group in groups for c in group.consumption_models()]
+            CostLayerConsumption.objects.bulk_create(consumptions, batch_size=batch_size)
+
+        rows = movements.order_by('product_id', 'warehouse_id', 'created_at', 'id').values(
+            'id', 'product_id', 'warehouse_id', 'created_at',
+            'unit_cost', 'balance_before', 'balance_after',
+        ).iterator(chunk_size=batch_size)
+        return CostLayerService.replay(rows, product_costs, flush, batch_size)
@@ -0,0 +1,24 @@
+"""
+Management command to release expired stock reservations
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.core.exceptions import ValidationException
+from apps.inventory.reservations import RESERVATION_SWEEP_BATCH_SIZE, StockReservationService
+
+
+class Command(BaseCommand):
+    help = 'Return the quantities of expired stock reservations to the available stock'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=RESERVATION_SWEEP_BATCH_SIZE,
+            help='Reservations released per transaction',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            released = StockReservationService.sweep_expired(options['batch_size'])
+        except ValidationException as e:
+            raise CommandError(e.message)
+        self.stdout.write(self.style.SUCCESS(f'Released {released} expired reservation(s)'))
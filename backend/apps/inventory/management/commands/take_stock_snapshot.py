@@ -0,0 +1,49 @@
+"""
+Management command to store point-in-time stock snapshots
+"""
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from apps.core.exceptions import ValidationException
+from apps.inventory.snapshots import StockSnapshotService, month_ends
+
+
+class Command(BaseCommand):
+    help = 'Store stock quantities per product and warehouse at the end of a day'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--date', dest='snapshot_date',
+            help='Snapshot date as YYYY-MM-DD (default: yesterday)',
+        )
+        parser.add_argument(
+            '--month-ends-from', metavar='YYYY-MM-DD',
+            help='Backfill a snapshot for every month end from this date until yesterday',
+        )
+
+    def handle(self, *args, **options):
+        yesterday = timezone.localdate() - timedelta(days=1)
+
+        if options['month_ends_from']:
+            dates = month_ends(self._parse(options['month_ends_from']), yesterday)
+        else:
+            dates = [self._parse(options['snapshot_date']) if options['snapshot_date'] else yesterday]
+
+        for snapshot_date in dates:
+            try:
+                rows = StockSnapshotService.take_snapshot(snapshot_date)
+            except ValidationException as e:
+                raise CommandError(e.message)
+            self.stdout.write(f'{snapshot_date}: {rows} rows')
+
+        self.stdout.write(self.style.SUCCESS(f'Stored {len(dates)} stock snapshot(s)'))
+
+    @staticmethod
+    def _parse(value: str):
+        parsed = parse_date(value)
+        if parsed is None:
+            raise CommandError(f'Invalid date: {value}')
+        return parsed
@@ -0,0 +1,72 @@
+# Generated by Django 5.0.14 on 2026-10-18 21:23
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0006_add_usd_prices'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CostLayer',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='تاريخ الإنشاء')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='تاريخ التحديث')),
+                ('received_at', models.DateTimeField(verbose_name='تاريخ الاستلام')),
+                ('quantity', models.DecimalField(decimal_places=2, max_digits=15, verbose_name='الكمية')),
+                ('unit_cost', models.DecimalField(decimal_places=2, max_digits=15, verbose_name='تكلفة الوحدة')),
+                ('remaining_fifo', models.DecimalField(decimal_places=2, max_digits=15, verbose_name='المتبقي (FIFO)')),
+                ('remaining_lifo', models.DecimalField(decimal_places=2, max_digits=15, verbose_name='المتبقي (LIFO)')),
+                ('movement', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='cost_layers', to='inventory.stockmovement', verbose_name='حركة المخزون')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='cost_layers', to='inventory.product', verbose_name='المنتج')),
+                ('warehouse', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='cost_layers', to='inventory.warehouse', verbose_name='المستودع')),
+            ],
+            options={
+                'verbose_name': 'طبقة تكلفة',
+                'verbose_name_plural': 'طبقات التكلفة',
+                'ordering': ['received_at', 'id'],
+            },
+        ),
+        migrations.CreateModel(
+            name='CostLayerConsumption',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='تاريخ الإنشاء')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='تاريخ التحديث')),
+                ('method', models.CharField(choices=[('fifo', 'الوارد أولاً صادر أولاً'), ('lifo', 'الوارد أخيراً صادر أولاً')], max_length=10, verbose_name='طريقة التقييم')),
+                ('consumed_at', models.DateTimeField(verbose_name='تاريخ الصرف')),
+                ('quantity', models.DecimalField(decimal_places=2, max_digits=15, verbose_name='الكمية')),
+                ('unit_cost', models.DecimalField(decimal_places=2, max_digits=15, verbose_name='تكلفة الوحدة')),
+                ('layer', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='consumptions', to='inventory.costlayer', verbose_name='طبقة التكلفة')),
+                ('movement', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='cost_consumptions', to='inventory.stockmovement', verbose_name='حركة المخزون')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='cost_consumptions', to='inventory.product', verbose_name='المنتج')),
+                ('warehouse', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='cost_consumptions', to='inventory.warehouse', verbose_name='المستودع')),
+            ],
+            options={
+                'verbose_name': 'صرف من طبقة تكلفة',
+                'verbose_name_plural': 'الصرف من طبقات التكلفة',
+                'ordering': ['consumed_at', 'id'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='costlayer',
+            index=models.Index(fields=['product', 'warehouse', 'received_at'], name='inventory_c_product_cd0a57_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='costlayer',
+            index=models.Index(fields=['received_at'], name='inventory_c_receive_3d34ad_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='costlayerconsumption',
+            index=models.Index(fields=['method', 'consumed_at'], name='inventory_c_method_c1e4c8_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='costlayerconsumption',
+            index=models.Index(fields=['method', 'product', 'warehouse'], name='inventory_c_method_c2a29d_idx'),
+        ),
+    ]
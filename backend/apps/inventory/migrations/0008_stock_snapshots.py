@@ -0,0 +1,32 @@
+# Generated by Django 5.0.14 on 2026-10-18 22:21
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0007_cost_layers'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='تاريخ الإنشاء')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='تاريخ التحديث')),
+                ('snapshot_date', models.DateField(verbose_name='تاريخ اللقطة')),
+                ('quantity', models.DecimalField(decimal_places=2, max_digits=15, verbose_name='الكمية')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_snapshots', to='inventory.product', verbose_name='المنتج')),
+                ('warehouse', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_snapshots', to='inventory.warehouse', verbose_name='المستودع')),
+            ],
+            options={
+                'verbose_name': 'لقطة مخزون',
+                'verbose_name_plural': 'لقطات المخزون',
+                'ordering': ['-snapshot_date', 'product'],
+                'unique_together': {('snapshot_date', 'product', 'warehouse')},
+            },
+        ),
+    ]
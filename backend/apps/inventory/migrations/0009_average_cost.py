@@ -0,0 +1,68 @@
+# Generated by Django 5.0.14 on 2026-10-19 00:02
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+
+
+def seed_average_costs(apps, schema_editor):
+    """
+    Start existing stock at the product cost price, the cost used until now
+    (USD, and old pounds at the latest exchange rate).
+    """
+    Stock = apps.get_model('inventory', 'Stock')
+    DailyExchangeRate = apps.get_model('core', 'DailyExchangeRate')
+
+    latest = DailyExchangeRate.objects.order_by('-rate_date').first()
+    rate = latest.usd_to_syp_old if latest else None
+    stocks = list(Stock.objects.select_related('product'))
+    for stock in stocks:
+        product = stock.product
+        cost = product.cost_price_usd if product.cost_price_usd else product.cost_price
+        stock.average_cost = cost or Decimal('0')
+        stock.average_cost_syp = stock.average_cost * rate if rate else Decimal('0')
+    Stock.objects.bulk_update(stocks, ['average_cost', 'average_cost_syp'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_daily_exchange_rate'),
+        ('inventory', '0008_stock_snapshots'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='stock',
+            name='average_cost',
+            field=models.DecimalField(decimal_places=4, default=Decimal('0.0000'), max_digits=15, verbose_name='متوسط التكلفة (USD)'),
+        ),
+        migrations.AddField(
+            model_name='stock',
+            name='average_cost_syp',
+            field=models.DecimalField(decimal_places=4, default=Decimal('0.0000'), max_digits=20, verbose_name='متوسط التكلفة (ل.س)'),
+        ),
+        migrations.CreateModel(
+            name='AverageCostHistory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quantity', models.DecimalField(decimal_places=2, max_digits=15, verbose_name='الكمية الواردة')),
+                ('unit_cost', models.DecimalField(decimal_places=4, max_digits=15, verbose_name='تكلفة الوحدة (USD)')),
+                ('unit_cost_syp', models.DecimalField(blank=True, decimal_places=4, max_digits=20, null=True, verbose_name='تكلفة الوحدة (ل.س)')),
+                ('quantity_after', models.DecimalField(decimal_places=2, max_digits=15, verbose_name='الرصيد بعد')),
+                ('average_cost', models.DecimalField(decimal_places=4, max_digits=15, verbose_name='متوسط التكلفة (USD)')),
+                ('average_cost_syp', models.DecimalField(decimal_places=4, max_digits=20, verbose_name='متوسط التكلفة (ل.س)')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='تاريخ الإنشاء')),
+                ('movement', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='average_cost_history', to='inventory.stockmovement', verbose_name='حركة المخزون')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='average_cost_history', to='inventory.product', verbose_name='المنتج')),
+                ('warehouse', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='average_cost_history', to='inventory.warehouse', verbose_name='المستودع')),
+            ],
+            options={
+                'verbose_name': 'سجل متوسط التكلفة',
+                'verbose_name_plural': 'سجل متوسط التكلفة',
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['product', 'warehouse', 'created_at'], name='inventory_a_product_afc790_idx')],
+            },
+        ),
+        migrations.RunPython(seed_average_costs, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.0.14 on 2026-10-19 00:09
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0009_average_cost'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='stockmovement',
+            index=models.Index(fields=['source_type', 'created_at'], name='inventory_s_source__6fe44c_idx'),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.0.14 on 2026-10-19 00:22
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0010_movement_source_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockReservation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='تاريخ الإنشاء')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='تاريخ التحديث')),
+                ('quantity', models.DecimalField(decimal_places=2, max_digits=15, verbose_name='الكمية')),
+                ('reference_type', models.CharField(max_length=50, verbose_name='نوع المرجع')),
+                ('reference_id', models.PositiveIntegerField(verbose_name='معرف المرجع')),
+                ('status', models.CharField(choices=[('active', 'نشط'), ('consumed', 'مستهلك'), ('released', 'محرر'), ('expired', 'منتهي الصلاحية')], default='active', max_length=20, verbose_name='الحالة')),
+                ('expires_at', models.DateTimeField(verbose_name='تاريخ الانتهاء')),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='بواسطة')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reservations', to='inventory.product', verbose_name='المنتج')),
+                ('warehouse', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reservations', to='inventory.warehouse', verbose_name='المستودع')),
+            ],
+            options={
+                'verbose_name': 'حجز مخزون',
+                'verbose_name_plural': 'حجوزات المخزون',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['status', 'expires_at'], name='inventory_s_status_c656ef_idx'), models.Index(fields=['reference_type', 'reference_id'], name='inventory_s_referen_912c56_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='stockreservation',
+            constraint=models.UniqueConstraint(condition=models.Q(('status', 'active')), fields=('reference_type', 'reference_id', 'product', 'warehouse'), name='inventory_reservation_active_document'),
+        ),
+    ]
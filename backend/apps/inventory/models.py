@@ -56,10 +56,19 @@ class Category(BaseModel):
 
     @property
     def full_path(self):
-        """Get full category path with parents."""
-        if self.parent:
-            return f"{self.parent.full_path} > {self.name}"
-        return self.name
+        """Get full category path with parents (from the cached category tree)."""
+        from .categories import CategoryTreeService, PATH_SEPARATOR
+        if not self.parent_id:
+            return self.name
+        parent_path = CategoryTreeService.full_path(self.parent_id)
+        if parent_path is not None:
+            return f"{parent_path}{PATH_SEPARATOR}{self.name}"
+        names, seen, node = [], set(), self
+        while node is not None and node.pk not in seen:
+            seen.add(node.pk)
+            names.append(node.name)
+            node = node.parent
+        return PATH_SEPARATOR.join(reversed(names))
 
 
 class Unit(BaseModel):
@@ -475,6 +484,18 @@ class Stock(TimeStampedModel):
         default=Decimal('0.00'),
         verbose_name='الكمية المحجوزة'
     )
+    average_cost = models.DecimalField(
+        max_digits=15,
+        decimal_places=4,
+        default=Decimal('0.0000'),
+        verbose_name='متوسط التكلفة (USD)'
+    )
+    average_cost_syp = models.DecimalField(
+        max_digits=20,
+        decimal_places=4,
+        default=Decimal('0.0000'),
+        verbose_name='متوسط التكلفة (ل.س)'
+    )
 
     class Meta:
         verbose_name = 'مخزون'
@@ -605,7 +626,330 @@ class StockMovement(TimeStampedModel):
             models.Index(fields=['product', 'warehouse']),
             models.Index(fields=['created_at']),
             models.Index(fields=['reference_type', 'reference_id']),
+            models.Index(fields=['source_type', 'created_at']),
         ]
 
     def __str__(self):
         return f"{self.product.name} - {self.get_movement_type_display()}: {self.quantity}"
+
+
+class CostLayer(TimeStampedModel):
+    """
+    Inbound cost layer (lot) created by a stock movement that adds stock.
+
+    FIFO and LIFO consume the same layers in different orders, so each
+    method keeps its own remaining quantity.
+    """
+    product = models.ForeignKey(
+        Product,
+        on_delete=models.CASCADE,
+        related_name='cost_layers',
+        verbose_name='المنتج'
+    )
+    warehouse = models.ForeignKey(
+        Warehouse,
+        on_delete=models.CASCADE,
+        related_name='cost_layers',
+        verbose_name='المستودع'
+    )
+    movement = models.ForeignKey(
+        StockMovement,
+        on_delete=models.CASCADE,
+        related_name='cost_layers',
+        verbose_name='حركة المخزون'
+    )
+    received_at = models.DateTimeField(
+        verbose_name='تاريخ الاستلام'
+    )
+    quantity = models.DecimalField(
+        max_digits=15,
+        decimal_places=2,
+        verbose_name='الكمية'
+    )
+    unit_cost = models.DecimalField(
+        max_digits=15,
+        decimal_places=2,
+        verbose_name='تكلفة الوحدة'
+    )
+    remaining_fifo = models.DecimalField(
+        max_digits=15,
+        decimal_places=2,
+        verbose_name='المتبقي (FIFO)'
+    )
+    remaining_lifo = models.DecimalField(
+        max_digits=15,
+        decimal_places=2,
+        verbose_name='المتبقي (LIFO)'
+    )
+
+    class Meta:
+        verbose_name = 'طبقة تكلفة'
+        verbose_name_plural = 'طبقات التكلفة'
+        ordering = ['received_at', 'id']
+        indexes = [
+            models.Index(fields=['product', 'warehouse', 'received_at']),
+            models.Index(fields=['received_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id}/{self.warehouse_id}: {self.quantity} @ {self.unit_cost}"
+
+
+class CostLayerConsumption(TimeStampedModel):
+    """
+    Quantity taken from a cost layer by an outbound stock movement.
+
+    ``layer`` is empty when stock left without an open layer (negative
+    stock or history older than the layers); it is then costed at the
+    product cost price.
+    """
+
+    class Method(models.TextChoices):
+        FIFO = 'fifo', 'الوارد أولاً صادر أولاً'
+        LIFO = 'lifo', 'الوارد أخيراً صادر أولاً'
+
+    layer = models.ForeignKey(
+        CostLayer,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='consumptions',
+        verbose_name='طبقة التكلفة'
+    )
+    movement = models.ForeignKey(
+        StockMovement,
+        on_delete=models.CASCADE,
+        related_name='cost_consumptions',
+        verbose_name='حركة المخزون'
+    )
+    product = models.ForeignKey(
+        Product,
+        on_delete=models.CASCADE,
+        related_name='cost_consumptions',
+        verbose_name='المنتج'
+    )
+    warehouse = models.ForeignKey(
+        Warehouse,
+        on_delete=models.CASCADE,
+        related_name='cost_consumptions',
+        verbose_name='المستودع'
+    )
+    method = models.CharField(
+        max_length=10,
+        choices=Method.choices,
+        verbose_name='طريقة التقييم'
+    )
+    consumed_at = models.DateTimeField(
+        verbose_name='تاريخ الصرف'
+    )
+    quantity = models.DecimalField(
+        max_digits=15,
+        decimal_places=2,
+        verbose_name='الكمية'
+    )
+    unit_cost = models.DecimalField(
+        max_digits=15,
+        decimal_places=2,
+        verbose_name='تكلفة الوحدة'
+    )
+
+    class Meta:
+        verbose_name = 'صرف من طبقة تكلفة'
+        verbose_name_plural = 'الصرف من طبقات التكلفة'
+        ordering = ['consumed_at', 'id']
+        indexes = [
+            models.Index(fields=['method', 'consumed_at']),
+            models.Index(fields=['method', 'product', 'warehouse']),
+        ]
+
+    def __str__(self):
+        return f"{self.method}: {self.quantity} @ {self.unit_cost}"
+
+
+class AverageCostHistory(models.Model):
+    """
+    Moving-average cost of a product in a warehouse after an inbound
+    movement (goods receipt, sales return, invoice cancellation).
+    Costs are per base unit; SYP values are old pounds at the document's
+    exchange rate.
+    """
+    product = models.ForeignKey(
+        Product,
+        on_delete=models.CASCADE,
+        related_name='average_cost_history',
+        verbose_name='المنتج'
+    )
+    warehouse = models.ForeignKey(
+        Warehouse,
+        on_delete=models.CASCADE,
+        related_name='average_cost_history',
+        verbose_name='المستودع'
+    )
+    movement = models.ForeignKey(
+        StockMovement,
+        on_delete=models.CASCADE,
+        related_name='average_cost_history',
+        verbose_name='حركة المخزون'
+    )
+    quantity = models.DecimalField(
+        max_digits=15,
+        decimal_places=2,
+        verbose_name='الكمية الواردة'
+    )
+    unit_cost = models.DecimalField(
+        max_digits=15,
+        decimal_places=4,
+        verbose_name='تكلفة الوحدة (USD)'
+    )
+    unit_cost_syp = models.DecimalField(
+        max_digits=20,
+        decimal_places=4,
+        null=True,
+        blank=True,
+        verbose_name='تكلفة الوحدة (ل.س)'
+    )
+    quantity_after = models.DecimalField(
+        max_digits=15,
+        decimal_places=2,
+        verbose_name='الرصيد بعد'
+    )
+    average_cost = models.DecimalField(
+        max_digits=15,
+        decimal_places=4,
+        verbose_name='متوسط التكلفة (USD)'
+    )
+    average_cost_syp = models.DecimalField(
+        max_digits=20,
+        decimal_places=4,
+        verbose_name='متوسط التكلفة (ل.س)'
+    )
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='تاريخ الإنشاء'
+    )
+
+    class Meta:
+        verbose_name = 'سجل متوسط التكلفة'
+        verbose_name_plural = 'سجل متوسط التكلفة'
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['product', 'warehouse', 'created_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id}/{self.warehouse_id}: {self.average_cost}"
+
+
+class StockReservation(TimeStampedModel):
+    """
+    Hold on stock for a pending document (order, draft invoice).
+
+    Active holds are counted in Stock.reserved_quantity. A hold ends when
+    it is consumed by the document, released, or expires after its TTL.
+    """
+
+    class Status(models.TextChoices):
+        ACTIVE = 'active', 'نشط'
+        CONSUMED = 'consumed', 'مستهلك'
+        RELEASED = 'released', 'محرر'
+        EXPIRED = 'expired', 'منتهي الصلاحية'
+
+    product = models.ForeignKey(
+        Product,
+        on_delete=models.CASCADE,
+        related_name='reservations',
+        verbose_name='المنتج'
+    )
+    warehouse = models.ForeignKey(
+        Warehouse,
+        on_delete=models.CASCADE,
+        related_name='reservations',
+        verbose_name='المستودع'
+    )
+    quantity = models.DecimalField(
+        max_digits=15,
+        decimal_places=2,
+        verbose_name='الكمية'
+    )
+    reference_type = models.CharField(
+        max_length=50,
+        verbose_name='نوع المرجع'
+    )
+    reference_id = models.PositiveIntegerField(
+        verbose_name='معرف المرجع'
+    )
+    status = models.CharField(
+        max_length=20,
+        choices=Status.choices,
+        default=Status.ACTIVE,
+        verbose_name='الحالة'
+    )
+    expires_at = models.DateTimeField(
+        verbose_name='تاريخ الانتهاء'
+    )
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+',
+        verbose_name='بواسطة'
+    )
+
+    class Meta:
+        verbose_name = 'حجز مخزون'
+        verbose_name_plural = 'حجوزات المخزون'
+        ordering = ['-created_at']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['reference_type', 'reference_id', 'product', 'warehouse'],
+                condition=models.Q(status='active'),
+                name='inventory_reservation_active_document'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['status', 'expires_at']),
+            models.Index(fields=['reference_type', 'reference_id']),
+        ]
+
+    def __str__(self):
+        return f"{self.reference_type} #{self.reference_id} - {self.product.name}: {self.quantity}"
+
+
+class StockSnapshot(TimeStampedModel):
+    """
+    Stock quantity of a product in a warehouse at the end of a day.
+
+    Snapshots are taken periodically (e.g. at month close) so stock on a
+    past date can be derived from the nearest snapshot instead of the full
+    movement history.
+    """
+    snapshot_date = models.DateField(
+        verbose_name='تاريخ اللقطة'
+    )
+    product = models.ForeignKey(
+        Product,
+        on_delete=models.CASCADE,
+        related_name='stock_snapshots',
+        verbose_name='المنتج'
+    )
+    warehouse = models.ForeignKey(
+        Warehouse,
+        on_delete=models.CASCADE,
+        related_name='stock_snapshots',
+        verbose_name='المستودع'
+    )
+    quantity = models.DecimalField(
+        max_digits=15,
+        decimal_places=2,
+        verbose_name='الكمية'
+    )
+
+    class Meta:
+        verbose_name = 'لقطة مخزون'
+        verbose_name_plural = 'لقطات المخزون'
+        ordering = ['-snapshot_date', 'product']
+        unique_together = ['snapshot_date', 'product', 'warehouse']
+
+    def __str__(self):
+        return f"{self.snapshot_date}: {self.product_id}/{self.warehouse_id} = {self.quantity}"
@@ -0,0 +1,189 @@
+"""
+Replenishment - Reorder suggestions from sales velocity
+
+Daily sales velocity per (product, warehouse) is read from the sale,
+sales-return and cancellation movements of several rolling windows in one
+grouped query. The windows are blended (recent demand weighs more) and
+compared with the stock position (available plus on order) to give days of
+cover and a suggested order quantity:
+
+    reorder level = max(reorder_point, velocity * lead time + minimum_stock)
+    target        = maximum_stock, or reorder level + velocity * review days
+
+A line is suggested once the position falls to the reorder level, for the
+quantity that brings it back up to the target. Stock rows are read as plain
+values, so a full catalogue is evaluated in a few queries.
+"""
+from datetime import date, timedelta
+from decimal import Decimal, ROUND_CEILING, ROUND_HALF_UP
+from typing import Dict, List, Tuple
+
+from django.db.models import Q, Sum
+from django.utils import timezone
+
+from apps.core.exceptions import ValidationException
+from apps.core.utils import day_bounds
+from .models import Stock, StockMovement
+
+ZERO = Decimal('0')
+
+# Rolling windows (days) and their weight in the blended daily velocity
+VELOCITY_WINDOWS = {7: Decimal('0.5'), 30: Decimal('0.3'), 90: Decimal('0.2')}
+
+# Days between placing an order and receiving it, when not given
+DEFAULT_LEAD_TIME_DAYS = 7
+
+# Days of demand an order should cover beyond the reorder level
+DEFAULT_REVIEW_DAYS = 14
+
+# Longest lead time or review period accepted
+MAX_PLANNING_DAYS = 365
+
+StockKey = Tuple[int, int]
+
+
+def _rate(value: Decimal) -> Decimal:
+    return value.quantize(Decimal('0.0001'), ROUND_HALF_UP)
+
+
+class ReplenishmentService:
+    """
+    Service class for sales velocity and reorder suggestions.
+    """
+
+    @staticmethod
+    def sales_velocity(warehouse_id: int = None, as_of: date = None) -> Dict[StockKey, Dict[str, Decimal]]:
+        """
+        Daily net sales per (product, warehouse) over each rolling window.
+
+        One grouped query over the movements of the longest window; returns
+        and cancellations are netted off the sales of the same window.
+
+        Returns:
+            {(product_id, warehouse_id): {'7': rate, '30': rate, ..., 'daily': blended}}
+        """
+        as_of = as_of or timezone.localdate()
+        _, end = day_bounds(as_of)
+        starts = {days: end - timedelta(days=days) for days in VELOCITY_WINDOWS}
+
+        sold = Q(source_type=StockMovement.SourceType.SALE)
+        # Returned and cancelled sales are not demand
+        returned = Q(source_type=StockMovement.SourceType.RETURN) | Q(
+            source_type=StockMovement.SourceType.ADJUSTMENT, reference_type='invoice_cancellation'
+        )
+        aggregates = {}
+        for days, start in starts.items():
+            aggregates[f'sold_{days}'] = Sum('quantity', filter=sold & Q(created_at__gte=start))
+            aggregates[f'returned_{days}'] = Sum('quantity', filter=returned & Q(created_at__gte=start))
+
+        movements = StockMovement.objects.filter(
+            sold | returned,
+            created_at__gte=min(starts.values()),
+            created_at__lt=end,
+        )
+        if warehouse_id:
+            movements = movements.filter(warehouse_id=warehouse_id)
+        rows = movements.values('product_id', 'warehouse_id').annotate(**aggregates).order_by()
+
+        velocity = {}
+        for row in rows:
+            rates = {}
+            blended = ZERO
+            for days, weight in VELOCITY_WINDOWS.items():
+                net = max((row[f'sold_{days}'] or ZERO) - (row[f'returned_{days}'] or ZERO), ZERO)
+                rates[str(days)] = _rate(net / days)
+                blended += weight * net / days
+            rates['daily'] = _rate(blended)
+            velocity[(row['product_id'], row['warehouse_id'])] = rates
+        return velocity
+
+    @staticmethod
+    def get_reorder_suggestions(
+        warehouse_id: int = None,
+        lead_time_days: int = DEFAULT_LEAD_TIME_DAYS,
+        review_days: int = DEFAULT_REVIEW_DAYS,
+        on_order: Dict[StockKey, Decimal] = None,
+        as_of: date = None,
+        include_all: bool = False
+    ) -> List[Dict]:
+        """
+        Reorder suggestions for tracked, active products.
+
+        Args:
+            warehouse_id: Optional warehouse filter
+            lead_time_days: Days until an order placed now arrives
+            review_days: Days of demand covered beyond the reorder level
+            on_order: Base quantities already ordered per (product, warehouse)
+            as_of: Last day of the sales windows (defaults to today)
+            include_all: Also return lines that need no order
+
+        Returns:
+            Lines sorted by days of cover (lowest first, no demand last),
+            all quantities in base units
+        """
+        periods = {}
+        for name, value in (('lead_time_days', lead_time_days), ('review_days', review_days)):
+            try:
+                periods[name] = int(value)
+            except (TypeError, ValueError):
+                periods[name] = -1
+            if not 0 <= periods[name] <= MAX_PLANNING_DAYS:
+                raise ValidationException(f'يجب أن تكون المدة بين 0 و {MAX_PLANNING_DAYS} يوماً', field=name)
+        lead_time = Decimal(periods['lead_time_days'])
+        review = Decimal(periods['review_days'])
+        on_order = on_order or {}
+
+        velocity = ReplenishmentService.sales_velocity(warehouse_id, as_of)
+        stocks = Stock.objects.filter(
+            product__is_active=True,
+            product__is_deleted=False,
+            product__track_stock=True
+        )
+        if warehouse_id:
+            stocks = stocks.filter(warehouse_id=warehouse_id)
+        rows = stocks.values_list(
+            'product_id', 'warehouse_id', 'quantity', 'reserved_quantity', 'average_cost',
+            'product__code', 'product__name', 'product__minimum_stock',
+            'product__maximum_stock', 'product__reorder_point'
+        )
+
+        suggestions = []
+        for (product_id, stock_warehouse_id, quantity, reserved, average_cost, code, name,
+             minimum_stock, maximum_stock, reorder_point) in rows.iterator(chunk_size=5000):
+            key = (product_id, stock_warehouse_id)
+            rates = velocity.get(key)
+            daily = rates['daily'] if rates else ZERO
+            available = quantity - reserved
+            ordered = on_order.get(key, ZERO)
+            position = available + ordered
+
+            reorder_level = max(reorder_point, daily * lead_time + minimum_stock)
+            target = maximum_stock if maximum_stock > 0 else reorder_level + daily * review
+            target = max(target, reorder_level)
+            suggested = ZERO
+            if position <= reorder_level and target > position:
+                suggested = (target - position).to_integral_value(ROUND_CEILING)
+            if not suggested and not include_all:
+                continue
+
+            suggestions.append({
+                'product_id': product_id,
+                'product_code': code,
+                'product_name': name,
+                'warehouse_id': stock_warehouse_id,
+                'current_stock': quantity,
+                'available_stock': available,
+                'on_order': ordered,
+                'daily_velocity': daily,
+                'velocity': {days: rates[days] for days in rates if days != 'daily'} if rates else {},
+                'days_of_cover': (available / daily).quantize(Decimal('0.1'), ROUND_HALF_UP) if daily > 0 else None,
+                'minimum_stock': minimum_stock,
+                'reorder_point': reorder_point,
+                'reorder_level': reorder_level.quantize(Decimal('0.01'), ROUND_HALF_UP),
+                'target_stock': target.quantize(Decimal('0.01'), ROUND_HALF_UP),
+                'suggested_quantity': suggested,
+                'average_cost': average_cost,
+            })
+
+        suggestions.sort(key=lambda s: (s['days_of_cover'] is None, s['days_of_cover'] or ZERO, s['product_code']))
+        return suggestions
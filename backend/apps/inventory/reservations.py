@@ -0,0 +1,282 @@
+"""
+Stock Reservations - Expiring holds on stock for pending documents
+
+A hold is a StockReservation row keyed by (reference_type, reference_id,
+product, warehouse) plus its quantity in Stock.reserved_quantity. The
+reserved quantity only changes through single conditional UPDATEs:
+
+    UPDATE stock SET reserved_quantity = reserved_quantity + n
+     WHERE product_id = ? AND warehouse_id = ? AND quantity - reserved_quantity >= n
+
+so concurrent reservations of the same product can never hold more than
+is on hand, without reading the row first. Every hold has a TTL; the
+sweeper (job ``reservation_sweep`` / ``release_expired_reservations``)
+returns expired holds to the available stock in batches, and a reservation
+that finds too little stock first reclaims the expired holds of its row.
+Confirming an invoice consumes its own holds before deducting the stock,
+so they never count against the invoice itself.
+"""
+from datetime import timedelta
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.db import IntegrityError, transaction
+from django.db.models import F, Value
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from apps.core.decorators import handle_service_error
+from apps.core.exceptions import BusinessException, InsufficientStockException, ValidationException
+from apps.core.jobs import JobContext, register_job
+from .models import Product, Stock, StockReservation
+
+ZERO = Decimal('0')
+
+# Lifetime of a hold when none is given
+DEFAULT_RESERVATION_TTL = timedelta(minutes=30)
+
+# Longest lifetime accepted for a hold
+MAX_RESERVATION_TTL = timedelta(days=7)
+
+# Expired holds released per transaction by the sweeper
+RESERVATION_SWEEP_BATCH_SIZE = 500
+
+# Reference type of holds taken for a sales invoice; confirming it consumes them
+INVOICE_RESERVATION = 'invoice'
+
+StockKey = Tuple[int, int]
+
+
+def increment_reserved(product_id: int, warehouse_id: int, quantity: Decimal) -> bool:
+    """Reserve ``quantity`` if that much is available; one conditional UPDATE."""
+    return Stock.objects.filter(
+        product_id=product_id,
+        warehouse_id=warehouse_id,
+        quantity__gte=F('reserved_quantity') + quantity
+    ).update(
+        reserved_quantity=F('reserved_quantity') + quantity,
+        updated_at=timezone.now()
+    ) > 0
+
+
+def decrement_reserved(product_id: int, warehouse_id: int, quantity: Decimal) -> bool:
+    """Return ``quantity`` to the available stock (never below zero reserved)."""
+    return Stock.objects.filter(
+        product_id=product_id,
+        warehouse_id=warehouse_id
+    ).update(
+        reserved_quantity=Greatest(F('reserved_quantity') - quantity, Value(ZERO)),
+        updated_at=timezone.now()
+    ) > 0
+
+
+def _insufficient(product_id: int, warehouse_id: int, requested: Decimal) -> InsufficientStockException:
+    available = Stock.objects.filter(
+        product_id=product_id, warehouse_id=warehouse_id
+    ).values_list(F('quantity') - F('reserved_quantity'), flat=True).first() or ZERO
+    name = Product.objects.filter(pk=product_id).values_list('name', flat=True).first() or product_id
+    return InsufficientStockException(name, int(requested), int(max(available, ZERO)))
+
+
+class StockReservationService:
+    """
+    Service class for expiring stock reservations.
+    """
+
+    @staticmethod
+    @handle_service_error
+    @transaction.atomic
+    def reserve(
+        product_id: int,
+        warehouse_id: int,
+        quantity: Decimal,
+        reference_type: str,
+        reference_id: int,
+        ttl: timedelta = None,
+        user=None
+    ) -> StockReservation:
+        """
+        Hold ``quantity`` (base units) for a document.
+
+        Reserving again for the same document and product sets the hold to
+        the new quantity and restarts its TTL, so retries are harmless.
+
+        Raises:
+            InsufficientStockException: If not enough stock is available
+            ValidationException: If the quantity or TTL is invalid
+        """
+        quantity = Decimal(str(quantity))
+        if quantity <= 0:
+            raise ValidationException('يجب أن تكون الكمية المحجوزة أكبر من صفر', field='quantity')
+        ttl = DEFAULT_RESERVATION_TTL if ttl is None else ttl
+        if not timedelta(0) < ttl <= MAX_RESERVATION_TTL:
+            raise ValidationException('مدة الحجز غير صالحة', field='ttl')
+
+        now = timezone.now()
+        holds = StockReservation.objects.select_for_update().filter(
+            reference_type=reference_type,
+            reference_id=reference_id,
+            product_id=product_id,
+            warehouse_id=warehouse_id,
+            status=StockReservation.Status.ACTIVE
+        )
+        reservation = holds.first()
+        delta = quantity - (reservation.quantity if reservation else ZERO)
+
+        if delta > 0 and not increment_reserved(product_id, warehouse_id, delta):
+            # Expired holds of this row may be what blocks the request
+            expired = StockReservation.objects.filter(
+                product_id=product_id,
+                warehouse_id=warehouse_id,
+                status=StockReservation.Status.ACTIVE,
+                expires_at__lte=now
+            )
+            if reservation is not None:
+                expired = expired.exclude(pk=reservation.pk)
+            if not StockReservationService._end(expired, StockReservation.Status.EXPIRED) \
+                    or not increment_reserved(product_id, warehouse_id, delta):
+                raise _insufficient(product_id, warehouse_id, delta)
+        elif delta < 0:
+            decrement_reserved(product_id, warehouse_id, -delta)
+
+        if reservation is not None:
+            reservation.quantity = quantity
+            reservation.expires_at = now + ttl
+            reservation.save(update_fields=['quantity', 'expires_at', 'updated_at'])
+            return reservation
+        try:
+            with transaction.atomic():
+                return StockReservation.objects.create(
+                    product_id=product_id,
+                    warehouse_id=warehouse_id,
+                    quantity=quantity,
+                    reference_type=reference_type,
+                    reference_id=reference_id,
+                    expires_at=now + ttl,
+                    created_by=user
+                )
+        except IntegrityError:
+            # A concurrent request for the same document created the hold first
+            raise BusinessException('يتم حجز هذا المستند في طلب آخر، يرجى المحاولة مرة أخرى', 'RESERVATION_CONFLICT')
+
+    @staticmethod
+    @handle_service_error
+    @transaction.atomic
+    def reserve_document(
+        warehouse_id: int,
+        lines: Iterable[Dict],
+        reference_type: str,
+        reference_id: int,
+        ttl: timedelta = None,
+        user=None
+    ) -> List[StockReservation]:
+        """
+        Hold every line ({product_id, quantity}) of a document, all or nothing.
+        """
+        quantities: Dict[int, Decimal] = {}
+        for line in lines:
+            product_id = int(line['product_id'])
+            quantities[product_id] = quantities.get(product_id, ZERO) + Decimal(str(line['quantity']))
+        # Rows are always taken in the same order, so two documents cannot deadlock
+        return [
+            StockReservationService.reserve(
+                product_id, warehouse_id, quantity, reference_type, reference_id, ttl=ttl, user=user
+            )
+            for product_id, quantity in sorted(quantities.items())
+        ]
+
+    @staticmethod
+    @handle_service_error
+    def release(reference_type: str, reference_id: int, product_id: int = None) -> int:
+        """Release the active holds of a document; returns how many ended."""
+        return StockReservationService._end(
+            StockReservationService._active(reference_type, reference_id, product_id),
+            StockReservation.Status.RELEASED
+        )
+
+    @staticmethod
+    @handle_service_error
+    def consume(reference_type: str, reference_id: int, product_id: int = None) -> int:
+        """
+        End the active holds of a document whose stock is being deducted
+        (the deduction itself is done by the caller).
+        """
+        return StockReservationService._end(
+            StockReservationService._active(reference_type, reference_id, product_id),
+            StockReservation.Status.CONSUMED
+        )
+
+    @staticmethod
+    def sweep_expired(batch_size: int = RESERVATION_SWEEP_BATCH_SIZE, now=None,
+                      context: Optional[JobContext] = None) -> int:
+        """
+        Release expired holds in batches of ``batch_size``, one transaction
+        per batch. Returns the number of holds released.
+        """
+        if batch_size < 1:
+            raise ValidationException('حجم الدفعة يجب أن يكون أكبر من صفر', field='batch_size')
+        now = now or timezone.now()
+        expired = StockReservation.objects.filter(
+            status=StockReservation.Status.ACTIVE, expires_at__lte=now
+        )
+        pending = expired.count() if context is not None else 0
+        total = 0
+        while True:
+            ended = StockReservationService._end(expired, StockReservation.Status.EXPIRED, limit=batch_size)
+            total += ended
+            if context is not None and pending:
+                context.progress('inventory.reservation_sweep', total * 100 // pending)
+            if ended < batch_size:
+                return total
+
+    @staticmethod
+    def _active(reference_type: str, reference_id: int, product_id: int = None):
+        holds = StockReservation.objects.filter(
+            reference_type=reference_type,
+            reference_id=reference_id,
+            status=StockReservation.Status.ACTIVE
+        )
+        if product_id:
+            holds = holds.filter(product_id=product_id)
+        return holds
+
+    @staticmethod
+    @transaction.atomic
+    def _end(holds, status: str, limit: int = None) -> int:
+        """
+        Move active holds to ``status`` and give their quantities back,
+        one UPDATE per stock row. Holds locked by another transaction are
+        skipped (they are being ended there).
+        """
+        holds = holds.select_for_update(skip_locked=True).order_by('id')
+        if limit:
+            holds = holds[:limit]
+        rows = list(holds.values_list('id', 'product_id', 'warehouse_id', 'quantity'))
+        if not rows:
+            return 0
+
+        # Only holds still active here are ended, so nothing is returned twice
+        ended = StockReservation.objects.filter(
+            id__in=[row[0] for row in rows], status=StockReservation.Status.ACTIVE
+        ).update(status=status, updated_at=timezone.now())
+        if ended != len(rows):
+            # Lost a race with another release (no row locks on this database)
+            raise BusinessException('تم تعديل الحجز في طلب آخر، يرجى المحاولة مرة أخرى', 'RESERVATION_CONFLICT')
+
+        returned: Dict[StockKey, Decimal] = {}
+        for _, product_id, warehouse_id, quantity in rows:
+            key = (product_id, warehouse_id)
+            returned[key] = returned.get(key, ZERO) + quantity
+        for (product_id, warehouse_id), quantity in sorted(returned.items()):
+            decrement_reserved(product_id, warehouse_id, quantity)
+        return ended
+
+
+@register_job('reservation_sweep')
+def run_reservation_sweep(context: JobContext) -> Dict:
+    """
+    Params:
+        batch_size: Holds released per transaction
+    """
+    batch_size = int(context.params.get('batch_size') or RESERVATION_SWEEP_BATCH_SIZE)
+    return {'released': StockReservationService.sweep_expired(batch_size, context=context)}
@@ -3,7 +3,8 @@ Inventory Serializers
 """
 from rest_framework import serializers
 from decimal import Decimal
-from .models import Category, Unit, ProductUnit, Warehouse, Product, Stock, StockMovement
+from .models import Category, Unit, ProductUnit, Warehouse, Product, Stock, StockMovement, StockReservation
+from .categories import CategoryTreeService
 
 
 class CategorySerializer(serializers.ModelSerializer):
@@ -23,24 +24,10 @@ class CategorySerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'created_at']
 
     def get_children_count(self, obj):
-        return obj.children.filter(is_active=True, is_deleted=False).count()
+        return CategoryTreeService.children_count(obj.id)
 
     def get_products_count(self, obj):
-        return obj.products.filter(is_active=True, is_deleted=False).count()
-
-
-class CategoryTreeSerializer(serializers.ModelSerializer):
-    """Serializer for Category with nested children."""
-    
-    children = serializers.SerializerMethodField()
-    
-    class Meta:
-        model = Category
-        fields = ['id', 'name', 'name_en', 'children']
-
-    def get_children(self, obj):
-        children = obj.children.filter(is_active=True, is_deleted=False)
-        return CategoryTreeSerializer(children, many=True).data
+        return CategoryTreeService.products_count(obj.id)
 
 
 class UnitSerializer(serializers.ModelSerializer):
@@ -762,6 +749,48 @@ class StockMovementSerializer(serializers.ModelSerializer):
         read_only_fields = ['__all__']
 
 
+class StockReservationSerializer(serializers.ModelSerializer):
+    """Serializer for StockReservation model."""
+    
+    product_name = serializers.CharField(source='product.name', read_only=True)
+    warehouse_name = serializers.CharField(source='warehouse.name', read_only=True)
+    status_display = serializers.CharField(source='get_status_display', read_only=True)
+    
+    class Meta:
+        model = StockReservation
+        fields = [
+            'id', 'product', 'product_name', 'warehouse', 'warehouse_name',
+            'quantity', 'reference_type', 'reference_id',
+            'status', 'status_display', 'expires_at', 'created_at', 'updated_at'
+        ]
+        read_only_fields = fields
+
+
+class StockReservationLineSerializer(serializers.Serializer):
+    """One product line of a reservation request."""
+    
+    product_id = serializers.IntegerField()
+    quantity = serializers.DecimalField(max_digits=15, decimal_places=2, min_value=Decimal('0.01'))
+
+
+class StockReservationRequestSerializer(serializers.Serializer):
+    """Serializer for reserving the lines of a document."""
+    
+    warehouse_id = serializers.IntegerField()
+    reference_type = serializers.CharField(max_length=50)
+    reference_id = serializers.IntegerField(min_value=0)
+    ttl_minutes = serializers.IntegerField(required=False, min_value=1)
+    items = StockReservationLineSerializer(many=True, allow_empty=False)
+
+
+class StockReservationReleaseSerializer(serializers.Serializer):
+    """Serializer for releasing the holds of a document."""
+    
+    reference_type = serializers.CharField(max_length=50)
+    reference_id = serializers.IntegerField(min_value=0)
+    product_id = serializers.IntegerField(required=False)
+
+
 class BarcodeSearchSerializer(serializers.Serializer):
     """Serializer for barcode search."""
     
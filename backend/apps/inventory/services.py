@@ -5,13 +5,20 @@ from decimal import Decimal
 from typing import List, Optional, Dict, Any
 from django.db import transaction
 from django.db.models import Sum, F, Q
+from django.utils import timezone
 from apps.core.exceptions import (
     InsufficientStockException, 
     NotFoundException, 
     ValidationException
 )
 from apps.core.decorators import handle_service_error
+from apps.core.versioning import DataVersionService
 from .models import Product, Stock, StockMovement, Warehouse, Category
+from .average_cost import AverageCostService
+from .costing import CostLayerService
+from .reservations import decrement_reserved, increment_reserved
+from .snapshots import StockSnapshotService
+from .stock_events import publish_stock_changes
 
 
 class InventoryService:
@@ -41,6 +48,31 @@ class InventoryService:
         except Product.DoesNotExist:
             return None
 
+    @staticmethod
+    @handle_service_error
+    def get_available_quantities(product_ids, warehouse_id: int = None) -> Dict[int, Decimal]:
+        """
+        Available (quantity - reserved) stock of several products in one query.
+
+        Args:
+            product_ids: Product IDs
+            warehouse_id: Optional warehouse ID; all warehouses when omitted
+
+        Returns:
+            Dictionary of product ID to available quantity (products without
+            stock rows are absent)
+        """
+        product_ids = list(product_ids)
+        if not product_ids:
+            return {}
+        stocks = Stock.objects.filter(product_id__in=product_ids)
+        if warehouse_id:
+            stocks = stocks.filter(warehouse_id=warehouse_id)
+        rows = stocks.values('product_id').annotate(
+            available=Sum(F('quantity') - F('reserved_quantity'))
+        )
+        return {row['product_id']: row['available'] for row in rows}
+
     @staticmethod
     @handle_service_error
     def get_product_stock(product_id: int, warehouse_id: int = None) -> Dict[str, Any]:
@@ -142,18 +174,23 @@ class InventoryService:
         
         stock.save()
         
+        # Stock added by an adjustment is costed at the current product cost
+        cost_price = Product.objects.filter(pk=product_id).values_list('cost_price', flat=True).first()
+        
         # Create movement record
-        StockMovement.objects.create(
+        movement = StockMovement.objects.create(
             product_id=product_id,
             warehouse_id=warehouse_id,
             movement_type=movement_type,
             source_type=StockMovement.SourceType.ADJUSTMENT,
             quantity=quantity,
+            unit_cost=cost_price if stock.quantity > balance_before else Decimal('0.00'),
             balance_before=balance_before,
             balance_after=stock.quantity,
             notes=f"{reason}\n{notes}" if notes else reason,
             created_by=user
         )
+        CostLayerService.apply_movement(movement, fallback_cost=cost_price)
         
         return stock
 
@@ -170,11 +207,16 @@ class InventoryService:
         reference_type: str = None,
         reference_id: int = None,
         user=None,
-        notes: str = None
+        notes: str = None,
+        unit_cost_usd: Decimal = None,
+        usd_to_syp_old: Decimal = None
     ) -> Stock:
         """
         Add stock from purchase or other source.
         
+        The moving-average cost of the stock row is updated in the same
+        locked pass (see average_cost.py).
+        
         Args:
             product_id: Product ID
             warehouse_id: Warehouse ID
@@ -186,22 +228,30 @@ class InventoryService:
             reference_id: ID of reference document
             user: User performing the operation
             notes: Optional notes
+            unit_cost_usd: USD cost per base unit for the average cost
+                (defaults to unit_cost)
+            usd_to_syp_old: Exchange rate of the document (defaults to
+                today's rate)
             
         Returns:
             Updated Stock instance
         """
-        stock, created = Stock.objects.get_or_create(
+        stock, created = Stock.objects.select_for_update().get_or_create(
             product_id=product_id,
             warehouse_id=warehouse_id,
             defaults={'quantity': Decimal('0')}
         )
         
+        history = AverageCostService.receive(
+            stock, quantity, unit_cost if unit_cost_usd is None else unit_cost_usd,
+            usd_to_syp_old or AverageCostService.current_syp_rate()
+        )
         balance_before = stock.quantity
         stock.quantity += quantity
         stock.save()
         
         # Create movement record
-        StockMovement.objects.create(
+        movement = StockMovement.objects.create(
             product_id=product_id,
             warehouse_id=warehouse_id,
             movement_type=StockMovement.MovementType.IN,
@@ -216,9 +266,106 @@ class InventoryService:
             notes=notes,
             created_by=user
         )
+        CostLayerService.apply_movement(movement)
+        AverageCostService.record([(history, movement)])
         
         return stock
 
+    @staticmethod
+    @handle_service_error
+    @transaction.atomic
+    def add_stock_bulk(
+        warehouse_id: int,
+        lines: List[Dict[str, Any]],
+        source_type: str,
+        reference_number: str = None,
+        reference_type: str = None,
+        reference_id: int = None,
+        user=None,
+        notes: str = None,
+        usd_to_syp_old: Decimal = None
+    ) -> List[StockMovement]:
+        """
+        Add stock for several lines of one document in a single pass.
+        
+        Equivalent to calling add_stock once per line (one movement per
+        line, balances chained in line order), but the stock rows are
+        locked with one query and the movements are bulk inserted. The
+        moving-average costs are updated on the same locked rows.
+        
+        Args:
+            warehouse_id: Warehouse ID
+            lines: Dicts with product_id, quantity and unit_cost, and
+                optionally unit_cost_usd (USD cost per base unit for the
+                average cost; defaults to unit_cost)
+            source_type: Source of stock (purchase, return, etc.)
+            reference_number: Reference document number
+            reference_type: Type of reference document
+            reference_id: ID of reference document
+            user: User performing the operation
+            notes: Optional notes
+            usd_to_syp_old: Exchange rate of the document (defaults to
+                today's rate)
+            
+        Returns:
+            Created StockMovement instances, in line order
+        """
+        if not lines:
+            return []
+        
+        product_ids = {line['product_id'] for line in lines}
+        locked = Stock.objects.select_for_update().filter(
+            warehouse_id=warehouse_id, product_id__in=product_ids
+        )
+        stocks = {stock.product_id: stock for stock in locked}
+        missing = product_ids - stocks.keys()
+        if missing:
+            Stock.objects.bulk_create(
+                [Stock(product_id=pid, warehouse_id=warehouse_id, quantity=Decimal('0')) for pid in missing],
+                ignore_conflicts=True
+            )
+            stocks.update({stock.product_id: stock for stock in locked.filter(product_id__in=missing)})
+        
+        usd_to_syp_old = usd_to_syp_old or AverageCostService.current_syp_rate()
+        movements = []
+        history = []
+        for line in lines:
+            stock = stocks[line['product_id']]
+            history.append(AverageCostService.receive(
+                stock, line['quantity'], line.get('unit_cost_usd', line['unit_cost']), usd_to_syp_old
+            ))
+            balance_before = stock.quantity
+            stock.quantity += line['quantity']
+            movements.append(StockMovement(
+                product_id=line['product_id'],
+                warehouse_id=warehouse_id,
+                movement_type=StockMovement.MovementType.IN,
+                source_type=source_type,
+                quantity=line['quantity'],
+                unit_cost=line['unit_cost'],
+                reference_number=reference_number,
+                reference_type=reference_type,
+                reference_id=reference_id,
+                balance_before=balance_before,
+                balance_after=stock.quantity,
+                notes=notes,
+                created_by=user
+            ))
+        
+        now = timezone.now()
+        for stock in stocks.values():
+            stock.updated_at = now
+        Stock.objects.bulk_update(
+            list(stocks.values()), ['quantity', 'average_cost', 'average_cost_syp', 'updated_at']
+        )
+        StockMovement.objects.bulk_create(movements)
+        CostLayerService.apply_movements(movements)
+        AverageCostService.record(zip(history, movements))
+        DataVersionService.bump()
+        publish_stock_changes(movements)
+        
+        return movements
+
     @staticmethod
     @handle_service_error
     @transaction.atomic
@@ -275,7 +422,7 @@ class InventoryService:
         stock.save()
         
         # Create movement record
-        StockMovement.objects.create(
+        movement = StockMovement.objects.create(
             product_id=product_id,
             warehouse_id=warehouse_id,
             movement_type=StockMovement.MovementType.OUT,
@@ -289,6 +436,7 @@ class InventoryService:
             notes=notes,
             created_by=user
         )
+        CostLayerService.apply_movement(movement)
         
         return stock
 
@@ -330,17 +478,28 @@ class InventoryService:
 
     @staticmethod
     @handle_service_error
-    def get_stock_valuation(warehouse_id: int = None, method: str = 'average') -> Dict[str, Any]:
+    def get_stock_valuation(warehouse_id: int = None, method: str = 'average', as_of=None) -> Dict[str, Any]:
         """
         Calculate total stock valuation.
         
+        'average' values stock at the product cost price. 'fifo' and 'lifo'
+        value it from the cost layers; quantities not covered by layers
+        (history older than the layers) fall back to the product cost price.
+        
+        With ``as_of`` the quantities come from the stock snapshots and the
+        layers are those held at the end of that day.
+        
         Args:
             warehouse_id: Optional warehouse filter
             method: Valuation method ('average', 'fifo', 'lifo')
+            as_of: Optional date to value the stock at
             
         Returns:
             Dictionary with valuation information
         """
+        if method not in ('average', 'fifo', 'lifo'):
+            raise ValidationException(f'طريقة التقييم غير مدعومة: {method}', 'method')
+        
         stocks = Stock.objects.select_related('product').filter(
             product__is_active=True,
             product__is_deleted=False
@@ -349,20 +508,31 @@ class InventoryService:
         if warehouse_id:
             stocks = stocks.filter(warehouse_id=warehouse_id)
         
+        layers = {}
+        if method != 'average':
+            layers = CostLayerService.layer_totals(method, warehouse_id, as_of=as_of)
+        quantities = None
+        if as_of is not None:
+            quantities = StockSnapshotService.stock_as_of(as_of, warehouse_id)
+        
         total_value = Decimal('0')
         items = []
         
         for stock in stocks:
-            # Using average cost (cost_price) for simplicity
-            # FIFO/LIFO would require tracking lot-level costs
-            item_value = stock.quantity * stock.product.cost_price
+            key = (stock.product_id, stock.warehouse_id)
+            quantity = stock.quantity if quantities is None else quantities.get(key, Decimal('0'))
+            if method == 'average':
+                item_value = quantity * stock.product.cost_price
+            else:
+                layer_qty, layer_value = layers.get(key, (Decimal('0'), Decimal('0')))
+                item_value = layer_value + (quantity - layer_qty) * stock.product.cost_price
             total_value += item_value
             
             items.append({
                 'product_id': stock.product_id,
                 'product_name': stock.product.name,
-                'quantity': stock.quantity,
-                'unit_cost': stock.product.cost_price,
+                'quantity': quantity,
+                'unit_cost': item_value / quantity if quantity else stock.product.cost_price,
                 'total_value': item_value
             })
         
@@ -379,6 +549,11 @@ class InventoryService:
         """
         Reserve stock for a pending order.
         
+        The reserved quantity is raised by one conditional UPDATE, so
+        concurrent reservations cannot exceed the stock on hand. Holds that
+        belong to a document and should expire are made through
+        StockReservationService (reservations.py).
+        
         Args:
             product_id: Product ID
             warehouse_id: Warehouse ID
@@ -390,25 +565,12 @@ class InventoryService:
         Raises:
             InsufficientStockException: If not enough available stock
         """
-        try:
-            stock = Stock.objects.get(
-                product_id=product_id, 
-                warehouse_id=warehouse_id
-            )
-        except Stock.DoesNotExist:
-            product = Product.objects.get(id=product_id)
-            raise InsufficientStockException(product.name, int(quantity), 0)
-        
-        if stock.available_quantity < quantity:
+        if not increment_reserved(product_id, warehouse_id, quantity):
+            available = Stock.objects.filter(
+                product_id=product_id, warehouse_id=warehouse_id
+            ).values_list(F('quantity') - F('reserved_quantity'), flat=True).first() or Decimal('0')
             product = Product.objects.get(id=product_id)
-            raise InsufficientStockException(
-                product.name, 
-                int(quantity), 
-                int(stock.available_quantity)
-            )
-        
-        stock.reserved_quantity += quantity
-        stock.save()
+            raise InsufficientStockException(product.name, int(quantity), int(max(available, Decimal('0'))))
         return True
 
     @staticmethod
@@ -425,16 +587,4 @@ class InventoryService:
         Returns:
             True if release successful
         """
-        try:
-            stock = Stock.objects.get(
-                product_id=product_id, 
-                warehouse_id=warehouse_id
-            )
-            stock.reserved_quantity = max(
-                Decimal('0'), 
-                stock.reserved_quantity - quantity
-            )
-            stock.save()
-            return True
-        except Stock.DoesNotExist:
-            return False
+        return decrement_reserved(product_id, warehouse_id, quantity)
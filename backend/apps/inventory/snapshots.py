@@ -0,0 +1,175 @@
+"""
+Stock Snapshots - Point-in-time stock quantities
+
+A snapshot stores the quantity of every product/warehouse at the end of a
+day (typically a month close). Stock on any past date is the nearest
+snapshot plus or minus the movements recorded between the two dates, so
+historical queries read a bounded slice of the movement table instead of
+the full history.
+"""
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.db import transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from apps.core.exceptions import ValidationException
+from apps.core.jobs import JobContext, register_job
+from .models import StockMovement, StockSnapshot
+
+ZERO = Decimal('0')
+
+# Rows written per bulk insert when taking a snapshot
+SNAPSHOT_BATCH_SIZE = 5000
+
+StockKey = Tuple[int, int]
+
+
+def _day_end(value: date) -> datetime:
+    """Exclusive upper bound of a day: midnight at the start of the next day."""
+    return timezone.make_aware(datetime.combine(value + timedelta(days=1), time.min))
+
+
+def month_ends(date_from: date, date_to: date) -> List[date]:
+    """Last day of each month between two dates (inclusive)."""
+    ends = []
+    current = date(date_from.year, date_from.month, 1)
+    while current <= date_to:
+        next_month = date(current.year + current.month // 12, current.month % 12 + 1, 1)
+        last_day = next_month - timedelta(days=1)
+        if date_from <= last_day <= date_to:
+            ends.append(last_day)
+        current = next_month
+    return ends
+
+
+class StockSnapshotService:
+    """
+    Service class for stock snapshots and historical stock quantities.
+    """
+
+    @staticmethod
+    def nearest_snapshot_date(as_of: date) -> Optional[date]:
+        """Snapshot date closest to ``as_of``; earlier snapshots win ties."""
+        before = StockSnapshot.objects.filter(snapshot_date__lte=as_of).order_by(
+            '-snapshot_date'
+        ).values_list('snapshot_date', flat=True).first()
+        after = StockSnapshot.objects.filter(snapshot_date__gt=as_of).order_by(
+            'snapshot_date'
+        ).values_list('snapshot_date', flat=True).first()
+        if before is None or (after is not None and (after - as_of) < (as_of - before)):
+            return after
+        return before
+
+    @staticmethod
+    def _movement_deltas(start: Optional[datetime], end: datetime, filters: Dict) -> Dict[StockKey, Decimal]:
+        """Net stock change per (product, warehouse) for movements in [start, end)."""
+        movements = StockMovement.objects.filter(created_at__lt=end, **filters)
+        if start is not None:
+            movements = movements.filter(created_at__gte=start)
+        rows = movements.values('product_id', 'warehouse_id').annotate(
+            delta=Sum(F('balance_after') - F('balance_before'))
+        ).order_by()
+        return {(r['product_id'], r['warehouse_id']): r['delta'] or ZERO for r in rows}
+
+    @staticmethod
+    def stock_as_of(as_of: date, warehouse_id: int = None,
+                    product_ids: Iterable[int] = None) -> Dict[StockKey, Decimal]:
+        """
+        Stock quantity per (product, warehouse) at the end of ``as_of``.
+
+        Uses the nearest snapshot and applies the movements between the
+        snapshot and the requested date; without snapshots the movement
+        history is summed from the start.
+
+        Args:
+            as_of: Date to report stock for
+            warehouse_id: Optional warehouse filter
+            product_ids: Optional product filter
+
+        Returns:
+            Mapping of (product_id, warehouse_id) to quantity; pairs with
+            no stock are omitted
+        """
+        filters = {}
+        if warehouse_id:
+            filters['warehouse_id'] = warehouse_id
+        if product_ids is not None:
+            filters['product_id__in'] = list(product_ids)
+
+        snapshot_date = StockSnapshotService.nearest_snapshot_date(as_of)
+        quantities: Dict[StockKey, Decimal] = {}
+        if snapshot_date is not None:
+            quantities = {
+                (p, w): q for p, w, q in StockSnapshot.objects.filter(
+                    snapshot_date=snapshot_date, **filters
+                ).values_list('product_id', 'warehouse_id', 'quantity')
+            }
+
+        if snapshot_date is None:
+            deltas = StockSnapshotService._movement_deltas(None, _day_end(as_of), filters)
+            sign = 1
+        elif snapshot_date <= as_of:
+            deltas = StockSnapshotService._movement_deltas(
+                _day_end(snapshot_date), _day_end(as_of), filters
+            )
+            sign = 1
+        else:
+            deltas = StockSnapshotService._movement_deltas(
+                _day_end(as_of), _day_end(snapshot_date), filters
+            )
+            sign = -1
+
+        for key, delta in deltas.items():
+            quantities[key] = quantities.get(key, ZERO) + sign * delta
+        return {key: qty for key, qty in quantities.items() if qty != 0}
+
+    @staticmethod
+    @transaction.atomic
+    def take_snapshot(snapshot_date: date = None, batch_size: int = SNAPSHOT_BATCH_SIZE) -> int:
+        """
+        Store the stock at the end of ``snapshot_date`` (default: yesterday).
+
+        An existing snapshot for the same date is replaced. Only completed
+        days can be captured, since later movements of the same day would
+        be missing from the snapshot.
+
+        Returns:
+            Number of snapshot rows written
+        """
+        today = timezone.localdate()
+        if snapshot_date is None:
+            snapshot_date = today - timedelta(days=1)
+        if snapshot_date >= today:
+            raise ValidationException('لا يمكن أخذ لقطة مخزون ليوم لم ينتهِ بعد', 'date')
+
+        quantities = StockSnapshotService.stock_as_of(snapshot_date)
+        StockSnapshot.objects.filter(snapshot_date=snapshot_date).delete()
+        StockSnapshot.objects.bulk_create(
+            [
+                StockSnapshot(
+                    snapshot_date=snapshot_date,
+                    product_id=product_id,
+                    warehouse_id=warehouse_id,
+                    quantity=quantity,
+                )
+                for (product_id, warehouse_id), quantity in quantities.items()
+            ],
+            batch_size=batch_size,
+        )
+        return len(quantities)
+
+
+@register_job('stock_snapshot')
+def run_stock_snapshot(context: JobContext) -> Dict:
+    """
+    Params:
+        date: Snapshot date as YYYY-MM-DD (default: yesterday)
+    """
+    snapshot_date = parse_date(context.params.get('date') or '') \
+        or timezone.localdate() - timedelta(days=1)
+    rows = StockSnapshotService.take_snapshot(snapshot_date)
+    return {'date': snapshot_date.isoformat(), 'rows': rows}
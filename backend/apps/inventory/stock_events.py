@@ -0,0 +1,60 @@
+"""
+Stock Events - stock-changed and low-stock-crossed change events
+
+Every stock movement publishes the new balance of its product/warehouse.
+When a batch of movements commits, products whose stock fell from above
+their minimum to at or below it also raise a low-stock event.
+"""
+from typing import Iterable, List
+
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from apps.core.events import (
+    EVENT_LOW_STOCK_CROSSED, EVENT_STOCK_CHANGED, Event, EventService, register_enricher
+)
+from .models import Product, StockMovement
+
+
+def publish_stock_changes(movements: Iterable[StockMovement]) -> None:
+    """Publish one stock-changed event per movement."""
+    EventService.publish_many([
+        (EVENT_STOCK_CHANGED, {
+            'product_id': movement.product_id,
+            'warehouse_id': movement.warehouse_id,
+            'movement_id': movement.id,
+            'previous_quantity': movement.balance_before,
+            'quantity': movement.balance_after,
+        })
+        for movement in movements
+    ])
+
+
+@register_enricher
+def low_stock_crossings(events: List[Event]) -> List[Event]:
+    changes = [payload for event_type, payload in events if event_type == EVENT_STOCK_CHANGED]
+    if not changes:
+        return []
+    products = {
+        row['id']: row for row in Product.objects.filter(
+            id__in={change['product_id'] for change in changes}
+        ).values('id', 'name', 'minimum_stock')
+    }
+    crossings = []
+    for change in changes:
+        product = products.get(change['product_id'])
+        if product and change['previous_quantity'] > product['minimum_stock'] >= change['quantity']:
+            crossings.append((EVENT_LOW_STOCK_CROSSED, {
+                'product_id': change['product_id'],
+                'product_name': product['name'],
+                'warehouse_id': change['warehouse_id'],
+                'quantity': change['quantity'],
+                'minimum_stock': product['minimum_stock'],
+            }))
+    return crossings
+
+
+@receiver(post_save, sender=StockMovement)
+def _movement_saved(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        publish_stock_changes([instance])
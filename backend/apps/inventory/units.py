@@ -0,0 +1,273 @@
+"""
+Unit Conversion - Cached product unit graphs
+
+Each product's units (base unit, conversion factors, prices and barcodes)
+are loaded once into a process-level cache, so converting a line quantity
+to base units costs no queries after warm-up. Services prefetch the graphs
+of every product on a document in one query before walking its lines.
+The cache is tagged with a version stamp stored in the database
+(``DataVersion`` key 'units'); a worker re-reads the stamp at most every
+UNIT_CACHE_CHECK_INTERVAL seconds and drops its graphs when it moved.
+Saves and deletes of ProductUnit drop the product's graph at once and bump
+the stamp when they commit, so other worker processes stop converting with
+an old factor within seconds. Graphs also expire after UNIT_CACHE_TTL
+seconds, covering writes that send no signals, and the least recently
+used are evicted once the cache holds UNIT_CACHE_MAX_PRODUCTS products.
+"""
+import threading
+import time
+from collections import OrderedDict
+from decimal import Decimal
+from typing import Dict, Iterable, Optional
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.core.backup import backup_restored
+from apps.core.versioning import increment_version, read_version
+from .models import ProductUnit
+
+UNIT_VERSION_KEY = 'units'
+
+# Seconds a worker trusts its graphs before re-reading the version stamp
+UNIT_CACHE_CHECK_INTERVAL = 2.0
+
+# Seconds a cached unit graph is used at most, even when the stamp did not move
+UNIT_CACHE_TTL = 300
+
+# Products kept in the cache; the least recently used are evicted beyond it
+UNIT_CACHE_MAX_PRODUCTS = 20000
+
+
+class UnitEntry:
+    """Immutable copy of one ProductUnit row."""
+
+    __slots__ = (
+        'id', 'product_id', 'unit_id', 'conversion_factor', 'is_base_unit', 'is_deleted',
+        'sale_price', 'sale_price_usd', 'cost_price', 'cost_price_usd', 'barcode',
+    )
+
+    def __init__(self, product_unit: ProductUnit):
+        for name in self.__slots__:
+            object.__setattr__(self, name, getattr(product_unit, name))
+
+    def __setattr__(self, name, value):
+        raise AttributeError('UnitEntry is read-only')
+
+    def convert_to_base(self, quantity: Decimal) -> Decimal:
+        """Convert quantity from this unit to base unit."""
+        return quantity * self.conversion_factor
+
+    def convert_from_base(self, base_quantity: Decimal) -> Decimal:
+        """Convert quantity from base unit to this unit."""
+        return base_quantity / self.conversion_factor
+
+
+class UnitGraph:
+    """All units of one product."""
+
+    __slots__ = ('product_id', 'units', 'base_unit', 'version', 'loaded_at')
+
+    def __init__(self, product_id: int, units: Iterable[UnitEntry], version: int = 0):
+        self.product_id = product_id
+        self.units: Dict[int, UnitEntry] = {entry.id: entry for entry in units}
+        # Lowest id wins, matching ``.filter(is_base_unit=True).first()``
+        self.base_unit: Optional[UnitEntry] = next(
+            (entry for entry in sorted(self.units.values(), key=lambda e: e.id)
+             if entry.is_base_unit and not entry.is_deleted),
+            None
+        )
+        self.version = version
+        self.loaded_at = time.monotonic()
+
+    def by_barcode(self, barcode: str) -> Optional[UnitEntry]:
+        for entry in self.units.values():
+            if entry.barcode == barcode and not entry.is_deleted:
+                return entry
+        return None
+
+
+_lock = threading.Lock()
+# Product id -> graph, least recently used first
+_graphs: 'OrderedDict[int, UnitGraph]' = OrderedDict()
+# ProductUnit id -> product id, for lookups by unit id
+_unit_products: Dict[int, int] = {}
+# Version stamp the cache holds and when it was last read (None: read it next time)
+_state = {'version': 0, 'checked_at': None}
+
+
+def _check_interval() -> float:
+    return getattr(settings, 'UNIT_CACHE_CHECK_INTERVAL', UNIT_CACHE_CHECK_INTERVAL)
+
+
+def _current_version() -> int:
+    """
+    Version stamp of the unit tables, re-read at most every
+    UNIT_CACHE_CHECK_INTERVAL seconds; the cache is emptied when it moved.
+    """
+    now = time.monotonic()
+    with _lock:
+        checked_at = _state['checked_at']
+        if checked_at is not None and now - checked_at < _check_interval():
+            return _state['version']
+    version = read_version(UNIT_VERSION_KEY)
+    with _lock:
+        # A thread that read the stamp later has already stored it
+        if _state['checked_at'] is None or now >= _state['checked_at']:
+            if version != _state['version']:
+                _graphs.clear()
+                _unit_products.clear()
+                _state['version'] = version
+            _state['checked_at'] = now
+        return _state['version']
+
+
+def _fresh(graph: Optional[UnitGraph]) -> bool:
+    return (
+        graph is not None
+        and graph.version == _state['version']
+        and time.monotonic() - graph.loaded_at < UNIT_CACHE_TTL
+    )
+
+
+class UnitConversionService:
+    """
+    Service class for product unit lookups and quantity conversion.
+    """
+
+    @staticmethod
+    def prefetch(product_ids: Iterable[int]) -> Dict[int, UnitGraph]:
+        """
+        Load the unit graphs of all uncached products with one query.
+
+        Returns:
+            {product_id: graph} for every requested product; callers use
+            these directly, since the cache may evict them at any time
+        """
+        # Read before the rows, so a graph is never tagged newer than its data
+        version = _current_version()
+        graphs: Dict[int, UnitGraph] = {}
+        missing = set()
+        with _lock:
+            for pid in product_ids:
+                if pid is None or pid in graphs or pid in missing:
+                    continue
+                graph = _graphs.get(pid)
+                if _fresh(graph):
+                    _graphs.move_to_end(pid)
+                    graphs[pid] = graph
+                else:
+                    missing.add(pid)
+        if not missing:
+            return graphs
+        entries: Dict[int, list] = {pid: [] for pid in missing}
+        for product_unit in ProductUnit.objects.filter(product_id__in=missing):
+            entries[product_unit.product_id].append(UnitEntry(product_unit))
+
+        with _lock:
+            for product_id, units in entries.items():
+                graph = UnitGraph(product_id, units, version)
+                graphs[product_id] = graph
+                if version != _state['version']:
+                    # The stamp moved while loading; hand out the graph uncached
+                    continue
+                UnitConversionService._drop(product_id)
+                _graphs[product_id] = graph
+                for unit_id in graph.units:
+                    _unit_products[unit_id] = product_id
+            while len(_graphs) > UNIT_CACHE_MAX_PRODUCTS:
+                UnitConversionService._drop(next(iter(_graphs)))
+        return graphs
+
+    @staticmethod
+    def graph(product_id: int) -> UnitGraph:
+        """Unit graph of a product, loading it if needed."""
+        _current_version()
+        with _lock:
+            graph = _graphs.get(product_id)
+            if _fresh(graph):
+                _graphs.move_to_end(product_id)
+                return graph
+        return UnitConversionService.prefetch([product_id])[product_id]
+
+    @staticmethod
+    def base_unit(product_id: int) -> Optional[UnitEntry]:
+        """Base unit of a product, or None when no units are configured."""
+        return UnitConversionService.graph(product_id).base_unit
+
+    @staticmethod
+    def unit(product_unit_id: int) -> UnitEntry:
+        """
+        Unit by id.
+
+        Raises:
+            ProductUnit.DoesNotExist: If the unit does not exist
+        """
+        product_id = _unit_products.get(product_unit_id)
+        if product_id is not None:
+            entry = UnitConversionService.graph(product_id).units.get(product_unit_id)
+            if entry is not None:
+                return entry
+        product_id = ProductUnit.objects.values_list('product_id', flat=True).get(id=product_unit_id)
+        UnitConversionService.invalidate(product_id)
+        return UnitConversionService.graph(product_id).units[product_unit_id]
+
+    @staticmethod
+    def to_base(product_id: int, quantity: Decimal, product_unit_id: Optional[int] = None) -> Decimal:
+        """
+        Convert a line quantity to base units.
+
+        Uses the line's unit when given, else the product's base unit; with
+        no units configured the quantity is returned as-is.
+        Requirements: 3.4, 3.6, 4.4, 4.6
+        """
+        if product_unit_id:
+            return UnitConversionService.unit(product_unit_id).convert_to_base(quantity)
+        base_unit = UnitConversionService.base_unit(product_id)
+        return base_unit.convert_to_base(quantity) if base_unit else quantity
+
+    @staticmethod
+    def invalidate(product_id: int) -> None:
+        """Drop a product's cached graph."""
+        with _lock:
+            UnitConversionService._drop(product_id)
+
+    @staticmethod
+    def clear() -> None:
+        """Drop every cached graph and re-read the version stamp on next use."""
+        with _lock:
+            _graphs.clear()
+            _unit_products.clear()
+            _state['checked_at'] = None
+
+    @staticmethod
+    def _drop(product_id: int) -> None:
+        """Remove a product's graph and unit index entries (lock held)."""
+        graph = _graphs.pop(product_id, None)
+        if graph is not None:
+            for unit_id in graph.units:
+                if _unit_products.get(unit_id) == product_id:
+                    del _unit_products[unit_id]
+
+
+@receiver(post_save, sender=ProductUnit)
+@receiver(post_delete, sender=ProductUnit)
+def _product_unit_changed(sender, instance, **kwargs):
+    product_id = instance.product_id
+    UnitConversionService.invalidate(product_id)
+
+    def committed():
+        # Other workers drop their graphs on their next stamp check
+        increment_version(UNIT_VERSION_KEY)
+        # Readers may have cached the uncommitted row; drop it again once settled
+        UnitConversionService.invalidate(product_id)
+
+    transaction.on_commit(committed, robust=True)
+
+
+@receiver(backup_restored)
+def _backup_restored(sender, **kwargs):
+    increment_version(UNIT_VERSION_KEY)
+    UnitConversionService.clear()
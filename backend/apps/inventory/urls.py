@@ -6,7 +6,7 @@ from rest_framework.routers import DefaultRouter
 from rest_framework_nested import routers as nested_routers
 from .views import (
     CategoryViewSet, UnitViewSet, ProductUnitViewSet, WarehouseViewSet,
-    ProductViewSet, StockViewSet, StockMovementViewSet
+    ProductViewSet, StockViewSet, StockMovementViewSet, StockReservationViewSet
 )
 
 router = DefaultRouter()
@@ -17,6 +17,7 @@ router.register('warehouses', WarehouseViewSet)
 router.register('products', ProductViewSet)
 router.register('stock', StockViewSet)
 router.register('movements', StockMovementViewSet)
+router.register('reservations', StockReservationViewSet)
 
 # Nested routes for product units under products
 products_router = nested_routers.NestedDefaultRouter(router, 'products', lookup='product')
@@ -1,17 +1,42 @@
 """
 Inventory Views - API Endpoints
 """
+from datetime import timedelta
+
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from django_filters.rest_framework import DjangoFilterBackend
 from django_filters import rest_framework as filters
 from rest_framework.filters import SearchFilter, OrderingFilter
+from django.db.models import Q
 from django.shortcuts import get_object_or_404
+from django.utils.dateparse import parse_date
 
 from apps.core.decorators import handle_view_error
-from .models import Category, Unit, ProductUnit, Warehouse, Product, Stock, StockMovement
+from apps.core.exceptions import ValidationException
+from apps.core.job_serializers import BackgroundJobSerializer
+from apps.core.jobs import JobRunner
+from apps.core.pagination import CreatedAtCursorPagination
+from apps.core.utils import day_bounds
+from .models import Category, Unit, ProductUnit, Warehouse, Product, Stock, StockMovement, StockReservation
+
+
+# Type-ahead lookup result sizes
+LOOKUP_DEFAULT_LIMIT = 20
+LOOKUP_MAX_LIMIT = 50
+
+
+def _parse_date_param(request, name: str):
+    """Parse an optional YYYY-MM-DD query parameter."""
+    value = request.query_params.get(name)
+    if not value:
+        return None
+    parsed = parse_date(value)
+    if parsed is None:
+        raise ValidationException('صيغة التاريخ غير صحيحة، استخدم YYYY-MM-DD', name)
+    return parsed
 
 
 class StockMovementFilter(filters.FilterSet):
@@ -25,25 +50,45 @@ class StockMovementFilter(filters.FilterSet):
     - source_type: Filter by source type (purchase, sale, adjustment, transfer, opening, return)
     - date_from: Filter movements from this date (inclusive)
     - date_to: Filter movements up to this date (inclusive)
+    - created_after / created_before: Half-open datetime range [after, before)
+    
+    Dates are turned into datetime bounds on created_at so the index on the
+    column can be used.
     
     Requirements: 6.2 - Provide filtering by product, warehouse, movement type, and date range
     """
-    date_from = filters.DateFilter(field_name='created_at', lookup_expr='date__gte')
-    date_to = filters.DateFilter(field_name='created_at', lookup_expr='date__lte')
+    date_from = filters.DateFilter(method='filter_date_from')
+    date_to = filters.DateFilter(method='filter_date_to')
+    created_after = filters.IsoDateTimeFilter(field_name='created_at', lookup_expr='gte')
+    created_before = filters.IsoDateTimeFilter(field_name='created_at', lookup_expr='lt')
     
     class Meta:
         model = StockMovement
-        fields = ['product', 'warehouse', 'movement_type', 'source_type', 'date_from', 'date_to']
+        fields = [
+            'product', 'warehouse', 'movement_type', 'source_type',
+            'date_from', 'date_to', 'created_after', 'created_before'
+        ]
+
+    def filter_date_from(self, queryset, name, value):
+        return queryset.filter(created_at__gte=day_bounds(value)[0])
+
+    def filter_date_to(self, queryset, name, value):
+        return queryset.filter(created_at__lt=day_bounds(value)[1])
 from .serializers import (
-    CategorySerializer, CategoryTreeSerializer,
+    CategorySerializer,
     UnitSerializer, UnitCreateSerializer,
     ProductUnitSerializer, ProductUnitCreateSerializer,
     WarehouseSerializer,
     ProductListSerializer, ProductDetailSerializer, ProductCreateSerializer,
     StockSerializer, StockAdjustmentSerializer, StockMovementSerializer,
+    StockReservationSerializer, StockReservationRequestSerializer, StockReservationReleaseSerializer,
     BarcodeSearchSerializer
 )
 from .services import InventoryService
+from .categories import CategoryTreeService
+from .costing import CostLayerService
+from .reservations import StockReservationService
+from .snapshots import StockSnapshotService
 
 
 class CategoryViewSet(viewsets.ModelViewSet):
@@ -99,10 +144,8 @@ class CategoryViewSet(viewsets.ModelViewSet):
 
     @action(detail=False, methods=['get'])
     def tree(self, request):
-        """Get categories as a tree structure."""
-        root_categories = self.queryset.filter(parent__isnull=True)
-        serializer = CategoryTreeSerializer(root_categories, many=True)
-        return Response(serializer.data)
+        """Get categories as a tree structure (cached, built from one query)."""
+        return Response(CategoryTreeService.tree())
 
 
 class UnitViewSet(viewsets.ModelViewSet):
@@ -436,6 +479,29 @@ class ProductViewSet(viewsets.ModelViewSet):
             status=status.HTTP_404_NOT_FOUND
         )
 
+    @handle_view_error
+    @action(detail=False, methods=['get'])
+    def lookup(self, request):
+        """
+        Type-ahead product search for filter widgets.
+        
+        Matches the start of the name, code or barcode (?q=) so the indexes
+        on those columns are used, and returns at most ``limit`` light rows.
+        """
+        query = (request.query_params.get('q') or '').strip()
+        try:
+            limit = min(int(request.query_params.get('limit', LOOKUP_DEFAULT_LIMIT)), LOOKUP_MAX_LIMIT)
+        except ValueError:
+            raise ValidationException('قيمة الحد غير صحيحة', 'limit')
+        
+        products = Product.objects.filter(is_deleted=False)
+        if query:
+            products = products.filter(
+                Q(name__istartswith=query) | Q(code__istartswith=query) | Q(barcode=query)
+            )
+        rows = products.order_by('name', 'id').values('id', 'code', 'name', 'barcode')[:max(limit, 1)]
+        return Response(list(rows))
+
     @handle_view_error
     @action(detail=True, methods=['get'])
     def stock(self, request, pk=None):
@@ -486,10 +552,63 @@ class StockViewSet(viewsets.ModelViewSet):
         """Get stock valuation report."""
         warehouse_id = request.query_params.get('warehouse')
         method = request.query_params.get('method', 'average')
+        as_of = _parse_date_param(request, 'as_of')
         
-        valuation = InventoryService.get_stock_valuation(warehouse_id, method)
+        valuation = InventoryService.get_stock_valuation(warehouse_id, method, as_of=as_of)
         return Response(valuation)
 
+    @handle_view_error
+    @action(detail=False, methods=['get'])
+    def cogs(self, request):
+        """Get cost of goods sold from FIFO/LIFO cost layers."""
+        cogs = CostLayerService.get_cogs(
+            method=request.query_params.get('method', 'fifo'),
+            date_from=_parse_date_param(request, 'date_from'),
+            date_to=_parse_date_param(request, 'date_to'),
+            warehouse_id=request.query_params.get('warehouse'),
+        )
+        return Response(cogs)
+
+    @handle_view_error
+    @action(detail=False, methods=['get'], url_path='as-of')
+    def as_of(self, request):
+        """Get stock quantities at the end of a past date (?date=YYYY-MM-DD)."""
+        as_of = _parse_date_param(request, 'date')
+        if as_of is None:
+            raise ValidationException('التاريخ مطلوب', 'date')
+        warehouse_id = request.query_params.get('warehouse')
+        product_id = request.query_params.get('product')
+
+        quantities = StockSnapshotService.stock_as_of(
+            as_of, warehouse_id, product_ids=[product_id] if product_id else None
+        )
+        products = Product.objects.in_bulk({p for p, _ in quantities})
+        warehouses = Warehouse.objects.in_bulk({w for _, w in quantities})
+        items = [
+            {
+                'product_id': product_id,
+                'product_code': products[product_id].code,
+                'product_name': products[product_id].name,
+                'warehouse_id': warehouse_id,
+                'warehouse_name': warehouses[warehouse_id].name,
+                'quantity': quantity,
+            }
+            for (product_id, warehouse_id), quantity in sorted(
+                quantities.items(), key=lambda item: (products[item[0][0]].name, item[0][1])
+            )
+        ]
+        return Response({'date': as_of, 'item_count': len(items), 'items': items})
+
+    @handle_view_error
+    @action(detail=False, methods=['post'], permission_classes=[IsAdminUser])
+    def snapshots(self, request):
+        """Take a stock snapshot in the background (body: {"date": "YYYY-MM-DD"})."""
+        params = {}
+        if request.data.get('date'):
+            params['date'] = request.data['date']
+        job = JobRunner.submit('stock_snapshot', params, user=request.user)
+        return Response(BackgroundJobSerializer(job).data, status=status.HTTP_202_ACCEPTED)
+
 
 class StockMovementViewSet(viewsets.ReadOnlyModelViewSet):
     """
@@ -497,6 +616,9 @@ class StockMovementViewSet(viewsets.ReadOnlyModelViewSet):
     
     Provides filtering by product, warehouse, movement type, source type, and date range.
     
+    Lists use page numbers by default; ``?pagination=cursor`` switches to
+    keyset pagination on (created_at, id), which stays fast on deep pages.
+    
     Requirements:
     - 6.1: Display stock movements list with columns (date, product, warehouse, type, quantity, balance before, balance after, reference)
     - 6.2: Provide filtering by product, warehouse, movement type, and date range
@@ -512,4 +634,59 @@ class StockMovementViewSet(viewsets.ReadOnlyModelViewSet):
     filterset_class = StockMovementFilter
     search_fields = ['product__name', 'reference_number', 'notes']
     ordering_fields = ['created_at', 'quantity']
-    ordering = ['-created_at']
+    ordering = ['-created_at', '-id']
+
+    @property
+    def paginator(self):
+        if not hasattr(self, '_paginator'):
+            params = self.request.query_params
+            if params.get('pagination') == 'cursor' or 'cursor' in params:
+                self._paginator = CreatedAtCursorPagination()
+            else:
+                self._paginator = super().paginator
+        return self._paginator
+
+
+class StockReservationViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    ViewSet for expiring stock reservations.
+    
+    POST creates (or resets) the holds of a document; ``release`` ends them.
+    Expired holds are released by the ``reservation_sweep`` job.
+    """
+    
+    queryset = StockReservation.objects.select_related('product', 'warehouse')
+    serializer_class = StockReservationSerializer
+    permission_classes = [IsAuthenticated]
+    filter_backends = [DjangoFilterBackend, OrderingFilter]
+    filterset_fields = ['product', 'warehouse', 'status', 'reference_type', 'reference_id']
+    ordering = ['-created_at', '-id']
+
+    @handle_view_error
+    def create(self, request):
+        """Reserve the lines of a document, all or nothing."""
+        serializer = StockReservationRequestSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        ttl_minutes = data.get('ttl_minutes')
+        reservations = StockReservationService.reserve_document(
+            warehouse_id=data['warehouse_id'],
+            lines=data['items'],
+            reference_type=data['reference_type'],
+            reference_id=data['reference_id'],
+            ttl=timedelta(minutes=ttl_minutes) if ttl_minutes else None,
+            user=request.user
+        )
+        return Response(
+            StockReservationSerializer(reservations, many=True).data,
+            status=status.HTTP_201_CREATED
+        )
+
+    @handle_view_error
+    @action(detail=False, methods=['post'])
+    def release(self, request):
+        """Release the active holds of a document."""
+        serializer = StockReservationReleaseSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        released = StockReservationService.release(**serializer.validated_data)
+        return Response({'released': released})
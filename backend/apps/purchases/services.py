@@ -4,18 +4,31 @@ Purchases Services - Business Logic
 from decimal import Decimal
 from typing import List, Dict, Any
 from django.db import transaction
+from django.db.models import Max, Subquery
 from django.utils import timezone
-from apps.core.exceptions import ValidationException, InvalidOperationException
+from apps.core.exceptions import ValidationException, InvalidOperationException, NotFoundException
 from apps.core.decorators import handle_service_error
 from apps.core.utils import get_daily_fx, normalize_fx, to_usd, from_usd
 from apps.inventory.services import InventoryService
-from apps.inventory.models import StockMovement
+from apps.inventory.models import Product, StockMovement
+from apps.inventory.replenishment import DEFAULT_LEAD_TIME_DAYS, DEFAULT_REVIEW_DAYS, ReplenishmentService
+from apps.inventory.units import UnitConversionService
 from .models import (
     Supplier, PurchaseOrder, PurchaseOrderItem,
     GoodsReceivedNote, GRNItem, SupplierPayment
 )
 
 
+# Purchase order statuses whose remaining quantities count as on order
+OPEN_ORDER_STATUSES = [
+    PurchaseOrder.Status.DRAFT,
+    PurchaseOrder.Status.PENDING,
+    PurchaseOrder.Status.APPROVED,
+    PurchaseOrder.Status.ORDERED,
+    PurchaseOrder.Status.PARTIAL,
+]
+
+
 class PurchaseService:
     """Service class for purchase operations."""
 
@@ -45,8 +58,10 @@ class PurchaseService:
         - Accepts optional product_unit_id for unit selection
         - Calculates base_quantity using conversion factor from product_unit
         - If no product_unit specified, defaults to product's base unit
+        
+        Unit graphs are prefetched and the lines are inserted with one
+        bulk_create.
         """
-        from apps.inventory.models import ProductUnit
         
         if usd_to_syp_old_snapshot is None and usd_to_syp_new_snapshot is None:
             raise ValidationException('يجب إدخال سعر الصرف لأمر الشراء', field='usd_to_syp_old_snapshot')
@@ -72,34 +87,23 @@ class PurchaseService:
             created_by=user
         )
         
+        UnitConversionService.prefetch(item['product_id'] for item in items)
+        po_items = []
         for item in items:
             product_id = item['product_id']
             quantity = Decimal(str(item['quantity']))
             product_unit_id = item.get('product_unit_id')
             product_unit = None
             
-            # Get product_unit if specified
+            # Get product_unit if specified, else default to the base unit
             if product_unit_id:
-                product_unit = ProductUnit.objects.get(id=product_unit_id)
-                base_quantity = product_unit.convert_to_base(quantity)
-            else:
-                # Default to base unit - find the base unit for this product
-                base_unit = ProductUnit.objects.filter(
-                    product_id=product_id,
-                    is_base_unit=True,
-                    is_deleted=False
-                ).first()
-                
-                if base_unit:
-                    base_quantity = base_unit.convert_to_base(quantity)
-                else:
-                    # No ProductUnit configured, use quantity as-is (legacy behavior)
-                    base_quantity = quantity
+                product_unit = UnitConversionService.unit(product_unit_id)
+            base_quantity = UnitConversionService.to_base(product_id, quantity, product_unit_id)
             
-            PurchaseOrderItem.objects.create(
+            po_items.append(PurchaseOrderItem(
                 purchase_order=purchase_order,
                 product_id=product_id,
-                product_unit=product_unit,
+                product_unit_id=product_unit.id if product_unit else None,
                 quantity=quantity,
                 base_quantity=base_quantity,
                 unit_price=item['unit_price'],
@@ -107,11 +111,142 @@ class PurchaseService:
                 tax_rate=Decimal('0.00'),
                 notes=item.get('notes'),
                 created_by=user
-            )
+            ))
         
+        PurchaseOrderItem.objects.bulk_create(po_items)
         purchase_order.calculate_totals()
         return purchase_order
 
+    @staticmethod
+    def get_on_order_quantities(warehouse_id: int = None) -> Dict[tuple, Decimal]:
+        """
+        Base quantities still to be received per (product, warehouse), over
+        draft and open purchase orders.
+        """
+        lines = PurchaseOrderItem.objects.filter(
+            is_deleted=False,
+            purchase_order__is_deleted=False,
+            purchase_order__status__in=OPEN_ORDER_STATUSES
+        )
+        if warehouse_id:
+            lines = lines.filter(purchase_order__warehouse_id=warehouse_id)
+        on_order = {}
+        for product_id, po_warehouse_id, quantity, base_quantity, received in lines.values_list(
+            'product_id', 'purchase_order__warehouse_id', 'quantity', 'base_quantity', 'received_quantity'
+        ):
+            if quantity <= 0 or received >= quantity:
+                continue
+            key = (product_id, po_warehouse_id)
+            on_order[key] = on_order.get(key, Decimal('0')) + base_quantity * (quantity - received) / quantity
+        return on_order
+
+    @staticmethod
+    @handle_service_error
+    def get_reorder_suggestions(
+        warehouse_id: int = None,
+        lead_time_days: int = DEFAULT_LEAD_TIME_DAYS,
+        review_days: int = DEFAULT_REVIEW_DAYS,
+        include_all: bool = False
+    ) -> List[Dict]:
+        """
+        Reorder suggestions from sales velocity, net of quantities already
+        on order (see apps.inventory.replenishment).
+        """
+        return ReplenishmentService.get_reorder_suggestions(
+            warehouse_id=warehouse_id,
+            lead_time_days=lead_time_days,
+            review_days=review_days,
+            on_order=PurchaseService.get_on_order_quantities(warehouse_id),
+            include_all=include_all
+        )
+
+    @staticmethod
+    @handle_service_error
+    @transaction.atomic
+    def draft_reorder_purchase_orders(
+        warehouse_id: int,
+        lead_time_days: int = DEFAULT_LEAD_TIME_DAYS,
+        review_days: int = DEFAULT_REVIEW_DAYS,
+        product_ids: List[int] = None,
+        user=None
+    ) -> Dict[str, Any]:
+        """
+        Draft one purchase order per supplier for the reorder suggestions of
+        a warehouse.
+        
+        Each product is ordered from the supplier of its latest purchase
+        order line, priced at that line's base-unit price (else the
+        warehouse average cost, else the product cost). Products never
+        purchased before are returned as unassigned.
+        
+        Returns:
+            {'orders': [PurchaseOrder, ...], 'unassigned': [suggestion, ...]}
+        """
+        if not warehouse_id:
+            raise ValidationException('يجب تحديد المستودع', field='warehouse')
+        suggestions = PurchaseService.get_reorder_suggestions(warehouse_id, lead_time_days, review_days)
+        if product_ids:
+            wanted = {int(product_id) for product_id in product_ids}
+            suggestions = [s for s in suggestions if s['product_id'] in wanted]
+        if not suggestions:
+            return {'orders': [], 'unassigned': []}
+
+        # Latest purchase line of every product, in one query
+        latest_ids = PurchaseOrderItem.objects.filter(
+            is_deleted=False, purchase_order__is_deleted=False
+        ).exclude(
+            purchase_order__status=PurchaseOrder.Status.CANCELLED
+        ).values('product_id').annotate(latest_id=Max('id')).values('latest_id')
+        latest = {
+            product_id: (supplier_id, unit_price * quantity / base_quantity if base_quantity else unit_price)
+            for product_id, supplier_id, unit_price, quantity, base_quantity in PurchaseOrderItem.objects.filter(
+                id__in=Subquery(latest_ids)
+            ).values_list('product_id', 'purchase_order__supplier_id', 'unit_price', 'quantity', 'base_quantity')
+        }
+        # Product cost, only for lines with neither a price nor an average
+        uncosted = [
+            s['product_id'] for s in suggestions
+            if s['product_id'] in latest and not latest[s['product_id']][1] and not s['average_cost']
+        ]
+        costs = {
+            product_id: cost_usd if cost_usd is not None else cost
+            for product_id, cost_usd, cost in Product.objects.filter(
+                id__in=uncosted
+            ).values_list('id', 'cost_price_usd', 'cost_price')
+        } if uncosted else {}
+
+        by_supplier = {}
+        unassigned = []
+        for suggestion in suggestions:
+            product_id = suggestion['product_id']
+            if product_id not in latest:
+                unassigned.append(suggestion)
+                continue
+            supplier_id, last_price = latest[product_id]
+            unit_price = last_price or suggestion['average_cost'] or costs[product_id]
+            by_supplier.setdefault(supplier_id, []).append({
+                'product_id': product_id,
+                'quantity': suggestion['suggested_quantity'],
+                'unit_price': unit_price.quantize(Decimal('0.01')),
+            })
+
+        order_date = timezone.localdate()
+        usd_to_syp_old, usd_to_syp_new = get_daily_fx(order_date)
+        orders = [
+            PurchaseService.create_purchase_order(
+                supplier_id=supplier_id,
+                warehouse_id=warehouse_id,
+                order_date=order_date,
+                items=items,
+                usd_to_syp_old_snapshot=usd_to_syp_old,
+                usd_to_syp_new_snapshot=usd_to_syp_new,
+                notes='أمر شراء مقترح من اقتراحات إعادة الطلب',
+                user=user
+            )
+            for supplier_id, items in by_supplier.items()
+        ]
+        return {'orders': orders, 'unassigned': unassigned}
+
     @staticmethod
     @handle_service_error
     @transaction.atomic
@@ -177,10 +312,14 @@ class PurchaseService:
         - Calculates base_quantity using conversion factor from product_unit
         - If no product_unit specified, defaults to product's base unit
         - Uses base_quantity for stock addition
+        
+        The order lines are loaded once, GRN items and received quantities
+        are written in bulk and stock is added in one locked pass, so the
+        query count does not grow with the number of lines.
         """
-        from apps.inventory.models import ProductUnit
         
-        purchase_order = PurchaseOrder.objects.get(id=po_id)
+        # Locked so concurrent receipts cannot exceed the ordered quantities
+        purchase_order = PurchaseOrder.objects.select_for_update().get(id=po_id)
         
         if purchase_order.status not in [
             PurchaseOrder.Status.APPROVED,
@@ -199,6 +338,13 @@ class PurchaseService:
         if not items:
             raise ValidationException('يجب تحديد بنود للاستلام')
         
+        # All lines of the order, loaded once
+        po_items = {
+            po_item.id: po_item
+            for po_item in purchase_order.items.select_related('product')
+        }
+        UnitConversionService.prefetch({po_item.product_id for po_item in po_items.values()})
+        
         # Create GRN
         grn = GoodsReceivedNote.objects.create(
             purchase_order=purchase_order,
@@ -210,9 +356,14 @@ class PurchaseService:
         )
         
         total_received_value_usd = Decimal('0')
+        grn_items = []
+        stock_lines = []
+        received = {}
         
         for item_data in items:
-            po_item = PurchaseOrderItem.objects.get(id=item_data['po_item_id'])
+            po_item = po_items.get(int(item_data['po_item_id']))
+            if po_item is None:
+                raise NotFoundException('بند أمر الشراء', item_data['po_item_id'])
             quantity = Decimal(str(item_data['quantity']))
             
             # Validate quantity doesn't exceed remaining
@@ -223,59 +374,53 @@ class PurchaseService:
             
             # Calculate base_quantity based on product_unit or default to base unit
             # Requirements: 4.4, 4.6
-            if po_item.product_unit:
-                # Use the conversion factor from the specified product_unit
-                base_quantity = po_item.product_unit.convert_to_base(quantity)
-            else:
-                # Default to base unit - find the base unit for this product
-                base_unit = ProductUnit.objects.filter(
-                    product=po_item.product,
-                    is_base_unit=True,
-                    is_deleted=False
-                ).first()
-                
-                if base_unit:
-                    # Use base unit conversion (should be 1.0)
-                    base_quantity = base_unit.convert_to_base(quantity)
-                else:
-                    # No ProductUnit configured, use quantity as-is (legacy behavior)
-                    base_quantity = quantity
+            base_quantity = UnitConversionService.to_base(po_item.product_id, quantity, po_item.product_unit_id)
             
-            # Create GRN item
-            GRNItem.objects.create(
+            grn_items.append(GRNItem(
                 grn=grn,
                 po_item=po_item,
-                product=po_item.product,
+                product_id=po_item.product_id,
                 quantity_received=quantity,
                 notes=item_data.get('notes'),
                 created_by=user
-            )
+            ))
             
-            # Update received quantity on PO item
+            # Update received quantity on PO item (written below in one query)
             po_item.received_quantity += quantity
-            po_item.save()
+            received[po_item.id] = po_item
             
             # Calculate value for supplier balance update
             total_received_value_usd += quantity * po_item.unit_price
             
             # Add stock using base_quantity
-            InventoryService.add_stock(
-                product_id=po_item.product_id,
-                warehouse_id=purchase_order.warehouse_id,
-                quantity=base_quantity,  # Use base_quantity for stock addition
-                unit_cost=po_item.unit_price,
-                source_type=StockMovement.SourceType.PURCHASE,
-                reference_number=grn.grn_number,
-                reference_type='GRN',
-                reference_id=grn.id,
-                user=user,
-                notes=f"استلام من أمر الشراء {purchase_order.order_number}"
-            )
+            stock_lines.append({
+                'product_id': po_item.product_id,
+                'quantity': base_quantity,
+                'unit_cost': po_item.unit_price,
+                'unit_cost_usd': quantity * po_item.unit_price / base_quantity if base_quantity else None,
+            })
+        
+        now = timezone.now()
+        for po_item in received.values():
+            po_item.updated_at = now
+        PurchaseOrderItem.objects.bulk_update(list(received.values()), ['received_quantity', 'updated_at'])
+        GRNItem.objects.bulk_create(grn_items)
+        InventoryService.add_stock_bulk(
+            warehouse_id=purchase_order.warehouse_id,
+            lines=stock_lines,
+            source_type=StockMovement.SourceType.PURCHASE,
+            reference_number=grn.grn_number,
+            reference_type='GRN',
+            reference_id=grn.id,
+            user=user,
+            notes=f"استلام من أمر الشراء {purchase_order.order_number}",
+            usd_to_syp_old=purchase_order.usd_to_syp_old_snapshot
+        )
         
         # Check if all items are fully received
         all_received = all(
-            item.remaining_quantity <= 0 
-            for item in purchase_order.items.all()
+            po_item.remaining_quantity <= 0
+            for po_item in po_items.values()
         )
         
         # Update PO status
@@ -9,6 +9,8 @@ from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.filters import SearchFilter, OrderingFilter
 
 from apps.core.decorators import handle_view_error
+from apps.core.idempotency import idempotent
+from apps.inventory.replenishment import DEFAULT_LEAD_TIME_DAYS, DEFAULT_REVIEW_DAYS
 from .models import (
     Supplier, PurchaseOrder, PurchaseOrderItem,
     GoodsReceivedNote, SupplierPayment
@@ -120,6 +122,43 @@ class PurchaseOrderViewSet(viewsets.ModelViewSet):
         """Perform soft delete using the model's soft_delete method."""
         instance.soft_delete(user=self.request.user)
 
+    @action(detail=False, methods=['get'], url_path='reorder-suggestions')
+    @handle_view_error
+    def reorder_suggestions(self, request):
+        """
+        Reorder suggestions from sales velocity.
+        
+        Query params: warehouse, lead_time_days, review_days, all=1 (also
+        lines that need no order).
+        """
+        params = request.query_params
+        suggestions = PurchaseService.get_reorder_suggestions(
+            warehouse_id=params.get('warehouse'),
+            lead_time_days=params.get('lead_time_days', DEFAULT_LEAD_TIME_DAYS),
+            review_days=params.get('review_days', DEFAULT_REVIEW_DAYS),
+            include_all=params.get('all') in ('1', 'true')
+        )
+        return Response({'item_count': len(suggestions), 'items': suggestions})
+
+    @action(detail=False, methods=['post'], url_path='draft-reorder')
+    @handle_view_error
+    def draft_reorder(self, request):
+        """Draft purchase orders, one per supplier, from the reorder suggestions."""
+        result = PurchaseService.draft_reorder_purchase_orders(
+            warehouse_id=request.data.get('warehouse'),
+            lead_time_days=request.data.get('lead_time_days', DEFAULT_LEAD_TIME_DAYS),
+            review_days=request.data.get('review_days', DEFAULT_REVIEW_DAYS),
+            product_ids=request.data.get('products'),
+            user=request.user
+        )
+        return Response(
+            {
+                'orders': PurchaseOrderListSerializer(result['orders'], many=True).data,
+                'unassigned': result['unassigned'],
+            },
+            status=status.HTTP_201_CREATED
+        )
+
     @action(detail=True, methods=['post'])
     @handle_view_error
     def approve(self, request, pk=None):
@@ -140,6 +179,7 @@ class PurchaseOrderViewSet(viewsets.ModelViewSet):
 
     @action(detail=True, methods=['post'])
     @handle_view_error
+    @idempotent
     def receive(self, request, pk=None):
         """Receive goods against PO."""
         grn = PurchaseService.receive_goods(
@@ -186,6 +226,7 @@ class SupplierPaymentViewSet(viewsets.ModelViewSet):
     search_fields = ['payment_number', 'supplier__name', 'reference']
     ordering = ['-payment_date', '-payment_number']
 
+    @idempotent
     def create(self, request, *args, **kwargs):
         """Create supplier payment using PurchaseService for proper balance updates."""
         serializer = self.get_serializer(data=request.data)
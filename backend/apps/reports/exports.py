@@ -0,0 +1,514 @@
+"""
+Reports Export - Streaming XLSX/CSV/PDF report files
+
+Report views accept ``?format=xlsx|csv|pdf`` and return the report rows as a
+file instead of JSON. Rows are read with ``QuerySet.iterator()`` and written
+as they arrive, so large reports never sit in memory on the server.
+"""
+import csv
+import io
+import os
+import tempfile
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from django.db.models import F, Q, Count, Sum
+from django.http import StreamingHttpResponse
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+from apps.sales.models import Invoice, Customer
+from apps.inventory.models import Stock
+from apps.inventory.snapshots import StockSnapshotService
+from apps.core.decorators import handle_service_error
+
+
+EXPORT_FORMATS = ('xlsx', 'csv', 'pdf')
+
+# Rows fetched per database round trip by QuerySet.iterator()
+EXPORT_CHUNK_SIZE = 2000
+
+# Bytes per chunk when streaming a generated file to the client
+STREAM_BLOCK_SIZE = 64 * 1024
+
+Column = Tuple[str, str]
+
+
+class _ExportRenderer(JSONRenderer):
+    """
+    Accepts ``?format=<ext>`` during content negotiation.
+
+    File responses are returned as StreamingHttpResponse and bypass the
+    renderer; error responses are switched back to JSON by ReportExportMixin.
+    """
+
+
+class XLSXRenderer(_ExportRenderer):
+    media_type = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+    format = 'xlsx'
+
+
+class CSVRenderer(_ExportRenderer):
+    media_type = 'text/csv'
+    format = 'csv'
+
+
+class PDFRenderer(_ExportRenderer):
+    media_type = 'application/pdf'
+    format = 'pdf'
+
+
+EXPORT_RENDERERS = [XLSXRenderer, CSVRenderer, PDFRenderer]
+
+
+class ReportExportMixin:
+    """
+    Adds file export to a report APIView.
+
+    Views call ``self.get_export_format(request)`` and, when it is set,
+    return ``ReportExportService.build_response(...)`` instead of JSON.
+    """
+
+    renderer_classes = list(api_settings.DEFAULT_RENDERER_CLASSES) + EXPORT_RENDERERS
+
+    def get_export_format(self, request) -> Optional[str]:
+        fmt = request.query_params.get(api_settings.URL_FORMAT_OVERRIDE)
+        return fmt if fmt in EXPORT_FORMATS else None
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        # Validation errors and exceptions are still JSON bodies
+        if isinstance(response, Response) and isinstance(
+            getattr(request, 'accepted_renderer', None), _ExportRenderer
+        ):
+            request.accepted_renderer = JSONRenderer()
+            request.accepted_media_type = JSONRenderer.media_type
+        return super().finalize_response(request, response, *args, **kwargs)
+
+
+def _cell_value(value: Any) -> Any:
+    """Convert database values to types every writer understands."""
+    if value is None:
+        return ''
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+
+def _stream_file(fileobj, path: str) -> Iterator[bytes]:
+    """Yield a generated temp file in blocks and delete it afterwards."""
+    try:
+        fileobj.seek(0)
+        while True:
+            block = fileobj.read(STREAM_BLOCK_SIZE)
+            if not block:
+                break
+            yield block
+    finally:
+        fileobj.close()
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+class ReportExportService:
+    """Row sources and streaming file writers for report exports."""
+
+    # ------------------------------------------------------------------
+    # Row sources
+    # ------------------------------------------------------------------
+
+    SALES_COLUMNS: List[Column] = [
+        ('invoice_number', 'رقم الفاتورة'),
+        ('invoice_date', 'التاريخ'),
+        ('customer', 'العميل'),
+        ('status', 'الحالة'),
+        ('total_amount', 'الإجمالي'),
+        ('total_amount_usd', 'الإجمالي (USD)'),
+        ('paid_amount', 'المدفوع'),
+    ]
+
+    INVENTORY_COLUMNS: List[Column] = [
+        ('product_code', 'الكود'),
+        ('product_name', 'اسم المنتج'),
+        ('warehouse', 'المستودع'),
+        ('quantity', 'الكمية'),
+        ('unit_cost', 'التكلفة'),
+        ('value', 'القيمة'),
+    ]
+
+    CUSTOMER_COLUMNS: List[Column] = [
+        ('code', 'الكود'),
+        ('name', 'العميل'),
+        ('invoices_count', 'عدد الفواتير'),
+        ('invoices_total', 'إجمالي المبيعات'),
+        ('invoices_total_usd', 'إجمالي المبيعات (USD)'),
+        ('balance', 'الرصيد'),
+    ]
+
+    RECEIVABLES_COLUMNS: List[Column] = [
+        ('code', 'الكود'),
+        ('name', 'العميل'),
+        ('current_balance', 'الرصيد'),
+        ('overdue_amount', 'المتأخر'),
+        ('unpaid_invoice_count', 'فواتير غير مدفوعة'),
+        ('partial_invoice_count', 'فواتير مدفوعة جزئياً'),
+    ]
+
+    SUPPLIER_COLUMNS: List[Column] = [
+        ('code', 'الكود'),
+        ('name', 'المورد'),
+        ('purchase_order_count', 'عدد أوامر الشراء'),
+        ('total_purchases', 'إجمالي المشتريات'),
+        ('total_payments', 'إجمالي المدفوعات'),
+        ('outstanding_balance', 'الرصيد المستحق'),
+        ('last_purchase_date', 'آخر شراء'),
+    ]
+
+    EXPENSE_COLUMNS: List[Column] = [
+        ('expense_number', 'رقم المصروف'),
+        ('date', 'التاريخ'),
+        ('category', 'الفئة'),
+        ('description', 'الوصف'),
+        ('amount', 'المبلغ'),
+        ('tax_amount', 'الضريبة'),
+        ('total_amount', 'الإجمالي'),
+        ('payee', 'المستفيد'),
+        ('reference', 'المرجع'),
+    ]
+
+    @staticmethod
+    def iter_sales_rows(start_date: date, end_date: date) -> Iterator[Dict[str, Any]]:
+        """Yield confirmed/paid/partial invoices in the period."""
+        status_labels = dict(Invoice.Status.choices)
+        rows = Invoice.objects.filter(
+            status__in=[Invoice.Status.CONFIRMED, Invoice.Status.PAID, Invoice.Status.PARTIAL],
+            invoice_date__gte=start_date,
+            invoice_date__lte=end_date
+        ).order_by('invoice_date', 'id').values(
+            'invoice_number', 'invoice_date', 'customer__name', 'status',
+            'total_amount', 'total_amount_usd', 'paid_amount'
+        )
+        for row in rows.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+            row['customer'] = row.pop('customer__name')
+            row['status'] = status_labels.get(row['status'], row['status'])
+            yield row
+
+    @staticmethod
+    def iter_inventory_rows(as_of: Optional[date] = None) -> Iterator[Dict[str, Any]]:
+        """Yield stock rows with their cost valuation (optionally as of a past date)."""
+        quantities = StockSnapshotService.stock_as_of(as_of) if as_of else None
+        rows = Stock.objects.filter(
+            product__is_active=True,
+            product__is_deleted=False
+        ).order_by('product__code', 'warehouse__name').values(
+            'product_id', 'warehouse_id',
+            product_code=F('product__code'),
+            product_name=F('product__name'),
+            warehouse_name=F('warehouse__name'),
+            stock_quantity=F('quantity'),
+            unit_cost=F('product__cost_price'),
+        )
+        for row in rows.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+            if quantities is None:
+                quantity = row['stock_quantity'] or Decimal('0')
+            else:
+                quantity = quantities.get((row['product_id'], row['warehouse_id']), Decimal('0'))
+            unit_cost = row['unit_cost'] or Decimal('0')
+            yield {
+                'product_code': row['product_code'],
+                'product_name': row['product_name'],
+                'warehouse': row['warehouse_name'],
+                'quantity': quantity,
+                'unit_cost': unit_cost,
+                'value': quantity * unit_cost,
+            }
+
+    @staticmethod
+    def iter_customer_rows(start_date: date, end_date: date) -> Iterator[Dict[str, Any]]:
+        """Yield active customers with their sales totals in the period."""
+        invoice_filter = Q(
+            invoices__status__in=[Invoice.Status.CONFIRMED, Invoice.Status.PAID, Invoice.Status.PARTIAL],
+            invoices__invoice_date__gte=start_date,
+            invoices__invoice_date__lte=end_date
+        )
+        rows = Customer.objects.filter(is_active=True, is_deleted=False).annotate(
+            invoices_count=Count('invoices', filter=invoice_filter),
+            invoices_total=Sum('invoices__total_amount', filter=invoice_filter),
+            invoices_total_usd=Sum('invoices__total_amount_usd', filter=invoice_filter),
+        ).order_by(F('invoices_total_usd').desc(nulls_last=True), 'id').values(
+            'code', 'name', 'invoices_count', 'invoices_total',
+            'invoices_total_usd', 'current_balance'
+        )
+        for row in rows.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+            row['balance'] = row.pop('current_balance')
+            yield row
+
+    @staticmethod
+    def _expense_filter(start_date, end_date, category_id) -> Q:
+        """Same filter as ReportService.get_expenses_report."""
+        expense_filter = Q(is_approved=True)
+        if start_date:
+            expense_filter &= Q(expense_date__gte=start_date)
+        if end_date:
+            expense_filter &= Q(expense_date__lte=end_date)
+        if category_id:
+            expense_filter &= Q(category_id=category_id)
+        return expense_filter
+
+    @staticmethod
+    def iter_expense_rows(
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        category_id: Optional[int] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """Yield approved expenses, newest first (same filters as the report)."""
+        from apps.expenses.models import Expense
+
+        expense_filter = ReportExportService._expense_filter(start_date, end_date, category_id)
+
+        rows = Expense.objects.filter(expense_filter).order_by('-expense_date', '-id').values(
+            'expense_number', 'expense_date', 'category__name', 'description',
+            'amount', 'tax_amount', 'total_amount', 'payee', 'reference'
+        )
+        for row in rows.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+            row['date'] = row.pop('expense_date')
+            row['category'] = row.pop('category__name') or 'بدون فئة'
+            yield row
+
+    @staticmethod
+    def get_expenses_summary(
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        category_id: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """Period, total and count lines for the expenses export header."""
+        from apps.expenses.models import Expense
+
+        expense_filter = ReportExportService._expense_filter(start_date, end_date, category_id)
+
+        totals = Expense.objects.filter(expense_filter).aggregate(
+            total=Sum('total_amount'), count=Count('id')
+        )
+        summary = {}
+        if start_date or end_date:
+            summary['الفترة'] = f"{start_date or ''} - {end_date or ''}"
+        summary['إجمالي المصروفات'] = totals['total'] or Decimal('0.00')
+        summary['عدد المصروفات'] = totals['count'] or 0
+        return summary
+
+    # ------------------------------------------------------------------
+    # Writers
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def stream_csv(columns: List[Column], rows: Iterable[Dict]) -> Iterator[bytes]:
+        """Yield CSV bytes row by row (UTF-8 with BOM so Excel shows Arabic)."""
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+
+        def flush() -> bytes:
+            data = buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate(0)
+            return data
+
+        writer.writerow([header for _, header in columns])
+        yield b'\xef\xbb\xbf' + flush()
+
+        pending = 0
+        for row in rows:
+            writer.writerow([_cell_value(row.get(key)) for key, _ in columns])
+            pending += 1
+            if pending >= 500:
+                yield flush()
+                pending = 0
+        if pending:
+            yield flush()
+
+    @staticmethod
+    def stream_xlsx(
+        columns: List[Column],
+        rows: Iterable[Dict],
+        title: str,
+        summary: Optional[Dict[str, Any]] = None
+    ) -> Iterator[bytes]:
+        """Write rows with xlsxwriter in constant_memory mode, then stream the file."""
+        import xlsxwriter
+
+        fd, path = tempfile.mkstemp(suffix='.xlsx')
+        os.close(fd)
+
+        workbook = xlsxwriter.Workbook(path, {'constant_memory': True})
+        try:
+            sheet = workbook.add_worksheet(title[:31])
+            sheet.right_to_left()
+
+            title_fmt = workbook.add_format({'bold': True, 'font_size': 14, 'align': 'center'})
+            header_fmt = workbook.add_format({
+                'bold': True, 'font_color': '#FFFFFF', 'bg_color': '#2563EB',
+                'border': 1, 'align': 'center', 'valign': 'vcenter'
+            })
+            cell_fmt = workbook.add_format({'border': 1, 'align': 'right'})
+            number_fmt = workbook.add_format({'border': 1, 'align': 'right', 'num_format': '#,##0.00'})
+
+            for col_idx, (_, header) in enumerate(columns):
+                sheet.set_column(col_idx, col_idx, min(max(len(header) + 4, 14), 50))
+
+            last_col = max(len(columns) - 1, 0)
+            sheet.merge_range(0, 0, 0, last_col, title, title_fmt)
+            sheet.write(1, 0, f"تاريخ التقرير: {datetime.now().strftime('%Y-%m-%d %H:%M')}")
+            row_idx = 3
+
+            if summary:
+                for key, value in summary.items():
+                    sheet.write(row_idx, 0, str(key))
+                    sheet.write(row_idx, 1, _cell_value(value))
+                    row_idx += 1
+                row_idx += 1
+
+            for col_idx, (_, header) in enumerate(columns):
+                sheet.write(row_idx, col_idx, header, header_fmt)
+            row_idx += 1
+
+            for row in rows:
+                for col_idx, (key, _) in enumerate(columns):
+                    value = _cell_value(row.get(key))
+                    if isinstance(value, (int, float)) and not isinstance(value, bool):
+                        sheet.write_number(row_idx, col_idx, value, number_fmt)
+                    else:
+                        sheet.write_string(row_idx, col_idx, str(value), cell_fmt)
+                row_idx += 1
+        finally:
+            workbook.close()
+
+        yield from _stream_file(open(path, 'rb'), path)
+
+    @staticmethod
+    def _register_pdf_font() -> str:
+        from reportlab.pdfbase import pdfmetrics
+        from reportlab.pdfbase.ttfonts import TTFont
+
+        candidates = [
+            ('C:/Windows/Fonts/tahoma.ttf', 'Tahoma'),
+            ('C:/Windows/Fonts/arial.ttf', 'Arial'),
+            ('/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf', 'DejaVuSans'),
+        ]
+        for font_path, name in candidates:
+            if name in pdfmetrics.getRegisteredFontNames():
+                return name
+            if os.path.exists(font_path):
+                try:
+                    pdfmetrics.registerFont(TTFont(name, font_path))
+                    return name
+                except Exception:
+                    continue
+        return 'Helvetica'
+
+    @staticmethod
+    def _pdf_text(value: Any) -> str:
+        """Shape Arabic text for the PDF when arabic_reshaper/python-bidi are available."""
+        text = str(_cell_value(value))
+        if isinstance(value, float):
+            text = f"{value:,.2f}"
+        try:
+            import arabic_reshaper
+            from bidi.algorithm import get_display
+            return get_display(arabic_reshaper.reshape(text))
+        except Exception:
+            return text
+
+    @staticmethod
+    def stream_pdf(
+        columns: List[Column],
+        rows: Iterable[Dict],
+        title: str,
+        summary: Optional[Dict[str, Any]] = None
+    ) -> Iterator[bytes]:
+        """Draw rows page by page on a reportlab canvas, then stream the file."""
+        from reportlab.lib.pagesizes import A4, landscape
+        from reportlab.lib.units import cm
+        from reportlab.pdfgen import canvas
+
+        fd, path = tempfile.mkstemp(suffix='.pdf')
+        os.close(fd)
+
+        font_name = ReportExportService._register_pdf_font()
+        text = ReportExportService._pdf_text
+        page_w, page_h = landscape(A4) if len(columns) > 6 else A4
+        margin = 1.5 * cm
+        row_h = 0.6 * cm
+        col_w = (page_w - 2 * margin) / max(len(columns), 1)
+
+        # Columns run right-to-left
+        col_right = [page_w - margin - i * col_w for i in range(len(columns))]
+
+        pdf = canvas.Canvas(path, pagesize=(page_w, page_h))
+
+        def draw_header(y: float) -> float:
+            pdf.setFont(font_name, 10)
+            for i, (_, header) in enumerate(columns):
+                pdf.drawRightString(col_right[i] - 4, y, text(header))
+            pdf.line(margin, y - 4, page_w - margin, y - 4)
+            pdf.setFont(font_name, 9)
+            return y - row_h
+
+        y = page_h - margin
+        pdf.setFont(font_name, 16)
+        pdf.drawCentredString(page_w / 2, y, text(title))
+        y -= row_h * 1.5
+        pdf.setFont(font_name, 10)
+        pdf.drawCentredString(
+            page_w / 2, y, text(f"تاريخ الإنشاء: {datetime.now().strftime('%Y-%m-%d %H:%M')}")
+        )
+        y -= row_h * 1.5
+
+        for key, value in (summary or {}).items():
+            pdf.drawRightString(page_w - margin, y, text(f"{key}: {_cell_value(value)}"))
+            y -= row_h
+        y = draw_header(y - row_h / 2)
+
+        for row in rows:
+            if y < margin:
+                pdf.showPage()
+                y = draw_header(page_h - margin)
+            for i, (key, _) in enumerate(columns):
+                value = _cell_value(row.get(key))
+                label = text(value)
+                # Clip long values to the column width
+                while label and pdf.stringWidth(label, font_name, 9) > col_w - 8:
+                    label = label[:-1]
+                pdf.drawRightString(col_right[i] - 4, y, label)
+            y -= row_h
+
+        pdf.save()
+        yield from _stream_file(open(path, 'rb'), path)
+
+    @staticmethod
+    @handle_service_error
+    def build_response(
+        fmt: str,
+        columns: List[Column],
+        rows: Iterable[Dict],
+        title: str,
+        filename: str,
+        summary: Optional[Dict[str, Any]] = None
+    ) -> StreamingHttpResponse:
+        """Stream ``rows`` as an xlsx, csv or pdf attachment."""
+        if fmt == 'csv':
+            content = ReportExportService.stream_csv(columns, rows)
+            content_type = CSVRenderer.media_type + '; charset=utf-8'
+        elif fmt == 'xlsx':
+            content = ReportExportService.stream_xlsx(columns, rows, title, summary)
+            content_type = XLSXRenderer.media_type
+        else:
+            content = ReportExportService.stream_pdf(columns, rows, title, summary)
+            content_type = PDFRenderer.media_type
+
+        response = StreamingHttpResponse(content, content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="{filename}.{fmt}"'
+        return response
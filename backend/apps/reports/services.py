@@ -1,19 +1,29 @@
 """
 Reports Services - Business Intelligence and Analytics
 """
+import threading
 from decimal import Decimal
 from typing import Dict, Any, List, Optional
 from dataclasses import dataclass
 from django.db.models import Sum, Count, Avg, F, Q, DecimalField, ExpressionWrapper
 from django.db.models.functions import TruncDate, TruncMonth
 from datetime import date, timedelta
+from django.core.cache import cache
 
 from apps.sales.models import Invoice, InvoiceItem, Customer, Payment, SalesReturn, SalesReturnItem
 from apps.purchases.models import PurchaseOrder, Supplier
 from apps.expenses.models import Expense
 from apps.inventory.models import Product, Stock, StockMovement
+from apps.inventory.snapshots import StockSnapshotService
 from apps.core.decorators import handle_service_error
 from apps.core.utils import get_daily_fx, to_usd
+from apps.core.versioning import DataVersionService
+
+# Seconds a dashboard summary stays cached for one data version
+DASHBOARD_CACHE_TIMEOUT = 300
+
+# Serializes recomputation so concurrent pollers share one computation
+_DASHBOARD_LOCK = threading.Lock()
 
 
 @dataclass
@@ -46,6 +56,31 @@ class CustomerStatementData:
 class ReportService:
     """Service class for generating reports."""
 
+    @staticmethod
+    @handle_service_error
+    def get_cached_dashboard_summary(start_date: date = None, end_date: date = None) -> Dict[str, Any]:
+        """
+        Dashboard summary cached per date range and data version.
+
+        The summary is recomputed only after a business write bumped the data
+        version (or the day changed), so any number of polling clients cost
+        one computation. The version is returned as ``data_version``.
+        """
+        today = date.today()
+        start_date = start_date or today.replace(day=1)
+        end_date = end_date or today
+        version = DataVersionService.current()
+        key = f'reports:dashboard:{start_date}:{end_date}:{today}:{version}'
+
+        data = cache.get(key)
+        if data is None:
+            with _DASHBOARD_LOCK:
+                data = cache.get(key)
+                if data is None:
+                    data = ReportService.get_dashboard_summary(start_date, end_date)
+                    cache.set(key, data, DASHBOARD_CACHE_TIMEOUT)
+        return {**data, 'data_version': version}
+
     @staticmethod
     @handle_service_error
     def get_dashboard_summary(start_date: date = None, end_date: date = None) -> Dict[str, Any]:
@@ -524,21 +559,31 @@ class ReportService:
 
     @staticmethod
     @handle_service_error
-    def get_inventory_report() -> Dict[str, Any]:
-        """Get inventory status report."""
+    def get_inventory_report(as_of: Optional[date] = None) -> Dict[str, Any]:
+        """
+        Get inventory status report.
+        
+        Args:
+            as_of: Optional past date; quantities are taken from the stock
+                snapshots instead of the current stock
+        """
         
         # Stock valuation
         stocks = Stock.objects.select_related('product', 'warehouse').filter(
             product__is_active=True,
             product__is_deleted=False
         )
+        quantities = StockSnapshotService.stock_as_of(as_of) if as_of else None
         
         total_value = Decimal('0')
         items = []
         low_stock_items = []
         
         for stock in stocks:
-            value = stock.quantity * stock.product.cost_price
+            quantity = stock.quantity if quantities is None else quantities.get(
+                (stock.product_id, stock.warehouse_id), Decimal('0')
+            )
+            value = quantity * stock.product.cost_price
             total_value += value
             
             item_data = {
@@ -546,18 +591,18 @@ class ReportService:
                 'product_code': stock.product.code,
                 'product_name': stock.product.name,
                 'warehouse': stock.warehouse.name,
-                'quantity': stock.quantity,
+                'quantity': quantity,
                 'unit_cost': stock.product.cost_price,
                 'value': value
             }
             
             items.append(item_data)
             
-            if stock.is_low_stock:
+            if quantity <= stock.product.minimum_stock:
                 low_stock_items.append({
                     **item_data,
                     'minimum': stock.product.minimum_stock,
-                    'shortage': stock.product.minimum_stock - stock.quantity
+                    'shortage': stock.product.minimum_stock - quantity
                 })
         
         # By category
@@ -568,6 +613,7 @@ class ReportService:
         ).order_by('-count')
         
         return {
+            'as_of': as_of,
             'total_value': total_value,
             'item_count': len(items),
             'low_stock_count': len(low_stock_items),
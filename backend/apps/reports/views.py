@@ -1,5 +1,8 @@
 """
 Reports Views
+
+Report endpoints also accept ``?format=xlsx|csv|pdf`` to download the report
+rows as a streamed file (see exports.py).
 """
 from rest_framework import views, status
 from rest_framework.response import Response
@@ -7,6 +10,7 @@ from rest_framework.permissions import IsAuthenticated
 from datetime import date, datetime
 
 from .services import ReportService
+from .exports import ReportExportMixin, ReportExportService
 from apps.core.decorators import handle_view_error
 
 
@@ -25,11 +29,11 @@ class DashboardView(views.APIView):
         if end_date:
             end_date = datetime.strptime(end_date, '%Y-%m-%d').date()
         
-        data = ReportService.get_dashboard_summary(start_date, end_date)
+        data = ReportService.get_cached_dashboard_summary(start_date, end_date)
         return Response(data)
 
 
-class SalesReportView(views.APIView):
+class SalesReportView(ReportExportMixin, views.APIView):
     """Sales report endpoint."""
     
     permission_classes = [IsAuthenticated]
@@ -49,6 +53,17 @@ class SalesReportView(views.APIView):
         start_date = datetime.strptime(start_date, '%Y-%m-%d').date()
         end_date = datetime.strptime(end_date, '%Y-%m-%d').date()
         
+        export_format = self.get_export_format(request)
+        if export_format:
+            return ReportExportService.build_response(
+                export_format,
+                ReportExportService.SALES_COLUMNS,
+                ReportExportService.iter_sales_rows(start_date, end_date),
+                title='تقرير المبيعات',
+                filename=f'sales-report-{start_date}-{end_date}',
+                summary={'الفترة': f'{start_date} - {end_date}'}
+            )
+        
         data = ReportService.get_sales_report(start_date, end_date, group_by)
         return Response(data)
 
@@ -76,18 +91,32 @@ class ProfitReportView(views.APIView):
         return Response(data)
 
 
-class InventoryReportView(views.APIView):
+class InventoryReportView(ReportExportMixin, views.APIView):
     """Inventory report endpoint."""
     
     permission_classes = [IsAuthenticated]
 
     @handle_view_error
     def get(self, request):
-        data = ReportService.get_inventory_report()
+        as_of = request.query_params.get('as_of')
+        if as_of:
+            as_of = datetime.strptime(as_of, '%Y-%m-%d').date()
+        
+        export_format = self.get_export_format(request)
+        if export_format:
+            return ReportExportService.build_response(
+                export_format,
+                ReportExportService.INVENTORY_COLUMNS,
+                ReportExportService.iter_inventory_rows(as_of or None),
+                title='تقرير المخزون',
+                filename=f'inventory-report-{as_of or date.today()}'
+            )
+        
+        data = ReportService.get_inventory_report(as_of or None)
         return Response(data)
 
 
-class CustomerReportView(views.APIView):
+class CustomerReportView(ReportExportMixin, views.APIView):
     """Customer analysis report endpoint."""
     
     permission_classes = [IsAuthenticated]
@@ -106,11 +135,22 @@ class CustomerReportView(views.APIView):
             start_date = datetime.strptime(start_date, '%Y-%m-%d').date()
             end_date = datetime.strptime(end_date, '%Y-%m-%d').date()
         
+        export_format = self.get_export_format(request)
+        if export_format:
+            return ReportExportService.build_response(
+                export_format,
+                ReportExportService.CUSTOMER_COLUMNS,
+                ReportExportService.iter_customer_rows(start_date, end_date),
+                title='تقرير العملاء',
+                filename=f'customers-report-{start_date}-{end_date}',
+                summary={'الفترة': f'{start_date} - {end_date}'}
+            )
+        
         data = ReportService.get_customer_report(start_date, end_date)
         return Response(data)
 
 
-class ReceivablesReportView(views.APIView):
+class ReceivablesReportView(ReportExportMixin, views.APIView):
     """
     Receivables report endpoint.
     
@@ -145,6 +185,17 @@ class ReceivablesReportView(views.APIView):
             start_date=start_date,
             end_date=end_date
         )
+        
+        export_format = self.get_export_format(request)
+        if export_format:
+            return ReportExportService.build_response(
+                export_format,
+                ReportExportService.RECEIVABLES_COLUMNS,
+                data['customers'],
+                title='تقرير الذمم المدينة',
+                filename=f'receivables-report-{date.today()}',
+                summary={'إجمالي المستحق': data['summary']['total_outstanding']}
+            )
         return Response(data)
 
 
@@ -172,7 +223,7 @@ class AgingReportView(views.APIView):
         return Response(data)
 
 
-class SuppliersReportView(views.APIView):
+class SuppliersReportView(ReportExportMixin, views.APIView):
     """
     Suppliers report endpoint.
     
@@ -202,10 +253,21 @@ class SuppliersReportView(views.APIView):
             start_date=start_date,
             end_date=end_date
         )
+        
+        export_format = self.get_export_format(request)
+        if export_format:
+            return ReportExportService.build_response(
+                export_format,
+                ReportExportService.SUPPLIER_COLUMNS,
+                data['suppliers'],
+                title='تقرير الموردين',
+                filename=f'suppliers-report-{date.today()}',
+                summary={'إجمالي المستحقات': data['summary']['total_payables']}
+            )
         return Response(data)
 
 
-class ExpensesReportView(views.APIView):
+class ExpensesReportView(ReportExportMixin, views.APIView):
     """
     Expenses report endpoint.
     
@@ -233,6 +295,17 @@ class ExpensesReportView(views.APIView):
         if category_id:
             category_id = int(category_id)
         
+        export_format = self.get_export_format(request)
+        if export_format:
+            return ReportExportService.build_response(
+                export_format,
+                ReportExportService.EXPENSE_COLUMNS,
+                ReportExportService.iter_expense_rows(start_date, end_date, category_id),
+                title='تقرير المصروفات',
+                filename=f'expenses-report-{date.today()}',
+                summary=ReportExportService.get_expenses_summary(start_date, end_date, category_id)
+            )
+        
         data = ReportService.get_expenses_report(
             start_date=start_date,
             end_date=end_date,
@@ -0,0 +1,212 @@
+"""
+Bulk Invoice Service - Import batches of invoices from POS terminals and importers
+"""
+import logging
+from decimal import Decimal
+from typing import Any, Dict, List, Optional
+
+from django.db import DatabaseError, transaction
+
+from apps.core.exceptions import BusinessException, NotFoundException, custom_exception_handler
+from apps.core.utils import get_daily_fx
+from apps.inventory.models import Product, Warehouse
+from apps.inventory.units import UnitConversionService
+from .models import Customer, Invoice
+from .services import SalesService
+
+logger = logging.getLogger('apps.sales')
+
+# Invoices committed per transaction
+BULK_INVOICE_CHUNK_SIZE = 50
+
+# Largest chunk a caller may request
+BULK_INVOICE_MAX_CHUNK_SIZE = 500
+
+# Largest batch accepted in one request
+BULK_INVOICE_MAX_BATCH = 1000
+
+
+class BulkInvoiceService:
+    """
+    Service class for bulk invoice import.
+
+    Customers, warehouses, products, unit graphs and existing import keys
+    are loaded once for the whole batch. Invoices are created (and by default
+    confirmed with their payment) in transactions of ``chunk_size``; each
+    invoice runs in its own savepoint, so a failing invoice is reported
+    without undoing the rest of its chunk. Stock is still read per invoice
+    because earlier invoices in the batch change it.
+    """
+
+    @staticmethod
+    def import_invoices(
+        invoices: List[Dict[str, Any]],
+        user=None,
+        chunk_size: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Create and confirm a batch of invoices.
+
+        Args:
+            invoices: Validated BulkInvoiceSerializer data, each with its
+                position in the request under 'index'
+            user: The user importing the invoices
+            chunk_size: Invoices per transaction (default BULK_INVOICE_CHUNK_SIZE)
+
+        Returns:
+            One result per invoice, in input order. 'status' is 'created',
+            'duplicate' (idempotency key already imported; the existing
+            invoice is returned) or 'failed' (with the error body and HTTP
+            status the single-invoice endpoint would have returned).
+        """
+        chunk_size = max(1, min(chunk_size or BULK_INVOICE_CHUNK_SIZE, BULK_INVOICE_MAX_CHUNK_SIZE))
+
+        keys = {entry['idempotency_key'] for entry in invoices if entry.get('idempotency_key')}
+        imported = {
+            invoice.import_key: invoice for invoice in Invoice.objects.filter(import_key__in=keys)
+        } if keys else {}
+        context = {
+            'user': user,
+            'imported': imported,
+            'customers': Customer.objects.filter(is_deleted=False).in_bulk(
+                {entry['customer'] for entry in invoices}
+            ),
+            'warehouses': Warehouse.objects.filter(is_deleted=False).in_bulk(
+                {entry['warehouse'] for entry in invoices}
+            ),
+            'products': Product.objects.in_bulk(
+                {item['product'] for entry in invoices for item in entry['items']}
+            ),
+            'fx': {},
+        }
+        UnitConversionService.prefetch(context['products'].keys())
+
+        results = []
+        for start in range(0, len(invoices), chunk_size):
+            chunk = invoices[start:start + chunk_size]
+            try:
+                with transaction.atomic():
+                    chunk_results = [BulkInvoiceService._import_one(entry, context) for entry in chunk]
+            except DatabaseError as e:
+                logger.exception("Bulk invoice chunk starting at %s could not be committed", start)
+                chunk_results = [
+                    BulkInvoiceService._failed(entry, BusinessException(str(e), 'DATABASE_ERROR'))
+                    for entry in chunk
+                ]
+                for entry in chunk:
+                    imported.pop(entry.get('idempotency_key'), None)
+            results.extend(chunk_results)
+        return results
+
+    @staticmethod
+    def _import_one(entry: Dict[str, Any], context: Dict[str, Any]) -> Dict[str, Any]:
+        key = entry.get('idempotency_key') or None
+        if key and key in context['imported']:
+            return BulkInvoiceService._result(entry, 'duplicate', context['imported'][key])
+
+        try:
+            with transaction.atomic():
+                invoice = BulkInvoiceService._create(entry, context)
+        except BusinessException as e:
+            existing = Invoice.objects.filter(import_key=key).first() if key else None
+            if existing is not None:
+                # Imported concurrently by a retry of the same batch
+                context['imported'][key] = existing
+                return BulkInvoiceService._result(entry, 'duplicate', existing)
+            return BulkInvoiceService._failed(entry, e)
+
+        if key:
+            context['imported'][key] = invoice
+        return BulkInvoiceService._result(entry, 'created', invoice)
+
+    @staticmethod
+    def _create(entry: Dict[str, Any], context: Dict[str, Any]) -> Invoice:
+        if entry['customer'] not in context['customers']:
+            raise NotFoundException('العميل', entry['customer'])
+        if entry['warehouse'] not in context['warehouses']:
+            raise NotFoundException('المستودع', entry['warehouse'])
+
+        old_snapshot = entry.get('usd_to_syp_old_snapshot')
+        new_snapshot = entry.get('usd_to_syp_new_snapshot')
+        needs_fx = entry['transaction_currency'] != 'USD' or entry['invoice_type'] == Invoice.InvoiceType.CREDIT
+        if needs_fx and old_snapshot is None and new_snapshot is None:
+            rate_date = entry.get('fx_rate_date') or entry['invoice_date']
+            if rate_date not in context['fx']:
+                context['fx'][rate_date] = get_daily_fx(rate_date)
+            old_snapshot, new_snapshot = context['fx'][rate_date]
+
+        items = []
+        for item in entry['items']:
+            payload = {
+                'product_id': item['product'],
+                'quantity': item['quantity'],
+                'discount_percent': item.get('discount_percent', Decimal('0.00')),
+                'notes': item.get('notes'),
+            }
+            if item.get('product_unit'):
+                payload['product_unit_id'] = item['product_unit']
+            for field in ('unit_price', 'cost_price', 'tax_rate'):
+                if item.get(field) is not None:
+                    payload[field] = item[field]
+            items.append(payload)
+
+        user = context['user']
+        invoice = SalesService.create_invoice(
+            customer_id=entry['customer'],
+            warehouse_id=entry['warehouse'],
+            invoice_date=entry['invoice_date'],
+            items=items,
+            invoice_type=entry['invoice_type'],
+            discount_percent=entry['discount_percent'],
+            discount_amount=entry['discount_amount'],
+            due_date=entry.get('due_date'),
+            notes=entry.get('notes'),
+            internal_notes=entry.get('internal_notes'),
+            user=user,
+            override_credit_limit=entry['override_credit_limit'],
+            override_reason=entry.get('override_reason'),
+            transaction_currency=entry['transaction_currency'],
+            fx_rate_date=entry.get('fx_rate_date'),
+            usd_to_syp_old_snapshot=old_snapshot,
+            usd_to_syp_new_snapshot=new_snapshot,
+            import_key=entry.get('idempotency_key'),
+            products=context['products'],
+        )
+        if entry['confirm']:
+            invoice = SalesService.confirm_invoice(
+                invoice.id,
+                user=user,
+                paid_amount=entry.get('paid_amount'),
+                payment_method=entry.get('payment_method')
+            )
+        return invoice
+
+    @staticmethod
+    def _result(entry: Dict[str, Any], result_status: str, invoice: Invoice) -> Dict[str, Any]:
+        return {
+            'index': entry['index'],
+            'idempotency_key': entry.get('idempotency_key') or None,
+            'status': result_status,
+            'invoice_id': invoice.id,
+            'invoice_number': invoice.invoice_number,
+            'invoice_status': invoice.status,
+            'total_amount': invoice.total_amount,
+        }
+
+    @staticmethod
+    def _failed(entry: Dict[str, Any], exc: BusinessException) -> Dict[str, Any]:
+        response = custom_exception_handler(exc, {})
+        return BulkInvoiceService.failure(
+            entry['index'], entry.get('idempotency_key'), response.data, response.status_code
+        )
+
+    @staticmethod
+    def failure(index: int, idempotency_key: Optional[str], error: Dict, status_code: int) -> Dict[str, Any]:
+        """Result entry of an invoice that was not imported."""
+        return {
+            'index': index,
+            'idempotency_key': idempotency_key or None,
+            'status': 'failed',
+            'status_code': status_code,
+            'error': error,
+        }
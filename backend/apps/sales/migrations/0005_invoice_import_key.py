@@ -0,0 +1,18 @@
+# Generated by Django 5.0.14 on 2026-10-18 23:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales', '0004_currency_fx_fields'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='invoice',
+            name='import_key',
+            field=models.CharField(blank=True, max_length=100, null=True, unique=True, verbose_name='مفتاح الاستيراد'),
+        ),
+    ]
@@ -173,6 +173,15 @@ class Invoice(BaseModel):
         unique=True,
         verbose_name='رقم الفاتورة'
     )
+    # Client-supplied key of a bulk-imported invoice; retries with the same
+    # key return the existing invoice instead of creating another
+    import_key = models.CharField(
+        max_length=100,
+        unique=True,
+        blank=True,
+        null=True,
+        verbose_name='مفتاح الاستيراد'
+    )
     invoice_type = models.CharField(
         max_length=20,
         choices=InvoiceType.choices,
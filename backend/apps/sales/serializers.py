@@ -410,6 +410,51 @@ class InvoiceCreateSerializer(serializers.ModelSerializer):
         return invoice
 
 
+class BulkInvoiceItemSerializer(serializers.Serializer):
+    """Item of a bulk-imported invoice; references are plain IDs resolved in bulk."""
+
+    product = serializers.IntegerField()
+    product_unit = serializers.IntegerField(required=False, allow_null=True)
+    quantity = serializers.DecimalField(max_digits=15, decimal_places=2, min_value=Decimal('0.01'))
+    unit_price = serializers.DecimalField(max_digits=15, decimal_places=2, required=False)
+    cost_price = serializers.DecimalField(max_digits=15, decimal_places=2, required=False)
+    discount_percent = serializers.DecimalField(max_digits=5, decimal_places=2, required=False)
+    tax_rate = serializers.DecimalField(max_digits=5, decimal_places=2, required=False)
+    notes = serializers.CharField(required=False, allow_blank=True, allow_null=True)
+
+
+class BulkInvoiceSerializer(serializers.Serializer):
+    """
+    One invoice of POST /sales/invoices/bulk/.
+
+    Unlike InvoiceCreateSerializer, customer, warehouse and product are
+    validated as IDs only, so validating a batch runs no queries.
+    """
+
+    idempotency_key = serializers.CharField(max_length=100, required=False, allow_blank=True)
+    invoice_type = serializers.ChoiceField(choices=Invoice.InvoiceType.choices, default=Invoice.InvoiceType.CASH)
+    customer = serializers.IntegerField()
+    warehouse = serializers.IntegerField()
+    invoice_date = serializers.DateField()
+    due_date = serializers.DateField(required=False, allow_null=True)
+    transaction_currency = serializers.ChoiceField(
+        choices=Invoice._meta.get_field('transaction_currency').choices, default='SYP_OLD'
+    )
+    fx_rate_date = serializers.DateField(required=False, allow_null=True)
+    usd_to_syp_old_snapshot = serializers.DecimalField(max_digits=18, decimal_places=6, required=False, allow_null=True)
+    usd_to_syp_new_snapshot = serializers.DecimalField(max_digits=18, decimal_places=6, required=False, allow_null=True)
+    discount_percent = serializers.DecimalField(max_digits=5, decimal_places=2, default=Decimal('0.00'))
+    discount_amount = serializers.DecimalField(max_digits=15, decimal_places=2, default=Decimal('0.00'))
+    notes = serializers.CharField(required=False, allow_blank=True, allow_null=True)
+    internal_notes = serializers.CharField(required=False, allow_blank=True, allow_null=True)
+    items = BulkInvoiceItemSerializer(many=True, allow_empty=False)
+    confirm = serializers.BooleanField(default=True)
+    paid_amount = serializers.DecimalField(max_digits=15, decimal_places=2, required=False, allow_null=True)
+    payment_method = serializers.CharField(max_length=20, required=False, allow_null=True, allow_blank=True)
+    override_credit_limit = serializers.BooleanField(default=False)
+    override_reason = serializers.CharField(required=False, allow_null=True, allow_blank=True)
+
+
 class PaymentSerializer(serializers.ModelSerializer):
     """Serializer for Payment."""
     
@@ -535,21 +580,28 @@ class SalesReturnCreateSerializer(serializers.Serializer):
             })
         
         # Requirement 5.3: Validate return quantities
+        # Invoice items and already returned quantities are loaded in bulk
+        invoice_items = InvoiceItem.objects.filter(invoice=invoice).select_related('product').in_bulk(
+            [item_data.get('invoice_item_id') for item_data in items]
+        )
+        returned = dict(
+            SalesReturnItem.objects.filter(invoice_item_id__in=list(invoice_items)).values(
+                'invoice_item_id'
+            ).annotate(total=Sum('quantity')).values_list('invoice_item_id', 'total')
+        )
+        
         for item_data in items:
             invoice_item_id = item_data.get('invoice_item_id')
             return_quantity = item_data.get('quantity')
             
-            try:
-                invoice_item = InvoiceItem.objects.get(id=invoice_item_id, invoice=invoice)
-            except InvoiceItem.DoesNotExist:
+            invoice_item = invoice_items.get(invoice_item_id)
+            if invoice_item is None:
                 raise serializers.ValidationError({
                     'items': f'بند الفاتورة رقم {invoice_item_id} غير موجود في هذه الفاتورة'
                 })
             
             # Calculate already returned quantity for this item
-            already_returned = SalesReturnItem.objects.filter(
-                invoice_item=invoice_item
-            ).aggregate(total=Sum('quantity'))['total'] or Decimal('0')
+            already_returned = returned.get(invoice_item.id) or Decimal('0')
             
             available_quantity = invoice_item.quantity - already_returned
             
@@ -6,15 +6,39 @@ from datetime import datetime
 from typing import List, Dict, Any, Optional
 from django.db import transaction
 from django.db.models import Sum, F
-from apps.core.exceptions import ValidationException, InvalidOperationException, InsufficientStockException
+from apps.core.exceptions import (
+    ValidationException, InvalidOperationException, InsufficientStockException, NotFoundException
+)
 from apps.core.decorators import handle_service_error
+from apps.core.events import EVENT_INVOICE_CONFIRMED, EVENT_PAYMENT_RECEIVED, EventService
 from apps.core.utils import get_daily_fx, to_usd, from_usd, normalize_fx
+from apps.inventory.average_cost import AverageCostService
 from apps.inventory.services import InventoryService
 from apps.inventory.models import StockMovement, Product
+from apps.inventory.reservations import INVOICE_RESERVATION, StockReservationService
+from apps.inventory.units import UnitConversionService
 from .models import Customer, Invoice, InvoiceItem, Payment, SalesReturn, SalesReturnItem, PaymentAllocation, CreditLimitOverride
 from .credit_service import CreditService, CreditValidationStatus, CreditLimitExceededException
 
 
+def _base_unit_cost_usd(invoice: Invoice, cost_price: Decimal, quantity: Decimal,
+                        base_quantity: Decimal) -> Optional[Decimal]:
+    """USD cost per base unit of stock returned from an invoice line."""
+    if not cost_price or not base_quantity:
+        return None
+    line_cost = cost_price * quantity
+    if invoice.transaction_currency != 'USD':
+        if not invoice.usd_to_syp_old_snapshot or not invoice.usd_to_syp_new_snapshot:
+            return None
+        line_cost = to_usd(
+            line_cost,
+            invoice.transaction_currency,
+            usd_to_syp_old=invoice.usd_to_syp_old_snapshot,
+            usd_to_syp_new=invoice.usd_to_syp_new_snapshot
+        )
+    return line_cost / base_quantity
+
+
 class SalesService:
     """Service class for sales operations."""
 
@@ -39,7 +63,9 @@ class SalesService:
         transaction_currency: str = 'SYP_OLD',
         fx_rate_date=None,
         usd_to_syp_old_snapshot: Decimal = None,
-        usd_to_syp_new_snapshot: Decimal = None
+        usd_to_syp_new_snapshot: Decimal = None,
+        import_key: str = None,
+        products: Dict[int, Product] = None
     ) -> Invoice:
         """
         Create a new sales invoice.
@@ -66,6 +92,8 @@ class SalesService:
             deduct_stock: Whether to validate stock availability
             override_credit_limit: If True, bypass credit limit check (requires override_reason)
             override_reason: Reason for credit limit override (required if override_credit_limit=True)
+            import_key: Client key of a bulk-imported invoice (unique)
+            products: Products already loaded by id (bulk import); missing ones are fetched
             
         Returns:
             The created Invoice
@@ -74,8 +102,6 @@ class SalesService:
             CreditLimitExceededException: If credit limit exceeded and no override
             ValidationException: If credit invoice without customer or invalid override
         """
-        from apps.inventory.models import ProductUnit
-
         needs_fx = transaction_currency != 'USD' or invoice_type == Invoice.InvoiceType.CREDIT
         usd_to_syp_old = None
         usd_to_syp_new = None
@@ -93,44 +119,42 @@ class SalesService:
                     field='customer'
                 )
         
+        product_ids = {item['product_id'] for item in items}
+        products = dict(products or {})
+        missing = product_ids - products.keys()
+        if missing:
+            products.update(Product.objects.in_bulk(missing))
+        for product_id in product_ids:
+            if product_id not in products:
+                raise NotFoundException('المنتج', product_id)
+        UnitConversionService.prefetch(product_ids)
+        average_costs = AverageCostService.get_average_costs(product_ids, warehouse_id)
+
         # Validate stock availability if deducting
         if deduct_stock:
+            requested = {}
             for item in items:
-                product = Product.objects.get(id=item['product_id'])
+                product = products[item['product_id']]
                 if product.track_stock:
                     # Calculate base_quantity for stock validation
-                    quantity = Decimal(str(item['quantity']))
-                    product_unit_id = item.get('product_unit_id')
-                    
-                    if product_unit_id:
-                        product_unit = ProductUnit.objects.get(id=product_unit_id)
-                        base_quantity = product_unit.convert_to_base(quantity)
-                    else:
-                        # Default to base unit
-                        base_unit = ProductUnit.objects.filter(
-                            product=product,
-                            is_base_unit=True,
-                            is_deleted=False
-                        ).first()
-                        if base_unit:
-                            base_quantity = base_unit.convert_to_base(quantity)
-                        else:
-                            base_quantity = quantity
-                    
-                    stock_info = InventoryService.get_product_stock(
-                        item['product_id'], warehouse_id
+                    base_quantity = UnitConversionService.to_base(
+                        product.id, Decimal(str(item['quantity'])), item.get('product_unit_id')
+                    )
+                    requested[product.id] = requested.get(product.id, Decimal('0')) + base_quantity
+
+            available = InventoryService.get_available_quantities(requested.keys(), warehouse_id)
+            for product_id, base_quantity in requested.items():
+                if available.get(product_id, Decimal('0')) < base_quantity:
+                    raise InsufficientStockException(
+                        products[product_id].name,
+                        int(base_quantity),
+                        int(available.get(product_id, Decimal('0')))
                     )
-                    if stock_info['total_available'] < base_quantity:
-                        raise InsufficientStockException(
-                            product.name,
-                            int(base_quantity),
-                            int(stock_info['total_available'])
-                        )
         
         # Calculate estimated total for credit validation
         estimated_total = Decimal('0.00')
         for item in items:
-            product = Product.objects.get(id=item['product_id'])
+            product = products[item['product_id']]
 
             if transaction_currency == 'USD':
                 if product.sale_price_usd is not None:
@@ -207,6 +231,7 @@ class SalesService:
         
         # Create invoice
         invoice = Invoice.objects.create(
+            import_key=import_key or None,
             invoice_type=invoice_type,
             customer_id=customer_id,
             warehouse_id=warehouse_id,
@@ -226,12 +251,12 @@ class SalesService:
         
         # Create items
         for item in items:
-            product = Product.objects.get(id=item['product_id'])
+            product = products[item['product_id']]
             product_unit_id = item.get('product_unit_id')
             product_unit = None
             
             if product_unit_id:
-                product_unit = ProductUnit.objects.get(id=product_unit_id)
+                product_unit = UnitConversionService.unit(product_unit_id)
 
             if transaction_currency == 'USD':
                 if product_unit and product_unit.sale_price_usd is not None:
@@ -285,11 +310,21 @@ class SalesService:
                     default_cost_price = product_unit.cost_price
                 else:
                     default_cost_price = product.cost_price
+
+            # The moving-average cost of the warehouse, when known, is the cost snapshot
+            average_cost = average_costs.get(product.id)
+            if average_cost is not None and (transaction_currency == 'USD' or usd_to_syp_old is not None):
+                default_cost_price = from_usd(
+                    average_cost * UnitConversionService.to_base(product.id, Decimal('1'), product_unit_id),
+                    transaction_currency,
+                    usd_to_syp_old=usd_to_syp_old,
+                    usd_to_syp_new=usd_to_syp_new
+                )
             
             InvoiceItem.objects.create(
                 invoice=invoice,
                 product=product,
-                product_unit=product_unit,
+                product_unit_id=product_unit.id if product_unit else None,
                 quantity=item['quantity'],
                 unit_price=item.get('unit_price', default_unit_price),
                 cost_price=item.get('cost_price', default_cost_price),
@@ -339,7 +374,6 @@ class SalesService:
         """
         from .models import Invoice, Payment
         from apps.inventory.services import InventoryService
-        from apps.inventory.models import ProductUnit
         
         invoice = Invoice.objects.select_for_update().get(id=invoice_id)
         
@@ -374,27 +408,17 @@ class SalesService:
                 usd_to_syp_new=invoice.usd_to_syp_new_snapshot
             )
             
+        # The invoice's own holds must not count against it: end them before
+        # the availability check of each deduction
+        StockReservationService.consume(INVOICE_RESERVATION, invoice.id)
+
         # Deduct stock for all items
-        for item in invoice.items.all():
+        invoice_items = list(invoice.items.all())
+        UnitConversionService.prefetch(item.product_id for item in invoice_items)
+        for item in invoice_items:
             # Calculate base_quantity based on product_unit or default to base unit
             # Requirements: 3.4, 3.6
-            if item.product_unit:
-                # Use the conversion factor from the specified product_unit
-                base_quantity = item.product_unit.convert_to_base(item.quantity)
-            else:
-                # Default to base unit - find the base unit for this product
-                base_unit = ProductUnit.objects.filter(
-                    product=item.product,
-                    is_base_unit=True,
-                    is_deleted=False
-                ).first()
-                
-                if base_unit:
-                    # Use base unit conversion (should be 1.0)
-                    base_quantity = base_unit.convert_to_base(item.quantity)
-                else:
-                    # No ProductUnit configured, use quantity as-is (legacy behavior)
-                    base_quantity = item.quantity
+            base_quantity = UnitConversionService.to_base(item.product_id, item.quantity, item.product_unit_id)
             
             # Update the item's base_quantity
             item.base_quantity = base_quantity
@@ -525,6 +549,14 @@ class SalesService:
                 'paid_amount_usd'
             ]
         )
+        EventService.publish(EVENT_INVOICE_CONFIRMED, {
+            'invoice_id': invoice.id,
+            'invoice_number': invoice.invoice_number,
+            'customer_id': invoice.customer_id,
+            'status': invoice.status,
+            'total_amount': invoice.total_amount,
+            'total_amount_usd': invoice.total_amount_usd,
+        })
         return invoice
 
     @staticmethod
@@ -724,6 +756,13 @@ class SalesService:
                 amount_usd=alloc_usd
             )
         
+        EventService.publish(EVENT_PAYMENT_RECEIVED, {
+            'payment_id': payment.id,
+            'payment_number': payment.payment_number,
+            'customer_id': payment.customer_id,
+            'amount': payment.amount,
+            'amount_usd': payment.amount_usd,
+        })
         return payment
 
     @staticmethod
@@ -737,9 +776,12 @@ class SalesService:
         notes: str = None,
         user=None
     ) -> SalesReturn:
-        """Create a sales return."""
-        from apps.inventory.models import ProductUnit
+        """
+        Create a sales return.
         
+        Invoice items, base units and stock rows are resolved in bulk; return
+        items and stock movements are written with bulk inserts.
+        """
         invoice = Invoice.objects.get(id=invoice_id)
         
         if invoice.status not in [Invoice.Status.CONFIRMED, Invoice.Status.PAID, Invoice.Status.PARTIAL]:
@@ -748,6 +790,16 @@ class SalesService:
                 'لا يمكن إنشاء مرتجع لفاتورة غير مؤكدة'
             )
         
+        invoice_items = InvoiceItem.objects.select_related('product').in_bulk(
+            [item_data['invoice_item_id'] for item_data in items]
+        )
+        for item_data in items:
+            if item_data['invoice_item_id'] not in invoice_items:
+                raise NotFoundException('بند الفاتورة', item_data['invoice_item_id'])
+        UnitConversionService.prefetch(
+            item.product_id for item in invoice_items.values() if item.product.track_stock
+        )
+        
         # Create return
         sales_return = SalesReturn.objects.create(
             original_invoice=invoice,
@@ -758,13 +810,14 @@ class SalesService:
         )
         
         total_amount = Decimal('0.00')
+        return_items = []
+        stock_lines = []
         
         for item_data in items:
-            invoice_item = InvoiceItem.objects.get(id=item_data['invoice_item_id'])
+            invoice_item = invoice_items[item_data['invoice_item_id']]
             quantity = Decimal(str(item_data['quantity']))
             
-            # Create return item
-            SalesReturnItem.objects.create(
+            return_items.append(SalesReturnItem(
                 sales_return=sales_return,
                 invoice_item=invoice_item,
                 product=invoice_item.product,
@@ -772,7 +825,7 @@ class SalesService:
                 unit_price=invoice_item.unit_price,
                 reason=item_data.get('reason'),
                 created_by=user
-            )
+            ))
 
             # Calculate line total proportionally with original discount/tax
             unit_price = Decimal(str(invoice_item.unit_price or '0'))
@@ -789,31 +842,30 @@ class SalesService:
             
             # Add stock back
             if invoice_item.product.track_stock:
-                if invoice_item.product_unit:
-                    base_quantity = invoice_item.product_unit.convert_to_base(quantity)
-                else:
-                    base_unit = ProductUnit.objects.filter(
-                        product=invoice_item.product,
-                        is_base_unit=True,
-                        is_deleted=False
-                    ).first()
-                    if base_unit:
-                        base_quantity = base_unit.convert_to_base(quantity)
-                    else:
-                        base_quantity = quantity
-
-                InventoryService.add_stock(
-                    product_id=invoice_item.product_id,
-                    warehouse_id=invoice.warehouse_id,
-                    quantity=base_quantity,
-                    unit_cost=invoice_item.cost_price,
-                    source_type=StockMovement.SourceType.RETURN,
-                    reference_number=sales_return.return_number,
-                    reference_type='SalesReturn',
-                    reference_id=sales_return.id,
-                    user=user,
-                    notes=f"مرتجع مبيعات - الفاتورة رقم {invoice.invoice_number}"
+                base_quantity = UnitConversionService.to_base(
+                    invoice_item.product_id, quantity, invoice_item.product_unit_id
                 )
+                stock_lines.append({
+                    'product_id': invoice_item.product_id,
+                    'quantity': base_quantity,
+                    'unit_cost': invoice_item.cost_price,
+                    'unit_cost_usd': _base_unit_cost_usd(
+                        invoice, invoice_item.cost_price, quantity, base_quantity
+                    ),
+                })
+        
+        SalesReturnItem.objects.bulk_create(return_items)
+        InventoryService.add_stock_bulk(
+            warehouse_id=invoice.warehouse_id,
+            lines=stock_lines,
+            source_type=StockMovement.SourceType.RETURN,
+            reference_number=sales_return.return_number,
+            reference_type='SalesReturn',
+            reference_id=sales_return.id,
+            user=user,
+            notes=f"مرتجع مبيعات - الفاتورة رقم {invoice.invoice_number}",
+            usd_to_syp_old=invoice.usd_to_syp_old_snapshot
+        )
         
         sales_return.total_amount = total_amount
         sales_return.save()
@@ -1126,8 +1178,6 @@ class SalesService:
             InvalidOperationException: If invoice cannot be cancelled
             ValidationException: If reason is not provided
         """
-        from apps.inventory.models import ProductUnit
-        
         if not reason or not reason.strip():
             raise ValidationException(
                 'يجب تحديد سبب الإلغاء',
@@ -1145,36 +1195,31 @@ class SalesService:
             )
         
         # Reverse stock movements - add stock back for all items
-        for item in invoice.items.all():
-            if item.product.track_stock:
-                # Calculate base_quantity based on product_unit or default to base unit
-                if item.product_unit:
-                    base_quantity = item.product_unit.convert_to_base(item.quantity)
-                else:
-                    base_unit = ProductUnit.objects.filter(
-                        product=item.product,
-                        is_base_unit=True,
-                        is_deleted=False
-                    ).first()
-                    
-                    if base_unit:
-                        base_quantity = base_unit.convert_to_base(item.quantity)
-                    else:
-                        base_quantity = item.quantity
-                
-                # Add stock back using InventoryService
-                InventoryService.add_stock(
-                    product_id=item.product_id,
-                    warehouse_id=invoice.warehouse_id,
-                    quantity=base_quantity,
-                    unit_cost=item.cost_price,
-                    source_type=StockMovement.SourceType.ADJUSTMENT,
-                    reference_number=invoice.invoice_number,
-                    reference_type='invoice_cancellation',
-                    reference_id=invoice.id,
-                    user=user,
-                    notes=f'إلغاء فاتورة رقم {invoice.invoice_number} - السبب: {reason}'
-                )
+        items = [
+            item for item in invoice.items.select_related('product')
+            if item.product.track_stock
+        ]
+        UnitConversionService.prefetch(item.product_id for item in items)
+        stock_lines = []
+        for item in items:
+            base_quantity = UnitConversionService.to_base(item.product_id, item.quantity, item.product_unit_id)
+            stock_lines.append({
+                'product_id': item.product_id,
+                'quantity': base_quantity,
+                'unit_cost': item.cost_price,
+                'unit_cost_usd': _base_unit_cost_usd(invoice, item.cost_price, item.quantity, base_quantity),
+            })
+        InventoryService.add_stock_bulk(
+            warehouse_id=invoice.warehouse_id,
+            lines=stock_lines,
+            source_type=StockMovement.SourceType.ADJUSTMENT,
+            reference_number=invoice.invoice_number,
+            reference_type='invoice_cancellation',
+            reference_id=invoice.id,
+            user=user,
+            notes=f'إلغاء فاتورة رقم {invoice.invoice_number} - السبب: {reason}',
+            usd_to_syp_old=invoice.usd_to_syp_old_snapshot
+        )
         
         # Reverse customer balance changes
         # For credit invoices, the customer balance was increased by (total - paid)
@@ -10,15 +10,18 @@ from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.filters import SearchFilter, OrderingFilter
 
 from apps.core.decorators import handle_view_error
+from apps.core.exceptions import ValidationException
+from apps.core.idempotency import idempotent
 from .models import Customer, Invoice, Payment, SalesReturn
 from .serializers import (
     CustomerListSerializer, CustomerDetailSerializer,
-    InvoiceListSerializer, InvoiceDetailSerializer, InvoiceCreateSerializer,
+    InvoiceListSerializer, InvoiceDetailSerializer, InvoiceCreateSerializer, BulkInvoiceSerializer,
     PaymentSerializer, SalesReturnSerializer, SalesReturnCreateSerializer,
     PaymentAllocationSerializer, PaymentWithAllocationsSerializer,
     CollectPaymentWithAllocationSerializer, UnpaidInvoiceSerializer
 )
 from .services import SalesService
+from .bulk_service import BulkInvoiceService, BULK_INVOICE_MAX_BATCH
 
 
 class CustomerViewSet(viewsets.ModelViewSet):
@@ -119,6 +122,7 @@ class InvoiceViewSet(viewsets.ModelViewSet):
             return InvoiceCreateSerializer
         return InvoiceDetailSerializer
 
+    @idempotent
     def create(self, request, *args, **kwargs):
         """
         Create invoice and return full details for receipt printing.
@@ -161,6 +165,61 @@ class InvoiceViewSet(viewsets.ModelViewSet):
         invoice = SalesService.confirm_invoice(pk, request.user)
         return Response(InvoiceDetailSerializer(invoice).data)
 
+    @handle_view_error
+    @action(detail=False, methods=['post'])
+    def bulk(self, request):
+        """
+        Create (and by default confirm) a batch of invoices.
+
+        Request body:
+            invoices: List of invoices, each shaped like the create payload
+                with plain IDs and an optional idempotency_key; confirm
+                defaults to true
+            chunk_size: Optional number of invoices per transaction
+
+        Always answers 200 with one result per invoice, in request order;
+        invoices whose idempotency_key was already imported are returned as
+        'duplicate' without being created again.
+        """
+        invoices = request.data.get('invoices')
+        if not isinstance(invoices, list) or not invoices:
+            raise ValidationException('يجب إرسال قائمة فواتير', field='invoices')
+        if len(invoices) > BULK_INVOICE_MAX_BATCH:
+            raise ValidationException(
+                f'الحد الأقصى {BULK_INVOICE_MAX_BATCH} فاتورة في الطلب الواحد', field='invoices'
+            )
+        try:
+            chunk_size = int(request.data.get('chunk_size') or 0) or None
+        except (TypeError, ValueError):
+            raise ValidationException('حجم الدفعة غير صالح', field='chunk_size')
+
+        valid, results = [], []
+        for index, payload in enumerate(invoices):
+            serializer = BulkInvoiceSerializer(data=payload)
+            if serializer.is_valid():
+                valid.append({**serializer.validated_data, 'index': index})
+            else:
+                key = payload.get('idempotency_key') if isinstance(payload, dict) else None
+                results.append(BulkInvoiceService.failure(
+                    index, key, {'detail': serializer.errors, 'code': 'VALIDATION_ERROR'},
+                    status.HTTP_400_BAD_REQUEST
+                ))
+
+        if valid:
+            results += BulkInvoiceService.import_invoices(valid, user=request.user, chunk_size=chunk_size)
+        results.sort(key=lambda result: result['index'])
+
+        counts = {'created': 0, 'duplicate': 0, 'failed': 0}
+        for result in results:
+            counts[result['status']] += 1
+        return Response({
+            'count': len(results),
+            'created': counts['created'],
+            'duplicates': counts['duplicate'],
+            'failed': counts['failed'],
+            'results': results,
+        })
+
     @handle_view_error
     @action(detail=True, methods=['get'])
     def profit(self, request, pk=None):
@@ -237,6 +296,7 @@ class PaymentViewSet(viewsets.ModelViewSet):
         """Perform soft delete using the model's soft_delete method."""
         instance.soft_delete(user=self.request.user)
 
+    @idempotent
     def create(self, request, *args, **kwargs):
         """Create payment using SalesService for proper balance updates."""
         serializer = self.get_serializer(data=request.data)
@@ -317,6 +377,7 @@ class PaymentViewSet(viewsets.ModelViewSet):
 
     @handle_view_error
     @action(detail=False, methods=['post'])
+    @idempotent
     def collect_with_allocation(self, request):
         """
         Create payment with invoice allocations in one transaction.
@@ -52,6 +52,10 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    # Current request (user, IP) for audit entries
+    'apps.accounts.audit.AuditContextMiddleware',
+    # Opt-in query/timing profiler (PROFILING_ENABLED)
+    'apps.core.profiling.QueryProfilingMiddleware',
 ]
 
 ROOT_URLCONF = 'config.urls'
@@ -182,6 +186,23 @@ BUSINESS_SETTINGS = {
     'DECIMAL_PLACES': 2,
 }
 
+# Background Jobs (backup, restore, heavy reports) run in-process
+BACKGROUND_JOB_WORKERS = 2
+BACKGROUND_JOBS_EAGER = False
+
+# Audit trail: business writes are queued on commit and written in batches
+# by a background thread (see apps.accounts.audit)
+AUDIT_LOG_ENABLED = True
+AUDIT_LOG_EAGER = False
+AUDIT_BATCH_SIZE = 200
+AUDIT_FLUSH_INTERVAL_MS = 500
+
+# Query profiling (opt-in): per-request and per-service SQL counts, DB time
+# and N+1 fingerprints written to logs/profiling.log (see apps.core.profiling)
+PROFILING_ENABLED = os.environ.get('DJANGO_PROFILING', 'False').lower() == 'true'
+PROFILING_SLOW_MS = int(os.environ.get('DJANGO_PROFILING_SLOW_MS', '500'))
+PROFILING_DUPLICATE_THRESHOLD = 5
+
 # Logging Configuration
 # Requirements: 7.1, 7.2, 7.4 - Comprehensive error logging with timestamp, type, message, traceback
 import os
@@ -208,6 +229,11 @@ LOGGING = {
             'style': '{',
             'datefmt': '%Y-%m-%d %H:%M:%S',
         },
+        # Bare message, for logs whose messages are already JSON
+        'message': {
+            'format': '{message}',
+            'style': '{',
+        },
         # Simple formatter for console output
         'simple': {
             'format': '{levelname} {message}',
@@ -270,6 +296,16 @@ LOGGING = {
             'level': 'DEBUG',
             'filters': ['require_debug_true'],
         },
+        # Query profiles, one JSON object per line (read by profiling_report)
+        'profiling_file': {
+            'class': 'config.logging_handlers.WindowsSafeRotatingFileHandler',
+            'filename': LOGS_DIR / 'profiling.log',
+            'formatter': 'message',
+            'maxBytes': 20 * 1024 * 1024,  # 20 MB
+            'backupCount': 5,
+            'encoding': 'utf-8',
+            'level': 'INFO',
+        },
         # Structured JSON log for potential log aggregation
         'structured_file': {
             'class': 'config.logging_handlers.WindowsSafeRotatingFileHandler',
@@ -342,6 +378,12 @@ LOGGING = {
             'level': 'DEBUG',
             'propagate': False,
         },
+        # Query profiler (apps.core.profiling) - only the dedicated file
+        'apps.profiling': {
+            'handlers': ['profiling_file'],
+            'level': 'INFO',
+            'propagate': False,
+        },
         # Accounts app logger
         'apps.accounts': {
             'handlers': ['console', 'file', 'error_file'],
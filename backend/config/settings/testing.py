@@ -10,3 +10,9 @@ DATABASES = {
 # Simplify for testing
 SECRET_KEY = 'test-key'
 DEBUG = True
+
+# Run background jobs inline so tests see their results
+BACKGROUND_JOBS_EAGER = True
+
+# Write audit entries on commit instead of from the background thread
+AUDIT_LOG_EAGER = True
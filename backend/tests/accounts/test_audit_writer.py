@@ -0,0 +1,137 @@
+"""
+Tests for the batched audit trail writer.
+"""
+import json
+import pytest
+from decimal import Decimal
+from django.db import connection, transaction
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+
+from apps.accounts import audit
+from apps.accounts.audit import AuditWriter
+from apps.accounts.models import AuditLog
+from apps.inventory.models import Product
+
+AUDIT_URL = '/api/v1/auth/audit-logs/'
+
+
+def _logs(model_name='inventory.Product'):
+    return list(AuditLog.objects.filter(model_name=model_name).order_by('id'))
+
+
+@pytest.fixture
+def spool(tmp_path, settings):
+    settings.LOGS_DIR = tmp_path
+    return tmp_path / audit.AUDIT_SPOOL_NAME
+
+
+@pytest.mark.django_db(transaction=True)
+class TestAuditCapture:
+    """Signals turn committed business writes into audit entries."""
+
+    def test_create_update_and_soft_delete(self, product):
+        product = Product.objects.get(pk=product.pk)
+        product.sale_price = Decimal('175.00')
+        product.save()
+        product.save()  # nothing changed: no entry
+        product.soft_delete()
+
+        create, update, delete = _logs()
+        assert create.action == AuditLog.Action.CREATE
+        assert create.object_id == str(product.pk)
+        assert create.object_repr == product.code
+        assert update.action == AuditLog.Action.UPDATE
+        assert update.changes == {'sale_price': ['150.00', '175.00']}
+        assert delete.action == AuditLog.Action.DELETE
+        assert delete.changes['is_deleted'] == [False, True]
+
+    def test_diff_needs_no_query(self, product):
+        product = Product.objects.get(pk=product.pk)
+        product.name = 'Renamed'
+        with CaptureQueriesContext(connection) as ctx:
+            with transaction.atomic():
+                product.save(update_fields=['name'])
+        # UPDATE plus savepoint handling, then one bulk INSERT of the entry on commit
+        assert sum(1 for q in ctx.captured_queries if 'audit' in q['sql'].lower()) == 1
+        assert _logs()[-1].changes == {'name': ['Test Product', 'Renamed']}
+
+    def test_rolled_back_writes_are_not_audited(self, category, unit):
+        with pytest.raises(RuntimeError):
+            with transaction.atomic():
+                Product.objects.create(name='Ghost', code='GHOST', category=category, unit=unit)
+                raise RuntimeError
+        assert not Product.objects.filter(code='GHOST').exists()
+        assert not AuditLog.objects.filter(object_repr='GHOST').exists()
+
+    def test_request_user_and_ip_recorded(self, admin_client, admin_user, category):
+        response = admin_client.patch(
+            f'/api/v1/inventory/categories/{category.pk}/', {'name': 'Changed'},
+            format='json', HTTP_X_FORWARDED_FOR='10.1.2.3, 172.16.0.1'
+        )
+        assert response.status_code == 200
+        entry = _logs('inventory.Category')[-1]
+        assert entry.user_id == admin_user.pk
+        assert entry.ip_address == '10.1.2.3'
+        assert entry.changes['name'][1] == 'Changed'
+
+    @override_settings(AUDIT_LOG_ENABLED=False)
+    def test_disabled(self, category, unit):
+        Product.objects.create(name='Quiet', code='QUIET', category=category, unit=unit)
+        assert not AuditLog.objects.filter(object_repr='QUIET').exists()
+
+
+@pytest.mark.django_db(transaction=True)
+class TestAuditWriter:
+    """The background writer batches entries and spools failures."""
+
+    @override_settings(AUDIT_LOG_EAGER=False, AUDIT_BATCH_SIZE=3, AUDIT_FLUSH_INTERVAL_MS=50)
+    def test_background_thread_writes_in_batches(self, category, unit, monkeypatch):
+        batches = []
+        real_write = AuditWriter.write
+        monkeypatch.setattr(AuditWriter, 'write', staticmethod(
+            lambda entries: batches.append(len(entries)) or real_write(entries)
+        ))
+        try:
+            # One transaction: the entries are queued together on commit, and the
+            # test thread stays off the (SQLite) database while the writer runs
+            with transaction.atomic():
+                for i in range(7):
+                    Product.objects.create(name=f'P{i}', code=f'BATCH{i}', category=category, unit=unit)
+            AuditWriter.flush()
+        finally:
+            AuditWriter.stop()
+        assert AuditLog.objects.filter(object_repr__startswith='BATCH').count() == 7
+        assert sum(batches) == 7 and max(batches) <= 3
+
+    def test_failed_write_is_spooled_and_replayed(self, spool, monkeypatch):
+        entry = {'action': 'create', 'model_name': 'inventory.Product', 'object_id': '1',
+                 'object_repr': 'SPOOLED', 'changes': {'a': 1}, 'user_id': None, 'ip_address': None}
+        monkeypatch.setattr(AuditLog.objects, 'bulk_create', lambda *a, **k: 1 / 0)
+        assert AuditWriter.write([entry]) is False
+        monkeypatch.undo()
+
+        assert json.loads(spool.read_text(encoding='utf-8').splitlines()[0])['object_repr'] == 'SPOOLED'
+        assert AuditWriter.replay_spool() == 1
+        assert not spool.exists()
+        assert AuditLog.objects.get(object_repr='SPOOLED').changes == {'a': 1}
+
+
+@pytest.mark.django_db
+class TestAuditLogApi:
+    """The audit viewset pages with a keyset cursor."""
+
+    def test_cursor_pages(self, admin_client):
+        AuditLog.objects.bulk_create([
+            AuditLog(action=AuditLog.Action.VIEW, model_name='sales.Invoice', object_id=str(i))
+            for i in range(5)
+        ])
+        first = admin_client.get(AUDIT_URL, {'page_size': 3})
+        assert first.status_code == 200
+        assert 'count' not in first.data and len(first.data['results']) == 3
+        second = admin_client.get(first.data['next'])
+        ids = [row['id'] for row in first.data['results'] + second.data['results']]
+        assert len(set(ids)) == 5
+
+        by_object = admin_client.get(AUDIT_URL, {'model_name': 'sales.Invoice', 'object_id': '2'})
+        assert [row['object_id'] for row in by_object.data['results']] == ['2']
@@ -7,6 +7,7 @@ from datetime import date, timedelta
 from django.contrib.auth import get_user_model
 from rest_framework.test import APIClient
 
+from apps.core.settings_models import DailyExchangeRate
 from apps.inventory.models import Category, Unit, Product, Warehouse, Stock
 from apps.sales.models import Customer
 from apps.purchases.models import Supplier
@@ -15,6 +16,20 @@ from apps.expenses.models import ExpenseCategory
 User = get_user_model()
 
 
+@pytest.fixture(autouse=True)
+def clear_caches():
+    """Rolled-back test data fires no signals, so start each test with empty caches."""
+    from django.core.cache import cache
+    from apps.core.settings_cache import SettingsCache
+    from apps.inventory.categories import CategoryTreeService
+    from apps.inventory.units import UnitConversionService
+    CategoryTreeService.clear()
+    UnitConversionService.clear()
+    SettingsCache.clear()
+    cache.clear()
+    yield
+
+
 # ============================================================================
 # User Fixtures
 # ============================================================================
@@ -327,6 +342,14 @@ def expense_category(db):
     )
 
 
+@pytest.fixture
+def exchange_rate(db):
+    """Today's daily exchange rate (1 USD = 1,500,000 old / 15,000 new SYP)."""
+    return DailyExchangeRate.objects.create(
+        rate_date=date.today(), usd_to_syp_old=Decimal('1500000'), usd_to_syp_new=Decimal('15000')
+    )
+
+
 # ============================================================================
 # Date Fixtures
 # ============================================================================
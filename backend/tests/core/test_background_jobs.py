@@ -0,0 +1,169 @@
+"""
+Tests for the background job runner and the job polling API.
+"""
+import time
+import zipfile
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+
+from apps.core import jobs
+from apps.core.job_models import BackgroundJob
+from apps.core.jobs import JobCancelled, JobRunner, register_job
+from apps.inventory.models import Product
+
+
+@register_job('test_echo')
+def _echo(context):
+    context.progress('working', 50)
+    context.set_artifact('echo.txt')
+    return {'echo': context.params.get('value')}
+
+
+@register_job('test_fail')
+def _fail(context):
+    raise RuntimeError('boom')
+
+
+@register_job('test_cancel')
+def _cancel(context):
+    JobRunner.cancel(context.job)
+    context.progress('working', 10)
+    return {'unreachable': True}
+
+
+@pytest.mark.django_db
+class TestJobRunner:
+    def test_successful_job_stores_result(self, admin_user):
+        job = JobRunner.submit('test_echo', {'value': 7}, user=admin_user)
+
+        assert job.status == BackgroundJob.Status.SUCCEEDED
+        assert job.result == {'echo': 7}
+        assert job.artifact == 'echo.txt'
+        assert job.progress == 100
+        assert job.created_by == admin_user
+        assert job.started_at and job.finished_at
+
+    def test_failure_is_recorded(self):
+        job = JobRunner.submit('test_fail')
+        assert job.status == BackgroundJob.Status.FAILED
+        assert job.error == 'boom'
+
+    def test_cancel_stops_running_job(self):
+        job = JobRunner.submit('test_cancel')
+        assert job.status == BackgroundJob.Status.CANCELLED
+        assert job.result is None
+
+    def test_cancel_pending_job(self):
+        job = BackgroundJob.objects.create(job_type='test_echo')
+        JobRunner.cancel(job)
+        JobRunner.run_job(job.pk)
+
+        job.refresh_from_db()
+        assert job.status == BackgroundJob.Status.CANCELLED
+        assert job.started_at is None
+
+    def test_cancel_from_stale_copy_keeps_worker_status(self):
+        job = BackgroundJob.objects.create(job_type='test_echo')
+        stale = BackgroundJob.objects.get(pk=job.pk)
+        BackgroundJob.objects.filter(pk=job.pk).update(status=BackgroundJob.Status.RUNNING)
+
+        cancelled = JobRunner.cancel(stale)
+        assert cancelled.status == BackgroundJob.Status.RUNNING
+        assert cancelled.cancel_requested
+
+        finished = BackgroundJob.objects.create(job_type='test_echo')
+        stale = BackgroundJob.objects.get(pk=finished.pk)
+        BackgroundJob.objects.filter(pk=finished.pk).update(status=BackgroundJob.Status.SUCCEEDED)
+        assert JobRunner.cancel(stale).status == BackgroundJob.Status.SUCCEEDED
+        finished.refresh_from_db()
+        assert not finished.cancel_requested
+
+    def test_live_progress_overrides_stored_progress(self, admin_client):
+        job = BackgroundJob.objects.create(job_type='test_echo', status=BackgroundJob.Status.RUNNING)
+        jobs._LIVE_PROGRESS[job.pk] = ('inventory.product', 42)
+        try:
+            response = admin_client.get(f'/api/v1/core/jobs/{job.pk}/')
+        finally:
+            jobs._LIVE_PROGRESS.pop(job.pk, None)
+
+        assert response.status_code == 200
+        assert response.data['phase'] == 'inventory.product'
+        assert response.data['progress'] == 42
+
+
+@pytest.mark.django_db(transaction=True)
+class TestWorkerThread:
+    def test_job_runs_off_request_thread(self, settings):
+        settings.BACKGROUND_JOBS_EAGER = False
+        job = JobRunner.submit('test_echo', {'value': 'async'})
+
+        deadline = time.monotonic() + 10
+        while time.monotonic() < deadline:
+            job.refresh_from_db()
+            if job.is_finished:
+                break
+            time.sleep(0.05)
+
+        assert job.status == BackgroundJob.Status.SUCCEEDED
+        assert job.result == {'echo': 'async'}
+
+    def test_progress_raises_when_cancel_flag_set(self):
+        """Cancellation requested by another process is seen through the database."""
+        job = BackgroundJob.objects.create(job_type='test_echo', status=BackgroundJob.Status.RUNNING)
+        context = jobs.JobContext(job)
+        BackgroundJob.objects.filter(pk=job.pk).update(cancel_requested=True)
+        with pytest.raises(JobCancelled):
+            context.progress('phase', 10)
+
+
+@pytest.mark.django_db
+class TestJobsApi:
+    def test_requires_admin(self, manager_client):
+        job = BackgroundJob.objects.create(job_type='test_echo')
+        response = manager_client.get(f'/api/v1/core/jobs/{job.pk}/')
+        assert response.status_code == 403
+
+    def test_backup_job_polling(self, admin_client, product, settings, tmp_path):
+        settings.BASE_DIR = tmp_path
+        response = admin_client.post('/api/v1/core/backups/', {'incremental': 'false'}, format='json')
+        assert response.status_code == 202
+
+        poll = admin_client.get(f"/api/v1/core/jobs/{response.data['id']}/")
+        assert poll.data['job_type'] == 'backup'
+        assert poll.data['status'] == 'succeeded'
+        assert poll.data['is_finished'] is True
+        assert poll.data['artifact'] == poll.data['result']['filename']
+        assert (tmp_path / 'backups' / poll.data['artifact']).exists()
+
+    def test_cancel_endpoint(self, admin_client):
+        job = BackgroundJob.objects.create(job_type='test_echo')
+        response = admin_client.post(f'/api/v1/core/jobs/{job.pk}/cancel/')
+        assert response.status_code == 200
+        assert response.data['status'] == 'cancelled'
+        assert response.data['cancel_requested'] is True
+
+
+@pytest.mark.django_db(transaction=True)
+class TestRestoreJob:
+    def test_restore_job_round_trip(self, admin_client, product, settings, tmp_path):
+        settings.BASE_DIR = tmp_path
+        created = admin_client.post('/api/v1/core/backups/', {}, format='json')
+        archive = tmp_path / 'backups' / created.data['artifact']
+        Product.objects.all().delete()
+
+        with open(archive, 'rb') as f:
+            upload = SimpleUploadedFile(archive.name, f.read())
+        response = admin_client.post(
+            '/api/v1/core/backups/restore/',
+            {'confirm': 'RESTORE', 'file': upload, 'restore_media': 'false'},
+            format='multipart',
+        )
+
+        assert response.status_code == 202
+        assert response.data['status'] == 'succeeded', response.data['error']
+        assert response.data['result']['tables']['inventory.product'] == 1
+        assert Product.objects.filter(pk=product.pk).exists()
+        # The job table is not part of the backup and survives the restore
+        assert BackgroundJob.objects.filter(pk=response.data['id']).exists()
+        assert zipfile.is_zipfile(archive)
@@ -0,0 +1,244 @@
+"""
+Tests for the chunked NDJSON backup engine.
+"""
+import hashlib
+import io
+import json
+import zipfile
+from datetime import timedelta
+from decimal import Decimal
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.utils import timezone
+
+from apps.core import backup
+from apps.core.backup import BackupEngine, MANIFEST_NAME, backup_models, model_label
+from apps.core.job_models import BackgroundJob
+from apps.core.exceptions import BusinessException
+from apps.inventory.models import Category, Product, Unit
+
+User = get_user_model()
+
+
+def _manifest_table(manifest, label):
+    return next(t for t in manifest['tables'] if t['model'] == label)
+
+
+def _read_lines(path, member):
+    with zipfile.ZipFile(path) as zf:
+        return zf.read(member)
+
+
+@pytest.mark.django_db
+class TestBackupModels:
+    def test_dependencies_come_first(self):
+        order = [model_label(m) for m in backup_models()]
+        assert order.index('inventory.category') < order.index('inventory.product')
+        assert order.index('inventory.product') < order.index('inventory.stock')
+        assert order.index('accounts.user') < order.index('sales.invoice')
+
+    def test_excludes_rebuilt_tables(self):
+        order = {model_label(m) for m in backup_models()}
+        assert 'contenttypes.contenttype' not in order
+        assert 'sessions.session' not in order
+        assert 'admin.logentry' not in order
+
+
+@pytest.mark.django_db
+class TestCreateBackup:
+    def test_manifest_counts_and_checksums(self, tmp_path, product):
+        path = tmp_path / 'full.amsbackup'
+        manifest = BackupEngine.create_backup(path, created_by='admin')
+
+        with zipfile.ZipFile(path) as zf:
+            stored = json.loads(zf.read(MANIFEST_NAME))
+        assert stored == manifest
+        assert manifest['kind'] == 'full'
+        assert manifest['version'] == backup.BACKUP_FORMAT_VERSION
+
+        table = _manifest_table(manifest, 'inventory.product')
+        data = _read_lines(path, table['member'])
+        assert table['rows'] == Product.objects.count() == 1
+        assert table['sha256'] == hashlib.sha256(data).hexdigest()
+        row = json.loads(data.splitlines()[0])
+        assert row['model'] == 'inventory.product'
+        assert row['pk'] == product.pk
+
+    def test_tables_streamed_in_chunks(self, tmp_path):
+        for i in range(7):
+            Category.objects.create(name=f'Category {i}')
+        path = tmp_path / 'chunked.amsbackup'
+        manifest = BackupEngine.create_backup(path, chunk_size=3)
+
+        table = _manifest_table(manifest, 'inventory.category')
+        lines = _read_lines(path, table['member']).splitlines()
+        assert table['rows'] == len(lines) == 7
+        pks = [json.loads(line)['pk'] for line in lines]
+        assert pks == sorted(pks)
+
+    def test_progress_reported(self, tmp_path):
+        events = []
+        BackupEngine.create_backup(tmp_path / 'p.amsbackup', progress=lambda *e: events.append(e))
+        assert events[-1] == ('done', 100)
+        assert all(0 <= percent <= 100 for _, percent in events)
+
+    def test_incremental_only_changed_rows(self, tmp_path, category, unit):
+        old = Product.objects.create(
+            name='Old', code='OLD', category=category, unit=unit,
+            cost_price=Decimal('1'), sale_price=Decimal('2'),
+        )
+        BackupEngine.create_backup(tmp_path / 'base.amsbackup')
+        Product.objects.filter(pk=old.pk).update(updated_at=timezone.now() - timedelta(days=1))
+
+        new = Product.objects.create(
+            name='New', code='NEW', category=category, unit=unit,
+            cost_price=Decimal('1'), sale_price=Decimal('2'),
+        )
+        manifest = BackupEngine.create_backup(tmp_path / 'inc.amsbackup', incremental=True)
+
+        assert manifest['kind'] == 'incremental'
+        assert manifest['base_backup'] == 'base.amsbackup'
+        table = _manifest_table(manifest, 'inventory.product')
+        lines = _read_lines(tmp_path / 'inc.amsbackup', table['member']).splitlines()
+        assert [json.loads(line)['pk'] for line in lines] == [new.pk]
+
+    def test_incremental_without_base_is_full(self, tmp_path, product):
+        manifest = BackupEngine.create_backup(tmp_path / 'inc.amsbackup', incremental=True)
+        assert manifest['kind'] == 'full'
+        assert _manifest_table(manifest, 'inventory.product')['rows'] == 1
+
+
+def _corrupt_member(source, dest, member):
+    with zipfile.ZipFile(source) as src, zipfile.ZipFile(dest, 'w') as out:
+        for item in src.infolist():
+            data = src.read(item)
+            if item.filename == member:
+                data = data.replace(b'"name":"', b'"name":"X', 1)
+            out.writestr(item, data)
+
+
+@pytest.mark.django_db(transaction=True)
+class TestRestoreBackup:
+    def test_round_trip(self, tmp_path, product):
+        path = tmp_path / 'rt.amsbackup'
+        BackupEngine.create_backup(path)
+        Product.objects.all().delete()
+        Unit.objects.all().delete()
+
+        manifest = backup.read_manifest(path)
+        loaded = BackupEngine.restore_backup(path, manifest)
+
+        restored = Product.objects.get(pk=product.pk)
+        assert restored.name == product.name
+        assert restored.unit_id == product.unit_id
+        # JSON keeps millisecond precision, like dumpdata
+        assert abs(restored.updated_at - product.updated_at) < timedelta(milliseconds=1)
+        assert loaded['inventory.product'] == 1
+
+    def test_batches_and_many_to_many(self, tmp_path, admin_user):
+        group = Group.objects.create(name='Cashiers')
+        admin_user.groups.add(group)
+        for i in range(5):
+            Category.objects.create(name=f'Category {i}')
+        path = tmp_path / 'm2m.amsbackup'
+        BackupEngine.create_backup(path)
+
+        events = []
+        loaded = BackupEngine.restore_backup(
+            path, backup.read_manifest(path),
+            progress=lambda *e: events.append(e), batch_size=2,
+        )
+
+        assert loaded['inventory.category'] == 5
+        assert Category.objects.count() == 5
+        assert list(User.objects.get(pk=admin_user.pk).groups.all()) == [group]
+        assert 'inventory.category' in {phase for phase, _ in events}
+
+    def test_background_jobs_keep_only_restored_creators(self, tmp_path):
+        kept = User.objects.create_user(username='kept', password='x')
+        path = tmp_path / 'jobs.amsbackup'
+        BackupEngine.create_backup(path)
+        gone = User.objects.create_user(username='gone', password='x')
+        kept_job = BackgroundJob.objects.create(job_type='backup', created_by=kept)
+        gone_job = BackgroundJob.objects.create(job_type='restore', created_by=gone)
+
+        BackupEngine.restore_backup(path, backup.read_manifest(path))
+
+        assert not User.objects.filter(pk=gone.pk).exists()
+        kept_job.refresh_from_db()
+        gone_job.refresh_from_db()
+        assert kept_job.created_by_id == kept.pk
+        assert gone_job.created_by_id is None
+
+    def test_checksum_mismatch_leaves_database_untouched(self, tmp_path, product):
+        path = tmp_path / 'ok.amsbackup'
+        manifest = BackupEngine.create_backup(path)
+        member = _manifest_table(manifest, 'inventory.product')['member']
+        corrupted = tmp_path / 'bad.amsbackup'
+        _corrupt_member(path, corrupted, member)
+
+        with pytest.raises(BusinessException) as exc:
+            BackupEngine.restore_archive(corrupted)
+
+        assert exc.value.code == 'BACKUP_CHECKSUM_MISMATCH'
+        assert 'inventory.product' in exc.value.message
+        assert Product.objects.filter(pk=product.pk).exists()
+
+    def test_legacy_db_json_archive(self, tmp_path, product):
+        path = tmp_path / 'legacy.amsbackup'
+        out = io.StringIO()
+        call_command(
+            'dumpdata', '--natural-foreign', '--natural-primary',
+            '--exclude', 'admin.logentry', '--exclude', 'sessions.session',
+            stdout=out,
+        )
+        with zipfile.ZipFile(path, 'w') as zf:
+            zf.writestr('metadata.json', json.dumps({'format': 'amsbackup'}))
+            zf.writestr('db.json', out.getvalue())
+        Product.objects.all().delete()
+
+        result = BackupEngine.restore_archive(path, restore_media=False)
+
+        assert result['kind'] == 'full'
+        assert Product.objects.get(pk=product.pk).code == product.code
+
+    def test_rejects_path_traversal(self, tmp_path):
+        path = tmp_path / 'evil.amsbackup'
+        with zipfile.ZipFile(path, 'w') as zf:
+            zf.writestr('manifest.json', json.dumps({'format': 'amsbackup', 'tables': []}))
+            zf.writestr('../evil.txt', 'x')
+
+        with pytest.raises(BusinessException) as exc:
+            BackupEngine.restore_archive(path)
+        assert exc.value.code == 'INVALID_BACKUP'
+
+
+@pytest.mark.django_db
+class TestBackupApi:
+    def test_create_uses_engine(self, admin_client, product, settings, tmp_path):
+        settings.BASE_DIR = tmp_path
+        response = admin_client.post('/api/v1/core/backups/', {}, format='json')
+
+        assert response.status_code == 202
+        result = response.data['result']
+        assert result['kind'] == 'full'
+        assert result['rows'] >= 1
+        with zipfile.ZipFile(tmp_path / 'backups' / result['filename']) as zf:
+            assert MANIFEST_NAME in zf.namelist()
+            assert 'db.json' not in zf.namelist()
+
+    def test_restore_rejects_invalid_archive(self, admin_client, settings, tmp_path):
+        settings.BASE_DIR = tmp_path
+        upload = SimpleUploadedFile('x.amsbackup', b'not a zip')
+        response = admin_client.post(
+            '/api/v1/core/backups/restore/', {'confirm': 'RESTORE', 'file': upload},
+            format='multipart',
+        )
+        assert response.status_code == 202
+        assert response.data['status'] == 'failed'
+        assert response.data['result']['code'] == 'INVALID_BACKUP'
+        assert list((tmp_path / 'backups' / 'uploads').iterdir()) == []
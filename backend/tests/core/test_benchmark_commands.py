@@ -0,0 +1,96 @@
+"""
+Tests for the benchmark data generator and the bench command.
+"""
+import json
+import pytest
+from datetime import date
+from io import StringIO
+from django.core.management import call_command
+from django.db.models import Sum
+
+from apps.core.benchmark import compare
+from apps.core.benchmark_data import BenchmarkDataGenerator
+from apps.inventory.models import CostLayer, Stock, StockMovement
+from apps.sales.models import Invoice, Payment
+
+END_DATE = date(2026, 3, 31)
+
+
+def _generate(prefix='BM', seed=7):
+    return BenchmarkDataGenerator(
+        seed=seed, products=15, customers=6, suppliers=3, warehouses=2, categories=6,
+        days=20, invoices_per_day=4, purchase_orders_per_week=7, expenses_per_day=1,
+        return_rate=0.2, end_date=END_DATE, prefix=prefix,
+    ).generate()
+
+
+@pytest.mark.django_db
+class TestBenchmarkDataGenerator:
+    """Test suite for BenchmarkDataGenerator."""
+
+    def test_volumes_and_determinism(self):
+        counts = _generate('BMA')
+        assert counts['Product'] == 15
+        assert counts['Customer'] == 6
+        assert counts['Invoice'] > 20
+        for model in ('InvoiceItem', 'Payment', 'PaymentAllocation', 'SalesReturn',
+                      'PurchaseOrder', 'GoodsReceivedNote', 'Expense', 'StockMovement', 'ProductUnit'):
+            assert counts[model] > 0, model
+
+        first = list(Invoice.objects.filter(invoice_number__startswith='BMA-').order_by('id').values_list(
+            'invoice_date', 'total_amount', 'status'
+        ))
+        # Exchange rates already exist for the period, so only they are not created again
+        counts.pop('DailyExchangeRate')
+        assert _generate('BMB') == counts
+        second = list(Invoice.objects.filter(invoice_number__startswith='BMB-').order_by('id').values_list(
+            'invoice_date', 'total_amount', 'status'
+        ))
+        assert first == second
+
+    def test_data_is_consistent(self):
+        _generate()
+        assert Invoice.objects.filter(invoice_date__gt=END_DATE).count() == 0
+        assert Invoice.objects.order_by('invoice_date').first().created_at.date() >= date(2026, 3, 12)
+
+        # Stock levels equal the last movement balance
+        for stock in Stock.objects.all():
+            last = StockMovement.objects.filter(
+                product_id=stock.product_id, warehouse_id=stock.warehouse_id
+            ).order_by('created_at', 'id').last()
+            assert stock.quantity == last.balance_after
+
+        # Payments add up to the invoices' paid amounts
+        paid = Invoice.objects.aggregate(total=Sum('paid_amount'))['total']
+        assert Payment.objects.aggregate(total=Sum('amount'))['total'] == paid
+        assert CostLayer.objects.exists()
+
+
+@pytest.mark.django_db
+class TestBenchCommand:
+    """Test suite for the bench command."""
+
+    def test_emits_json_and_rolls_back_writes(self, admin_user):
+        _generate()
+        invoices = Invoice.objects.count()
+        out = StringIO()
+        call_command('bench', repeat=1, only=['reports.sales_report', 'sales.', 'purchases.receive_goods'],
+                     stdout=out, stderr=StringIO())
+        report = json.loads(out.getvalue())
+
+        results = {result['name']: result for result in report['results']}
+        assert 'reports.sales_report' in results
+        assert 'sales.confirm_invoice' in results
+        assert 'inventory.add_stock' not in results
+        for result in results.values():
+            assert 'error' not in result, result
+            assert result['queries'] > 0
+        assert Invoice.objects.count() == invoices
+
+    def test_compare_flags_regressions(self):
+        baseline = {'results': [{'name': 'a', 'median_ms': 10.0, 'queries': 5}]}
+        report = {'results': [{'name': 'a', 'median_ms': 10.5, 'queries': 6}]}
+        assert compare(report, baseline) == ['a']
+        report = {'results': [{'name': 'a', 'median_ms': 10.5, 'queries': 5}]}
+        assert compare(report, baseline) == []
+        assert report['results'][0]['change_pct'] == 5.0
@@ -0,0 +1,177 @@
+"""
+Tests for the change event feed (pub/sub, long-poll and SSE).
+
+Events are written on commit, so these tests use real transactions.
+"""
+import threading
+import time
+import pytest
+from decimal import Decimal
+from django.db import connection, transaction
+
+from apps.core.event_models import ChangeEvent
+from apps.core.events import (
+    EVENT_LOW_STOCK_CROSSED, EVENT_STOCK_CHANGED, EventService
+)
+from apps.inventory.models import StockMovement
+from apps.inventory.services import InventoryService
+
+EVENTS_URL = '/api/v1/core/events/'
+
+
+def _types(events):
+    return [event.event_type for event in events]
+
+
+@pytest.mark.django_db(transaction=True)
+class TestEventPublishing:
+    """Test suite for publishing events from stock writes."""
+
+    def test_stock_write_publishes_on_commit(self, product, warehouse):
+        start = EventService.last_id()
+        with transaction.atomic():
+            InventoryService.add_stock(
+                product.id, warehouse.id, Decimal('5'), Decimal('10'), StockMovement.SourceType.PURCHASE
+            )
+            assert EventService.since(start) == []
+        events = EventService.since(start)
+        assert _types(events) == [EVENT_STOCK_CHANGED]
+        assert events[0].payload['product_id'] == product.id
+        assert Decimal(events[0].payload['quantity']) == Decimal('5')
+
+    def test_rolled_back_write_publishes_nothing(self, product, warehouse):
+        start = EventService.last_id()
+        with pytest.raises(RuntimeError):
+            with transaction.atomic():
+                InventoryService.add_stock(
+                    product.id, warehouse.id, Decimal('5'), Decimal('10'), StockMovement.SourceType.PURCHASE
+                )
+                raise RuntimeError
+        assert EventService.since(start) == []
+
+    def test_rolled_back_savepoint_publishes_nothing(self):
+        start = EventService.last_id()
+        with transaction.atomic():
+            EventService.publish(EVENT_STOCK_CHANGED, {'product_id': 1})
+            with pytest.raises(RuntimeError):
+                with transaction.atomic():
+                    EventService.publish(EVENT_STOCK_CHANGED, {'product_id': 2})
+                    raise RuntimeError
+            with transaction.atomic():
+                EventService.publish(EVENT_STOCK_CHANGED, {'product_id': 3})
+            EventService.publish(EVENT_STOCK_CHANGED, {'product_id': 4})
+        payloads = [event.payload['product_id'] for event in EventService.since(start)]
+        assert sorted(payloads) == [1, 3, 4]
+
+        # A rolled-back transaction leaves no batch behind for the next one
+        with pytest.raises(RuntimeError):
+            with transaction.atomic():
+                EventService.publish(EVENT_STOCK_CHANGED, {'product_id': 5})
+                raise RuntimeError
+        with transaction.atomic():
+            EventService.publish(EVENT_STOCK_CHANGED, {'product_id': 6})
+        assert [event.payload['product_id'] for event in EventService.since(start)][3:] == [6]
+
+    def test_failed_feed_write_does_not_fail_committed_work(self, product, warehouse, monkeypatch):
+        def broken(events):
+            raise RuntimeError('feed unavailable')
+
+        monkeypatch.setattr('apps.core.events._enrichers', [broken])
+        start = EventService.last_id()
+        InventoryService.add_stock(
+            product.id, warehouse.id, Decimal('5'), Decimal('10'), StockMovement.SourceType.PURCHASE
+        )
+        EventService.publish(EVENT_STOCK_CHANGED, {'product_id': product.id})
+
+        assert StockMovement.objects.filter(product=product).count() == 1
+        assert EventService.since(start) == []
+
+    def test_low_stock_crossing(self, product, warehouse):
+        # product.minimum_stock is 10
+        InventoryService.add_stock(
+            product.id, warehouse.id, Decimal('15'), Decimal('10'), StockMovement.SourceType.PURCHASE
+        )
+        start = EventService.last_id()
+        InventoryService.deduct_stock(product.id, warehouse.id, Decimal('3'), StockMovement.SourceType.SALE)
+        assert _types(EventService.since(start)) == [EVENT_STOCK_CHANGED]
+
+        start = EventService.last_id()
+        InventoryService.deduct_stock(product.id, warehouse.id, Decimal('4'), StockMovement.SourceType.SALE)
+        events = EventService.since(start)
+        assert _types(events) == [EVENT_STOCK_CHANGED, EVENT_LOW_STOCK_CROSSED]
+        assert Decimal(events[1].payload['quantity']) == Decimal('8')
+
+        # Already below the minimum: no second alert
+        start = EventService.last_id()
+        InventoryService.deduct_stock(product.id, warehouse.id, Decimal('1'), StockMovement.SourceType.SALE)
+        assert _types(EventService.since(start)) == [EVENT_STOCK_CHANGED]
+
+    def test_bulk_write_is_one_insert(self, product, warehouse):
+        start = EventService.last_id()
+        InventoryService.add_stock_bulk(warehouse.id, [
+            {'product_id': product.id, 'quantity': Decimal('1'), 'unit_cost': Decimal('1')},
+            {'product_id': product.id, 'quantity': Decimal('2'), 'unit_cost': Decimal('1')},
+        ], StockMovement.SourceType.ADJUSTMENT)
+        events = EventService.since(start)
+        assert [Decimal(e.payload['quantity']) for e in events] == [Decimal('1'), Decimal('3')]
+
+
+@pytest.mark.django_db(transaction=True)
+class TestEventFeed:
+    """Test suite for the long-poll and SSE endpoints."""
+
+    def test_cursor_and_long_poll(self, admin_client):
+        response = admin_client.get(EVENTS_URL)
+        assert response.data == {'events': [], 'last_id': EventService.last_id()}
+        cursor = response.data['last_id']
+
+        response = admin_client.get(EVENTS_URL, {'after': cursor, 'timeout': 0})
+        assert response.data == {'events': [], 'last_id': cursor}
+
+        EventService.publish(EVENT_STOCK_CHANGED, {'product_id': 1})
+        response = admin_client.get(EVENTS_URL, {'after': cursor, 'timeout': 5})
+        assert [e['type'] for e in response.data['events']] == [EVENT_STOCK_CHANGED]
+        assert response.data['last_id'] > cursor
+
+    def test_type_filter_and_validation(self, admin_client):
+        EventService.publish(EVENT_STOCK_CHANGED, {'product_id': 1})
+        response = admin_client.get(EVENTS_URL, {'after': 0, 'timeout': 0, 'types': EVENT_LOW_STOCK_CROSSED})
+        assert response.data['events'] == []
+
+        assert admin_client.get(EVENTS_URL, {'after': 0, 'types': 'nope'}).status_code == 400
+        assert admin_client.get(EVENTS_URL, {'after': 'x'}).status_code == 400
+
+    def test_waiter_is_woken_by_publish(self):
+        cursor = EventService.last_id()
+
+        def publish_later():
+            time.sleep(0.3)
+            EventService.publish(EVENT_STOCK_CHANGED, {'product_id': 2})
+            connection.close()
+
+        thread = threading.Thread(target=publish_later)
+        started = time.monotonic()
+        thread.start()
+        events = EventService.wait(cursor, timeout=10)
+        thread.join()
+        assert _types(events) == [EVENT_STOCK_CHANGED]
+        assert time.monotonic() - started < 5
+
+    def test_sse_stream(self, admin_client):
+        cursor = EventService.last_id()
+        EventService.publish(EVENT_STOCK_CHANGED, {'product_id': 3})
+        response = admin_client.get(
+            f'{EVENTS_URL}stream/', {'after': cursor}, HTTP_ACCEPT='text/event-stream'
+        )
+        assert response.status_code == 200
+        assert response['Content-Type'].startswith('text/event-stream')
+
+        chunks = iter(response.streaming_content)
+        assert next(chunks).startswith(b'retry:')
+        event = next(chunks).decode()
+        event_id = ChangeEvent.objects.latest('id').id
+        assert event.startswith(f'id: {event_id}\nevent: {EVENT_STOCK_CHANGED}\n')
+        response.close()
+
+    def test_requires_authentication(self, api_client):
+        assert api_client.get(EVENTS_URL).status_code == 401
@@ -0,0 +1,94 @@
+"""
+Tests for the data version counter and the version-keyed dashboard cache.
+
+Bumps run on commit, so these tests use real transactions.
+"""
+import pytest
+from decimal import Decimal
+from django.db import transaction
+
+from apps.core.versioning import DataVersionService
+from apps.expenses.models import Expense
+from apps.inventory.models import StockMovement
+from apps.inventory.services import InventoryService
+from apps.reports.services import ReportService
+
+
+def _purchase(product, warehouse):
+    InventoryService.add_stock(
+        product.id, warehouse.id, Decimal('1'), Decimal('10'), StockMovement.SourceType.PURCHASE
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+class TestDataVersion:
+    """Test suite for DataVersionService."""
+
+    def test_starts_at_zero(self):
+        assert DataVersionService.current() == 0
+
+    def test_tracked_writes_bump_once_per_transaction(self, product, warehouse):
+        before = DataVersionService.current()
+        with transaction.atomic():
+            for _ in range(3):
+                _purchase(product, warehouse)
+            assert DataVersionService.current() == before
+        assert DataVersionService.current() == before + 1
+
+    def test_rolled_back_write_does_not_bump(self, product, warehouse):
+        before = DataVersionService.current()
+        with pytest.raises(RuntimeError):
+            with transaction.atomic():
+                _purchase(product, warehouse)
+                raise RuntimeError
+        assert DataVersionService.current() == before
+
+        _purchase(product, warehouse)
+        assert DataVersionService.current() == before + 1
+
+    def test_bulk_stock_write_bumps(self, product, warehouse):
+        before = DataVersionService.current()
+        InventoryService.add_stock_bulk(
+            warehouse.id, [{'product_id': product.id, 'quantity': Decimal('2'), 'unit_cost': Decimal('5')}],
+            StockMovement.SourceType.ADJUSTMENT
+        )
+        assert DataVersionService.current() == before + 1
+
+    def test_untracked_write_does_not_bump(self, category):
+        before = DataVersionService.current()
+        category.name = 'Renamed'
+        category.save()
+        assert DataVersionService.current() == before
+
+    def test_endpoint(self, admin_client, product, warehouse):
+        before = admin_client.get('/api/v1/core/data-version/').data['version']
+        _purchase(product, warehouse)
+        assert admin_client.get('/api/v1/core/data-version/').data == {'version': before + 1}
+
+    def test_endpoint_requires_authentication(self, api_client):
+        assert api_client.get('/api/v1/core/data-version/').status_code == 401
+
+
+@pytest.mark.django_db(transaction=True)
+class TestCachedDashboard:
+    """Test suite for the version-keyed dashboard cache."""
+
+    def test_repeated_polls_compute_once(self, admin_client, django_assert_num_queries):
+        first = admin_client.get('/api/v1/reports/dashboard/')
+        assert first.status_code == 200
+        assert first.data['data_version'] == DataVersionService.current()
+
+        # Only the version lookup runs for a cached summary
+        with django_assert_num_queries(1):
+            ReportService.get_cached_dashboard_summary()
+
+    def test_write_invalidates(self, admin_user, expense_category, today):
+        before = ReportService.get_cached_dashboard_summary()
+        Expense.objects.create(
+            category=expense_category, expense_date=today, amount=Decimal('50.00'),
+            description='Rent', is_approved=True, created_by=admin_user
+        )
+        after = ReportService.get_cached_dashboard_summary()
+
+        assert after['data_version'] == before['data_version'] + 1
+        assert after['expenses']['total'] == before['expenses']['total'] + Decimal('50.00')
@@ -0,0 +1,111 @@
+"""
+Tests for Idempotency-Key handling on document-creating POST endpoints.
+"""
+import pytest
+from datetime import date, timedelta
+from decimal import Decimal
+from django.utils import timezone
+
+from apps.core.idempotency import IdempotencyService
+from apps.core.idempotency_models import IdempotencyKey
+from apps.inventory.models import Stock
+from apps.sales.models import Invoice, Payment
+
+INVOICES_URL = '/api/v1/sales/invoices/'
+PAYMENTS_URL = '/api/v1/sales/payments/'
+
+
+pytestmark = pytest.mark.usefixtures('exchange_rate')
+
+
+@pytest.fixture
+def invoice_payload(customer, warehouse, product):
+    Stock.objects.create(product=product, warehouse=warehouse, quantity=Decimal('100'))
+    return {
+        'customer': customer.id,
+        'warehouse': warehouse.id,
+        'invoice_date': str(date.today()),
+        'transaction_currency': 'USD',
+        'confirm': True,
+        'items': [{'product': product.id, 'quantity': '2', 'unit_price': '150.00'}],
+    }
+
+
+def _post(client, url, payload, key):
+    return client.post(url, payload, format='json', HTTP_IDEMPOTENCY_KEY=key)
+
+
+@pytest.mark.django_db
+class TestIdempotentEndpoints:
+    """A retried POST with the same key replays the first response."""
+
+    def test_retry_replays_without_second_invoice(self, admin_client, invoice_payload, product, warehouse):
+        first = _post(admin_client, INVOICES_URL, invoice_payload, 'sale-1')
+        assert first.status_code == 201
+        again = _post(admin_client, INVOICES_URL, invoice_payload, 'sale-1')
+        assert again.status_code == 201
+        assert again['Idempotent-Replayed'] == 'true'
+        assert again.json() == first.json()
+        assert Invoice.objects.count() == 1
+        assert Stock.objects.get(product=product, warehouse=warehouse).quantity == Decimal('98')
+
+    def test_without_key_nothing_is_stored(self, admin_client, invoice_payload):
+        assert admin_client.post(INVOICES_URL, invoice_payload, format='json').status_code == 201
+        assert admin_client.post(INVOICES_URL, invoice_payload, format='json').status_code == 201
+        assert Invoice.objects.count() == 2
+        assert not IdempotencyKey.objects.exists()
+
+    def test_key_reused_with_other_body(self, admin_client, invoice_payload):
+        _post(admin_client, INVOICES_URL, invoice_payload, 'sale-2')
+        invoice_payload['items'][0]['quantity'] = '3'
+        response = _post(admin_client, INVOICES_URL, invoice_payload, 'sale-2')
+        assert response.status_code == 422
+        assert response.data['code'] == 'IDEMPOTENCY_KEY_REUSED'
+        assert Invoice.objects.count() == 1
+
+    def test_retry_while_in_progress(self, admin_client, admin_user, invoice_payload):
+        first = _post(admin_client, INVOICES_URL, invoice_payload, 'sale-3')
+        IdempotencyKey.objects.filter(key='sale-3').update(status_code=None, response_body=None)
+        response = _post(admin_client, INVOICES_URL, invoice_payload, 'sale-3')
+        assert response.status_code == 409
+        assert response.data['code'] == 'IDEMPOTENCY_REQUEST_IN_PROGRESS'
+
+        # A request left in progress by a crashed worker is taken over later
+        IdempotencyKey.objects.filter(key='sale-3').update(created_at=timezone.now() - timedelta(hours=1))
+        assert _post(admin_client, INVOICES_URL, invoice_payload, 'sale-3').status_code == 201
+        assert Invoice.objects.count() == 2
+        assert first.status_code == 201
+
+    def test_failed_request_releases_key(self, admin_client, invoice_payload):
+        invoice_payload['items'][0]['quantity'] = '500'
+        assert _post(admin_client, INVOICES_URL, invoice_payload, 'sale-4').status_code == 400
+        assert not IdempotencyKey.objects.filter(key='sale-4').exists()
+
+        invoice_payload['items'][0]['quantity'] = '1'
+        assert _post(admin_client, INVOICES_URL, invoice_payload, 'sale-4').status_code == 201
+
+    def test_keys_are_per_user(self, admin_client, manager_client, invoice_payload):
+        _post(admin_client, INVOICES_URL, invoice_payload, 'shared')
+        assert _post(manager_client, INVOICES_URL, invoice_payload, 'shared').status_code == 201
+        assert Invoice.objects.count() == 2
+
+    def test_payment_replay(self, admin_client, customer):
+        payload = {
+            'customer': customer.id, 'payment_date': str(date.today()), 'amount': '50.00',
+            'payment_method': 'cash', 'transaction_currency': 'USD',
+        }
+        first = _post(admin_client, PAYMENTS_URL, payload, 'pay-1')
+        again = _post(admin_client, PAYMENTS_URL, payload, 'pay-1')
+        assert (first.status_code, again.status_code) == (201, 201)
+        assert again.json()['payment_number'] == first.json()['payment_number']
+        assert Payment.objects.count() == 1
+
+    def test_expired_keys_are_pruned_and_reusable(self, admin_client, invoice_payload):
+        _post(admin_client, INVOICES_URL, invoice_payload, 'sale-5')
+        IdempotencyKey.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+        assert 'Idempotent-Replayed' not in _post(admin_client, INVOICES_URL, invoice_payload, 'sale-5')
+        assert Invoice.objects.count() == 2
+
+        IdempotencyKey.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+        assert IdempotencyService.prune() == 1
+        assert not IdempotencyKey.objects.exists()
@@ -0,0 +1,113 @@
+"""
+Tests for the query profiling middleware, decorator and report command.
+"""
+import json
+import logging
+import pytest
+from io import StringIO
+from django.core.management import call_command
+from django.test import override_settings
+
+from apps.core.profiling import fingerprint, profile_service
+from apps.inventory.models import Product
+from apps.inventory.services import InventoryService
+
+CATEGORIES_URL = '/api/v1/inventory/categories/'
+
+
+class _Collect(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(json.loads(record.getMessage()))
+
+
+@pytest.fixture
+def profiles():
+    handler = _Collect()
+    logger = logging.getLogger('apps.profiling')
+    logger.addHandler(handler)
+    yield handler.records
+    logger.removeHandler(handler)
+
+
+def test_fingerprint_groups_parameter_variants():
+    a = fingerprint('SELECT * FROM t WHERE id = %s AND name = \'x\' LIMIT 21')
+    b = fingerprint('SELECT  *  FROM t WHERE id = %s AND name = \'y\' LIMIT 1')
+    assert a == b == 'SELECT * FROM t WHERE id = ? AND name = ? LIMIT ?'
+    assert fingerprint('SELECT 1 FROM t WHERE id IN (%s, %s, %s)') == 'SELECT ? FROM t WHERE id IN (?...)'
+
+
+@pytest.mark.django_db
+class TestQueryProfiling:
+    """Test suite for request and service profiles."""
+
+    def test_disabled_by_default(self, admin_client, profiles):
+        response = admin_client.get(CATEGORIES_URL)
+        assert 'X-Query-Profile' not in response
+        assert profiles == []
+
+    @override_settings(PROFILING_ENABLED=True, DEBUG=True)
+    def test_request_profile_and_header(self, admin_client, category, profiles):
+        response = admin_client.get(CATEGORIES_URL)
+        assert response.status_code == 200
+        assert response['X-Query-Profile'].startswith('queries=')
+        assert 'db;dur=' in response['Server-Timing']
+
+        request = [p for p in profiles if p['kind'] == 'request'][-1]
+        assert request['name'] == 'GET category-list'
+        assert request['status'] == 200
+        assert request['queries'] > 0
+        assert request['slowest'] and request['user_id'] is not None
+
+    @override_settings(PROFILING_ENABLED=True, DEBUG=False)
+    def test_header_only_in_debug(self, admin_client, profiles):
+        response = admin_client.get(CATEGORIES_URL)
+        assert 'X-Query-Profile' not in response
+        assert profiles[-1]['kind'] == 'request'
+
+    @override_settings(PROFILING_ENABLED=True, PROFILING_DUPLICATE_THRESHOLD=3)
+    def test_service_profile_flags_repeated_queries(self, product, profiles):
+        @profile_service
+        def load_each(ids):
+            return [Product.objects.get(pk=pk) for pk in ids]
+
+        load_each([product.pk] * 4)
+        profile = profiles[-1]
+        assert profile['kind'] == 'service'
+        assert profile['name'].endswith('load_each')
+        assert profile['queries'] == 4
+        assert profile['duplicates'][0]['count'] == 4
+
+    @override_settings(PROFILING_ENABLED=True)
+    def test_service_error_decorator_profiles_services(self, product, warehouse, profiles):
+        InventoryService.get_product_stock(product.id, warehouse.id)
+        assert profiles[-1]['name'] == 'InventoryService.get_product_stock'
+
+
+def test_report_command_aggregates(tmp_path):
+    log = tmp_path / 'profiling.log'
+    lines = [
+        {'kind': 'request', 'name': 'GET slow-list', 'wall_ms': ms, 'db_ms': 1, 'queries': 40,
+         'slow': ms > 500, 'duplicates': [{'sql': 'SELECT ?', 'count': 30}]}
+        for ms in (100, 900, 700)
+    ] + [
+        {'kind': 'request', 'name': 'GET fast-list', 'wall_ms': 5, 'db_ms': 1, 'queries': 2,
+         'slow': False, 'duplicates': []}
+    ]
+    log.write_text('\n'.join(json.dumps(line) for line in lines) + '\nnot json\n', encoding='utf-8')
+
+    out = StringIO()
+    call_command('profiling_report', file=str(log), json=True, top=1, stdout=out)
+    report = json.loads(out.getvalue())
+    assert report['profiles'] == 4 and report['skipped_lines'] == 1
+    [row] = report['rows']
+    assert row['name'] == 'GET slow-list'
+    assert row['count'] == 3 and row['slow'] == 2 and row['max_ms'] == 900
+    assert row['duplicates'] == [{'sql': 'SELECT ?', 'count': 30}]
+
+    out = StringIO()
+    call_command('profiling_report', file=str(log), stdout=out)
+    assert 'possible N+1' in out.getvalue()
@@ -0,0 +1,122 @@
+"""
+Tests for the process-local settings cache and its invalidation.
+"""
+import pytest
+from decimal import Decimal
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from apps.core import settings_cache
+from apps.core.settings_cache import SETTINGS_VERSION_KEY, SettingsCache
+from apps.core.settings_models import Currency, SystemSettings, TaxRate
+from apps.core.versioning import increment_version, read_version
+
+
+@pytest.fixture
+def settings_rows(db):
+    SystemSettings.objects.create(key='show_dual_currency', value='True')
+    SystemSettings.objects.create(key='decimal_places', value='3')
+    Currency.objects.create(code='USD', name='دولار', symbol='$', is_primary=True)
+    Currency.objects.create(code='SYP', name='ليرة', symbol='ل.س', exchange_rate=Decimal('0.0001'),
+                            decimal_places=0)
+    TaxRate.objects.create(name='VAT', code='VAT', rate=Decimal('15.00'), is_default=True)
+
+
+@pytest.mark.django_db(transaction=True)
+class TestSettingsCache:
+    """Test suite for SettingsCache."""
+
+    def test_typed_accessors(self, settings_rows):
+        assert SettingsCache.get_bool('show_dual_currency') is True
+        assert SettingsCache.get_int('decimal_places') == 3
+        assert SettingsCache.get_int('missing', 7) == 7
+        assert SettingsCache.get_decimal('show_dual_currency', Decimal('1')) == Decimal('1')
+        assert SettingsCache.primary_currency().code == 'USD'
+        assert SettingsCache.currency('EUR') is None
+        assert SettingsCache.default_tax_rate() == Decimal('15.00')
+        assert SettingsCache.tax_enabled() is True
+
+    def test_warm_lookups_run_no_queries(self, settings_rows):
+        SettingsCache.get('decimal_places')
+        with CaptureQueriesContext(connection) as ctx:
+            assert SystemSettings.get_setting('decimal_places') == '3'
+            assert SystemSettings.get_setting('missing', 'x') == 'x'
+            assert Currency.get_primary().code == 'USD'
+            assert Currency.convert(Decimal('10'), 'USD', 'SYP') == Decimal('100000')
+            assert TaxRate.get_default() == Decimal('15.00')
+            assert TaxRate.is_tax_enabled() is True
+        assert len(ctx.captured_queries) == 0
+
+    def test_convert_keeps_error_semantics(self, settings_rows):
+        with pytest.raises(Currency.DoesNotExist):
+            Currency.convert(Decimal('1'), 'USD', 'EUR')
+        Currency.objects.filter(code='SYP').update(exchange_rate=Decimal('0'))
+        SettingsCache.clear()
+        with pytest.raises(ValueError):
+            Currency.convert(Decimal('1'), 'SYP', 'USD')
+
+    def test_returned_currencies_are_copies(self, settings_rows):
+        SettingsCache.primary_currency().symbol = 'X'
+        assert SettingsCache.primary_currency().symbol == '$'
+
+    def test_save_and_delete_invalidate(self, settings_rows):
+        version = SettingsCache.version()
+        SystemSettings.set_setting('decimal_places', '2')
+        assert SettingsCache.get_int('decimal_places') == 2
+        assert SettingsCache.version() == version + 1
+
+        TaxRate.objects.get(code='VAT').delete()
+        assert TaxRate.get_default() == Decimal('0.00')
+        assert TaxRate.is_tax_enabled() is False
+
+        Currency.objects.create(code='EUR', name='يورو', symbol='€', is_primary=True)
+        assert Currency.get_primary().code == 'EUR'
+
+    def test_one_bump_per_transaction(self, settings_rows):
+        before = read_version(SETTINGS_VERSION_KEY)
+        with transaction.atomic():
+            SystemSettings.set_setting('a', '1')
+            SystemSettings.set_setting('b', '2')
+            # Uncommitted writes are visible to the writing transaction
+            assert SettingsCache.get('b') == '2'
+        assert read_version(SETTINGS_VERSION_KEY) == before + 1
+
+    def test_rolled_back_writes_are_not_cached(self, settings_rows):
+        SettingsCache.get('decimal_places')
+        with pytest.raises(RuntimeError):
+            with transaction.atomic():
+                SystemSettings.set_setting('decimal_places', '9')
+                assert SettingsCache.get('decimal_places') == '9'
+                raise RuntimeError
+        assert SettingsCache.get('decimal_places') == '3'
+
+    def test_other_worker_changes_seen_after_check_interval(self, settings_rows, settings):
+        settings.SETTINGS_CACHE_CHECK_INTERVAL = 60
+        assert SettingsCache.get('decimal_places') == '3'
+
+        # Another worker commits a change: the row and the stamp move, no local signal
+        SystemSettings.objects.filter(key='decimal_places').update(value='4')
+        increment_version(SETTINGS_VERSION_KEY)
+        assert SettingsCache.get('decimal_places') == '3'
+
+        settings_cache._state['checked_at'] -= 60
+        with CaptureQueriesContext(connection) as ctx:
+            assert SettingsCache.get('decimal_places') == '4'
+        # Stamp check plus the three table loads
+        assert len(ctx.captured_queries) == 4
+
+        settings_cache._state['checked_at'] -= 60
+        with CaptureQueriesContext(connection) as ctx:
+            SettingsCache.get('decimal_places')
+        assert len(ctx.captured_queries) == 1
+
+
+@pytest.mark.django_db
+class TestAppContextCaching:
+    """The app-context endpoint reads the primary currency from the cache."""
+
+    def test_primary_currency_from_cache(self, admin_client, settings_rows):
+        url = '/api/v1/core/app-context/'
+        first = admin_client.get(url)
+        assert first.status_code == 200
+        assert first.data['primary_currency']['code'] == 'USD'
@@ -0,0 +1,122 @@
+"""
+Tests for the moving-average cost engine.
+"""
+import pytest
+from datetime import date
+from decimal import Decimal
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from apps.inventory.average_cost import AverageCostService
+from apps.inventory.models import AverageCostHistory, Stock, StockMovement
+from apps.inventory.services import InventoryService
+from apps.purchases.services import PurchaseService
+from apps.sales.services import SalesService
+
+
+pytestmark = pytest.mark.usefixtures('exchange_rate')
+
+
+def _receive(supplier, warehouse, product, user, quantity, unit_price, usd_to_syp_old):
+    po = PurchaseService.create_purchase_order(
+        supplier.id, warehouse.id, date.today(),
+        [{'product_id': product.id, 'quantity': quantity, 'unit_price': Decimal(unit_price)}],
+        user=user,
+        usd_to_syp_old_snapshot=Decimal(usd_to_syp_old),
+        usd_to_syp_new_snapshot=Decimal(usd_to_syp_old) / 100,
+    )
+    po = PurchaseService.approve_purchase_order(po.id, user)
+    return PurchaseService.receive_goods(
+        po.id, date.today(), [{'po_item_id': po.items.get().id, 'quantity': quantity}], user=user
+    )
+
+
+def _stock(product, warehouse):
+    return Stock.objects.get(product=product, warehouse=warehouse)
+
+
+def _sell(customer, warehouse, product, user, quantity):
+    invoice = SalesService.create_invoice(
+        customer.id, warehouse.id, date.today(),
+        [{'product_id': product.id, 'quantity': Decimal(quantity), 'unit_price': Decimal('50')}],
+        user=user, transaction_currency='USD',
+    )
+    return SalesService.confirm_invoice(invoice.id, user)
+
+
+@pytest.mark.django_db
+class TestAverageCost:
+    """Test suite for moving-average cost updates."""
+
+    @pytest.fixture(autouse=True)
+    def setup_receipts(self, admin_user, supplier, warehouse, product):
+        self.user = admin_user
+        _receive(supplier, warehouse, product, admin_user, '10', '10', '1000000')
+        _receive(supplier, warehouse, product, admin_user, '30', '20', '2000000')
+
+    def test_receipts_blend_usd_and_syp_averages(self, product, warehouse):
+        stock = _stock(product, warehouse)
+        assert stock.quantity == Decimal('40')
+        assert stock.average_cost == Decimal('17.5000')
+        # 10 x 10,000,000 and 30 x 40,000,000 old pounds, each at its own rate
+        assert stock.average_cost_syp == Decimal('32500000.0000')
+
+    def test_history_is_recorded_per_receipt(self, product, warehouse):
+        history = AverageCostService.history(product.id, warehouse.id)
+        assert [(h.quantity_after, h.average_cost) for h in history] == [
+            (Decimal('40'), Decimal('17.5000')), (Decimal('10'), Decimal('10.0000'))
+        ]
+        assert all(h.movement.source_type == StockMovement.SourceType.PURCHASE for h in history)
+
+    def test_invoice_snapshots_average(self, customer, product, warehouse):
+        invoice = _sell(customer, warehouse, product, self.user, '4')
+        assert invoice.items.get().cost_price == Decimal('17.50')
+        # Stock leaving at the average does not move it
+        assert _stock(product, warehouse).average_cost == Decimal('17.5000')
+
+        syp_invoice = SalesService.create_invoice(
+            customer.id, warehouse.id, date.today(),
+            [{'product_id': product.id, 'quantity': Decimal('1'), 'unit_price': Decimal('100000000')}],
+            user=self.user, transaction_currency='SYP_OLD',
+        )
+        assert syp_invoice.items.get().cost_price == Decimal('26250000.00')
+
+    def test_explicit_cost_price_wins(self, customer, product, warehouse):
+        invoice = SalesService.create_invoice(
+            customer.id, warehouse.id, date.today(),
+            [{'product_id': product.id, 'quantity': Decimal('1'), 'unit_price': Decimal('50'),
+              'cost_price': Decimal('12.00')}],
+            user=self.user,
+        )
+        assert invoice.items.get().cost_price == Decimal('12.00')
+
+    def test_sales_return_moves_average(self, customer, supplier, product, warehouse):
+        invoice = _sell(customer, warehouse, product, self.user, '20')
+        # Newer, dearer stock arrives before the return
+        _receive(supplier, warehouse, product, self.user, '20', '25', '1500000')
+        assert _stock(product, warehouse).average_cost == Decimal('21.2500')
+
+        SalesService.create_sales_return(
+            invoice.id, date.today(),
+            [{'invoice_item_id': invoice.items.get().id, 'quantity': '10'}],
+            reason='damaged', user=self.user,
+        )
+        stock = _stock(product, warehouse)
+        assert stock.quantity == Decimal('50')
+        assert stock.average_cost == Decimal('20.5000')
+        latest = AverageCostService.history(product.id, warehouse.id, limit=1)[0]
+        assert latest.movement.source_type == StockMovement.SourceType.RETURN
+
+    def test_uncosted_movements_keep_average(self, product, warehouse):
+        InventoryService.add_stock(
+            product.id, warehouse.id, Decimal('10'), Decimal('0'), StockMovement.SourceType.ADJUSTMENT
+        )
+        stock = _stock(product, warehouse)
+        assert stock.average_cost == Decimal('17.5000')
+        assert AverageCostHistory.objects.filter(product=product).count() == 2
+
+    def test_average_lookup_is_one_query(self, product, warehouse):
+        with CaptureQueriesContext(connection) as ctx:
+            averages = AverageCostService.get_average_costs([product.id, product.id + 1000], warehouse.id)
+        assert len(ctx.captured_queries) == 1
+        assert averages == {product.id: Decimal('17.5000')}
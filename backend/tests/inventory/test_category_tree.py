@@ -0,0 +1,140 @@
+"""
+Tests for the cached category tree, paths and counts.
+"""
+import pytest
+from decimal import Decimal
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from apps.core.versioning import increment_version
+from apps.inventory.categories import CATALOG_VERSION_KEY, CategoryTreeService
+from apps.inventory.models import Category, Product
+
+CATEGORIES_URL = '/api/v1/inventory/categories/'
+
+
+@pytest.fixture
+def catalog(unit):
+    """Two roots, a three-level branch, an inactive child and products."""
+    food = Category.objects.create(name='Food', sort_order=2)
+    drinks = Category.objects.create(name='Drinks', sort_order=1)
+    juice = Category.objects.create(name='Juice', parent=drinks)
+    orange = Category.objects.create(name='Orange', parent=juice)
+    Category.objects.create(name='Hidden', parent=drinks, is_active=False)
+    for index in range(3):
+        Product.objects.create(
+            name=f'Juice {index}', category=juice, unit=unit,
+            cost_price=Decimal('1'), sale_price=Decimal('2')
+        )
+    Product.objects.create(
+        name='Old juice', category=juice, unit=unit,
+        cost_price=Decimal('1'), sale_price=Decimal('2'), is_active=False
+    )
+    return {'food': food, 'drinks': drinks, 'juice': juice, 'orange': orange}
+
+
+@pytest.mark.django_db
+class TestCategoryTree:
+    """Test suite for CategoryTreeService."""
+
+    def test_tree_shape_and_order(self, catalog):
+        tree = CategoryTreeService.tree()
+        assert [node['name'] for node in tree] == ['Drinks', 'Food']
+        drinks = tree[0]
+        assert [node['name'] for node in drinks['children']] == ['Juice']
+        assert [node['name'] for node in drinks['children'][0]['children']] == ['Orange']
+
+    def test_paths_and_counts(self, catalog):
+        assert CategoryTreeService.full_path(catalog['orange'].id) == 'Drinks > Juice > Orange'
+        assert catalog['orange'].full_path == 'Drinks > Juice > Orange'
+        assert CategoryTreeService.children_count(catalog['drinks'].id) == 1
+        assert CategoryTreeService.products_count(catalog['juice'].id) == 3
+        assert CategoryTreeService.products_count(catalog['food'].id) == 0
+
+    def test_built_once_then_served_from_cache(self, catalog):
+        with CaptureQueriesContext(connection) as built:
+            CategoryTreeService.tree()
+        # The version stamp, the categories and the product counts
+        assert len(built) == 3
+        with CaptureQueriesContext(connection) as cached:
+            CategoryTreeService.tree()
+            CategoryTreeService.full_path(catalog['orange'].id)
+        assert len(cached) == 0
+
+    def test_category_write_invalidates(self, catalog):
+        CategoryTreeService.tree()
+        catalog['juice'].name = 'Juices'
+        catalog['juice'].save()
+        assert CategoryTreeService.full_path(catalog['orange'].id) == 'Drinks > Juices > Orange'
+
+        catalog['orange'].soft_delete()
+        assert CategoryTreeService.children_count(catalog['juice'].id) == 0
+
+    def test_product_write_invalidates(self, catalog, unit):
+        assert CategoryTreeService.products_count(catalog['food'].id) == 0
+        Product.objects.create(
+            name='Bread', category=catalog['food'], unit=unit,
+            cost_price=Decimal('1'), sale_price=Decimal('2')
+        )
+        assert CategoryTreeService.products_count(catalog['food'].id) == 1
+
+    def test_product_write_outside_the_tree_keeps_it(self, catalog):
+        product = Product.objects.filter(category=catalog['juice']).first()
+        CategoryTreeService.tree()
+        product.sale_price = Decimal('3')
+        product.save()
+        with CaptureQueriesContext(connection) as cached:
+            CategoryTreeService.tree()
+        assert len(cached) == 0
+
+        product.category = catalog['food']
+        product.save()
+        assert CategoryTreeService.products_count(catalog['food'].id) == 1
+
+    def test_other_workers_rebuild_when_the_stamp_moves(self, catalog, settings):
+        settings.CATEGORY_TREE_CHECK_INTERVAL = 60
+        CategoryTreeService.tree()
+        # Another worker renamed the category and bumped the stamp
+        Category.objects.filter(pk=catalog['juice'].pk).update(name='Juices')
+        increment_version(CATALOG_VERSION_KEY)
+        assert CategoryTreeService.full_path(catalog['juice'].id) == 'Drinks > Juice'
+
+        settings.CATEGORY_TREE_CHECK_INTERVAL = 0
+        assert CategoryTreeService.full_path(catalog['juice'].id) == 'Drinks > Juices'
+
+    def test_parent_cycle_does_not_recurse(self, catalog):
+        Category.objects.filter(pk=catalog['drinks'].pk).update(parent=catalog['orange'])
+        CategoryTreeService.invalidate()
+        assert CategoryTreeService.full_path(catalog['orange'].id).endswith('Juice > Orange')
+        assert CategoryTreeService.tree() == [
+            {'id': catalog['food'].id, 'name': 'Food', 'name_en': None, 'children': []}
+        ]
+
+
+@pytest.mark.django_db
+class TestCategoryEndpoints:
+    """Test suite for the category list and tree endpoints."""
+
+    def test_tree_endpoint(self, admin_client, catalog):
+        response = admin_client.get(f'{CATEGORIES_URL}tree/')
+        assert response.status_code == 200
+        assert [node['name'] for node in response.data] == ['Drinks', 'Food']
+
+    def test_list_query_count_is_flat(self, admin_client, catalog):
+        admin_client.get(CATEGORIES_URL)
+        with CaptureQueriesContext(connection) as few:
+            response = admin_client.get(CATEGORIES_URL, {'parent': catalog['drinks'].id})
+        assert response.status_code == 200
+
+        for index in range(10):
+            Category.objects.create(name=f'Extra {index}', parent=catalog['drinks'])
+        admin_client.get(CATEGORIES_URL)
+        with CaptureQueriesContext(connection) as many:
+            response = admin_client.get(CATEGORIES_URL, {'parent': catalog['drinks'].id})
+        assert len(many) == len(few)
+
+        results = response.data['results'] if isinstance(response.data, dict) else response.data
+        juice = next(item for item in results if item['id'] == catalog['juice'].id)
+        assert juice['full_path'] == 'Drinks > Juice'
+        assert juice['products_count'] == 3
+        assert juice['children_count'] == 1
@@ -0,0 +1,137 @@
+"""
+Tests for the FIFO/LIFO cost layer engine.
+"""
+import pytest
+from datetime import timedelta
+from decimal import Decimal
+from django.utils import timezone
+
+from apps.inventory.costing import CostLayerService
+from apps.inventory.models import CostLayer, CostLayerConsumption, StockMovement
+from apps.inventory.services import InventoryService
+
+
+def _receive(product, warehouse, quantity, unit_cost):
+    return InventoryService.add_stock(
+        product.id, warehouse.id, Decimal(quantity), Decimal(unit_cost),
+        StockMovement.SourceType.PURCHASE,
+    )
+
+
+def _sell(product, warehouse, quantity):
+    return InventoryService.deduct_stock(
+        product.id, warehouse.id, Decimal(quantity), StockMovement.SourceType.SALE,
+    )
+
+
+def _snapshot():
+    layers = sorted(
+        CostLayer.objects.values_list('movement_id', 'quantity', 'unit_cost', 'remaining_fifo', 'remaining_lifo')
+    )
+    consumptions = sorted(
+        CostLayerConsumption.objects.values_list('movement_id', 'method', 'quantity', 'unit_cost')
+    )
+    return layers, consumptions
+
+
+@pytest.mark.django_db
+class TestCostLayers:
+    """Test suite for incremental cost layer maintenance."""
+
+    @pytest.fixture(autouse=True)
+    def setup_stock(self, product, warehouse):
+        self.product = product
+        self.warehouse = warehouse
+        _receive(product, warehouse, '10', '10')
+        _receive(product, warehouse, '10', '20')
+        _sell(product, warehouse, '15')
+
+    def test_inbound_movements_open_layers(self):
+        layers = list(CostLayer.objects.order_by('id'))
+        assert [l.quantity for l in layers] == [Decimal('10'), Decimal('10')]
+        assert [l.remaining_fifo for l in layers] == [Decimal('0'), Decimal('5')]
+        assert [l.remaining_lifo for l in layers] == [Decimal('5'), Decimal('0')]
+
+    def test_fifo_and_lifo_valuation(self):
+        fifo = InventoryService.get_stock_valuation(self.warehouse.id, 'fifo')
+        lifo = InventoryService.get_stock_valuation(self.warehouse.id, 'lifo')
+        assert fifo['total_value'] == Decimal('100')
+        assert lifo['total_value'] == Decimal('50')
+        assert fifo['items'][0]['unit_cost'] == Decimal('20')
+
+    def test_average_valuation_unchanged(self):
+        valuation = InventoryService.get_stock_valuation(self.warehouse.id, 'average')
+        assert valuation['total_value'] == Decimal('5') * self.product.cost_price
+
+    def test_cogs_per_method(self):
+        fifo = CostLayerService.get_cogs('fifo')
+        lifo = CostLayerService.get_cogs('lifo')
+        assert fifo['total_quantity'] == Decimal('15')
+        assert fifo['total_cost'] == Decimal('200')
+        assert lifo['total_cost'] == Decimal('250')
+        assert fifo['items'][0]['product_id'] == self.product.id
+
+    def test_cogs_date_range_is_half_open(self):
+        tomorrow = timezone.localdate() + timedelta(days=1)
+        assert CostLayerService.get_cogs('fifo', date_from=tomorrow)['total_cost'] == 0
+        assert CostLayerService.get_cogs('fifo', date_to=timezone.localdate())['total_cost'] == Decimal('200')
+
+    def test_shortfall_uses_fallback_cost(self):
+        # Stock older than the layers (e.g. before they existed) has no layer to consume
+        CostLayer.objects.update(remaining_fifo=0, remaining_lifo=0)
+        _sell(self.product, self.warehouse, '1')
+        shortfall = CostLayerConsumption.objects.filter(layer__isnull=True, method='fifo').get()
+        assert shortfall.quantity == Decimal('1')
+        assert shortfall.unit_cost == self.product.cost_price
+
+    def test_as_of_excludes_later_movements(self):
+        CostLayer.objects.update(received_at=timezone.now() - timedelta(days=3))
+        CostLayerConsumption.objects.update(consumed_at=timezone.now() - timedelta(days=1))
+        before_sale = timezone.localdate() - timedelta(days=2)
+        totals = CostLayerService.layer_totals('fifo', as_of=before_sale)
+        assert totals[(self.product.id, self.warehouse.id)] == (Decimal('20'), Decimal('300'))
+
+        valuation = InventoryService.get_stock_valuation(self.warehouse.id, 'lifo', as_of=timezone.localdate())
+        assert valuation['items'][0]['quantity'] == Decimal('5')
+        assert valuation['total_value'] == Decimal('50')
+
+    def test_rebuild_matches_incremental_layers(self):
+        InventoryService.adjust_stock(
+            self.product.id, self.warehouse.id, Decimal('3'), 'subtract', 'تالف'
+        )
+        _receive(self.product, self.warehouse, '4', '25')
+        _sell(self.product, self.warehouse, '5')
+        incremental = _snapshot()
+
+        counts = CostLayerService.rebuild()
+        assert counts['movements'] == 6
+        assert _snapshot() == incremental
+
+    def test_unsupported_method_rejected(self):
+        from apps.core.exceptions import ValidationException
+        with pytest.raises(ValidationException):
+            InventoryService.get_stock_valuation(method='hifo')
+
+
+@pytest.mark.django_db
+class TestCostLayerEndpoints:
+    """Test suite for the valuation and COGS endpoints."""
+
+    def test_valuation_and_cogs(self, admin_client, product, warehouse):
+        _receive(product, warehouse, '4', '10')
+        _receive(product, warehouse, '4', '30')
+        _sell(product, warehouse, '4')
+
+        response = admin_client.get('/api/v1/inventory/stock/valuation/', {'method': 'lifo'})
+        assert response.status_code == 200
+        assert Decimal(str(response.data['total_value'])) == Decimal('40')
+
+        response = admin_client.get('/api/v1/inventory/stock/cogs/', {
+            'method': 'fifo', 'date_from': timezone.localdate().isoformat(),
+        })
+        assert response.status_code == 200
+        assert Decimal(str(response.data['total_cost'])) == Decimal('40')
+
+    def test_invalid_date_rejected(self, admin_client):
+        response = admin_client.get('/api/v1/inventory/stock/cogs/', {'date_from': 'yesterday'})
+        assert response.status_code == 400
@@ -0,0 +1,130 @@
+"""
+Tests for sales velocity and reorder suggestions.
+"""
+import uuid
+import pytest
+from datetime import timedelta
+from decimal import Decimal
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from apps.core.exceptions import ValidationException
+from apps.inventory.models import Product, Stock, StockMovement
+from apps.inventory.replenishment import ReplenishmentService
+
+
+def _movement(product, warehouse, quantity, days_ago, source_type=StockMovement.SourceType.SALE, **fields):
+    movement = StockMovement.objects.create(
+        product=product, warehouse=warehouse,
+        movement_type=StockMovement.MovementType.OUT if source_type == StockMovement.SourceType.SALE
+        else StockMovement.MovementType.IN,
+        source_type=source_type, quantity=Decimal(quantity),
+        balance_before=Decimal('0'), balance_after=Decimal('0'), **fields
+    )
+    StockMovement.objects.filter(pk=movement.pk).update(created_at=timezone.now() - timedelta(days=days_ago))
+    return movement
+
+
+def _product(category, unit, **fields):
+    uid = uuid.uuid4().hex[:10]
+    return Product.objects.create(
+        name=f'Reorder {uid}', code=f'R{uid}', barcode=f'RB{uid}', category=category, unit=unit,
+        cost_price=Decimal('10.00'), sale_price=Decimal('15.00'), **fields
+    )
+
+
+@pytest.mark.django_db
+class TestSalesVelocity:
+    """Test suite for windowed sales velocity."""
+
+    def test_windows_and_blend(self, product, warehouse):
+        _movement(product, warehouse, '14', days_ago=2)
+        _movement(product, warehouse, '16', days_ago=20)
+        _movement(product, warehouse, '60', days_ago=60)
+        _movement(product, warehouse, '500', days_ago=120)  # outside every window
+
+        rates = ReplenishmentService.sales_velocity()[(product.id, warehouse.id)]
+        assert rates['7'] == Decimal('2.0000')
+        assert rates['30'] == Decimal('1.0000')
+        assert rates['90'] == Decimal('1.0000')
+        # 0.5 x 2 + 0.3 x 1 + 0.2 x 1
+        assert rates['daily'] == Decimal('1.5000')
+
+    def test_returns_and_cancellations_are_netted(self, product, warehouse):
+        _movement(product, warehouse, '70', days_ago=1)
+        _movement(product, warehouse, '7', days_ago=1, source_type=StockMovement.SourceType.RETURN)
+        _movement(product, warehouse, '7', days_ago=1, source_type=StockMovement.SourceType.ADJUSTMENT,
+                  reference_type='invoice_cancellation')
+        _movement(product, warehouse, '50', days_ago=1, source_type=StockMovement.SourceType.PURCHASE)
+
+        rates = ReplenishmentService.sales_velocity()[(product.id, warehouse.id)]
+        assert rates['7'] == Decimal('8.0000')
+
+
+@pytest.mark.django_db
+class TestReorderSuggestions:
+    """Test suite for reorder suggestions."""
+
+    def test_suggested_quantity_and_cover(self, category, unit, warehouse):
+        product = _product(category, unit, minimum_stock=Decimal('5'))
+        Stock.objects.create(product=product, warehouse=warehouse, quantity=Decimal('30'),
+                             reserved_quantity=Decimal('5'))
+        # 4 a day over every window
+        _movement(product, warehouse, '28', days_ago=1)
+        _movement(product, warehouse, '92', days_ago=10)
+        _movement(product, warehouse, '240', days_ago=60)
+
+        suggestion = ReplenishmentService.get_reorder_suggestions(lead_time_days=7, review_days=14)[0]
+        assert suggestion['product_id'] == product.id
+        assert suggestion['daily_velocity'] == Decimal('4.0000')
+        assert suggestion['available_stock'] == Decimal('25')
+        assert suggestion['days_of_cover'] == Decimal('6.3')
+        # Reorder level 4 x 7 + 5 = 33, target 33 + 4 x 14 = 89
+        assert suggestion['reorder_level'] == Decimal('33.00')
+        assert suggestion['suggested_quantity'] == Decimal('64')
+
+        # Quantities already on order count towards the position
+        suggestions = ReplenishmentService.get_reorder_suggestions(
+            lead_time_days=7, review_days=14, on_order={(product.id, warehouse.id): Decimal('5')}
+        )
+        assert suggestions[0]['suggested_quantity'] == Decimal('59')
+        suggestions = ReplenishmentService.get_reorder_suggestions(
+            lead_time_days=7, review_days=14, on_order={(product.id, warehouse.id): Decimal('10')}
+        )
+        assert suggestions == []
+
+    def test_static_levels_without_demand(self, category, unit, warehouse):
+        product = _product(category, unit, reorder_point=Decimal('10'), maximum_stock=Decimal('50'))
+        Stock.objects.create(product=product, warehouse=warehouse, quantity=Decimal('8'))
+        healthy = _product(category, unit, reorder_point=Decimal('10'))
+        Stock.objects.create(product=healthy, warehouse=warehouse, quantity=Decimal('40'))
+
+        suggestions = ReplenishmentService.get_reorder_suggestions(warehouse.id)
+        assert [(s['product_id'], s['suggested_quantity'], s['days_of_cover']) for s in suggestions] == [
+            (product.id, Decimal('42'), None)
+        ]
+        everything = ReplenishmentService.get_reorder_suggestions(warehouse.id, include_all=True)
+        assert {s['product_id'] for s in everything} == {product.id, healthy.id}
+
+    def test_query_count_does_not_grow_with_products(self, category, unit, warehouse):
+        def run():
+            with CaptureQueriesContext(connection) as ctx:
+                ReplenishmentService.get_reorder_suggestions(warehouse.id)
+            return len(ctx.captured_queries)
+
+        product = _product(category, unit, minimum_stock=Decimal('5'))
+        Stock.objects.create(product=product, warehouse=warehouse, quantity=Decimal('1'))
+        _movement(product, warehouse, '3', days_ago=1)
+        single = run()
+        for _ in range(10):
+            product = _product(category, unit, minimum_stock=Decimal('5'))
+            Stock.objects.create(product=product, warehouse=warehouse, quantity=Decimal('1'))
+            _movement(product, warehouse, '3', days_ago=1)
+        assert run() == single
+
+    def test_invalid_lead_time(self):
+        with pytest.raises(ValidationException):
+            ReplenishmentService.get_reorder_suggestions(lead_time_days='abc')
+        with pytest.raises(ValidationException):
+            ReplenishmentService.get_reorder_suggestions(review_days=1000)
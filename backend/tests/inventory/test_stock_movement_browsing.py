@@ -0,0 +1,134 @@
+"""
+Tests for stock movement date filters, cursor pagination and product lookup.
+"""
+import pytest
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+from django.utils import timezone
+
+from apps.inventory.models import Product, StockMovement
+from apps.inventory.services import InventoryService
+
+MOVEMENTS_URL = '/api/v1/inventory/movements/'
+
+
+@pytest.fixture
+def dated_movements(product, warehouse):
+    """One movement per day at 00:00, 12:00 and 23:59 on three consecutive days."""
+    base = timezone.localdate() - timedelta(days=5)
+    ids = []
+    for day in range(3):
+        for moment in (time(0, 0), time(12, 0), time(23, 59, 59)):
+            InventoryService.add_stock(
+                product.id, warehouse.id, Decimal('1'), Decimal('10'),
+                StockMovement.SourceType.PURCHASE
+            )
+            latest = StockMovement.objects.latest('id')
+            StockMovement.objects.filter(pk=latest.pk).update(
+                created_at=timezone.make_aware(datetime.combine(base + timedelta(days=day), moment))
+            )
+            ids.append(latest.pk)
+    return base, ids
+
+
+@pytest.mark.django_db
+class TestMovementDateFilters:
+    """Test suite for half-open date filtering."""
+
+    def test_date_range_includes_whole_days(self, admin_client, dated_movements):
+        base, ids = dated_movements
+        day2 = (base + timedelta(days=1)).isoformat()
+        response = admin_client.get(MOVEMENTS_URL, {'date_from': day2, 'date_to': day2})
+        assert response.status_code == 200
+        assert sorted(m['id'] for m in response.data['results']) == ids[3:6]
+
+    def test_open_ended_ranges(self, admin_client, dated_movements):
+        base, ids = dated_movements
+        response = admin_client.get(MOVEMENTS_URL, {'date_to': base.isoformat()})
+        assert response.data['count'] == 3
+        response = admin_client.get(MOVEMENTS_URL, {'date_from': (base + timedelta(days=2)).isoformat()})
+        assert response.data['count'] == 3
+
+    def test_datetime_bounds_are_half_open(self, admin_client, dated_movements):
+        base, ids = dated_movements
+        noon = timezone.make_aware(datetime.combine(base, time(12, 0)))
+        response = admin_client.get(MOVEMENTS_URL, {
+            'created_after': noon.isoformat(),
+            'created_before': (noon + timedelta(days=1)).isoformat(),
+        })
+        assert sorted(m['id'] for m in response.data['results']) == ids[1:4]
+
+
+@pytest.mark.django_db
+class TestMovementCursorPagination:
+    """Test suite for keyset pagination of movements."""
+
+    def test_walks_all_pages_newest_first(self, admin_client, dated_movements):
+        base, ids = dated_movements
+        seen = []
+        response = admin_client.get(MOVEMENTS_URL, {'pagination': 'cursor', 'page_size': 4})
+        while True:
+            assert response.status_code == 200
+            assert 'count' not in response.data
+            seen.extend(m['id'] for m in response.data['results'])
+            if not response.data['next']:
+                break
+            response = admin_client.get(response.data['next'])
+        assert seen == list(reversed(ids))
+
+    def test_ties_on_created_at_are_not_skipped(self, admin_client, product, warehouse):
+        moment = timezone.now() - timedelta(hours=1)
+        for _ in range(5):
+            InventoryService.add_stock(
+                product.id, warehouse.id, Decimal('1'), Decimal('10'),
+                StockMovement.SourceType.PURCHASE
+            )
+        StockMovement.objects.update(created_at=moment)
+
+        seen = []
+        response = admin_client.get(MOVEMENTS_URL, {'pagination': 'cursor', 'page_size': 2})
+        while True:
+            seen.extend(m['id'] for m in response.data['results'])
+            if not response.data['next']:
+                break
+            response = admin_client.get(response.data['next'])
+        assert sorted(seen) == sorted(StockMovement.objects.values_list('id', flat=True))
+        assert len(seen) == 5
+
+    def test_page_numbers_remain_default(self, admin_client, dated_movements):
+        response = admin_client.get(MOVEMENTS_URL, {'page_size': 4})
+        assert response.data['count'] == 9
+
+
+@pytest.mark.django_db
+class TestProductLookup:
+    """Test suite for the type-ahead product lookup."""
+
+    @pytest.fixture(autouse=True)
+    def setup_products(self, category, unit):
+        for code, name, barcode in (
+            ('TEA-1', 'Tea Green', '111'),
+            ('TEA-2', 'Tea Black', '222'),
+            ('COF-1', 'Coffee', '333'),
+        ):
+            Product.objects.create(code=code, name=name, barcode=barcode, category=category, unit=unit)
+
+    def test_prefix_matches_name_and_code(self, admin_client):
+        response = admin_client.get('/api/v1/inventory/products/lookup/', {'q': 'tea'})
+        assert response.status_code == 200
+        assert [p['name'] for p in response.data] == ['Tea Black', 'Tea Green']
+        assert set(response.data[0]) == {'id', 'code', 'name', 'barcode'}
+
+        response = admin_client.get('/api/v1/inventory/products/lookup/', {'q': 'COF'})
+        assert [p['code'] for p in response.data] == ['COF-1']
+
+    def test_exact_barcode_and_limit(self, admin_client):
+        response = admin_client.get('/api/v1/inventory/products/lookup/', {'q': '333'})
+        assert [p['code'] for p in response.data] == ['COF-1']
+
+        response = admin_client.get('/api/v1/inventory/products/lookup/', {'limit': 2})
+        assert len(response.data) == 2
+
+    def test_invalid_limit(self, admin_client):
+        response = admin_client.get('/api/v1/inventory/products/lookup/', {'limit': 'many'})
+        assert response.status_code == 400
@@ -0,0 +1,200 @@
+"""
+Tests for expiring stock reservations.
+"""
+import threading
+import time
+import pytest
+from datetime import date, timedelta
+from decimal import Decimal
+from django.db import connection
+from django.utils import timezone
+
+from apps.core.exceptions import DatabaseException, InsufficientStockException, ValidationException
+from apps.inventory.models import Stock, StockReservation
+from apps.inventory.reservations import INVOICE_RESERVATION, StockReservationService
+from apps.inventory.services import InventoryService
+from apps.sales.models import Invoice, InvoiceItem
+from apps.sales.services import SalesService
+
+ORDER = 'sales_order'
+
+
+@pytest.fixture
+def stock(product, warehouse):
+    return Stock.objects.create(product=product, warehouse=warehouse, quantity=Decimal('10'))
+
+
+def _reserved(stock):
+    stock.refresh_from_db()
+    return stock.reserved_quantity
+
+
+def _expire(*reservations):
+    StockReservation.objects.filter(pk__in=[r.pk for r in reservations]).update(
+        expires_at=timezone.now() - timedelta(seconds=1)
+    )
+
+
+@pytest.mark.django_db
+class TestStockReservations:
+    """Test suite for reserving, releasing and expiring holds."""
+
+    def test_reserve_release_and_consume(self, stock, product, warehouse):
+        reservation = StockReservationService.reserve(product.id, warehouse.id, Decimal('4'), ORDER, 1)
+        assert reservation.status == StockReservation.Status.ACTIVE
+        assert reservation.expires_at > timezone.now()
+        StockReservationService.reserve(product.id, warehouse.id, Decimal('3'), ORDER, 2)
+        assert _reserved(stock) == Decimal('7')
+
+        assert StockReservationService.release(ORDER, 1) == 1
+        assert StockReservationService.release(ORDER, 1) == 0
+        assert StockReservationService.consume(ORDER, 2) == 1
+        assert _reserved(stock) == Decimal('0')
+        assert sorted(StockReservation.objects.values_list('status', flat=True)) == ['consumed', 'released']
+
+    def test_reserving_again_resets_the_hold(self, stock, product, warehouse):
+        first = StockReservationService.reserve(product.id, warehouse.id, Decimal('4'), ORDER, 1)
+        again = StockReservationService.reserve(
+            product.id, warehouse.id, Decimal('6'), ORDER, 1, ttl=timedelta(hours=2)
+        )
+        assert again.pk == first.pk
+        assert again.expires_at > first.expires_at
+        assert _reserved(stock) == Decimal('6')
+
+        StockReservationService.reserve(product.id, warehouse.id, Decimal('2'), ORDER, 1)
+        assert _reserved(stock) == Decimal('2')
+        assert StockReservation.objects.count() == 1
+
+    def test_cannot_reserve_more_than_available(self, stock, product, warehouse):
+        StockReservationService.reserve(product.id, warehouse.id, Decimal('8'), ORDER, 1)
+        with pytest.raises(InsufficientStockException) as exc:
+            StockReservationService.reserve(product.id, warehouse.id, Decimal('3'), ORDER, 2)
+        assert exc.value.available == 2
+        assert _reserved(stock) == Decimal('8')
+        assert StockReservation.objects.count() == 1
+
+    def test_document_lines_are_all_or_nothing(self, stock, product, warehouse, category, unit):
+        lines = [{'product_id': product.id, 'quantity': '4'}, {'product_id': product.id, 'quantity': '4'}]
+        assert len(StockReservationService.reserve_document(warehouse.id, lines, ORDER, 1)) == 1
+        assert _reserved(stock) == Decimal('8')
+
+        lines.append({'product_id': product.id, 'quantity': '3'})
+        with pytest.raises(InsufficientStockException):
+            StockReservationService.reserve_document(warehouse.id, lines, ORDER, 2)
+        assert _reserved(stock) == Decimal('8')
+
+    def test_expired_holds_are_reclaimed_when_stock_is_short(self, stock, product, warehouse):
+        stale = StockReservationService.reserve(product.id, warehouse.id, Decimal('8'), ORDER, 1)
+        _expire(stale)
+        StockReservationService.reserve(product.id, warehouse.id, Decimal('5'), ORDER, 2)
+        stale.refresh_from_db()
+        assert stale.status == StockReservation.Status.EXPIRED
+        assert _reserved(stock) == Decimal('5')
+
+    def test_sweeper_releases_expired_holds_in_batches(self, stock, product, warehouse):
+        holds = [
+            StockReservationService.reserve(product.id, warehouse.id, Decimal('1'), ORDER, i)
+            for i in range(7)
+        ]
+        _expire(*holds[:5])
+        assert StockReservationService.sweep_expired(batch_size=2) == 5
+        assert _reserved(stock) == Decimal('2')
+        assert StockReservation.objects.filter(status=StockReservation.Status.EXPIRED).count() == 5
+        assert StockReservationService.sweep_expired() == 0
+        with pytest.raises(ValidationException):
+            StockReservationService.sweep_expired(batch_size=0)
+
+    def test_invalid_requests(self, stock, product, warehouse):
+        with pytest.raises(ValidationException):
+            StockReservationService.reserve(product.id, warehouse.id, Decimal('0'), ORDER, 1)
+        with pytest.raises(ValidationException):
+            StockReservationService.reserve(product.id, warehouse.id, Decimal('1'), ORDER, 1, ttl=timedelta(days=30))
+
+    def test_legacy_reserve_stock_is_conditional(self, stock, product, warehouse):
+        assert InventoryService.reserve_stock(product.id, warehouse.id, Decimal('10'))
+        with pytest.raises(InsufficientStockException):
+            InventoryService.reserve_stock(product.id, warehouse.id, Decimal('1'))
+        assert InventoryService.release_reserved_stock(product.id, warehouse.id, Decimal('15'))
+        assert _reserved(stock) == Decimal('0')
+
+    def test_confirming_an_invoice_consumes_its_holds(self, stock, product, warehouse, customer, admin_user):
+        invoice = Invoice.objects.create(
+            invoice_number='INV-HOLD-1', customer=customer, warehouse=warehouse,
+            invoice_date=date.today(), invoice_type=Invoice.InvoiceType.CASH,
+            transaction_currency='USD', status=Invoice.Status.DRAFT, created_by=admin_user
+        )
+        InvoiceItem.objects.create(
+            invoice=invoice, product=product, quantity=Decimal('6'),
+            unit_price=Decimal('150.00'), cost_price=Decimal('100.00'), created_by=admin_user
+        )
+        StockReservationService.reserve(product.id, warehouse.id, Decimal('6'), INVOICE_RESERVATION, invoice.id)
+        StockReservationService.reserve(product.id, warehouse.id, Decimal('4'), ORDER, 1)
+
+        SalesService.confirm_invoice(invoice.id, user=admin_user)
+
+        stock.refresh_from_db()
+        assert stock.quantity == Decimal('4')
+        assert stock.reserved_quantity == Decimal('4')
+        assert StockReservation.objects.get(reference_type=INVOICE_RESERVATION).status == StockReservation.Status.CONSUMED
+
+    def test_api(self, admin_client, stock, product, warehouse):
+        payload = {
+            'warehouse_id': warehouse.id, 'reference_type': ORDER, 'reference_id': 9, 'ttl_minutes': 5,
+            'items': [{'product_id': product.id, 'quantity': '6'}],
+        }
+        response = admin_client.post('/api/v1/inventory/reservations/', payload, format='json')
+        assert response.status_code == 201
+        assert response.data[0]['status'] == 'active'
+
+        payload['reference_id'] = 10
+        response = admin_client.post('/api/v1/inventory/reservations/', payload, format='json')
+        assert response.status_code == 400
+
+        response = admin_client.get('/api/v1/inventory/reservations/', {'reference_id': 9})
+        assert response.status_code == 200
+
+        response = admin_client.post(
+            '/api/v1/inventory/reservations/release/', {'reference_type': ORDER, 'reference_id': 9}, format='json'
+        )
+        assert response.data == {'released': 1}
+        assert _reserved(stock) == Decimal('0')
+
+
+@pytest.mark.django_db(transaction=True)
+class TestConcurrentReservations:
+    """Threads reserving the same product never hold more than is on hand."""
+
+    THREADS = 8
+
+    def test_parallel_reservations_of_one_sku(self, stock, product, warehouse):
+        barrier = threading.Barrier(self.THREADS)
+        outcomes = []
+
+        def reserve(document_id):
+            try:
+                barrier.wait()
+                for _ in range(50):
+                    try:
+                        StockReservationService.reserve(product.id, warehouse.id, Decimal('3'), ORDER, document_id)
+                        outcomes.append('reserved')
+                        return
+                    except InsufficientStockException:
+                        outcomes.append('refused')
+                        return
+                    except DatabaseException:
+                        # SQLite's shared-cache test database refuses concurrent
+                        # writers instead of queueing them
+                        time.sleep(0.01)
+                outcomes.append('gave up')
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=reserve, args=(i,)) for i in range(self.THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert sorted(outcomes) == ['refused'] * 5 + ['reserved'] * 3
+        assert _reserved(stock) == Decimal('9')
+        assert StockReservation.objects.filter(status=StockReservation.Status.ACTIVE).count() == 3
@@ -0,0 +1,136 @@
+"""
+Tests for point-in-time stock snapshots.
+"""
+import pytest
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from django.core.management import call_command
+from django.utils import timezone
+
+from apps.core.exceptions import ValidationException
+from apps.inventory.models import StockMovement, StockSnapshot
+from apps.inventory.services import InventoryService
+from apps.inventory.snapshots import StockSnapshotService, month_ends
+from apps.reports.services import ReportService
+
+
+def _at(day: date) -> datetime:
+    return timezone.make_aware(datetime.combine(day, time(12, 0)))
+
+
+@pytest.mark.django_db
+class TestStockAsOf:
+    """Test suite for stock_as_of and snapshots."""
+
+    @pytest.fixture(autouse=True)
+    def setup_history(self, product, warehouse):
+        """Movements on three past days: +10, -4, +6."""
+        self.product = product
+        self.warehouse = warehouse
+        self.key = (product.id, warehouse.id)
+        today = timezone.localdate()
+        self.day1, self.day2, self.day3 = (today - timedelta(days=n) for n in (30, 20, 10))
+
+        for day, change in ((self.day1, 'in'), (self.day2, 'out'), (self.day3, 'in')):
+            if change == 'in':
+                quantity = Decimal('10') if day == self.day1 else Decimal('6')
+                InventoryService.add_stock(
+                    product.id, warehouse.id, quantity, Decimal('5'), StockMovement.SourceType.PURCHASE
+                )
+            else:
+                InventoryService.deduct_stock(
+                    product.id, warehouse.id, Decimal('4'), StockMovement.SourceType.SALE
+                )
+            StockMovement.objects.filter(pk=StockMovement.objects.latest('id').pk).update(
+                created_at=_at(day)
+            )
+
+    def test_without_snapshots_sums_history(self):
+        assert StockSnapshotService.stock_as_of(self.day1 - timedelta(days=1)) == {}
+        assert StockSnapshotService.stock_as_of(self.day1)[self.key] == Decimal('10')
+        assert StockSnapshotService.stock_as_of(self.day2)[self.key] == Decimal('6')
+        assert StockSnapshotService.stock_as_of(timezone.localdate())[self.key] == Decimal('12')
+
+    def test_take_snapshot_stores_quantities(self):
+        rows = StockSnapshotService.take_snapshot(self.day2)
+        assert rows == 1
+        snapshot = StockSnapshot.objects.get(snapshot_date=self.day2)
+        assert snapshot.quantity == Decimal('6')
+
+        # Taking the same date again replaces the rows
+        StockSnapshotService.take_snapshot(self.day2)
+        assert StockSnapshot.objects.filter(snapshot_date=self.day2).count() == 1
+
+    def test_snapshot_plus_movement_delta(self):
+        StockSnapshotService.take_snapshot(self.day2)
+        # Tampering with the snapshot proves it is used instead of the history
+        StockSnapshot.objects.update(quantity=Decimal('100'))
+        assert StockSnapshotService.stock_as_of(self.day2 + timedelta(days=1))[self.key] == Decimal('100')
+        assert StockSnapshotService.stock_as_of(self.day3)[self.key] == Decimal('106')
+
+    def test_later_snapshot_subtracts_movements(self):
+        StockSnapshotService.take_snapshot(self.day3)
+        assert StockSnapshotService.nearest_snapshot_date(self.day2) == self.day3
+        assert StockSnapshotService.stock_as_of(self.day2)[self.key] == Decimal('6')
+        assert StockSnapshotService.stock_as_of(self.day1)[self.key] == Decimal('10')
+
+    def test_warehouse_filter(self, warehouse):
+        assert StockSnapshotService.stock_as_of(self.day3, warehouse_id=warehouse.id + 1000) == {}
+
+    def test_open_day_rejected(self):
+        with pytest.raises(ValidationException):
+            StockSnapshotService.take_snapshot(timezone.localdate())
+
+    def test_valuation_as_of_uses_snapshot_quantities(self):
+        valuation = InventoryService.get_stock_valuation(method='average', as_of=self.day2)
+        assert valuation['items'][0]['quantity'] == Decimal('6')
+        assert valuation['total_value'] == Decimal('6') * self.product.cost_price
+
+    def test_inventory_report_as_of(self):
+        report = ReportService.get_inventory_report(as_of=self.day1)
+        assert report['total_value'] == Decimal('10') * self.product.cost_price
+
+    def test_month_end_backfill_command(self):
+        call_command('take_stock_snapshot', '--month-ends-from', self.day1.isoformat(), stdout=None)
+        expected = month_ends(self.day1, timezone.localdate() - timedelta(days=1))
+        assert sorted(set(StockSnapshot.objects.values_list('snapshot_date', flat=True))) == [
+            d for d in expected if d >= self.day1
+        ]
+
+
+def test_month_ends():
+    assert month_ends(date(2025, 11, 15), date(2026, 2, 28)) == [
+        date(2025, 11, 30), date(2025, 12, 31), date(2026, 1, 31), date(2026, 2, 28)
+    ]
+
+
+@pytest.mark.django_db
+class TestStockAsOfEndpoints:
+    """Test suite for the as-of and snapshot endpoints."""
+
+    def test_as_of_endpoint(self, admin_client, product, warehouse):
+        InventoryService.add_stock(
+            product.id, warehouse.id, Decimal('7'), Decimal('5'), StockMovement.SourceType.PURCHASE
+        )
+        response = admin_client.get('/api/v1/inventory/stock/as-of/', {'date': timezone.localdate().isoformat()})
+        assert response.status_code == 200
+        assert response.data['items'][0]['quantity'] == Decimal('7')
+        assert response.data['items'][0]['warehouse_name'] == warehouse.name
+
+    def test_as_of_requires_date(self, admin_client):
+        response = admin_client.get('/api/v1/inventory/stock/as-of/')
+        assert response.status_code == 400
+
+    def test_snapshot_job(self, admin_client, product, warehouse):
+        InventoryService.add_stock(
+            product.id, warehouse.id, Decimal('3'), Decimal('5'), StockMovement.SourceType.PURCHASE
+        )
+        StockMovement.objects.update(created_at=timezone.now() - timedelta(days=2))
+        response = admin_client.post('/api/v1/inventory/stock/snapshots/', {}, format='json')
+        assert response.status_code == 202
+        assert response.data['status'] == 'succeeded'
+        assert StockSnapshot.objects.get().quantity == Decimal('3')
+
+    def test_snapshot_requires_admin(self, manager_client):
+        response = manager_client.post('/api/v1/inventory/stock/snapshots/', {}, format='json')
+        assert response.status_code == 403
@@ -0,0 +1,135 @@
+"""
+Tests for the cached product unit graphs used for base-quantity conversion.
+"""
+import pytest
+from datetime import date
+from decimal import Decimal
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from apps.core.backup import BackupEngine, backup_restored
+from apps.core.settings_models import DailyExchangeRate
+from apps.core.versioning import increment_version
+from apps.inventory.models import ProductUnit, Stock, Unit
+from apps.inventory.units import UNIT_VERSION_KEY, UnitConversionService
+from apps.sales.models import Invoice, InvoiceItem
+from apps.sales.services import SalesService
+
+
+@pytest.fixture
+def box(db):
+    return Unit.objects.create(name='Box', name_en='Box', symbol='BX')
+
+
+@pytest.fixture
+def units(product, unit, box):
+    base = ProductUnit.objects.create(
+        product=product, unit=unit, conversion_factor=Decimal('1'), is_base_unit=True,
+        sale_price=Decimal('150.00'), barcode='PU-1'
+    )
+    boxed = ProductUnit.objects.create(
+        product=product, unit=box, conversion_factor=Decimal('12'),
+        sale_price=Decimal('1700.00'), barcode='PU-12'
+    )
+    return base, boxed
+
+
+@pytest.mark.django_db
+class TestUnitConversionService:
+    """Test suite for UnitConversionService."""
+
+    def test_converts_with_line_unit_or_base_unit(self, product, units):
+        base, boxed = units
+        assert UnitConversionService.to_base(product.id, Decimal('2'), boxed.id) == Decimal('24')
+        assert UnitConversionService.to_base(product.id, Decimal('2')) == Decimal('2')
+        assert UnitConversionService.base_unit(product.id).id == base.id
+        assert UnitConversionService.graph(product.id).by_barcode('PU-12').id == boxed.id
+
+    def test_without_units_quantity_is_unchanged(self, product):
+        assert UnitConversionService.to_base(product.id, Decimal('3.5')) == Decimal('3.5')
+
+    def test_unknown_unit_raises(self, product):
+        with pytest.raises(ProductUnit.DoesNotExist):
+            UnitConversionService.to_base(product.id, Decimal('1'), 999999)
+
+    def test_no_queries_after_warm_up(self, product, units, django_assert_num_queries):
+        base, boxed = units
+        # The version stamp and the units
+        with django_assert_num_queries(2):
+            UnitConversionService.prefetch([product.id])
+        with django_assert_num_queries(0):
+            UnitConversionService.to_base(product.id, Decimal('1'), boxed.id)
+            UnitConversionService.to_base(product.id, Decimal('1'))
+
+    def test_save_and_delete_invalidate(self, product, units):
+        base, boxed = units
+        UnitConversionService.prefetch([product.id])
+
+        boxed.conversion_factor = Decimal('6')
+        boxed.save()
+        assert UnitConversionService.to_base(product.id, Decimal('2'), boxed.id) == Decimal('12')
+
+        base.delete()
+        assert UnitConversionService.base_unit(product.id) is None
+
+    def test_restore_clears_cache(self, product, units):
+        UnitConversionService.prefetch([product.id])
+        ProductUnit.objects.filter(product=product).update(conversion_factor=Decimal('5'))
+        backup_restored.send(sender=BackupEngine)
+        assert UnitConversionService.to_base(product.id, Decimal('1'), units[1].id) == Decimal('5')
+
+    def test_other_workers_reload_when_the_stamp_moves(self, product, units, settings):
+        settings.UNIT_CACHE_CHECK_INTERVAL = 60
+        UnitConversionService.prefetch([product.id])
+        # Another worker changed the factor and bumped the stamp
+        ProductUnit.objects.filter(pk=units[1].pk).update(conversion_factor=Decimal('5'))
+        increment_version(UNIT_VERSION_KEY)
+        assert UnitConversionService.to_base(product.id, Decimal('1'), units[1].id) == Decimal('12')
+
+        settings.UNIT_CACHE_CHECK_INTERVAL = 0
+        assert UnitConversionService.to_base(product.id, Decimal('1'), units[1].id) == Decimal('5')
+
+    def test_least_recently_used_graphs_are_evicted(self, product, units, monkeypatch,
+                                                    django_assert_num_queries):
+        monkeypatch.setattr('apps.inventory.units.UNIT_CACHE_MAX_PRODUCTS', 2)
+        UnitConversionService.clear()
+        other, newest = product.id + 1000, product.id + 2000
+        UnitConversionService.prefetch([product.id])
+        UnitConversionService.prefetch([other])
+        UnitConversionService.graph(product.id)
+
+        graphs = UnitConversionService.prefetch([newest])
+        assert graphs[newest].units == {}
+        with django_assert_num_queries(0):
+            assert UnitConversionService.base_unit(product.id).id == units[0].id
+        with django_assert_num_queries(1):
+            assert UnitConversionService.prefetch([other, newest])[other].units == {}
+
+
+@pytest.mark.django_db
+def test_confirm_invoice_reads_units_once(admin_user, customer, warehouse, product, units):
+    DailyExchangeRate.objects.create(
+        rate_date=date.today(), usd_to_syp_old=Decimal('1500000'), usd_to_syp_new=Decimal('15000')
+    )
+    Stock.objects.create(product=product, warehouse=warehouse, quantity=Decimal('100'))
+    invoice = Invoice.objects.create(
+        invoice_number='INV-UNITS-1', customer=customer, warehouse=warehouse,
+        invoice_date=date.today(), invoice_type=Invoice.InvoiceType.CREDIT,
+        status=Invoice.Status.DRAFT, created_by=admin_user
+    )
+    for product_unit, quantity in ((units[1], Decimal('2')), (None, Decimal('3')), (units[1], Decimal('1'))):
+        InvoiceItem.objects.create(
+            invoice=invoice, product=product, product_unit=product_unit, quantity=quantity,
+            unit_price=Decimal('150.00'), cost_price=Decimal('100.00'), created_by=admin_user
+        )
+    invoice.calculate_totals()
+
+    with CaptureQueriesContext(connection) as ctx:
+        SalesService.confirm_invoice(invoice.id, user=admin_user)
+
+    unit_queries = [q for q in ctx.captured_queries if 'inventory_productunit' in q['sql']]
+    assert len(unit_queries) == 1
+    assert sorted(invoice.items.values_list('base_quantity', flat=True)) == [
+        Decimal('3'), Decimal('12'), Decimal('24')
+    ]
+    assert Stock.objects.get(product=product, warehouse=warehouse).quantity == Decimal('61')
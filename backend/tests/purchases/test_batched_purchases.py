@@ -0,0 +1,130 @@
+"""
+Tests for the batched create_purchase_order and receive_goods.
+"""
+import uuid
+import pytest
+from datetime import date
+from decimal import Decimal
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from apps.core.exceptions import NotFoundException, ValidationException
+from apps.inventory.models import CostLayer, Product, Stock, StockMovement
+from apps.inventory.units import UnitConversionService
+from apps.purchases.models import GRNItem, PurchaseOrder, PurchaseOrderItem
+from apps.purchases.services import PurchaseService
+
+FX = {'usd_to_syp_old_snapshot': Decimal('1500000'), 'usd_to_syp_new_snapshot': Decimal('15000')}
+
+
+def _products(count, category, unit):
+    products = []
+    for _ in range(count):
+        uid = uuid.uuid4().hex[:10]
+        products.append(Product.objects.create(
+            name=f'Bulk {uid}', code=f'P{uid}', barcode=f'PB{uid}',
+            category=category, unit=unit, cost_price=Decimal('10.00'), sale_price=Decimal('15.00')
+        ))
+    return products
+
+
+def _lines(products, quantity='10'):
+    return [{'product_id': p.id, 'quantity': quantity, 'unit_price': Decimal('10.00')} for p in products]
+
+
+def _order(supplier, warehouse, products, user, quantity='10'):
+    po = PurchaseService.create_purchase_order(
+        supplier.id, warehouse.id, date.today(), _lines(products, quantity), user=user, **FX
+    )
+    return PurchaseService.approve_purchase_order(po.id, user)
+
+
+def _receive_all(po, user, quantity='10'):
+    items = [{'po_item_id': item.id, 'quantity': quantity} for item in po.items.all()]
+    return lambda: PurchaseService.receive_goods(po.id, date.today(), items, user=user)
+
+
+def _count_queries(func):
+    with CaptureQueriesContext(connection) as ctx:
+        func()
+    return len(ctx.captured_queries)
+
+
+@pytest.mark.django_db
+class TestBatchedPurchaseOrder:
+    """Test suite for create_purchase_order bulk writes."""
+
+    def test_query_count_does_not_grow_with_lines(self, admin_user, supplier, warehouse, category, unit):
+        small, large = _products(1, category, unit), _products(8, category, unit)
+
+        def create(products):
+            return lambda: PurchaseService.create_purchase_order(
+                supplier.id, warehouse.id, date.today(), _lines(products), user=admin_user, **FX
+            )
+
+        # Read the unit cache's version stamp up front; it is re-read on a timer, not per order
+        UnitConversionService.prefetch([])
+        assert _count_queries(create(large)) == _count_queries(create(small))
+
+    def test_lines_and_totals(self, admin_user, supplier, warehouse, category, unit):
+        po = _order(supplier, warehouse, _products(3, category, unit), admin_user)
+        assert po.items.count() == 3
+        assert all(item.base_quantity == Decimal('10') for item in po.items.all())
+        assert po.total_amount == Decimal('300.00')
+
+
+@pytest.mark.django_db
+class TestBatchedReceiveGoods:
+    """Test suite for receive_goods bulk writes."""
+
+    def test_query_count_does_not_grow_with_lines(self, admin_user, supplier, warehouse, category, unit):
+        small = _order(supplier, warehouse, _products(1, category, unit), admin_user)
+        large = _order(supplier, warehouse, _products(8, category, unit), admin_user)
+        assert _count_queries(_receive_all(large, admin_user)) == _count_queries(_receive_all(small, admin_user))
+
+    def test_stock_items_status_and_balance(self, admin_user, supplier, warehouse, category, unit):
+        products = _products(2, category, unit)
+        po = _order(supplier, warehouse, products, admin_user)
+
+        grn = _receive_all(po, admin_user, quantity='4')()
+        po.refresh_from_db()
+        assert po.status == PurchaseOrder.Status.PARTIAL
+        assert GRNItem.objects.filter(grn=grn).count() == 2
+        assert set(PurchaseOrderItem.objects.filter(purchase_order=po).values_list(
+            'received_quantity', flat=True)) == {Decimal('4')}
+
+        _receive_all(po, admin_user, quantity='6')()
+        po.refresh_from_db()
+        assert po.status == PurchaseOrder.Status.RECEIVED
+        for product in products:
+            assert Stock.objects.get(product=product, warehouse=warehouse).quantity == Decimal('10')
+        movements = StockMovement.objects.filter(reference_type='GRN', source_type=StockMovement.SourceType.PURCHASE)
+        assert movements.count() == 4
+        assert CostLayer.objects.filter(movement__in=movements).count() == 4
+        supplier.refresh_from_db()
+        assert supplier.current_balance_usd == Decimal('200.00')
+
+    def test_repeated_line_is_checked_against_running_total(self, admin_user, supplier, warehouse, category, unit):
+        product = _products(1, category, unit)[0]
+        po = _order(supplier, warehouse, [product], admin_user)
+        po_item = po.items.get()
+
+        lines = [{'po_item_id': po_item.id, 'quantity': '6'}, {'po_item_id': po_item.id, 'quantity': '6'}]
+        with pytest.raises(ValidationException):
+            PurchaseService.receive_goods(po.id, date.today(), lines, user=admin_user)
+        assert not Stock.objects.filter(product=product).exists()
+
+        lines[1]['quantity'] = '4'
+        PurchaseService.receive_goods(po.id, date.today(), lines, user=admin_user)
+        movements = StockMovement.objects.filter(product=product).order_by('id')
+        assert [(m.balance_before, m.balance_after) for m in movements] == [
+            (Decimal('0'), Decimal('6')), (Decimal('6'), Decimal('10'))
+        ]
+
+    def test_line_of_another_order(self, admin_user, supplier, warehouse, category, unit):
+        po = _order(supplier, warehouse, _products(1, category, unit), admin_user)
+        other = _order(supplier, warehouse, _products(1, category, unit), admin_user)
+        with pytest.raises(NotFoundException):
+            PurchaseService.receive_goods(
+                po.id, date.today(), [{'po_item_id': other.items.get().id, 'quantity': '1'}], user=admin_user
+            )
@@ -0,0 +1,119 @@
+"""
+Tests for reorder suggestions net of open orders and drafted purchase orders.
+"""
+import uuid
+import pytest
+from datetime import date, timedelta
+from decimal import Decimal
+from django.utils import timezone
+
+from apps.inventory.models import Product, Stock, StockMovement
+from apps.purchases.models import PurchaseOrder, Supplier
+from apps.purchases.services import PurchaseService
+
+FX = {'usd_to_syp_old_snapshot': Decimal('1500000'), 'usd_to_syp_new_snapshot': Decimal('15000')}
+
+
+pytestmark = pytest.mark.usefixtures('exchange_rate')
+
+
+def _selling_product(category, unit, warehouse, on_hand='10'):
+    """A product selling 10 a day with ``on_hand`` in stock."""
+    uid = uuid.uuid4().hex[:10]
+    product = Product.objects.create(
+        name=f'Reorder {uid}', code=f'R{uid}', barcode=f'RB{uid}', category=category, unit=unit,
+        cost_price=Decimal('9.00'), sale_price=Decimal('15.00')
+    )
+    Stock.objects.create(product=product, warehouse=warehouse, quantity=Decimal(on_hand))
+    for quantity, days_ago in (('70', 1), ('230', 10), ('600', 60)):
+        movement = StockMovement.objects.create(
+            product=product, warehouse=warehouse, movement_type=StockMovement.MovementType.OUT,
+            source_type=StockMovement.SourceType.SALE, quantity=Decimal(quantity),
+            balance_before=Decimal('0'), balance_after=Decimal('0')
+        )
+        StockMovement.objects.filter(pk=movement.pk).update(created_at=timezone.now() - timedelta(days=days_ago))
+    return product
+
+
+def _order(supplier, warehouse, product, quantity, unit_price, user):
+    return PurchaseService.create_purchase_order(
+        supplier.id, warehouse.id, date.today(),
+        [{'product_id': product.id, 'quantity': quantity, 'unit_price': Decimal(unit_price)}],
+        user=user, **FX
+    )
+
+
+@pytest.mark.django_db
+class TestReorderPurchaseOrders:
+    """Test suite for on-order quantities and drafted reorder purchase orders."""
+
+    def test_open_orders_count_as_on_order(self, admin_user, supplier, warehouse, category, unit):
+        product = _selling_product(category, unit, warehouse)
+        po = PurchaseService.approve_purchase_order(_order(supplier, warehouse, product, '100', '8', admin_user).id)
+        PurchaseService.receive_goods(
+            po.id, date.today(), [{'po_item_id': po.items.get().id, 'quantity': '40'}], user=admin_user
+        )
+        cancelled = _order(supplier, warehouse, product, '500', '8', admin_user)
+        PurchaseOrder.objects.filter(pk=cancelled.pk).update(status=PurchaseOrder.Status.CANCELLED)
+
+        assert PurchaseService.get_on_order_quantities(warehouse.id) == {(product.id, warehouse.id): Decimal('60')}
+        suggestion = PurchaseService.get_reorder_suggestions(warehouse.id, include_all=True)[0]
+        assert suggestion['on_order'] == Decimal('60')
+        assert suggestion['available_stock'] == Decimal('50')
+        # 50 available and 60 on order are above the reorder level of 70
+        assert suggestion['suggested_quantity'] == Decimal('0')
+
+    def test_drafts_one_order_per_supplier(self, admin_user, supplier, warehouse, category, unit):
+        other = Supplier.objects.create(name='Other Supplier', phone='5550001')
+        first, second, third = (_selling_product(category, unit, warehouse) for _ in range(3))
+        never_bought = _selling_product(category, unit, warehouse)
+        for product, vendor, price in ((first, supplier, '8'), (second, supplier, '6'), (third, other, '4')):
+            po = _order(vendor, warehouse, product, '1', price, admin_user)
+            PurchaseOrder.objects.filter(pk=po.pk).update(status=PurchaseOrder.Status.RECEIVED)
+        # The latest order decides the supplier and the price
+        po = _order(other, warehouse, second, '1', '7', admin_user)
+        PurchaseOrder.objects.filter(pk=po.pk).update(status=PurchaseOrder.Status.RECEIVED)
+
+        result = PurchaseService.draft_reorder_purchase_orders(warehouse.id, user=admin_user)
+
+        assert [s['product_id'] for s in result['unassigned']] == [never_bought.id]
+        orders = {po.supplier_id: po for po in result['orders']}
+        assert set(orders) == {supplier.id, other.id}
+        assert all(po.status == PurchaseOrder.Status.DRAFT for po in orders.values())
+        lines = {
+            item.product_id: (item.quantity, item.unit_price)
+            for po in orders.values() for item in po.items.all()
+        }
+        # 10 a day: reorder level 70, target 70 + 140 = 210, 10 on hand
+        assert lines == {
+            first.id: (Decimal('200'), Decimal('8.00')),
+            second.id: (Decimal('200'), Decimal('7.00')),
+            third.id: (Decimal('200'), Decimal('4.00')),
+        }
+
+        # The drafts are on order, so a second run drafts nothing more
+        again = PurchaseService.draft_reorder_purchase_orders(warehouse.id, user=admin_user)
+        assert again['orders'] == []
+
+    def test_api(self, admin_client, supplier, warehouse, category, unit, admin_user):
+        product = _selling_product(category, unit, warehouse)
+        po = _order(supplier, warehouse, product, '1', '5', admin_user)
+        PurchaseOrder.objects.filter(pk=po.pk).update(status=PurchaseOrder.Status.RECEIVED)
+
+        response = admin_client.get(
+            '/api/v1/purchases/orders/reorder-suggestions/', {'warehouse': warehouse.id, 'lead_time_days': 3}
+        )
+        assert response.status_code == 200
+        assert response.data['item_count'] == 1
+        assert response.data['items'][0]['suggested_quantity'] == Decimal('160')
+
+        response = admin_client.post(
+            '/api/v1/purchases/orders/draft-reorder/',
+            {'warehouse': warehouse.id, 'products': [product.id]}, format='json'
+        )
+        assert response.status_code == 201
+        assert len(response.data['orders']) == 1
+        assert response.data['orders'][0]['supplier'] == supplier.id
+
+        response = admin_client.post('/api/v1/purchases/orders/draft-reorder/', {}, format='json')
+        assert response.status_code == 400
@@ -0,0 +1,135 @@
+"""
+Tests for streamed report exports (?format=xlsx|csv|pdf).
+"""
+import io
+import pytest
+from decimal import Decimal
+from rest_framework import status
+from openpyxl import load_workbook
+
+from apps.sales.models import Invoice
+from apps.inventory.models import Stock
+from apps.expenses.models import Expense
+from apps.reports.exports import ReportExportService
+
+
+def _content(response) -> bytes:
+    return b''.join(response.streaming_content)
+
+
+@pytest.mark.django_db
+class TestReportExports:
+    """Test suite for report export endpoints."""
+    
+    @pytest.fixture(autouse=True)
+    def setup_data(self, customer, warehouse, product, expense_category, today):
+        """Setup test data."""
+        self.today = today
+        for total in (Decimal('100.00'), Decimal('250.50')):
+            Invoice.objects.create(
+                customer=customer,
+                warehouse=warehouse,
+                invoice_date=today,
+                status=Invoice.Status.CONFIRMED,
+                total_amount=total
+            )
+        Invoice.objects.create(
+            customer=customer,
+            warehouse=warehouse,
+            invoice_date=today,
+            status=Invoice.Status.DRAFT,
+            total_amount=Decimal('999.00')
+        )
+        Stock.objects.create(product=product, warehouse=warehouse, quantity=Decimal('4'))
+        Expense.objects.create(
+            category=expense_category,
+            expense_date=today,
+            amount=Decimal('75.00'),
+            description='Paper',
+            is_approved=True
+        )
+    
+    def _sales_url(self, fmt):
+        return f'/api/v1/reports/sales/?start_date={self.today}&end_date={self.today}&format={fmt}'
+    
+    def test_requires_authentication(self, api_client):
+        response = api_client.get(self._sales_url('csv'))
+        assert response.status_code in (status.HTTP_401_UNAUTHORIZED, status.HTTP_403_FORBIDDEN)
+    
+    def test_sales_csv_streams_confirmed_invoices(self, admin_client):
+        response = admin_client.get(self._sales_url('csv'))
+        
+        assert response.status_code == status.HTTP_200_OK
+        assert response.streaming
+        assert response['Content-Type'].startswith('text/csv')
+        assert 'attachment' in response['Content-Disposition']
+        lines = _content(response).decode('utf-8-sig').splitlines()
+        assert lines[0].split(',')[0] == 'رقم الفاتورة'
+        assert len(lines) == 3
+        assert lines[2].split(',')[4] == '250.5'
+    
+    def test_sales_xlsx(self, admin_client):
+        response = admin_client.get(self._sales_url('xlsx'))
+        
+        assert response.status_code == status.HTTP_200_OK
+        ws = load_workbook(io.BytesIO(_content(response))).active
+        values = [row for row in ws.iter_rows(values_only=True)]
+        assert values[0][0] == 'تقرير المبيعات'
+        header_idx = next(i for i, row in enumerate(values) if row[0] == 'رقم الفاتورة')
+        data = values[header_idx + 1:]
+        assert len(data) == 2
+        assert data[1][4] == 250.5
+    
+    def test_sales_pdf(self, admin_client):
+        response = admin_client.get(self._sales_url('pdf'))
+        
+        assert response.status_code == status.HTTP_200_OK
+        assert response['Content-Type'] == 'application/pdf'
+        assert _content(response).startswith(b'%PDF')
+    
+    def test_inventory_csv_includes_value(self, admin_client):
+        response = admin_client.get('/api/v1/reports/inventory/?format=csv')
+        
+        assert response.status_code == status.HTTP_200_OK
+        lines = _content(response).decode('utf-8-sig').splitlines()
+        assert len(lines) == 2
+        assert lines[1].split(',')[-1] == '400.0'
+    
+    def test_expenses_csv(self, admin_client):
+        response = admin_client.get('/api/v1/reports/expenses/?format=csv')
+        
+        assert response.status_code == status.HTTP_200_OK
+        lines = _content(response).decode('utf-8-sig').splitlines()
+        assert len(lines) == 2
+        assert 'Paper' in lines[1]
+    
+    def test_receivables_xlsx(self, admin_client, customer):
+        customer.current_balance = Decimal('350.50')
+        customer.current_balance_usd = Decimal('3.50')
+        customer.save()
+        
+        response = admin_client.get('/api/v1/reports/receivables/?format=xlsx')
+        
+        assert response.status_code == status.HTTP_200_OK
+        ws = load_workbook(io.BytesIO(_content(response))).active
+        rows = [row for row in ws.iter_rows(values_only=True) if row[1] == 'Test Customer']
+        assert rows and rows[0][2] == 350.5
+    
+    def test_json_still_default(self, admin_client):
+        response = admin_client.get(
+            f'/api/v1/reports/sales/?start_date={self.today}&end_date={self.today}'
+        )
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['summary']['count'] == 2
+    
+    def test_missing_dates_error_is_json(self, admin_client):
+        response = admin_client.get('/api/v1/reports/sales/?format=csv')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert 'detail' in response.json()
+    
+    def test_rows_come_from_iterator(self, django_assert_max_num_queries):
+        """Rows are produced lazily from a single query."""
+        rows = ReportExportService.iter_sales_rows(self.today, self.today)
+        with django_assert_max_num_queries(1):
+            first = next(rows)
+        assert first['customer'] == 'Test Customer'
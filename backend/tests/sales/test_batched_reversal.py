@@ -0,0 +1,134 @@
+"""
+Tests for the batched stock reversal in cancel_invoice and create_sales_return.
+"""
+import uuid
+import pytest
+from datetime import date
+from decimal import Decimal
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from apps.core.exceptions import NotFoundException
+from apps.inventory.models import CostLayer, Product, ProductUnit, Stock, StockMovement
+from apps.sales.models import Invoice, InvoiceItem, SalesReturnItem
+from apps.sales.services import SalesService
+
+
+pytestmark = pytest.mark.usefixtures('exchange_rate')
+
+
+def _products(count, category, unit, warehouse):
+    products = []
+    for _ in range(count):
+        uid = uuid.uuid4().hex[:10]
+        product = Product.objects.create(
+            name=f'Batch {uid}', code=f'B{uid}', barcode=f'BB{uid}',
+            category=category, unit=unit,
+            cost_price=Decimal('10.00'), sale_price=Decimal('15.00'), track_stock=True
+        )
+        Stock.objects.create(product=product, warehouse=warehouse, quantity=Decimal('100'))
+        products.append(product)
+    return products
+
+
+def _confirmed_invoice(customer, warehouse, products, user, quantity=Decimal('2')):
+    invoice = Invoice.objects.create(
+        invoice_number=f'INV-{uuid.uuid4().hex[:8]}',
+        customer=customer,
+        warehouse=warehouse,
+        invoice_date=date.today(),
+        invoice_type=Invoice.InvoiceType.CREDIT,
+        status=Invoice.Status.DRAFT,
+        created_by=user
+    )
+    for product in products:
+        InvoiceItem.objects.create(
+            invoice=invoice, product=product, quantity=quantity,
+            unit_price=Decimal('15.00'), cost_price=product.cost_price, created_by=user
+        )
+    invoice.calculate_totals()
+    return SalesService.confirm_invoice(invoice.id, user=user)
+
+
+def _count_queries(func):
+    with CaptureQueriesContext(connection) as ctx:
+        func()
+    return len(ctx.captured_queries)
+
+
+@pytest.mark.django_db
+class TestBatchedCancellation:
+    """Test suite for cancel_invoice stock reversal."""
+
+    def test_query_count_does_not_grow_with_lines(self, admin_user, customer, warehouse, category, unit):
+        small = _confirmed_invoice(customer, warehouse, _products(1, category, unit, warehouse), admin_user)
+        large = _confirmed_invoice(customer, warehouse, _products(6, category, unit, warehouse), admin_user)
+
+        small_count = _count_queries(lambda: SalesService.cancel_invoice(small.id, 'خطأ', admin_user))
+        large_count = _count_queries(lambda: SalesService.cancel_invoice(large.id, 'خطأ', admin_user))
+        assert large_count == small_count
+
+    def test_restores_stock_with_chained_movements(self, admin_user, customer, warehouse, category, unit):
+        product = _products(1, category, unit, warehouse)[0]
+        ProductUnit.objects.create(
+            product=product, unit=unit, conversion_factor=Decimal('1'), is_base_unit=True,
+            sale_price=Decimal('15.00'), cost_price=Decimal('10.00')
+        )
+        invoice = _confirmed_invoice(customer, warehouse, [product, product], admin_user)
+        assert Stock.objects.get(product=product).quantity == Decimal('96')
+
+        SalesService.cancel_invoice(invoice.id, 'خطأ', admin_user)
+
+        assert Stock.objects.get(product=product).quantity == Decimal('100')
+        movements = list(StockMovement.objects.filter(
+            reference_type='invoice_cancellation', reference_id=invoice.id
+        ).order_by('id'))
+        assert [(m.balance_before, m.balance_after) for m in movements] == [
+            (Decimal('96'), Decimal('98')), (Decimal('98'), Decimal('100'))
+        ]
+        assert CostLayer.objects.filter(movement__in=movements).count() == 2
+
+
+@pytest.mark.django_db
+class TestBatchedSalesReturn:
+    """Test suite for create_sales_return bulk writes."""
+
+    def test_query_count_does_not_grow_with_lines(self, admin_user, customer, warehouse, category, unit):
+        small = _confirmed_invoice(customer, warehouse, _products(1, category, unit, warehouse), admin_user)
+        large = _confirmed_invoice(customer, warehouse, _products(6, category, unit, warehouse), admin_user)
+
+        def make_return(invoice):
+            items = [{'invoice_item_id': item.id, 'quantity': Decimal('1')} for item in invoice.items.all()]
+            return lambda: SalesService.create_sales_return(invoice.id, date.today(), items, 'تالف', user=admin_user)
+
+        assert _count_queries(make_return(large)) == _count_queries(make_return(small))
+
+    def test_writes_items_stock_and_balance(self, admin_user, customer, warehouse, category, unit):
+        products = _products(2, category, unit, warehouse)
+        invoice = _confirmed_invoice(customer, warehouse, products, admin_user)
+        customer.refresh_from_db()
+        balance_before = customer.current_balance
+        items = [{'invoice_item_id': item.id, 'quantity': Decimal('1'), 'reason': 'تالف'}
+                 for item in invoice.items.order_by('id')]
+
+        sales_return = SalesService.create_sales_return(invoice.id, date.today(), items, 'تالف', user=admin_user)
+
+        return_items = SalesReturnItem.objects.filter(sales_return=sales_return)
+        assert sorted(i.quantity for i in return_items) == [Decimal('1'), Decimal('1')]
+        assert sales_return.total_amount > Decimal('30.00')
+        for product in products:
+            assert Stock.objects.get(product=product).quantity == Decimal('99')
+        assert StockMovement.objects.filter(
+            reference_type='SalesReturn', reference_id=sales_return.id,
+            source_type=StockMovement.SourceType.RETURN
+        ).count() == 2
+        customer.refresh_from_db()
+        assert customer.current_balance == balance_before - sales_return.total_amount
+
+    def test_unknown_invoice_item(self, admin_user, customer, warehouse, category, unit):
+        invoice = _confirmed_invoice(customer, warehouse, _products(1, category, unit, warehouse), admin_user)
+        with pytest.raises(NotFoundException):
+            SalesService.create_sales_return(
+                invoice.id, date.today(), [{'invoice_item_id': 999999, 'quantity': Decimal('1')}], 'x',
+                user=admin_user
+            )
@@ -0,0 +1,94 @@
+"""
+Tests for POST /sales/invoices/bulk/.
+"""
+import pytest
+from datetime import date
+from decimal import Decimal
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from apps.inventory.models import Stock
+from apps.sales.models import Invoice, Payment
+
+BULK_URL = '/api/v1/sales/invoices/bulk/'
+
+
+pytestmark = pytest.mark.usefixtures('exchange_rate')
+
+
+@pytest.fixture
+def stocked(product, warehouse):
+    Stock.objects.create(product=product, warehouse=warehouse, quantity=Decimal('100'))
+    return product
+
+
+def _invoice(key, customer, warehouse, product, quantity='2', **extra):
+    return {
+        'idempotency_key': key,
+        'customer': customer.id,
+        'warehouse': warehouse.id,
+        'invoice_date': str(date.today()),
+        'items': [{'product': product.id, 'quantity': quantity, 'unit_price': '150.00'}],
+        **extra,
+    }
+
+
+@pytest.mark.django_db
+class TestBulkInvoices:
+    """Test suite for the bulk invoice endpoint."""
+
+    def test_creates_and_confirms_with_per_invoice_results(self, admin_client, customer, warehouse, stocked):
+        payload = {'invoices': [
+            _invoice('POS1-1', customer, warehouse, stocked),
+            _invoice('POS1-2', customer, warehouse, stocked, quantity='500'),
+            {'customer': customer.id},
+            _invoice('POS1-3', customer, warehouse, stocked, confirm=False),
+        ], 'chunk_size': 2}
+        response = admin_client.post(BULK_URL, payload, format='json')
+        assert response.status_code == 200
+        assert (response.data['created'], response.data['failed']) == (2, 2)
+
+        ok, short, invalid, draft = response.data['results']
+        assert ok['status'] == 'created' and ok['invoice_status'] == Invoice.Status.PAID
+        assert short['status'] == 'failed' and short['error']['code'] == 'INSUFFICIENT_STOCK'
+        assert invalid['status_code'] == 400 and 'items' in invalid['error']['detail']
+        assert draft['invoice_status'] == Invoice.Status.DRAFT
+
+        assert Stock.objects.get(product=stocked, warehouse=warehouse).quantity == Decimal('98')
+        assert Payment.objects.filter(invoice_id=ok['invoice_id']).count() == 1
+        assert Invoice.objects.get(pk=ok['invoice_id']).import_key == 'POS1-1'
+
+    def test_retry_does_not_duplicate(self, admin_client, customer, warehouse, stocked):
+        payload = {'invoices': [_invoice('RETRY-1', customer, warehouse, stocked)]}
+        first = admin_client.post(BULK_URL, payload, format='json').data['results'][0]
+        # Retry repeats the key, also twice within the same batch
+        payload['invoices'].append(_invoice('RETRY-1', customer, warehouse, stocked))
+        again = admin_client.post(BULK_URL, payload, format='json').data
+        assert again['duplicates'] == 2
+        assert {r['invoice_id'] for r in again['results']} == {first['invoice_id']}
+        assert Invoice.objects.filter(import_key='RETRY-1').count() == 1
+        assert Stock.objects.get(product=stocked, warehouse=warehouse).quantity == Decimal('98')
+
+    def test_unknown_references_fail_only_their_invoice(self, admin_client, customer, warehouse, stocked):
+        bad = _invoice('BAD', customer, warehouse, stocked)
+        bad['customer'] = 999999
+        response = admin_client.post(BULK_URL, {'invoices': [
+            bad, _invoice('GOOD', customer, warehouse, stocked)
+        ]}, format='json')
+        bad_result, good_result = response.data['results']
+        assert bad_result['status_code'] == 404
+        assert good_result['status'] == 'created'
+
+    def test_references_loaded_once_per_batch(self, admin_client, customer, warehouse, stocked):
+        payload = {'invoices': [
+            _invoice(f'Q-{i}', customer, warehouse, stocked, quantity='1') for i in range(6)
+        ]}
+        with CaptureQueriesContext(connection) as ctx:
+            assert admin_client.post(BULK_URL, payload, format='json').data['created'] == 6
+        for table in ('sales_customer', 'inventory_warehouse', 'inventory_product', 'core_dailyexchangerate'):
+            lookups = [q for q in ctx.captured_queries if q['sql'].startswith(f'SELECT "{table}"."id"')]
+            assert len(lookups) == 1, table
+
+    def test_rejects_empty_batch(self, admin_client):
+        response = admin_client.post(BULK_URL, {'invoices': []}, format='json')
+        assert response.status_code == 400
@@ -24,6 +24,7 @@ from .views.settings import SettingsView
 from .views.login import LoginDialog
 from .styles.theme import ThemeManager
 from .services.auth import AuthService
+from .services.events import EventSubscriber
 
 
 class MainApplication(QMainWindow):
@@ -52,6 +53,8 @@ class MainApplication(QMainWindow):
                 self.dashboard_view.start_auto_refresh()
             # Refresh dashboard on start
             self.dashboard_view.refresh()
+            # Live updates from other terminals
+            self.event_subscriber.start()
         else:
             # User cancelled login, close app
             import sys
@@ -98,6 +101,7 @@ class MainApplication(QMainWindow):
         # Stacked widget for views
         self.stack = QStackedWidget()
         self.setup_views()
+        self.setup_live_updates()
         content_layout.addWidget(self.stack)
         
         main_layout.addWidget(content_widget, 1)
@@ -178,6 +182,12 @@ class MainApplication(QMainWindow):
             'supplier_payments': self.supplier_payments_view,
         }
         
+    def setup_live_updates(self):
+        """Route server change events to the views that show the changed data."""
+        self.event_subscriber = EventSubscriber(parent=self)
+        for view in (self.dashboard_view, self.products_view, self.invoices_view, self.payments_view):
+            self.event_subscriber.event_received.connect(view.on_server_event)
+
     def on_navigation(self, view_name: str):
         """Handle sidebar navigation."""
         if view_name in self.views:
@@ -305,6 +315,7 @@ class MainApplication(QMainWindow):
         if reply == QMessageBox.Yes:
             if hasattr(self, 'dashboard_view') and hasattr(self.dashboard_view, 'stop_auto_refresh'):
                 self.dashboard_view.stop_auto_refresh()
+            self.event_subscriber.stop()
             # Clear session
             self.current_user = None
             AuthService.logout()
@@ -24,6 +24,12 @@ class AppConfig:
     # API Settings
     API_BASE_URL: str = os.getenv('API_BASE_URL', 'http://localhost:8000/api/v1')
     API_TIMEOUT: int = 30
+    API_IDEMPOTENT_RETRIES: int = 2  # automatic resends of keyed POSTs (invoice, payment, GRN)
+    API_RETRY_BACKOFF: float = 1.0  # seconds, multiplied by the attempt number
+    JOB_POLL_INTERVAL: int = 1000  # ms between background job status polls
+    LOOKUP_DEBOUNCE_INTERVAL: int = 300  # ms of typing pause before a type-ahead lookup
+    EVENT_POLL_TIMEOUT: int = 25  # seconds the server holds a change-event long poll
+    EVENT_DEBOUNCE_INTERVAL: int = 500  # ms to gather change events before updating a view
     
     # Currency Settings (Multi-currency support)
     PRIMARY_CURRENCY: CurrencyConfig = field(default_factory=lambda: CurrencyConfig(
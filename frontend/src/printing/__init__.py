@@ -1,3 +1,4 @@
 # Printing Package
 from .invoice import InvoicePrinter
 from .receipt import ReceiptPrinter
+from .print_queue import ReceiptPrintQueue
@@ -0,0 +1,94 @@
+"""
+Receipt Print Queue - Background receipt printing
+
+Rendering and spooling a receipt can take long enough to freeze the POS
+screen, so receipts are handed to a single worker thread through a bounded
+queue. Results are reported back to the GUI thread through Qt signals.
+"""
+import logging
+import queue
+import threading
+from typing import Dict, Optional
+
+from PySide6.QtCore import QObject, Signal
+
+from .receipt import ReceiptPrinter
+
+logger = logging.getLogger(__name__)
+
+
+class ReceiptPrintQueue(QObject):
+    """
+    Bounded queue of receipts printed by one background worker.
+
+    Signals:
+        printed(object): True when sent to the printer, or the saved file path
+        failed(str): Error message when printing failed
+    """
+
+    printed = Signal(object)
+    failed = Signal(str)
+
+    def __init__(self, max_pending: int = 5, parent=None):
+        super().__init__(parent)
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_pending)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def submit(self, invoice_data: Dict, printer_name: str = None) -> bool:
+        """
+        Queue a receipt for printing without blocking the caller.
+
+        Returns:
+            False when the queue is full, True otherwise
+        """
+        self._ensure_worker()
+        try:
+            self._queue.put_nowait((invoice_data, printer_name))
+            return True
+        except queue.Full:
+            logger.warning("Receipt print queue is full, dropping print request")
+            return False
+
+    def pending(self) -> int:
+        """Number of receipts waiting to be printed."""
+        return self._queue.qsize()
+
+    def stop(self, timeout: float = 2.0):
+        """Stop the worker after the receipts already queued."""
+        with self._lock:
+            thread = self._thread
+            self._thread = None
+        if thread is not None:
+            self._queue.put(None)
+            thread.join(timeout)
+
+    def _ensure_worker(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name="receipt-printer", daemon=True
+                )
+                self._thread.start()
+
+    def _run(self):
+        printer = ReceiptPrinter()
+        try:
+            printer.warm_up()
+        except Exception:
+            logger.exception("Receipt printer warm-up failed")
+
+        while True:
+            job = self._queue.get()
+            try:
+                if job is None:
+                    return
+                invoice_data, printer_name = job
+                try:
+                    result = printer.print_receipt(invoice_data, printer_name)
+                    self.printed.emit(result)
+                except Exception as e:
+                    logger.exception("Receipt printing failed")
+                    self.failed.emit(str(e))
+            finally:
+                self._queue.task_done()
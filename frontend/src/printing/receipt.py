@@ -1,13 +1,103 @@
 """
 Receipt Printer - Thermal Receipt Printing (58mm/80mm)
 Supports Arabic text by rendering as image for XPrinter XP-Q838L
+
+Fonts, shaped Arabic strings and the static header/footer bitmaps are cached
+at process level, so back-to-back sales only render the item rows and totals.
 """
+import threading
+from collections import OrderedDict
+from functools import lru_cache
 from typing import Dict, Optional
 from datetime import datetime
 from io import BytesIO
 from ..config import config
 
 
+# Lookup table for thresholding 'L' pixels into ESC/POS ink bits.
+_INK_LUT = [255 if p < 200 else 0 for p in range(256)]
+
+# Loaded PIL fonts per receipt width (58/80mm)
+_FONT_CACHE: Dict[int, tuple] = {}
+
+# Rendered static sections (header, table header, footer) as 'L' images
+_SECTION_CACHE: "OrderedDict[tuple, object]" = OrderedDict()
+_SECTION_CACHE_SIZE = 16
+
+_cache_lock = threading.Lock()
+
+_RECEIPT_CSS = """
+    body {
+        font-family: Tahoma, Arial, 'Segoe UI', sans-serif;
+        direction: rtl;
+        margin: 0;
+        padding: 0;
+        color: #000;
+        font-size: 15pt;
+    }
+    .center { text-align: center; }
+    .company { font-size: 22pt; font-weight: 700; }
+    .small { font-size: 13pt; }
+    hr { border: 0; border-top: 1px solid #000; margin: 6px 0; }
+    table { width: 100%; border-collapse: collapse; table-layout: fixed; }
+    th { font-weight: 700; font-size: 13pt; padding: 5px 8px; border-bottom: 1px solid #000; }
+    td { font-size: 13pt; padding: 5px 8px; vertical-align: top; }
+    th:nth-child(1), td:nth-child(1) { width: 44%; }
+    th:nth-child(2), td:nth-child(2) { width: 18%; }
+    th:nth-child(3), td:nth-child(3) { width: 19%; }
+    th:nth-child(4), td:nth-child(4) { width: 19%; }
+    td.item { text-align: right; }
+    td.num { text-align: right; direction: ltr; white-space: nowrap; }
+    .total-row td { font-weight: 700; font-size: 15pt; padding-top: 10px; }
+"""
+
+
+def clear_receipt_caches():
+    """Drop cached fonts, shaped text and rendered sections (e.g. after settings change)."""
+    with _cache_lock:
+        _FONT_CACHE.clear()
+        _SECTION_CACHE.clear()
+    ReceiptPrinter._shape_cached.cache_clear()
+
+
+def _get_cached_section(key: tuple):
+    with _cache_lock:
+        img = _SECTION_CACHE.get(key)
+        if img is not None:
+            _SECTION_CACHE.move_to_end(key)
+        return img
+
+
+def _put_cached_section(key: tuple, img):
+    with _cache_lock:
+        _SECTION_CACHE[key] = img
+        _SECTION_CACHE.move_to_end(key)
+        while len(_SECTION_CACHE) > _SECTION_CACHE_SIZE:
+            _SECTION_CACHE.popitem(last=False)
+
+
+def _stack_images(parts, width: int, padding: int, bottom: int = 0, min_height: int = 120):
+    """Stack 'L' images vertically on a white canvas with top/bottom padding."""
+    from PIL import Image
+
+    height = padding + sum(p.size[1] for p in parts) + bottom + padding
+    img = Image.new('L', (width, max(int(height), min_height)), color=255)
+    y = padding
+    for part in parts:
+        img.paste(part, (0, y))
+        y += part.size[1]
+    return img
+
+
+def _esc(s) -> str:
+    return (
+        ("" if s is None else str(s))
+        .replace("&", "&amp;")
+        .replace("<", "&lt;")
+        .replace(">", "&gt;")
+    )
+
+
 class ReceiptPrinter:
     """
     Thermal receipt printer for 80mm printers.
@@ -37,7 +127,8 @@ class ReceiptPrinter:
         except:
             return "1"
 
-    def _reshape_arabic(self, text: str) -> str:
+    @staticmethod
+    def _reshape_arabic(text: str) -> str:
         """Reshape Arabic text for proper display."""
         if not text:
             return ""
@@ -58,7 +149,8 @@ class ReceiptPrinter:
         except Exception:
             return str(text)
 
-    def _contains_arabic(self, text: str) -> bool:
+    @staticmethod
+    def _contains_arabic(text: str) -> bool:
         if not text:
             return False
         for ch in text:
@@ -73,17 +165,46 @@ class ReceiptPrinter:
                 return True
         return False
 
-    def _shape_text(self, text: str) -> str:
-        text = "" if text is None else str(text)
-        if self._contains_arabic(text):
-            return self._reshape_arabic(text)
+    @staticmethod
+    @lru_cache(maxsize=2048)
+    def _shape_cached(text: str) -> str:
+        if ReceiptPrinter._contains_arabic(text):
+            return ReceiptPrinter._reshape_arabic(text)
         return text
 
+    def _shape_text(self, text: str) -> str:
+        return self._shape_cached("" if text is None else str(text))
+
     def _get_currency_symbol(self) -> str:
         sym = getattr(getattr(config, 'PRIMARY_CURRENCY', None), 'symbol', None)
         return (sym or "").strip()
 
+    def _company_header(self):
+        company = (config.COMPANY_NAME or config.COMPANY_NAME_EN or "STORE").strip()
+        phone = str(config.COMPANY_PHONE or "").strip()
+        return company, phone
+
+    def warm_up(self):
+        """
+        Pre-load fonts, the Arabic shaper and the static receipt sections so
+        the first sale of the day prints as fast as the following ones.
+        """
+        self._load_fonts()
+        self._shape_text("فاتورة")
+        try:
+            self._qt_static_sections()
+        except Exception:
+            pass
+        try:
+            self._pil_static_sections()
+        except Exception:
+            pass
+
     def _load_fonts(self):
+        cached = _FONT_CACHE.get(self.width)
+        if cached is not None:
+            return cached
+
         try:
             from PIL import ImageFont
         except ImportError:
@@ -102,17 +223,24 @@ class ReceiptPrinter:
         size_bold = 24 if self.width == 80 else 20
         size_small = 18 if self.width == 80 else 16
         
+        fonts = None
         for path in font_paths:
             try:
                 normal = ImageFont.truetype(path, size_normal)
                 bold = ImageFont.truetype(path, size_bold)
                 small = ImageFont.truetype(path, size_small)
-                return normal, bold, small
+                fonts = (normal, bold, small)
+                break
             except:
                 continue
         
-        normal = ImageFont.load_default()
-        return normal, normal, normal
+        if fonts is None:
+            normal = ImageFont.load_default()
+            fonts = (normal, normal, normal)
+
+        with _cache_lock:
+            _FONT_CACHE[self.width] = fonts
+        return fonts
 
     def _text_width(self, draw, text: str, font) -> int:
         bbox = draw.textbbox((0, 0), text, font=font)
@@ -148,7 +276,7 @@ class ReceiptPrinter:
 
     def _image_has_ink(self, img) -> bool:
         try:
-            g = img.convert('L')
+            g = img if img.mode == 'L' else img.convert('L')
             hist = g.histogram()
             if not hist or len(hist) < 256:
                 return True
@@ -183,8 +311,7 @@ class ReceiptPrinter:
                 if end > len(data):
                     break
 
-                bmp = data[start:end]
-                if any(bmp):
+                if data.count(0, start, end) != end - start:
                     return True
 
                 i = end
@@ -193,10 +320,90 @@ class ReceiptPrinter:
         except Exception:
             return True
 
+    # ------------------------------------------------------------------
+    # Qt (QTextDocument) renderer
+    # ------------------------------------------------------------------
+
+    def _render_html_qt(self, body_html: str):
+        """Render an HTML fragment at receipt width into a grayscale PIL image."""
+        from PySide6.QtGui import QTextDocument, QImage, QPainter
+        from PySide6.QtCore import QByteArray, QBuffer, QIODevice
+        from PIL import Image
+
+        padding = 8
+        avail = self.pixel_width - (padding * 2)
+
+        html = f"""
+        <!DOCTYPE html>
+        <html dir="rtl" lang="ar">
+        <head>
+            <meta charset="UTF-8">
+            <style>{_RECEIPT_CSS}</style>
+        </head>
+        <body>{body_html}</body>
+        </html>
+        """
+
+        doc = QTextDocument()
+        doc.setHtml(html)
+        doc.setTextWidth(avail)
+        doc.adjustSize()
+
+        size = doc.size().toSize()
+        if size.width() <= 0 or size.height() <= 0:
+            return None
+
+        qimg = QImage(int(self.pixel_width), int(size.height()), QImage.Format_ARGB32)
+        qimg.fill(0xFFFFFFFF)
+
+        painter = QPainter(qimg)
+        try:
+            painter.setRenderHint(QPainter.Antialiasing, False)
+            painter.setRenderHint(QPainter.TextAntialiasing, False)
+            painter.translate(padding, 0)
+            doc.drawContents(painter)
+        finally:
+            painter.end()
+
+        ba = QByteArray()
+        buf = QBuffer(ba)
+        buf.open(QIODevice.WriteOnly)
+        qimg.save(buf, "PNG")
+        buf.close()
+
+        return Image.open(BytesIO(bytes(ba))).convert('L')
+
+    def _qt_static_sections(self):
+        """Return the (header, footer) bitmaps for the Qt renderer, cached."""
+        company, phone = self._company_header()
+        header_key = ('qt', 'header', self.pixel_width, company, phone)
+        footer_key = ('qt', 'footer', self.pixel_width)
+
+        header = _get_cached_section(header_key)
+        if header is None:
+            header = self._render_html_qt(
+                f'<div class="center company">{_esc(company)}</div>'
+                + (f'<div class="center small">{_esc(phone)}</div>' if phone else '')
+                + '<hr /><div class="center" style="font-weight:700;">فاتورة</div>'
+            )
+            if header is None:
+                return None, None
+            _put_cached_section(header_key, header)
+
+        footer = _get_cached_section(footer_key)
+        if footer is None:
+            footer = self._render_html_qt(
+                '<hr /><div class="center small">شكراً لتعاملكم معنا</div>'
+            )
+            if footer is None:
+                return None, None
+            _put_cached_section(footer_key, footer)
+
+        return header, footer
+
     def _create_receipt_image_qt(self, invoice_data: Dict):
         try:
             from PySide6.QtGui import QTextDocument
-            from PySide6.QtCore import QByteArray, QBuffer, QIODevice
         except Exception:
             return None
 
@@ -205,12 +412,9 @@ class ReceiptPrinter:
         except Exception:
             return None
 
-        width = self.pixel_width
-        padding = 8
-        avail = width - (padding * 2)
-
-        company = (config.COMPANY_NAME or config.COMPANY_NAME_EN or "STORE").strip()
-        phone = str(config.COMPANY_PHONE or "").strip()
+        header, footer = self._qt_static_sections()
+        if header is None or footer is None:
+            return None
 
         inv_num = str(invoice_data.get('invoice_number', '') or "")
         inv_date = str(invoice_data.get('invoice_date', '') or "")
@@ -220,7 +424,7 @@ class ReceiptPrinter:
         total_amount = self._format_price(invoice_data.get('total_amount', 0))
         total_text = f"{total_amount} {currency}".strip()
 
-        items_html = ""
+        items_html = []
         items = invoice_data.get('items', []) or []
         for item in items:
             name = str(item.get('product_name', '') or item.get('name', '') or "Item")
@@ -229,66 +433,23 @@ class ReceiptPrinter:
             price = self._format_price(item.get('unit_price', 0))
             line_total = self._format_price(item.get('total', 0))
 
-            def esc(s: str) -> str:
-                return (
-                    ("" if s is None else str(s))
-                    .replace("&", "&amp;")
-                    .replace("<", "&lt;")
-                    .replace(">", "&gt;")
-                )
-
-            name_html = esc(name)
             qty_disp = qty
             price_disp = price
             if unit:
                 qty_disp = f"{qty} {unit}"
                 price_disp = f"{price}/{unit}"
 
-            items_html += (
+            items_html.append(
                 "<tr>"
-                f"<td class='item'>{name_html}</td>"
-                f"<td class='num'>{esc(qty_disp)}</td>"
-                f"<td class='num'>{esc(price_disp)}</td>"
-                f"<td class='num'>{esc(line_total)}</td>"
+                f"<td class='item'>{_esc(name)}</td>"
+                f"<td class='num'>{_esc(qty_disp)}</td>"
+                f"<td class='num'>{_esc(price_disp)}</td>"
+                f"<td class='num'>{_esc(line_total)}</td>"
                 "</tr>"
             )
 
-        html = f"""
-        <!DOCTYPE html>
-        <html dir="rtl" lang="ar">
-        <head>
-            <meta charset="UTF-8">
-            <style>
-                body {{
-                    font-family: Tahoma, Arial, 'Segoe UI', sans-serif;
-                    direction: rtl;
-                    margin: 0;
-                    padding: 0;
-                    color: #000;
-                    font-size: 15pt;
-                }}
-                .center {{ text-align: center; }}
-                .company {{ font-size: 22pt; font-weight: 700; }}
-                .small {{ font-size: 13pt; }}
-                hr {{ border: 0; border-top: 1px solid #000; margin: 6px 0; }}
-                table {{ width: 100%; border-collapse: collapse; table-layout: fixed; }}
-                th {{ font-weight: 700; font-size: 13pt; padding: 5px 8px; border-bottom: 1px solid #000; }}
-                td {{ font-size: 13pt; padding: 5px 8px; vertical-align: top; }}
-                th:nth-child(1), td:nth-child(1) {{ width: 44%; }}
-                th:nth-child(2), td:nth-child(2) {{ width: 18%; }}
-                th:nth-child(3), td:nth-child(3) {{ width: 19%; }}
-                th:nth-child(4), td:nth-child(4) {{ width: 19%; }}
-                td.item {{ text-align: right; }}
-                td.num {{ text-align: right; direction: ltr; white-space: nowrap; }}
-                .total-row td {{ font-weight: 700; font-size: 15pt; padding-top: 10px; }}
-            </style>
-        </head>
-        <body>
-            <div class="center company">{company}</div>
-            {f'<div class="center small">{phone}</div>' if phone else ''}
-            <hr />
-            <div class="center" style="font-weight:700;">فاتورة</div>
-            {f'<div class="center small">{info}</div>' if info else ''}
+        body = self._render_html_qt(f"""
+            {f'<div class="center small">{_esc(info)}</div>' if info else ''}
             <hr />
             <table>
                 <thead>
@@ -300,193 +461,96 @@ class ReceiptPrinter:
                     </tr>
                 </thead>
                 <tbody>
-                    {items_html}
+                    {''.join(items_html)}
                 </tbody>
             </table>
             <hr />
             <table>
                 <tr class="total-row">
                     <td class="item">الإجمالي</td>
-                    <td class="num" colspan="3">{total_text}</td>
+                    <td class="num" colspan="3">{_esc(total_text)}</td>
                 </tr>
             </table>
-            <hr />
-            <div class="center small">شكراً لتعاملكم معنا</div>
-        </body>
-        </html>
-        """
-
-        doc = QTextDocument()
-        doc.setHtml(html)
-        doc.setTextWidth(avail)
-        doc.adjustSize()
-
-        size = doc.size().toSize()
-        if size.width() <= 0 or size.height() <= 0:
-            return None
-
-        try:
-            from PySide6.QtGui import QImage, QPainter
-        except Exception:
+        """)
+        if body is None:
             return None
 
-        img_w = int(width)
-        img_h = int(size.height() + (padding * 2))
-        if img_h < 120:
-            img_h = 120
-
-        qimg = QImage(img_w, img_h, QImage.Format_ARGB32)
-        qimg.fill(0xFFFFFFFF)
-
-        painter = QPainter(qimg)
-        try:
-            painter.setRenderHint(QPainter.Antialiasing, False)
-            painter.setRenderHint(QPainter.TextAntialiasing, False)
-            painter.translate(padding, padding)
-            doc.drawContents(painter)
-        finally:
-            painter.end()
-
-        ba = QByteArray()
-        buf = QBuffer(ba)
-        buf.open(QIODevice.WriteOnly)
-        qimg.save(buf, "PNG")
-        buf.close()
-
-        pil = Image.open(BytesIO(bytes(ba))).convert('L')
+        pil = _stack_images([header, body, footer], self.pixel_width, padding=8)
         pil = pil.point(lambda p: 0 if p < 200 else 255, mode='1')
         if not self._image_has_ink(pil):
             return None
         return pil
 
-    def _create_receipt_image(self, invoice_data: Dict) -> bytes:
-        """Create receipt as image for Arabic support."""
-        try:
-            from PIL import Image, ImageDraw
-        except ImportError:
-            return None
-        
-        width = self.pixel_width
+    # ------------------------------------------------------------------
+    # PIL (ImageDraw) renderer
+    # ------------------------------------------------------------------
+
+    def _pil_layout(self):
+        """Column geometry for the PIL renderer."""
         padding = 8
         gap = 14 if self.width == 80 else 12
-        
-        font, font_bold, font_small = self._load_fonts()
-        if not font:
-            return None
-        
-        measure_img = Image.new('L', (width, 10), color=255)
-        measure = ImageDraw.Draw(measure_img)
-        
-        avail = width - (padding * 2)
+        avail = self.pixel_width - (padding * 2)
         qty_w = 95 if self.width == 80 else 70
         price_w = 130 if self.width == 80 else 105
         total_w = 130 if self.width == 80 else 110
         item_w = max(120, avail - (qty_w + price_w + total_w + (gap * 3)))
-        
-        x_right = width - padding
-        item_right = x_right
+
+        item_right = self.pixel_width - padding
         qty_right = item_right - gap - item_w
         price_right = qty_right - gap - qty_w
         total_right = price_right - gap - total_w
-        
-        ops = []
-        y = padding
-        
-        company = (config.COMPANY_NAME or config.COMPANY_NAME_EN or "STORE").strip()
-        if company:
-            ops.append(("center", (self._shape_text(company), font_bold)))
-            y += 34
-        
-        if config.COMPANY_PHONE:
-            ops.append(("center", (str(config.COMPANY_PHONE), font_small)))
-            y += 26
-        
-        ops.append(("hline", None))
-        y += 12
-        
-        ops.append(("center", (self._shape_text("فاتورة"), font)))
-        y += 28
-        
-        inv_num = str(invoice_data.get('invoice_number', '') or "")
-        inv_date = str(invoice_data.get('invoice_date', '') or "")
-        info = f"{inv_date}   #{inv_num}".strip()
-        if info:
-            ops.append(("center", (info, font_small)))
-            y += 26
-        
-        ops.append(("hline", None))
-        y += 12
-        
-        # Table header: Item | Qty | Price | Total
-        ops.append(("table_header", (
-            self._shape_text("الصنف"),
-            self._shape_text("كمية"),
-            self._shape_text("سعر"),
-            self._shape_text("إجمالي"),
-        )))
-        y += 30
-        ops.append(("hline", None))
-        y += 12
+        return {
+            'padding': padding,
+            'item_w': item_w,
+            'item_right': item_right,
+            'qty_right': qty_right,
+            'price_right': price_right,
+            'total_right': total_right,
+        }
+
+    def _op_height(self, op: str, payload, font_bold) -> int:
+        if op == "center":
+            return 34 if payload[1] == font_bold else 26
+        if op == "hline":
+            return 10
+        if op == "table_header":
+            return 28
+        if op == "item_row":
+            return 26
+        if op == "item_name_only":
+            return 24
+        if op == "total_row":
+            return 34
+        if op == "space":
+            return payload
+        return 0
+
+    def _render_ops(self, ops):
+        """Draw a list of layout ops into a new grayscale image of exact height."""
+        from PIL import Image, ImageDraw
 
-        items = invoice_data.get('items', []) or []
-        for item in items:
-            name = str(item.get('product_name', '') or item.get('name', '') or "Item")
-            unit = str(item.get('unit_name', '') or item.get('unit_symbol', '') or "").strip()
-            qty = self._format_qty(item.get('quantity', 1))
-            price = self._format_price(item.get('unit_price', 0))
-            total = self._format_price(item.get('total', 0))
-
-            qty_disp = f"{qty} {unit}" if unit else qty
-            price_disp = f"{price}/{unit}" if unit else price
-
-            shaped_name = self._shape_text(name)
-            name_lines = self._wrap_text(measure, shaped_name, font_small, item_w)
-            if not name_lines:
-                name_lines = [""]
-
-            first = True
-            for ln in name_lines:
-                if first:
-                    ops.append(("item_row", (ln, qty_disp, price_disp, total)))
-                    y += 26
-                    first = False
-                else:
-                    ops.append(("item_name_only", (ln,)))
-                    y += 24
-        
-        ops.append(("hline", None))
-        y += 14
-        
-        # Total (only essential field)
-        currency = self._get_currency_symbol()
-        total_amount = self._format_price(invoice_data.get('total_amount', 0))
-        total_text = f"{total_amount} {currency}".strip()
-        ops.append(("total_row", (self._shape_text("الإجمالي"), total_text)))
-        y += 34
-        
-        ops.append(("hline", None))
-        y += 12
-        
-        ops.append(("center", (self._shape_text("شكراً لتعاملكم معنا"), font_small)))
-        y += 28
-        y += 18
-        
-        height = max(int(y + padding), 120)
-        
-        img = Image.new('L', (width, height), color=255)
+        font, font_bold, font_small = self._load_fonts()
+        width = self.pixel_width
+        layout = self._pil_layout()
+        padding = layout['padding']
+        item_right = layout['item_right']
+        qty_right = layout['qty_right']
+        price_right = layout['price_right']
+        total_right = layout['total_right']
+
+        height = sum(self._op_height(op, payload, font_bold) for op, payload in ops)
+        img = Image.new('L', (width, max(int(height), 1)), color=255)
         draw = ImageDraw.Draw(img)
-        
-        y = padding
+
+        y = 0
         for op, payload in ops:
             if op == "center":
                 text, fnt = payload
                 bbox = draw.textbbox((0, 0), text, font=fnt)
                 tw = bbox[2] - bbox[0]
                 draw.text(((width - tw) // 2, y), text, font=fnt, fill=0)
-                y += 34 if fnt == font_bold else 26
             elif op == "hline":
                 draw.line((padding, y, width - padding, y), fill=0, width=1)
-                y += 10
             elif op == "table_header":
                 hi, hq, hp, ht = payload
                 tw = self._text_width(draw, ht, font_small)
@@ -497,7 +561,6 @@ class ReceiptPrinter:
                 draw.text((qty_right - tw, y), hq, font=font_small, fill=0)
                 tw = self._text_width(draw, hi, font_small)
                 draw.text((item_right - tw, y), hi, font=font_small, fill=0)
-                y += 28
             elif op == "item_row":
                 ln, qty, price, total = payload
                 s = str(total)
@@ -511,19 +574,123 @@ class ReceiptPrinter:
                 draw.text((qty_right - tw, y), s, font=font_small, fill=0)
                 tw = self._text_width(draw, ln, font_small)
                 draw.text((item_right - tw, y), ln, font=font_small, fill=0)
-                y += 26
             elif op == "item_name_only":
                 (ln,) = payload
                 tw = self._text_width(draw, ln, font=font_small)
                 draw.text((item_right - tw, y), ln, font=font_small, fill=0)
-                y += 24
             elif op == "total_row":
                 lbl, value = payload
                 tw = self._text_width(draw, value, font_bold)
                 draw.text((total_right - tw, y), value, font=font_bold, fill=0)
                 tw = self._text_width(draw, lbl, font_bold)
                 draw.text((item_right - tw, y), lbl, font=font_bold, fill=0)
-                y += 34
+            y += self._op_height(op, payload, font_bold)
+
+        return img
+
+    def _pil_static_sections(self):
+        """Return the (header, table header, footer) bitmaps for the PIL renderer, cached."""
+        font, font_bold, font_small = self._load_fonts()
+        if not font:
+            return None, None, None
+
+        company, phone = self._company_header()
+        header_key = ('pil', 'header', self.width, company, phone)
+        table_key = ('pil', 'table_header', self.width)
+        footer_key = ('pil', 'footer', self.width)
+
+        header = _get_cached_section(header_key)
+        if header is None:
+            ops = []
+            if company:
+                ops.append(("center", (self._shape_text(company), font_bold)))
+            if phone:
+                ops.append(("center", (phone, font_small)))
+            ops.append(("hline", None))
+            ops.append(("center", (self._shape_text("فاتورة"), font)))
+            header = self._render_ops(ops)
+            _put_cached_section(header_key, header)
+
+        table_header = _get_cached_section(table_key)
+        if table_header is None:
+            table_header = self._render_ops([
+                ("hline", None),
+                # Table header: Item | Qty | Price | Total
+                ("table_header", (
+                    self._shape_text("الصنف"),
+                    self._shape_text("كمية"),
+                    self._shape_text("سعر"),
+                    self._shape_text("إجمالي"),
+                )),
+                ("hline", None),
+            ])
+            _put_cached_section(table_key, table_header)
+
+        footer = _get_cached_section(footer_key)
+        if footer is None:
+            footer = self._render_ops([
+                ("hline", None),
+                ("center", (self._shape_text("شكراً لتعاملكم معنا"), font_small)),
+            ])
+            _put_cached_section(footer_key, footer)
+
+        return header, table_header, footer
+
+    def _create_receipt_image(self, invoice_data: Dict):
+        """Create receipt as image for Arabic support."""
+        try:
+            from PIL import Image, ImageDraw
+        except ImportError:
+            return None
+        
+        header, table_header, footer = self._pil_static_sections()
+        if header is None:
+            return None
+        
+        font, font_bold, font_small = self._load_fonts()
+        measure = ImageDraw.Draw(Image.new('L', (self.pixel_width, 10), color=255))
+        item_w = self._pil_layout()['item_w']
+        
+        inv_num = str(invoice_data.get('invoice_number', '') or "")
+        inv_date = str(invoice_data.get('invoice_date', '') or "")
+        info = f"{inv_date}   #{inv_num}".strip()
+        info_ops = [("center", (info, font_small))] if info else []
+        
+        ops = []
+        items = invoice_data.get('items', []) or []
+        for item in items:
+            name = str(item.get('product_name', '') or item.get('name', '') or "Item")
+            unit = str(item.get('unit_name', '') or item.get('unit_symbol', '') or "").strip()
+            qty = self._format_qty(item.get('quantity', 1))
+            price = self._format_price(item.get('unit_price', 0))
+            total = self._format_price(item.get('total', 0))
+
+            qty_disp = f"{qty} {unit}" if unit else qty
+            price_disp = f"{price}/{unit}" if unit else price
+
+            shaped_name = self._shape_text(name)
+            name_lines = self._wrap_text(measure, shaped_name, font_small, item_w)
+            if not name_lines:
+                name_lines = [""]
+
+            ops.append(("item_row", (name_lines[0], qty_disp, price_disp, total)))
+            for ln in name_lines[1:]:
+                ops.append(("item_name_only", (ln,)))
+        
+        ops.append(("hline", None))
+        
+        # Total (only essential field)
+        currency = self._get_currency_symbol()
+        total_amount = self._format_price(invoice_data.get('total_amount', 0))
+        total_text = f"{total_amount} {currency}".strip()
+        ops.append(("total_row", (self._shape_text("الإجمالي"), total_text)))
+        
+        parts = [header]
+        if info_ops:
+            parts.append(self._render_ops(info_ops))
+        parts.extend([table_header, self._render_ops(ops), footer])
+        
+        img = _stack_images(parts, self.pixel_width, padding=8, bottom=18)
         
         # Convert to pure black/white with threshold (better thermal output)
         img = img.point(lambda p: 0 if p < 180 else 255, mode='1')
@@ -539,7 +706,10 @@ class ReceiptPrinter:
         output.extend(b'\x1B\x40')
         output.extend(b'\x1B\x61\x01')
 
-        pixels = img.load()
+        # Threshold and pack in C: dark pixels (< 200) become set bits, MSB
+        # first, with each row zero-padded to a whole byte (GS v 0 layout).
+        raster = img.point(_INK_LUT, mode='1').tobytes()
+
         xL = width_bytes & 0xFF
         xH = (width_bytes >> 8) & 0xFF
 
@@ -555,15 +725,7 @@ class ReceiptPrinter:
             output.append(xH)
             output.append(yL)
             output.append(yH)
-
-            for y in range(y0, y0 + h):
-                for xb in range(width_bytes):
-                    b = 0
-                    for bit in range(8):
-                        x = xb * 8 + bit
-                        if x < width and int(pixels[x, y]) < 200:
-                            b |= (1 << (7 - bit))
-                    output.append(b)
+            output.extend(raster[y0 * width_bytes:(y0 + h) * width_bytes])
 
             output.extend(b'\x0A')
             y0 += h
@@ -7,7 +7,10 @@ error handling and conversion of network errors to typed exceptions.
 
 Requirements: 3.1, 3.2, 5.1, 5.2
 """
+import copy
 import logging
+import time
+import uuid
 import requests
 from pathlib import Path
 from typing import Optional, Dict, List, Any, Tuple
@@ -68,6 +71,8 @@ class ApiService:
     _instance = None
     _access_token: Optional[str] = None
     _refresh_token: Optional[str] = None
+    # Endpoint -> (data, Idempotency-Key) of user actions not yet succeeded
+    _pending_actions: Dict[str, Tuple[Dict, str]] = {}
     
     def __new__(cls):
         if cls._instance is None:
@@ -98,36 +103,61 @@ class ApiService:
             headers['Authorization'] = f'Bearer {self._access_token}'
         return headers
         
-    def _request(self, method: str, endpoint: str, **kwargs) -> Dict:
+    @staticmethod
+    def new_idempotency_key() -> str:
+        """Generate a fresh Idempotency-Key for one user action."""
+        return uuid.uuid4().hex
+
+    def _send(self, method: str, url: str, timeout, idempotency_key: Optional[str] = None,
+              **kwargs) -> requests.Response:
+        """Send one request, refreshing the access token once on 401."""
+        def headers():
+            request_headers = self._headers()
+            if idempotency_key:
+                request_headers['Idempotency-Key'] = idempotency_key
+            return request_headers
+
+        response = requests.request(method, url, headers=headers(), timeout=timeout, **kwargs)
+
+        # Handle token refresh (the key is resent, so a keyed POST is never doubled)
+        if response.status_code == 401 and self._refresh_token:
+            if self._refresh_access_token():
+                response = requests.request(method, url, headers=headers(), timeout=timeout, **kwargs)
+        return response
+
+    def _request(self, method: str, endpoint: str, idempotency_key: Optional[str] = None, **kwargs) -> Dict:
         """
         Make HTTP request with comprehensive error handling.
         
         Converts network errors to typed exceptions and parses error responses
         to extract field-specific validation errors and business rule violations.
         
+        With an idempotency_key the request is sent with an Idempotency-Key
+        header and retried automatically after a timeout, a connection error
+        or an "in progress" conflict: the server replays the first response
+        instead of creating the document twice.
+        
         Requirements: 3.1, 3.2, 5.1, 5.2
         """
         url = f"{self.base_url}/{endpoint.lstrip('/')}"
+        timeout = kwargs.pop('timeout', self.timeout)
+        retries = config.API_IDEMPOTENT_RETRIES if idempotency_key else 0
         
         try:
-            response = requests.request(
-                method,
-                url,
-                headers=self._headers(),
-                timeout=self.timeout,
-                **kwargs
-            )
-            
-            # Handle token refresh
-            if response.status_code == 401 and self._refresh_token:
-                if self._refresh_access_token():
-                    response = requests.request(
-                        method,
-                        url,
-                        headers=self._headers(),
-                        timeout=self.timeout,
-                        **kwargs
-                    )
+            for attempt in range(retries + 1):
+                last_attempt = attempt == retries
+                try:
+                    response = self._send(method, url, timeout, idempotency_key, **kwargs)
+                except (requests.exceptions.Timeout, requests.exceptions.ConnectionError):
+                    if last_attempt:
+                        raise
+                    logger.warning(f"Retrying {method} {endpoint} after a network error (attempt {attempt + 2})")
+                    time.sleep(config.API_RETRY_BACKOFF * (attempt + 1))
+                    continue
+                if not last_attempt and self._is_in_progress(response):
+                    time.sleep(config.API_RETRY_BACKOFF * (attempt + 1))
+                    continue
+                break
             
             # Check for errors and parse response
             if not response.ok:
@@ -147,6 +177,34 @@ class ApiService:
             logger.exception(f"Request error for {method} {endpoint}")
             raise ConnectionException(f"فشل في الاتصال بالخادم: {str(e)}")
     
+    @staticmethod
+    def _is_in_progress(response: requests.Response) -> bool:
+        """Whether the server is still processing the first request with this key."""
+        if response.status_code != 409:
+            return False
+        try:
+            return response.json().get('code') == 'IDEMPOTENCY_REQUEST_IN_PROGRESS'
+        except Exception:
+            return False
+
+    def _post_action(self, endpoint: str, data: Dict, idempotency_key: Optional[str] = None) -> Dict:
+        """
+        POST a document-creating user action (invoice, payment, goods receipt).
+        
+        Until the action succeeds, submitting the same data again (a second
+        click, or the user retrying after a timeout) reuses its key, so the
+        server replays the first result instead of creating a duplicate.
+        """
+        if idempotency_key is None:
+            pending = self._pending_actions.get(endpoint)
+            if pending is None or pending[0] != data:
+                pending = (copy.deepcopy(data), self.new_idempotency_key())
+                self._pending_actions[endpoint] = pending
+            idempotency_key = pending[1]
+        result = self.post(endpoint, data, idempotency_key=idempotency_key)
+        self._pending_actions.pop(endpoint, None)
+        return result
+
     def _handle_error_response(self, response: requests.Response) -> None:
         """
         Parse error response and raise appropriate ApiException.
@@ -347,14 +405,15 @@ class ApiService:
         return self._request('GET', endpoint, params=params)
     
     @handle_api_error
-    def post(self, endpoint: str, data: Dict) -> Dict:
+    def post(self, endpoint: str, data: Dict, idempotency_key: Optional[str] = None) -> Dict:
         """
         POST request with error handling.
         
-        Converts network errors to typed exceptions.
+        Converts network errors to typed exceptions. With an idempotency_key
+        the request is retried safely (see _request).
         Requirements: 3.1, 3.2
         """
-        return self._request('POST', endpoint, json=data)
+        return self._request('POST', endpoint, idempotency_key=idempotency_key, json=data)
     
     @handle_api_error
     def put(self, endpoint: str, data: Dict) -> Dict:
@@ -432,28 +491,58 @@ class ApiService:
     def list_backups(self) -> Dict:
         return self.get('core/backups/')
 
-    def create_backup(self, include_media: bool = False) -> Dict:
-        return self.post('core/backups/', {'include_media': include_media})
+    def create_backup(self, include_media: bool = False, incremental: bool = False) -> Dict:
+        """Start a backup job; returns the job to poll with get_job."""
+        return self.post('core/backups/', {'include_media': include_media, 'incremental': incremental})
 
     def delete_backup(self, filename: str) -> Dict:
         return self.delete(f'core/backups/{filename}/')
 
+    # Background jobs endpoints
+    def get_job(self, job_id: int) -> Dict:
+        return self.get(f'core/jobs/{job_id}/')
+
+    def cancel_job(self, job_id: int) -> Dict:
+        return self.post(f'core/jobs/{job_id}/cancel/', {})
+
+    def poll_events(self, after: Optional[int] = None, timeout: int = None) -> Dict:
+        """
+        Long-poll the server change feed.
+
+        Returns {'events': [...], 'last_id': n}; without ``after`` it returns
+        the current cursor immediately.
+        """
+        timeout = config.EVENT_POLL_TIMEOUT if timeout is None else timeout
+        params = {'timeout': timeout}
+        if after is not None:
+            params['after'] = after
+        # Leave the server time to answer an idle poll before timing out
+        return self._request('GET', 'core/events/', params=params, timeout=timeout + self.timeout)
+
+    def get_data_version(self) -> int:
+        """Server data change counter; changes whenever business data is written."""
+        return self.get('core/data-version/').get('version', 0)
+
     @handle_api_error
     def download_backup_to_file(self, filename: str, dest_path: str) -> Dict:
+        return self._download_to_file(f'core/backups/{filename}/download/', dest_path)
+
+    def _download_to_file(self, endpoint: str, dest_path: str, params: Dict = None) -> Dict:
+        """Stream a file response to disk without loading it into memory."""
         base = str(self.base_url).rstrip('/')
-        url = f"{base}/core/backups/{filename}/download/"
+        url = f"{base}/{endpoint.lstrip('/')}"
         headers = self._headers().copy()
         headers.pop('Content-Type', None)
         headers['Accept'] = '*/*'
 
-        response = requests.get(url, headers=headers, timeout=self.timeout, stream=True)
+        response = requests.get(url, headers=headers, params=params, timeout=self.timeout, stream=True)
 
         if response.status_code == 401 and self._refresh_token:
             if self._refresh_access_token():
                 headers = self._headers().copy()
                 headers.pop('Content-Type', None)
                 headers['Accept'] = '*/*'
-                response = requests.get(url, headers=headers, timeout=self.timeout, stream=True)
+                response = requests.get(url, headers=headers, params=params, timeout=self.timeout, stream=True)
 
         if not response.ok:
             self._handle_error_response(response)
@@ -515,6 +604,10 @@ class ApiService:
     def get_product(self, id: int) -> Dict:
         return self.get(f'inventory/products/{id}/')
         
+    def lookup_products(self, query: str = '', limit: int = 20) -> List[Dict]:
+        """Type-ahead product search by name, code or barcode prefix."""
+        return self.get('inventory/products/lookup/', {'q': query, 'limit': limit})
+        
     def get_product_by_barcode(self, barcode: str) -> Dict:
         return self.get('inventory/products/by_barcode/', {'barcode': barcode})
         
@@ -584,7 +677,7 @@ class ApiService:
         """
         return self.get('sales/payments/customer_unpaid_invoices/', {'customer_id': customer_id})
     
-    def collect_payment_with_allocation(self, data: Dict) -> Dict:
+    def collect_payment_with_allocation(self, data: Dict, idempotency_key: Optional[str] = None) -> Dict:
         """
         Create payment with invoice allocations in one transaction.
         
@@ -598,13 +691,14 @@ class ApiService:
                 - notes: Optional notes
                 - allocations: Optional list of {invoice_id, amount} objects
                 - auto_allocate: Boolean - if true, uses FIFO strategy
+            idempotency_key: Key of this user action (generated when omitted)
                 
         Returns:
             Created payment with allocations
             
         Requirements: 2.1, 7.1
         """
-        return self.post('sales/payments/collect_with_allocation/', data)
+        return self._post_action('sales/payments/collect_with_allocation/', data, idempotency_key)
     
     # Invoices endpoints
     def get_invoices(self, params: Dict = None) -> Dict:
@@ -613,8 +707,8 @@ class ApiService:
     def get_invoice(self, id: int) -> Dict:
         return self.get(f'sales/invoices/{id}/')
         
-    def create_invoice(self, data: Dict) -> Dict:
-        return self.post('sales/invoices/', data)
+    def create_invoice(self, data: Dict, idempotency_key: Optional[str] = None) -> Dict:
+        return self._post_action('sales/invoices/', data, idempotency_key)
         
     def confirm_invoice(self, id: int) -> Dict:
         return self.post(f'sales/invoices/{id}/confirm/', {})
@@ -647,8 +741,8 @@ class ApiService:
     def approve_purchase_order(self, id: int) -> Dict:
         return self.post(f'purchases/orders/{id}/approve/', {})
         
-    def receive_goods(self, id: int, data: Dict) -> Dict:
-        return self.post(f'purchases/orders/{id}/receive/', data)
+    def receive_goods(self, id: int, data: Dict, idempotency_key: Optional[str] = None) -> Dict:
+        return self._post_action(f'purchases/orders/{id}/receive/', data, idempotency_key)
 
     # Supplier Payments endpoints
     def get_supplier_payments(self, params: Dict = None) -> Dict:
@@ -657,8 +751,8 @@ class ApiService:
     def get_supplier_payment(self, payment_id: int) -> Dict:
         return self.get(f'purchases/payments/{payment_id}/')
 
-    def create_supplier_payment(self, data: Dict) -> Dict:
-        return self.post('purchases/payments/', data)
+    def create_supplier_payment(self, data: Dict, idempotency_key: Optional[str] = None) -> Dict:
+        return self._post_action('purchases/payments/', data, idempotency_key)
     
     # Expenses endpoints
     def get_expenses(self, params: Dict = None) -> Dict:
@@ -692,8 +786,9 @@ class ApiService:
             'end_date': end_date
         })
         
-    def get_inventory_report(self) -> Dict:
-        return self.get('reports/inventory/')
+    def get_inventory_report(self, as_of: str = None) -> Dict:
+        params = {'as_of': as_of} if as_of else None
+        return self.get('reports/inventory/', params)
         
     def get_customer_report(self, start_date: str = None, end_date: str = None) -> Dict:
         params = {}
@@ -810,6 +905,27 @@ class ApiService:
         if category_id:
             params['category'] = category_id
         return self.get('reports/expenses/', params)
+
+    @handle_api_error
+    def download_report_export(
+        self,
+        report: str,
+        export_format: str,
+        dest_path: str,
+        params: Dict = None
+    ) -> Dict:
+        """
+        Save a server-generated report file (xlsx, csv or pdf) to disk.
+        
+        Args:
+            report: Report endpoint name (e.g. 'sales', 'expenses')
+            export_format: One of 'xlsx', 'csv', 'pdf'
+            dest_path: Destination file path
+            params: Report filter parameters
+        """
+        params = dict(params or {})
+        params['format'] = export_format
+        return self._download_to_file(f'reports/{report}/', dest_path, params)
     
     # =========================================================================
     # Stock Movements API Methods
@@ -830,6 +946,7 @@ class ApiService:
                 - date_to: Filter to date (YYYY-MM-DD)
                 - page: Page number for pagination
                 - page_size: Number of items per page
+                - pagination: 'cursor' for keyset pages (with cursor from the next link)
                 
         Returns:
             Paginated list of stock movements with columns:
@@ -852,7 +969,26 @@ class ApiService:
         Requirements: 6.3
         """
         return self.get(f'inventory/movements/{movement_id}/')
-    
+
+    def get_stock_as_of(self, as_of: str, warehouse_id: int = None, product_id: int = None) -> Dict:
+        """
+        Get stock quantities at the end of a past date.
+
+        Args:
+            as_of: Date (YYYY-MM-DD)
+            warehouse_id: Optional warehouse filter
+            product_id: Optional product filter
+
+        Returns:
+            Dict with date, item_count and items (product, warehouse, quantity)
+        """
+        params = {'date': as_of}
+        if warehouse_id:
+            params['warehouse'] = warehouse_id
+        if product_id:
+            params['product'] = product_id
+        return self.get('inventory/stock/as-of/', params)
+
     # =========================================================================
     # Sales Returns API Methods
     # Requirements: 5.1, 5.9
@@ -1373,7 +1509,7 @@ class ApiService:
         """
         return self.get(f'sales/payments/{payment_id}/')
     
-    def create_payment(self, data: Dict) -> Dict:
+    def create_payment(self, data: Dict, idempotency_key: Optional[str] = None) -> Dict:
         """
         Create a new payment.
         
@@ -1386,13 +1522,14 @@ class ApiService:
                 - reference: Optional reference number
                 - notes: Optional notes
                 - invoice: Optional single invoice ID
+            idempotency_key: Key of this user action (generated when omitted)
                 
         Returns:
             Created payment
             
         Requirements: 13.2
         """
-        return self.post('sales/payments/', data)
+        return self._post_action('sales/payments/', data, idempotency_key)
     
     # =========================================================================
     # Purchase Orders API Methods (Enhanced)
@@ -0,0 +1,95 @@
+"""
+Change Event Subscriber - Live updates from other terminals
+
+A background thread long-polls the server change feed and re-emits each
+event as a Qt signal, so views update their cards and table rows without
+a manual refresh.
+"""
+import logging
+import threading
+from typing import Callable, Dict, Optional
+
+from PySide6.QtCore import QObject, QTimer, Signal
+
+from ..config import config
+
+logger = logging.getLogger(__name__)
+
+# Seconds to wait before retrying after a failed poll (doubled up to the max)
+RETRY_DELAY = 1
+RETRY_DELAY_MAX = 60
+
+
+class EventSubscriber(QObject):
+    """
+    Long-polls ``core/events/`` on a daemon thread.
+
+    Signals are emitted from the polling thread; Qt queues them to the
+    receivers' thread, so slots may touch widgets.
+    """
+
+    # Emitted with each event dict: {id, type, payload, created_at}
+    event_received = Signal(dict)
+
+    def __init__(self, poll: Callable[..., Dict] = None, parent=None):
+        """
+        Args:
+            poll: Function(after, timeout) returning {'events', 'last_id'}
+                (defaults to api.poll_events)
+            parent: Parent object
+        """
+        super().__init__(parent)
+        if poll is None:
+            from .api import api
+            poll = api.poll_events
+        self._poll = poll
+        self._cursor: Optional[int] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        """Start polling if not already running."""
+        if self.is_running() and not self._stop.is_set():
+            return
+        # A stopped thread may still be in its last poll; it keeps its own
+        # (set) stop event and exits, and a new thread takes over
+        self._stop = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, args=(self._stop,), name='event-subscriber', daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        """Stop after the current poll returns."""
+        self._stop.set()
+
+    def is_running(self) -> bool:
+        return bool(self._thread and self._thread.is_alive())
+
+    def poll_once(self, timeout: int = None):
+        """Run one poll and emit the events it returned."""
+        result = self._poll(self._cursor, config.EVENT_POLL_TIMEOUT if timeout is None else timeout)
+        for event in result.get('events', []):
+            self.event_received.emit(event)
+        self._cursor = result.get('last_id', self._cursor)
+
+    def _run(self, stop: threading.Event):
+        delay = RETRY_DELAY
+        while not stop.is_set():
+            try:
+                self.poll_once()
+                delay = RETRY_DELAY
+            except Exception:
+                logger.warning("Change event poll failed; retrying in %s s", delay)
+                stop.wait(delay)
+                delay = min(delay * 2, RETRY_DELAY_MAX)
+
+
+def debounce_timer(parent: QObject, callback: Callable[[], None],
+                   interval: int = None) -> QTimer:
+    """Single-shot timer that runs ``callback`` once a burst of events settles."""
+    timer = QTimer(parent)
+    timer.setSingleShot(True)
+    timer.setInterval(config.EVENT_DEBOUNCE_INTERVAL if interval is None else interval)
+    timer.timeout.connect(callback)
+    return timer
@@ -2,7 +2,7 @@
 Export Service - Report Export Functionality
 
 This module provides export functionality for reports including:
-- Excel export using openpyxl
+- Excel export using openpyxl (streamed, write-only workbook)
 - PDF export using reportlab with RTL support
 - Print functionality using PySide6 print dialog
 
@@ -10,7 +10,9 @@ Requirements: 3.1, 3.2, 3.3, 3.4, 3.5, 3.6, 4.1, 4.2, 4.3, 4.4, 4.5, 4.6, 4.7, 5
 """
 import os
 import logging
-from typing import List, Dict, Any, Optional, Tuple
+from itertools import chain, islice
+from typing import List, Dict, Any, Optional, Tuple, Iterable, Iterator
+from urllib.parse import parse_qs, urlparse
 from datetime import datetime
 
 from PySide6.QtWidgets import QFileDialog, QWidget
@@ -23,6 +25,9 @@ from ..config import config
 # Configure logger
 logger = logging.getLogger(__name__)
 
+# Rows sampled at the start of a streamed Excel export to size its columns
+EXCEL_WIDTH_SAMPLE_ROWS = 500
+
 
 class ExportError(Exception):
     """Exception raised for export errors."""
@@ -43,9 +48,189 @@ class ExportService:
     - 5.1, 5.2, 5.3, 5.4, 5.5: Print functionality
     """
     
+    @staticmethod
+    def iter_pages(fetch_page, params: Dict = None, page_size: int = 500) -> Iterator[Dict]:
+        """
+        Yield rows from a paginated API endpoint one page at a time.
+        
+        Args:
+            fetch_page: API method accepting a params dict (e.g. api.get_stock_movements)
+            params: Filter parameters; pagination keys are overridden
+            page_size: Rows requested per page
+            
+        Yields:
+            Row dictionaries, so the full dataset never sits in memory
+        """
+        params = dict(params or {})
+        params['page_size'] = page_size
+        page = 1
+        while True:
+            params['page'] = page
+            response = fetch_page(params)
+            if isinstance(response, dict):
+                rows = response.get('results', [])
+                has_next = bool(response.get('next'))
+            else:
+                rows = response if isinstance(response, list) else []
+                has_next = False
+            
+            yield from rows
+            
+            if not has_next or not rows:
+                return
+            page += 1
+    
+    @staticmethod
+    def iter_cursor_pages(fetch_page, params: Dict = None, page_size: int = 500) -> Iterator[Dict]:
+        """
+        Yield rows from an endpoint that supports ``pagination=cursor``.
+        
+        Each request continues from the cursor in the previous ``next`` link,
+        so the server never counts or skips rows however deep the export goes.
+        """
+        params = dict(params or {})
+        params.pop('page', None)
+        params['pagination'] = 'cursor'
+        params['page_size'] = page_size
+        while True:
+            response = fetch_page(params)
+            rows = response.get('results', []) if isinstance(response, dict) else []
+            yield from rows
+            
+            next_url = response.get('next') if isinstance(response, dict) else None
+            cursor = parse_qs(urlparse(next_url).query).get('cursor') if next_url else None
+            if not cursor or not rows:
+                return
+            params['cursor'] = cursor[0]
+    
+    @staticmethod
+    def _add_excel_styles(wb) -> None:
+        """Register the shared named styles used by streamed Excel exports."""
+        from openpyxl.styles import NamedStyle, Font, Alignment, Border, Side, PatternFill
+        
+        border = Border(
+            left=Side(style='thin'),
+            right=Side(style='thin'),
+            top=Side(style='thin'),
+            bottom=Side(style='thin')
+        )
+        center_alignment = Alignment(horizontal='center', vertical='center')
+        rtl_alignment = Alignment(horizontal='right', vertical='center', wrap_text=True)
+        
+        wb.add_named_style(NamedStyle(
+            name='export_title', font=Font(bold=True, size=14), alignment=center_alignment
+        ))
+        wb.add_named_style(NamedStyle(name='export_date', alignment=center_alignment))
+        wb.add_named_style(NamedStyle(
+            name='export_header',
+            font=Font(bold=True, size=12, color='FFFFFF'),
+            fill=PatternFill(start_color='2563EB', end_color='2563EB', fill_type='solid'),
+            border=border,
+            alignment=center_alignment
+        ))
+        wb.add_named_style(NamedStyle(
+            name='export_cell', border=border, alignment=rtl_alignment
+        ))
+        # Requirements: 3.3 - Format numbers properly
+        wb.add_named_style(NamedStyle(
+            name='export_number', border=border, alignment=rtl_alignment,
+            number_format='#,##0.00'
+        ))
+    
+    @staticmethod
+    def write_excel(
+        file_path: str,
+        data: Iterable[Dict],
+        columns: List[Tuple[str, str]],
+        title: str,
+        summary: Dict[str, Any] = None
+    ) -> int:
+        """
+        Stream rows into an Excel file using a write-only workbook.
+        
+        Rows are consumed from ``data`` as they are written. Column widths
+        are computed from the first EXCEL_WIDTH_SAMPLE_ROWS rows, which are
+        the only rows held in memory at any time.
+        
+        Returns:
+            Number of data rows written
+            
+        Requirements: 3.2, 3.3, 3.4
+        """
+        from openpyxl import Workbook
+        from openpyxl.cell import WriteOnlyCell
+        from openpyxl.utils import get_column_letter
+        
+        rows = iter(data)
+        sample = list(islice(rows, EXCEL_WIDTH_SAMPLE_ROWS))
+        keys = [key for key, _ in columns]
+        
+        wb = Workbook(write_only=True)
+        ExportService._add_excel_styles(wb)
+        ws = wb.create_sheet(title=title[:31])  # Excel sheet name limit
+        
+        # Set RTL direction for the sheet
+        ws.sheet_view.rightToLeft = True
+        
+        # Column widths must be known before the first row is streamed
+        for col_idx, (key, header) in enumerate(columns, 1):
+            max_length = len(str(header))
+            for row_data in sample:
+                value = row_data.get(key, '')
+                if value:
+                    max_length = max(max_length, len(str(value)))
+            ws.column_dimensions[get_column_letter(col_idx)].width = min(max_length + 2, 50)
+        
+        def styled(value, style):
+            cell = WriteOnlyCell(ws, value=value)
+            cell.style = style
+            return cell
+        
+        last_col = get_column_letter(len(columns))
+        
+        # Add title
+        # Requirements: 3.4 - Include report title
+        ws.merged_cells.add(f"A1:{last_col}1")
+        ws.append([styled(title, 'export_title')])
+        
+        # Add generation date
+        # Requirements: 3.4 - Include generation date
+        ws.merged_cells.add(f"A2:{last_col}2")
+        ws.append([styled(f"تاريخ التقرير: {datetime.now().strftime('%Y-%m-%d %H:%M')}", 'export_date')])
+        ws.append([])
+        
+        # Add summary if provided
+        if summary:
+            for key, value in summary.items():
+                ws.append([key, str(value)])
+            ws.append([])
+        
+        # Add headers
+        # Requirements: 3.2 - Include all visible data columns
+        ws.append([styled(header, 'export_header') for _, header in columns])
+        
+        # Add data rows
+        # Rows are serialized as soon as they are appended, so one styled
+        # cell per column is reused instead of styling a new cell per value.
+        text_cells = [styled(None, 'export_cell') for _ in keys]
+        number_cells = [styled(None, 'export_number') for _ in keys]
+        count = 0
+        for row_data in chain(sample, rows):
+            row = []
+            for col_idx, key in enumerate(keys):
+                value = row_data.get(key, '')
+                cell = number_cells[col_idx] if isinstance(value, (int, float)) else text_cells[col_idx]
+                cell.value = value
+                row.append(cell)
+            ws.append(row)
+            count += 1
+        
+        wb.save(file_path)
+        return count
+    
     @staticmethod
     def export_to_excel(
-        data: List[Dict],
+        data: Iterable[Dict],
         columns: List[Tuple[str, str]],
         filename: str,
         title: str,
@@ -56,7 +241,7 @@ class ExportService:
         Export data to Excel file.
         
         Args:
-            data: List of dictionaries containing row data
+            data: Rows to export; a list, generator or ExportService.iter_pages()
             columns: List of tuples (key, header_label) for columns
             filename: Default filename for save dialog
             title: Report title to include in the file
@@ -71,9 +256,7 @@ class ExportService:
         try:
             # Import openpyxl
             try:
-                from openpyxl import Workbook
-                from openpyxl.styles import Font, Alignment, Border, Side, PatternFill
-                from openpyxl.utils import get_column_letter
+                import openpyxl  # noqa: F401
             except ImportError:
                 raise ExportError(
                     "مكتبة Excel غير متوفرة. يرجى تثبيت openpyxl",
@@ -81,7 +264,9 @@ class ExportService:
                 )
             
             # Check if there's data to export
-            if not data:
+            rows = iter(data or [])
+            first = next(rows, None)
+            if first is None:
                 raise ExportError("لا توجد بيانات للتصدير", 'NO_DATA')
             
             # Show save dialog
@@ -100,96 +285,10 @@ class ExportService:
             if not file_path.endswith('.xlsx'):
                 file_path += '.xlsx'
             
-            # Create workbook
-            wb = Workbook()
-            ws = wb.active
-            ws.title = title[:31]  # Excel sheet name limit
-            
-            # Define styles
-            header_font = Font(bold=True, size=12)
-            header_fill = PatternFill(start_color='2563EB', end_color='2563EB', fill_type='solid')
-            header_font_white = Font(bold=True, size=12, color='FFFFFF')
-            title_font = Font(bold=True, size=14)
-            border = Border(
-                left=Side(style='thin'),
-                right=Side(style='thin'),
-                top=Side(style='thin'),
-                bottom=Side(style='thin')
-            )
-            rtl_alignment = Alignment(horizontal='right', vertical='center', wrap_text=True)
-            center_alignment = Alignment(horizontal='center', vertical='center')
-            
-            current_row = 1
-            
-            # Add title
-            # Requirements: 3.4 - Include report title
-            ws.merge_cells(start_row=current_row, start_column=1, end_row=current_row, end_column=len(columns))
-            title_cell = ws.cell(row=current_row, column=1, value=title)
-            title_cell.font = title_font
-            title_cell.alignment = center_alignment
-            current_row += 1
-            
-            # Add generation date
-            # Requirements: 3.4 - Include generation date
-            ws.merge_cells(start_row=current_row, start_column=1, end_row=current_row, end_column=len(columns))
-            date_cell = ws.cell(
-                row=current_row, 
-                column=1, 
-                value=f"تاريخ التقرير: {datetime.now().strftime('%Y-%m-%d %H:%M')}"
+            count = ExportService.write_excel(
+                file_path, chain([first], rows), columns, title, summary
             )
-            date_cell.alignment = center_alignment
-            current_row += 2
-            
-            # Add summary if provided
-            if summary:
-                for key, value in summary.items():
-                    ws.cell(row=current_row, column=1, value=key)
-                    ws.cell(row=current_row, column=2, value=str(value))
-                    current_row += 1
-                current_row += 1
-            
-            # Add headers
-            # Requirements: 3.2 - Include all visible data columns
-            for col_idx, (key, header) in enumerate(columns, 1):
-                cell = ws.cell(row=current_row, column=col_idx, value=header)
-                cell.font = header_font_white
-                cell.fill = header_fill
-                cell.border = border
-                cell.alignment = center_alignment
-            
-            current_row += 1
-            
-            # Add data rows
-            for row_data in data:
-                for col_idx, (key, _) in enumerate(columns, 1):
-                    value = row_data.get(key, '')
-                    cell = ws.cell(row=current_row, column=col_idx, value=value)
-                    cell.border = border
-                    cell.alignment = rtl_alignment
-                    
-                    # Format numbers with proper decimal places
-                    # Requirements: 3.3 - Format numbers properly
-                    if isinstance(value, (int, float)):
-                        cell.number_format = '#,##0.00'
-                
-                current_row += 1
-            
-            # Auto-adjust column widths
-            for col_idx, (key, header) in enumerate(columns, 1):
-                column_letter = get_column_letter(col_idx)
-                max_length = len(str(header))
-                for row in ws.iter_rows(min_row=current_row - len(data), max_row=current_row - 1, min_col=col_idx, max_col=col_idx):
-                    for cell in row:
-                        if cell.value:
-                            max_length = max(max_length, len(str(cell.value)))
-                ws.column_dimensions[column_letter].width = min(max_length + 2, 50)
-            
-            # Set RTL direction for the sheet
-            ws.sheet_view.rightToLeft = True
-            
-            # Save workbook
-            wb.save(file_path)
-            logger.info(f"Excel export successful: {file_path}")
+            logger.info(f"Excel export successful: {file_path} ({count} rows)")
             return True
             
         except ExportError:
@@ -205,6 +304,56 @@ class ExportService:
             raise ExportError(f"فشل تصدير Excel: {str(e)}", 'EXPORT_FAILED')
 
 
+    @staticmethod
+    def save_server_export(
+        report: str,
+        export_format: str,
+        filename: str,
+        params: Dict = None,
+        parent: QWidget = None
+    ) -> bool:
+        """
+        Ask for a destination and save a report file generated by the server.
+        
+        The server streams the file (``reports/<report>/?format=...``) and it
+        is written to disk as it arrives, so nothing is built on the client.
+        
+        Returns:
+            True if the file was saved, False if the user cancelled
+        """
+        from .api import api, ApiException
+        
+        filters = {
+            'xlsx': "Excel Files (*.xlsx)",
+            'csv': "CSV Files (*.csv)",
+            'pdf': "PDF Files (*.pdf)",
+        }
+        file_path, _ = QFileDialog.getSaveFileName(
+            parent,
+            "حفظ الملف",
+            filename,
+            filters.get(export_format, "All Files (*)")
+        )
+        
+        if not file_path:
+            return False  # User cancelled
+        
+        if not file_path.endswith(f'.{export_format}'):
+            file_path += f'.{export_format}'
+        
+        try:
+            api.download_report_export(report, export_format, file_path, params)
+        except PermissionError:
+            raise ExportError(
+                "لا يمكن حفظ الملف. تحقق من الصلاحيات أو أغلق الملف إذا كان مفتوحاً",
+                'PERMISSION_DENIED'
+            )
+        except ApiException as e:
+            raise ExportError(f"فشل التصدير: {str(e)}", 'EXPORT_FAILED')
+        
+        logger.info(f"Server export saved: {file_path}")
+        return True
+    
     @staticmethod
     def export_to_pdf(
         data: List[Dict],
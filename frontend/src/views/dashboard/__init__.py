@@ -14,6 +14,7 @@ from PySide6.QtGui import QFont, QCursor
 from ...config import Colors, Fonts, config
 from ...widgets.cards import StatCard, Card
 from ...services.api import api, ApiException
+from ...services.events import debounce_timer
 from ...services.auth import AuthService
 from ...utils.error_handler import handle_ui_error
 
@@ -50,11 +51,14 @@ class DashboardView(QWidget):
     
     def __init__(self, parent=None):
         super().__init__(parent)
+        # Server data version of the figures on screen
+        self._data_version = None
         self.setup_ui()
 
-        # Setup auto-refresh timer (30 seconds)
+        # Setup auto-refresh timer (30 seconds); it only polls the data version
         self.refresh_timer = QTimer(self)
         self.refresh_timer.timeout.connect(self._on_refresh_timer)
+        self._event_timer = debounce_timer(self, self.refresh_if_changed)
         
     def setup_ui(self):
         """Initialize dashboard UI."""
@@ -271,12 +275,27 @@ class DashboardView(QWidget):
         """Refresh dashboard data from API."""
         # Load dashboard data
         data = api.get_dashboard()
+        self._data_version = data.get('data_version')
         self.update_stats(data)
 
     def _on_refresh_timer(self):
         if not AuthService.is_authenticated():
             return
-        self.refresh()
+        self.refresh_if_changed()
+
+    def on_server_event(self, event: dict):
+        """Refresh the cards shortly after another terminal changed data."""
+        if AuthService.is_authenticated():
+            self._event_timer.start()
+
+    def refresh_if_changed(self):
+        """Reload the dashboard only when the server data version moved."""
+        try:
+            version = api.get_data_version()
+        except ApiException:
+            return
+        if self._data_version is None or version != self._data_version:
+            self.refresh()
 
     def start_auto_refresh(self):
         if not self.refresh_timer.isActive():
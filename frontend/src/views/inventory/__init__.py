@@ -19,6 +19,7 @@ from ...widgets.forms import FormField, FormDialog
 from ...widgets.dialogs import MessageDialog, ConfirmDialog
 from ...widgets.product_units import ProductUnitConfigWidget
 from ...services.api import api, ApiException
+from ...services.events import debounce_timer
 from ...utils.error_handler import handle_ui_error
 
 # Import StockMovementsView from submodule
@@ -312,8 +313,30 @@ class ProductsView(QWidget):
     def __init__(self, parent=None):
         super().__init__(parent)
         self.categories = []
+        # Products whose stock changed on the server since the last update
+        self._changed_products = set()
+        self._event_timer = debounce_timer(self, self._apply_stock_changes)
         self.setup_ui()
         
+    def on_server_event(self, event: dict):
+        """Queue visible rows whose stock changed on another terminal."""
+        if event.get('type') in ('stock-changed', 'low-stock-crossed'):
+            self._changed_products.add(event.get('payload', {}).get('product_id'))
+            self._event_timer.start()
+
+    def _apply_stock_changes(self):
+        """Reload only the changed products that are shown in the table."""
+        shown = {row.get('id') for row in self.table.data}
+        changed, self._changed_products = self._changed_products & shown, set()
+        if not self.isVisible():
+            return
+        for product_id in changed:
+            try:
+                product = api.get_product(product_id)
+            except ApiException:
+                continue
+            self.table.update_rows('id', product_id, product)
+        
     def setup_ui(self):
         """Initialize products view UI."""
         layout = QVBoxLayout(self)
@@ -10,11 +10,14 @@ from PySide6.QtWidgets import (
 )
 from PySide6.QtCore import Qt, QDate
 from PySide6.QtGui import QFont, QColor, QBrush
+from datetime import datetime
 
 from ...config import Colors, Fonts
 from ...widgets.tables import DataTable
 from ...widgets.dialogs import MessageDialog
+from ...widgets.product_lookup import ProductLookupComboBox
 from ...services.api import api, ApiException
+from ...services.export import ExportService, ExportError
 from ...utils.error_handler import handle_ui_error
 
 
@@ -252,7 +255,6 @@ class StockMovementsView(QWidget):
     
     def __init__(self, parent=None):
         super().__init__(parent)
-        self.products = []
         self.warehouses = []
         self.setup_ui()
     
@@ -277,11 +279,10 @@ class StockMovementsView(QWidget):
         filters_layout = QHBoxLayout(filters_frame)
         filters_layout.setSpacing(12)
         
-        # Product filter
+        # Product filter (searched on the server while typing)
         filters_layout.addWidget(QLabel("المنتج:"))
-        self.product_filter = QComboBox()
-        self.product_filter.setMinimumWidth(150)
-        self.product_filter.addItem("الكل", None)
+        self.product_filter = ProductLookupComboBox()
+        self.product_filter.setMinimumWidth(180)
         filters_layout.addWidget(self.product_filter)
         
         # Warehouse filter
@@ -331,6 +332,12 @@ class StockMovementsView(QWidget):
         clear_btn.clicked.connect(self.clear_filters)
         filters_layout.addWidget(clear_btn)
         
+        # Export button (streams every page matching the filters)
+        export_btn = QPushButton("📊 تصدير Excel")
+        export_btn.setProperty("class", "secondary")
+        export_btn.clicked.connect(self._export_excel)
+        filters_layout.addWidget(export_btn)
+        
         filters_layout.addStretch()
         layout.addWidget(filters_frame)
         
@@ -458,25 +465,12 @@ class StockMovementsView(QWidget):
     
     @handle_ui_error
     def load_filter_options(self):
-        """Load products and warehouses for filter dropdowns."""
-        # Load products
-        if not self.products:
-            try:
-                response = api.get_products({'page_size': 1000})
-                if isinstance(response, dict) and 'results' in response:
-                    self.products = response['results']
-                else:
-                    self.products = response if isinstance(response, list) else []
-                
-                # Update product filter
-                self.product_filter.clear()
-                self.product_filter.addItem("الكل", None)
-                for product in self.products:
-                    display = f"{product.get('code', '')} - {product.get('name', '')}"
-                    self.product_filter.addItem(display, product.get('id'))
-            except Exception:
-                pass
+        """
+        Load warehouses for the filter dropdown.
         
+        Products are not preloaded; the product filter looks them up on the
+        server as the user types.
+        """
         # Load warehouses
         if not self.warehouses:
             try:
@@ -500,7 +494,7 @@ class StockMovementsView(QWidget):
         params.update(self.table.get_sort_params())
         
         # Product filter
-        product_id = self.product_filter.currentData()
+        product_id = self.product_filter.selected_product_id()
         if product_id:
             params['product'] = product_id
         
@@ -522,6 +516,64 @@ class StockMovementsView(QWidget):
         
         return params
     
+    def _iter_export_rows(self):
+        """Yield export rows for all movements matching the current filters."""
+        params = self._build_params()
+        params.pop('page', None)
+        params.pop('page_size', None)
+        params.pop('ordering', None)
+        
+        def to_number(value):
+            try:
+                return float(value)
+            except (TypeError, ValueError):
+                return value
+        
+        for movement in ExportService.iter_cursor_pages(api.get_stock_movements, params):
+            created_at = movement.get('created_at', '') or ''
+            yield {
+                'created_at': created_at[:10],
+                'product_name': movement.get('product_name', ''),
+                'warehouse_name': movement.get('warehouse_name', ''),
+                'movement_type_display': movement.get('movement_type_display', ''),
+                'quantity': to_number(movement.get('quantity')),
+                'balance_before': to_number(movement.get('balance_before')),
+                'balance_after': to_number(movement.get('balance_after')),
+                'reference_number': movement.get('reference_number', ''),
+            }
+    
+    def _export_excel(self):
+        """Export all filtered movements to Excel, page by page."""
+        columns = [
+            ('created_at', 'التاريخ'),
+            ('product_name', 'المنتج'),
+            ('warehouse_name', 'المستودع'),
+            ('movement_type_display', 'نوع الحركة'),
+            ('quantity', 'الكمية'),
+            ('balance_before', 'الرصيد قبل'),
+            ('balance_after', 'الرصيد بعد'),
+            ('reference_number', 'المرجع'),
+        ]
+        summary_data = {
+            'الفترة': f"{self.date_from.date().toString('yyyy-MM-dd')} → "
+                      f"{self.date_to.date().toString('yyyy-MM-dd')}",
+        }
+        
+        try:
+            filename = f"حركات_المخزون_{datetime.now().strftime('%Y%m%d')}.xlsx"
+            ok = ExportService.export_to_excel(
+                data=self._iter_export_rows(),
+                columns=columns,
+                filename=filename,
+                title="حركات المخزون",
+                parent=self,
+                summary=summary_data
+            )
+            if ok:
+                MessageDialog.info(self, "نجاح", "تم التصدير بنجاح ✅")
+        except ExportError as e:
+            MessageDialog.error(self, "خطأ", e.message)
+    
     def apply_filters(self):
         """Apply filters and refresh."""
         self.table.current_page = 1
@@ -529,7 +581,7 @@ class StockMovementsView(QWidget):
     
     def clear_filters(self):
         """Clear all filters."""
-        self.product_filter.setCurrentIndex(0)
+        self.product_filter.reset()
         self.warehouse_filter.setCurrentIndex(0)
         self.type_filter.setCurrentIndex(0)
         self.date_from.setDate(QDate.currentDate().addMonths(-1))
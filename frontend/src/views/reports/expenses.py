@@ -785,58 +785,24 @@ class ExpensesReportView(QWidget):
             self.expenses_table.setItem(row, 5, status_item)
 
     def _export_excel(self):
-        """Export report to Excel."""
+        """Export report to Excel (generated and streamed by the server)."""
         if not self.expenses_list:
             MessageDialog.warning(self, "تنبيه", "لا توجد بيانات للتصدير")
             return
         
         try:
-            columns = [
-                ('date', 'التاريخ'),
-                ('category', 'الفئة'),
-                ('description', 'الوصف'),
-                ('amount', 'المبلغ'),
-                ('reference', 'المرجع')
-            ]
-            
-            export_data = []
-            for expense in self.expenses_list:
-                export_data.append({
-                    'date': expense.get('date', ''),
-                    'category': expense.get('category', 'غير مصنف'),
-                    'description': expense.get('description', ''),
-                    'amount': float(expense.get('amount', 0)),
-                    'reference': expense.get('reference', '') or '-'
-                })
-            
-            filename = f"تقرير_المصروفات_{datetime.now().strftime('%Y%m%d')}.xlsx"
-            
-            summary = self.report_data.get('summary', {})
-            by_category = self.report_data.get('by_category', [])
-            
-            start_date = self.from_date.date().toString('yyyy-MM-dd')
-            end_date = self.to_date.date().toString('yyyy-MM-dd')
-            
-            summary_data = {
-                'الفترة': f"{start_date} → {end_date}",
-                'إجمالي المصروفات': f"{float(summary.get('total_expenses', 0)):,.0f} ل.س",
-                'عدد المصروفات': str(summary.get('expense_count', 0)),
-                'متوسط المصروف': f"{float(summary.get('average_expense', 0)):,.0f} ل.س"
+            params = {
+                'start_date': self.from_date.date().toString('yyyy-MM-dd'),
+                'end_date': self.to_date.date().toString('yyyy-MM-dd'),
             }
+            category_id = self.category_combo.currentData()
+            if category_id:
+                params['category'] = category_id
             
-            for cat in by_category:
-                cat_name = cat.get('category_name', 'غير مصنف')
-                cat_total = float(cat.get('total', 0))
-                cat_percent = float(cat.get('percentage', 0))
-                summary_data[f'{cat_name}'] = f"{cat_total:,.0f} ل.س ({cat_percent:.1f}%)"
+            filename = f"تقرير_المصروفات_{datetime.now().strftime('%Y%m%d')}.xlsx"
             
-            success = ExportService.export_to_excel(
-                data=export_data,
-                columns=columns,
-                filename=filename,
-                title="تقرير المصروفات",
-                parent=self,
-                summary=summary_data
+            success = ExportService.save_server_export(
+                'expenses', 'xlsx', filename, params=params, parent=self
             )
             
             if success:
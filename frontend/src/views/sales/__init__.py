@@ -26,6 +26,7 @@ from ...widgets.dialogs import MessageDialog, ConfirmDialog
 from ...widgets.cards import Card
 from ...widgets.unit_selector import UnitSelectorComboBox
 from ...services.api import api, ApiException
+from ...services.events import debounce_timer
 from ...utils.error_handler import handle_ui_error
 
 # Import returns components
@@ -33,6 +34,7 @@ from .returns import SalesReturnDialog, SalesReturnsView, InvoiceDetailsDialog
 
 # Import receipt printer
 from ...printing.receipt import ReceiptPrinter
+from ...printing.print_queue import ReceiptPrintQueue
 
 
 class _MoneyQtyDelegate(QStyledItemDelegate):
@@ -245,6 +247,10 @@ class InvoicesView(QWidget):
     def __init__(self, parent=None):
         super().__init__(parent)
         self.customers_cache = []
+        self._event_timer = debounce_timer(self, self.refresh)
+        self.print_queue = ReceiptPrintQueue(parent=self)
+        self.print_queue.printed.connect(self._on_receipt_printed)
+        self.print_queue.failed.connect(self._on_receipt_print_failed)
         self.setup_ui()
         
     def setup_ui(self):
@@ -379,18 +385,25 @@ class InvoicesView(QWidget):
             MessageDialog.success(self, "نجاح", "تم إنشاء الفاتورة بنجاح")
             self.refresh()
 
-            try:
-                printer = ReceiptPrinter()
-                print_result = printer.print_receipt(result)
-                if print_result is True:
-                    MessageDialog.success(self, "نجاح", "تم إرسال الفاتورة للطباعة")
-                elif isinstance(print_result, str):
-                    MessageDialog.info(self, "معلومات", f"تم حفظ الفاتورة في ملف: {print_result}")
-            except Exception as e:
-                MessageDialog.error(self, "خطأ في الطباعة", f"فشل في طباعة الفاتورة: {str(e)}")
+            if not self.print_queue.submit(result):
+                MessageDialog.warning(self, "تنبيه", "قائمة الطباعة ممتلئة، يرجى المحاولة بعد قليل")
         except ApiException as e:
             MessageDialog.error(self, "خطأ", str(e))
+
+    def _on_receipt_printed(self, print_result):
+        if print_result is True:
+            MessageDialog.success(self, "نجاح", "تم إرسال الفاتورة للطباعة")
+        elif isinstance(print_result, str):
+            MessageDialog.info(self, "معلومات", f"تم حفظ الفاتورة في ملف: {print_result}")
+
+    def _on_receipt_print_failed(self, message: str):
+        MessageDialog.error(self, "خطأ في الطباعة", f"فشل في طباعة الفاتورة: {message}")
         
+    def on_server_event(self, event: dict):
+        """Reload the list when another terminal confirmed an invoice or took a payment."""
+        if event.get('type') in ('invoice-confirmed', 'payment-received') and self.isVisible():
+            self._event_timer.start()
+
     @handle_ui_error
     def refresh(self):
         """Refresh invoices data from API."""
@@ -741,6 +754,10 @@ class POSView(QWidget):
         self.selected_customer = None
         self.default_warehouse = None
         self.last_completed_invoice = None  # Requirements: 4.1 - Store last invoice for printing
+        # Receipts render and spool on a background worker so the till stays responsive
+        self.print_queue = ReceiptPrintQueue(parent=self)
+        self.print_queue.printed.connect(self._on_receipt_printed)
+        self.print_queue.failed.connect(self._on_receipt_print_failed)
         self.setup_ui()
         
     def setup_ui(self):
@@ -1275,19 +1292,20 @@ class POSView(QWidget):
             MessageDialog.warning(self, "تنبيه", "لا توجد فاتورة للطباعة")
             return
         
-        try:
-            # Requirements: 4.3 - Call ReceiptPrinter with invoice data
-            printer = ReceiptPrinter()
-            result = printer.print_receipt(self.last_completed_invoice)
-            
-            if result is True:
-                MessageDialog.success(self, "نجاح", "تم إرسال الفاتورة للطباعة")
-            elif isinstance(result, str):
-                # Fallback to file - result is the filepath
-                MessageDialog.info(self, "معلومات", f"تم حفظ الفاتورة في ملف: {result}")
-        except Exception as e:
-            # Requirements: 4.4 - Handle print errors gracefully
-            MessageDialog.error(self, "خطأ في الطباعة", f"فشل في طباعة الفاتورة: {str(e)}")
+        # Requirements: 4.3 - Call ReceiptPrinter with invoice data (on the print queue)
+        if not self.print_queue.submit(self.last_completed_invoice):
+            MessageDialog.warning(self, "تنبيه", "قائمة الطباعة ممتلئة، يرجى المحاولة بعد قليل")
+
+    def _on_receipt_printed(self, result):
+        if result is True:
+            MessageDialog.success(self, "نجاح", "تم إرسال الفاتورة للطباعة")
+        elif isinstance(result, str):
+            # Fallback to file - result is the filepath
+            MessageDialog.info(self, "معلومات", f"تم حفظ الفاتورة في ملف: {result}")
+
+    def _on_receipt_print_failed(self, message: str):
+        # Requirements: 4.4 - Handle print errors gracefully
+        MessageDialog.error(self, "خطأ في الطباعة", f"فشل في طباعة الفاتورة: {message}")
     
 
     @handle_ui_error
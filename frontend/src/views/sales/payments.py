@@ -28,6 +28,7 @@ from ...widgets.cards import Card
 from ...widgets.unit_selector import UnitSelectorComboBox
 from ...widgets.dialogs import MessageDialog, ConfirmDialog
 from ...services.api import api, ApiException
+from ...services.events import debounce_timer
 from ...utils.error_handler import handle_ui_error
 
 
@@ -47,7 +48,13 @@ class PaymentsView(QWidget):
     def __init__(self, parent=None):
         super().__init__(parent)
         self.customers_cache: List[Dict] = []
+        self._event_timer = debounce_timer(self, self.refresh)
         self.setup_ui()
+
+    def on_server_event(self, event: dict):
+        """Reload the list when another terminal received a payment."""
+        if event.get('type') == 'payment-received' and self.isVisible():
+            self._event_timer.start()
         
     def setup_ui(self):
         """Initialize payments view UI."""
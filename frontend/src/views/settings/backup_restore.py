@@ -15,7 +15,7 @@ from PySide6.QtCore import Qt, Signal
 from PySide6.QtGui import QFont, QColor, QBrush
 
 from ...config import Colors, Fonts
-from ...widgets.dialogs import MessageDialog, ConfirmDialog
+from ...widgets.dialogs import MessageDialog, ConfirmDialog, JobProgressDialog
 from ...services.api import api, ApiException
 from ...utils.error_handler import handle_ui_error
 
@@ -610,15 +610,30 @@ class BackupRestoreView(QWidget):
             self.backups_table.setItem(0, 0, empty_item)
             self.backups_table.setSpan(0, 0, 1, 5)
 
+    def _run_job(self, title: str, job: dict) -> dict:
+        """Show progress for a server job until it finishes and return its final state."""
+        dialog = JobProgressDialog(title, job, api.get_job, api.cancel_job, parent=self)
+        dialog.exec()
+        return dialog.job
+
     @handle_ui_error
     def create_backup(self, include_media: bool = False):
         """Create a new backup."""
         try:
-            api.create_backup(include_media=include_media)
-            MessageDialog.success(self, "نجاح ✅", "تم إنشاء النسخة الاحتياطية بنجاح")
-            self.load_backups()
+            job = api.create_backup(include_media=include_media)
+            job = self._run_job("إنشاء نسخة احتياطية", job)
         except ApiException as e:
             MessageDialog.error(self, "خطأ", str(e))
+            return
+
+        status = job.get('status')
+        if status == 'succeeded':
+            MessageDialog.success(self, "نجاح ✅", "تم إنشاء النسخة الاحتياطية بنجاح")
+        elif status == 'cancelled':
+            MessageDialog.info(self, "تم الإلغاء", "تم إلغاء إنشاء النسخة الاحتياطية")
+        else:
+            MessageDialog.error(self, "خطأ", "فشل إنشاء النسخة الاحتياطية", job.get('error'))
+        self.load_backups()
 
     @handle_ui_error
     def _download_backup(self, row: int):
@@ -687,17 +702,25 @@ class BackupRestoreView(QWidget):
         restore_media = True
         replace_media = False
 
-        api.restore_backup_from_file(
+        job = api.restore_backup_from_file(
             file_path=file_path,
             restore_media=restore_media,
             replace_media=replace_media,
         )
-        MessageDialog.success(
-            self,
-            "نجاح ✅",
-            "تمت الاستعادة بنجاح!\n\n"
-            "يُفضل إعادة تشغيل التطبيق لضمان تحديث جميع البيانات."
-        )
+        job = self._run_job("استعادة البيانات", job)
+
+        status = job.get('status')
+        if status == 'succeeded':
+            MessageDialog.success(
+                self,
+                "نجاح ✅",
+                "تمت الاستعادة بنجاح!\n\n"
+                "يُفضل إعادة تشغيل التطبيق لضمان تحديث جميع البيانات."
+            )
+        elif status == 'cancelled':
+            MessageDialog.info(self, "تم الإلغاء", "تم إلغاء الاستعادة ولم يتم تعديل البيانات")
+        else:
+            MessageDialog.error(self, "خطأ", "فشل استعادة النسخة الاحتياطية", job.get('error'))
         self.load_backups()
 
     def refresh(self):
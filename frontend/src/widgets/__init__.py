@@ -4,6 +4,7 @@ from .header import Header
 from .cards import StatCard, Card
 from .tables import DataTable
 from .forms import FormField, FormDialog
-from .dialogs import ConfirmDialog, MessageDialog
+from .dialogs import ConfirmDialog, MessageDialog, JobProgressDialog
 from .product_units import ProductUnitConfigWidget, ProductUnitDialog
 from .unit_selector import UnitSelectorComboBox, UnitSelectorWidget
+from .product_lookup import ProductLookupComboBox
@@ -1,14 +1,16 @@
 """
 Dialog Widgets
 """
+from typing import Callable, Dict, Optional
+
 from PySide6.QtWidgets import (
     QDialog, QVBoxLayout, QHBoxLayout, QLabel, 
-    QPushButton, QMessageBox
+    QPushButton, QMessageBox, QProgressBar
 )
-from PySide6.QtCore import Qt
+from PySide6.QtCore import Qt, QTimer
 from PySide6.QtGui import QFont
 
-from ..config import Colors, Fonts
+from ..config import Colors, Fonts, config
 
 
 class ConfirmDialog(QDialog):
@@ -235,3 +237,121 @@ class MessageDialog:
             QMessageBox.No
         )
         return reply == QMessageBox.Yes
+
+
+class JobProgressDialog(QDialog):
+    """
+    Modal progress dialog for a server-side background job.
+
+    Polls the job with ``fetch_job(job_id)`` until it finishes, showing its
+    phase and percentage. The dialog closes itself when the job ends; the
+    final job state is available as ``self.job``.
+    """
+
+    PHASE_LABELS = {
+        'verify': 'التحقق من سلامة الملف',
+        'media': 'نسخ الملفات المرفقة',
+        'done': 'اكتملت العملية',
+    }
+
+    # Consecutive polling failures tolerated before giving up
+    MAX_POLL_ERRORS = 5
+
+    def __init__(self, title: str, job: Dict,
+                 fetch_job: Callable[[int], Dict],
+                 cancel_job: Optional[Callable[[int], Dict]] = None,
+                 parent=None):
+        super().__init__(parent)
+        self.setWindowTitle(title)
+        self.setMinimumWidth(420)
+        self.setWindowFlag(Qt.WindowCloseButtonHint, False)
+        self.job = job
+        self._fetch_job = fetch_job
+        self._cancel_job = cancel_job
+        self._poll_errors = 0
+        self.setup_ui(title)
+
+        self._timer = QTimer(self)
+        self._timer.setInterval(config.JOB_POLL_INTERVAL)
+        self._timer.timeout.connect(self.poll)
+        self._update(job)
+        if not self._finished():
+            self._timer.start()
+
+    def setup_ui(self, title: str):
+        """Initialize dialog UI."""
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(24, 24, 24, 24)
+        layout.setSpacing(16)
+
+        title_label = QLabel(title)
+        title_label.setFont(QFont(Fonts.FAMILY_AR, Fonts.SIZE_H3, QFont.Bold))
+        title_label.setAlignment(Qt.AlignCenter)
+        layout.addWidget(title_label)
+
+        self.phase_label = QLabel("في الانتظار...")
+        self.phase_label.setFont(QFont(Fonts.FAMILY_AR, Fonts.SIZE_BODY))
+        self.phase_label.setAlignment(Qt.AlignCenter)
+        self.phase_label.setWordWrap(True)
+        layout.addWidget(self.phase_label)
+
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setRange(0, 100)
+        layout.addWidget(self.progress_bar)
+
+        buttons_layout = QHBoxLayout()
+        buttons_layout.addStretch()
+        self.cancel_btn = QPushButton("إلغاء العملية")
+        self.cancel_btn.setProperty("class", "danger")
+        self.cancel_btn.setVisible(self._cancel_job is not None)
+        self.cancel_btn.clicked.connect(self.request_cancel)
+        buttons_layout.addWidget(self.cancel_btn)
+        layout.addLayout(buttons_layout)
+
+    def _finished(self) -> bool:
+        return bool((self.job or {}).get('is_finished'))
+
+    def _update(self, job: Dict):
+        self.job = job
+        phase = job.get('phase') or ''
+        if job.get('status') == 'pending':
+            text = "في الانتظار..."
+        else:
+            text = self.PHASE_LABELS.get(phase, f"جارٍ المعالجة: {phase}" if phase else "جارٍ التنفيذ...")
+        self.phase_label.setText(text)
+        self.progress_bar.setValue(int(job.get('progress') or 0))
+        if self._finished():
+            self._timer.stop()
+            QTimer.singleShot(0, self.accept)
+
+    def poll(self):
+        """Fetch the latest job state from the server."""
+        try:
+            job = self._fetch_job(self.job['id'])
+            self._poll_errors = 0
+        except Exception as e:
+            self._poll_errors += 1
+            if self._poll_errors >= self.MAX_POLL_ERRORS:
+                self._timer.stop()
+                self.job = dict(self.job, status='failed', is_finished=True, error=str(e))
+                self.accept()
+            return
+        self._update(job)
+
+    def request_cancel(self):
+        """Ask the server to cancel the job; the dialog closes once it stops."""
+        if self._cancel_job is None or self._finished():
+            return
+        self.cancel_btn.setEnabled(False)
+        self.phase_label.setText("جارٍ الإلغاء...")
+        try:
+            self._update(self._cancel_job(self.job['id']))
+        except Exception:
+            self.cancel_btn.setEnabled(True)
+
+    def reject(self):
+        # Escape must not hide a job that is still running
+        if self._finished():
+            super().reject()
+        else:
+            self.request_cancel()
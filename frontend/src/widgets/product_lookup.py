@@ -0,0 +1,96 @@
+"""
+Product Lookup Widget - Type-ahead product picker for filter bars
+
+Products are searched on the server as the user types instead of loading
+the whole catalogue into the combo box.
+"""
+from typing import Callable, Dict, List, Optional
+
+from PySide6.QtCore import QTimer, Signal
+from PySide6.QtWidgets import QComboBox
+
+from ..config import config
+
+
+class ProductLookupComboBox(QComboBox):
+    """
+    Editable combo box that fills its items from a product lookup call.
+
+    The first item is always the "all" choice with no data, so
+    ``currentData()`` is None when no product is selected.
+    """
+
+    # Emitted with the selected product id, or None for "all"
+    product_selected = Signal(object)
+
+    def __init__(self, lookup: Callable[[str], List[Dict]] = None, all_label: str = "الكل",
+                 parent=None):
+        """
+        Args:
+            lookup: Function returning [{id, code, name}] for a query
+                (defaults to api.lookup_products)
+            all_label: Text of the "no filter" item
+            parent: Parent widget
+        """
+        super().__init__(parent)
+        if lookup is None:
+            from ..services.api import api
+            lookup = api.lookup_products
+        self._lookup = lookup
+        self._all_label = all_label
+        self._last_query: Optional[str] = None
+
+        self.setEditable(True)
+        self.setInsertPolicy(QComboBox.NoInsert)
+        self.lineEdit().setPlaceholderText("ابحث بالاسم أو الرمز...")
+        self.addItem(all_label, None)
+
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(config.LOOKUP_DEBOUNCE_INTERVAL)
+        self._timer.timeout.connect(self.run_lookup)
+
+        self.lineEdit().textEdited.connect(self._on_text_edited)
+        self.activated.connect(self._on_activated)
+
+    def _on_text_edited(self, text: str):
+        self._timer.start()
+
+    def _on_activated(self, index: int):
+        self.product_selected.emit(self.itemData(index))
+
+    def run_lookup(self):
+        """Query the server for the current text and replace the items."""
+        text = self.currentText().strip()
+        if text == self._last_query:
+            return
+        self._last_query = text
+        try:
+            products = self._lookup(text) or []
+        except Exception:
+            return
+
+        self.blockSignals(True)
+        self.clear()
+        self.addItem(self._all_label, None)
+        for product in products:
+            self.addItem(f"{product.get('code', '')} - {product.get('name', '')}", product.get('id'))
+        self.setEditText(text)
+        self.blockSignals(False)
+        if products:
+            self.showPopup()
+
+    def reset(self):
+        """Select the "all" item and forget the last query."""
+        self._timer.stop()
+        self._last_query = None
+        self.blockSignals(True)
+        self.clear()
+        self.addItem(self._all_label, None)
+        self.setCurrentIndex(0)
+        self.blockSignals(False)
+
+    def selected_product_id(self) -> Optional[int]:
+        """Product id matching the current selection, or None."""
+        index = self.findText(self.currentText())
+        return self.itemData(index) if index > 0 else None
@@ -231,39 +231,7 @@ class DataTable(QFrame):
         self.table.setRowCount(len(self.data))
         
         for row, item in enumerate(self.data):
-            for col, column in enumerate(self.columns):
-                key = column['key']
-                value = item.get(key, '')
-                
-                # Format value
-                if column.get('type') == 'currency':
-                    try:
-                        if isinstance(key, str) and key.endswith('_usd'):
-                            value = config.format_usd(float(value or 0))
-                        else:
-                            value = f"{float(value):,.2f}"
-                    except (ValueError, TypeError):
-                        value = str(value)
-                elif column.get('type') == 'date':
-                    pass  # Format date if needed
-                elif column.get('type') == 'stock':
-                    value = self._format_stock_value(item, value)
-                    
-                cell = QTableWidgetItem(str(value))
-                cell.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
-                
-                # Store tooltip data for stock columns
-                if column.get('type') == 'stock':
-                    tooltip = self._build_stock_tooltip(item)
-                    if tooltip:
-                        cell.setToolTip(tooltip)
-                    
-                    # Highlight low stock items with red background
-                    if item.get('is_low_stock', False):
-                        cell.setBackground(QBrush(QColor(255, 200, 200)))
-                        cell.setForeground(QBrush(QColor(180, 0, 0)))
-                
-                self.table.setItem(row, col, cell)
+            self._render_row_cells(row, item)
             
             # Actions column
             if len(self.actions) > 0:
@@ -305,6 +273,62 @@ class DataTable(QFrame):
         # Update sort indicator if sorting is active
         self._update_sort_indicator()
 
+    def _render_row_cells(self, row: int, item: dict):
+        """Render the data cells of one row."""
+        for col, column in enumerate(self.columns):
+            key = column['key']
+            value = item.get(key, '')
+            
+            # Format value
+            if column.get('type') == 'currency':
+                try:
+                    if isinstance(key, str) and key.endswith('_usd'):
+                        value = config.format_usd(float(value or 0))
+                    else:
+                        value = f"{float(value):,.2f}"
+                except (ValueError, TypeError):
+                    value = str(value)
+            elif column.get('type') == 'date':
+                pass  # Format date if needed
+            elif column.get('type') == 'stock':
+                value = self._format_stock_value(item, value)
+                
+            cell = QTableWidgetItem(str(value))
+            cell.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+            
+            # Store tooltip data for stock columns
+            if column.get('type') == 'stock':
+                tooltip = self._build_stock_tooltip(item)
+                if tooltip:
+                    cell.setToolTip(tooltip)
+                
+                # Highlight low stock items with red background
+                if item.get('is_low_stock', False):
+                    cell.setBackground(QBrush(QColor(255, 200, 200)))
+                    cell.setForeground(QBrush(QColor(180, 0, 0)))
+            
+            self.table.setItem(row, col, cell)
+
+    def update_rows(self, key: str, value, changes: dict) -> int:
+        """
+        Update rows in place without rebuilding the table.
+        
+        Args:
+            key: Row field to match (e.g. 'id')
+            value: Value of that field in the rows to update
+            changes: Fields to merge into the matching rows
+            
+        Returns:
+            Number of rows updated
+        """
+        updated = 0
+        for row, item in enumerate(self.data):
+            if item.get(key) == value:
+                item.update(changes)
+                self._render_row_cells(row, item)
+                updated += 1
+        return updated
+
     def _update_pagination_ui(self):
         """Update pagination controls."""
         # Requirements: 14.4 - Display row count and current page information
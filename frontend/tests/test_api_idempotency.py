@@ -0,0 +1,97 @@
+"""
+Unit tests for Idempotency-Key handling and safe retries in ApiService.
+"""
+import json
+
+import pytest
+import requests
+
+from src.config import config
+from src.services import api as api_module
+from src.services.api import ApiService
+from src.utils.exceptions import ConnectionException, TimeoutException
+
+INVOICE = {'customer': 1, 'warehouse': 1, 'items': [{'product': 7, 'quantity': 2}]}
+
+
+def _response(status_code, body):
+    response = requests.Response()
+    response.status_code = status_code
+    response._content = json.dumps(body).encode('utf-8')
+    return response
+
+
+@pytest.fixture
+def service(monkeypatch):
+    monkeypatch.setattr(config, 'API_RETRY_BACKOFF', 0)
+    monkeypatch.setattr(config, 'API_IDEMPOTENT_RETRIES', 2)
+    service = ApiService()
+    monkeypatch.setattr(service, '_pending_actions', {})
+    return service
+
+
+@pytest.fixture
+def server(monkeypatch):
+    """Replays queued outcomes (responses or exceptions) and records the calls."""
+    calls, outcomes = [], []
+
+    def fake_request(method, url, headers=None, **kwargs):
+        calls.append({'method': method, 'url': url, 'key': headers.get('Idempotency-Key')})
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    monkeypatch.setattr(api_module.requests, 'request', fake_request)
+    return calls, outcomes
+
+
+class TestIdempotentRequests:
+    """Document-creating POSTs carry a key and are retried safely."""
+
+    def test_timeout_is_retried_with_the_same_key(self, service, server):
+        calls, outcomes = server
+        outcomes.extend([requests.exceptions.Timeout(), _response(201, {'id': 5})])
+
+        assert service.create_invoice(INVOICE) == {'id': 5}
+        assert len(calls) == 2
+        assert calls[0]['key'] and calls[0]['key'] == calls[1]['key']
+
+    def test_in_progress_conflict_is_retried(self, service, server):
+        calls, outcomes = server
+        outcomes.extend([
+            _response(409, {'code': 'IDEMPOTENCY_REQUEST_IN_PROGRESS'}),
+            _response(201, {'id': 6}),
+        ])
+        assert service.collect_payment_with_allocation({'customer': 1, 'amount': '5'}) == {'id': 6}
+        assert len(calls) == 2
+
+    def test_resubmitted_action_reuses_key_until_it_succeeds(self, service, server):
+        calls, outcomes = server
+        outcomes.extend([requests.exceptions.ConnectionError()] * 3)
+        with pytest.raises(ConnectionException):
+            service.create_invoice(INVOICE)
+
+        # The user clicks again with the same invoice: same key, so no duplicate
+        outcomes.append(_response(201, {'id': 7}))
+        service.create_invoice(dict(INVOICE))
+        assert len({call['key'] for call in calls}) == 1
+
+        # A new sale with identical content is a new action
+        outcomes.append(_response(201, {'id': 8}))
+        service.create_invoice(INVOICE)
+        assert calls[-1]['key'] != calls[0]['key']
+
+    def test_explicit_key_and_endpoint(self, service, server):
+        calls, outcomes = server
+        outcomes.append(_response(200, {'grn_number': 'GRN-1'}))
+        service.receive_goods(3, {'items': []}, idempotency_key='grn-action')
+        assert calls[0]['key'] == 'grn-action'
+        assert calls[0]['url'].endswith('purchases/orders/3/receive/')
+
+    def test_plain_requests_are_not_retried(self, service, server):
+        calls, outcomes = server
+        outcomes.append(requests.exceptions.Timeout())
+        with pytest.raises(TimeoutException):
+            service.post('expenses/expenses/', {'amount': '1'})
+        assert len(calls) == 1 and calls[0]['key'] is None
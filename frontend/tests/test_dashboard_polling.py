@@ -0,0 +1,38 @@
+"""
+Unit tests for dashboard polling on the server data version.
+"""
+from src.views import dashboard as dashboard_module
+from src.views.dashboard import DashboardView
+
+
+class FakeApi:
+    def __init__(self):
+        self.version = 1
+        self.dashboard_calls = 0
+
+    def get_data_version(self):
+        return self.version
+
+    def get_dashboard(self):
+        self.dashboard_calls += 1
+        return {'data_version': self.version}
+
+
+class TestDashboardPolling:
+    """Test that the dashboard reloads only when data changed."""
+
+    def test_reloads_only_when_version_moves(self, qapp, monkeypatch):
+        fake = FakeApi()
+        monkeypatch.setattr(dashboard_module, 'api', fake)
+        view = DashboardView()
+
+        view.refresh_if_changed()
+        assert fake.dashboard_calls == 1
+
+        view.refresh_if_changed()
+        view.refresh_if_changed()
+        assert fake.dashboard_calls == 1
+
+        fake.version = 2
+        view.refresh_if_changed()
+        assert fake.dashboard_calls == 2
@@ -0,0 +1,110 @@
+"""
+Unit tests for the change event subscriber and in-place table row updates.
+"""
+import threading
+import time
+
+from src.services.events import EventSubscriber
+from src.widgets.tables import DataTable
+
+
+class FakeFeed:
+    def __init__(self, pages):
+        self.pages = list(pages)
+        self.cursors = []
+
+    def __call__(self, after, timeout):
+        self.cursors.append(after)
+        return self.pages.pop(0)
+
+
+class TestEventSubscriber:
+    """Test long-poll cursor handling and signal emission."""
+
+    def test_poll_once_emits_and_advances_cursor(self, qapp):
+        feed = FakeFeed([
+            {'events': [], 'last_id': 10},
+            {'events': [{'id': 11, 'type': 'stock-changed', 'payload': {'product_id': 3}},
+                        {'id': 12, 'type': 'low-stock-crossed', 'payload': {'product_id': 3}}],
+             'last_id': 12},
+            {'events': [], 'last_id': 12},
+        ])
+        subscriber = EventSubscriber(poll=feed)
+        received = []
+        subscriber.event_received.connect(received.append)
+
+        subscriber.poll_once()
+        subscriber.poll_once()
+        subscriber.poll_once()
+
+        assert feed.cursors == [None, 10, 12]
+        assert [event['id'] for event in received] == [11, 12]
+
+    def test_failed_poll_keeps_cursor(self, qapp):
+        calls = []
+
+        def poll(after, timeout):
+            calls.append(after)
+            if len(calls) == 2:
+                raise ConnectionError
+            return {'events': [], 'last_id': 5}
+
+        subscriber = EventSubscriber(poll=poll)
+        subscriber.poll_once()
+        try:
+            subscriber.poll_once()
+        except ConnectionError:
+            pass
+        subscriber.poll_once()
+        assert calls == [None, 5, 5]
+
+    def test_restart_during_last_poll_keeps_polling(self, qapp):
+        in_flight = threading.Event()
+        release = threading.Event()
+        calls = []
+
+        def poll(after, timeout):
+            calls.append(after)
+            if len(calls) == 1:
+                in_flight.set()
+                release.wait(5)
+            else:
+                time.sleep(0.01)
+            return {'events': [], 'last_id': 1}
+
+        subscriber = EventSubscriber(poll=poll)
+        subscriber.start()
+        assert in_flight.wait(5)
+        first = subscriber._thread
+        subscriber.stop()
+        subscriber.start()
+        release.set()
+        first.join(5)
+
+        assert not first.is_alive()
+        assert subscriber.is_running()
+        count = len(calls)
+        time.sleep(0.1)
+        assert len(calls) > count
+        subscriber.stop()
+        subscriber._thread.join(5)
+
+
+class TestDataTableUpdateRows:
+    """Test updating rows without rebuilding the table."""
+
+    def test_updates_matching_rows_only(self, qapp):
+        table = DataTable([
+            {'key': 'name', 'label': 'Name', 'type': 'text'},
+            {'key': 'total_stock', 'label': 'Stock', 'type': 'text'},
+        ])
+        table.set_data([
+            {'id': 1, 'name': 'Tea', 'total_stock': 5},
+            {'id': 2, 'name': 'Coffee', 'total_stock': 7},
+        ])
+
+        assert table.update_rows('id', 2, {'total_stock': 3}) == 1
+        assert table.table.item(1, 1).text() == '3'
+        assert table.table.item(0, 1).text() == '5'
+        assert table.data[1]['total_stock'] == 3
+        assert table.update_rows('id', 99, {'total_stock': 0}) == 0
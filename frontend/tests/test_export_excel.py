@@ -0,0 +1,179 @@
+"""
+Unit tests for the streaming Excel export in ExportService.
+"""
+from unittest.mock import patch
+
+import pytest
+from openpyxl import load_workbook
+
+from src.services import export
+from src.services.export import ExportService, ExportError
+
+
+COLUMNS = [
+    ('code', 'الكود'),
+    ('name', 'الاسم'),
+    ('quantity', 'الكمية'),
+]
+
+
+def _rows(count: int):
+    for i in range(count):
+        yield {'code': f"P{i:05d}", 'name': f"منتج {i}", 'quantity': i * 1.5}
+
+
+class TestWriteExcel:
+    """Test ExportService.write_excel output."""
+
+    def test_writes_title_summary_header_and_rows(self, tmp_path):
+        """The layout matches the previous in-memory export."""
+        path = str(tmp_path / 'report.xlsx')
+        count = ExportService.write_excel(path, _rows(3), COLUMNS, "تقرير", {'العدد': 3})
+
+        ws = load_workbook(path).active
+        assert count == 3
+        assert ws.title == "تقرير"
+        assert ws.sheet_view.rightToLeft is True
+        assert ws['A1'].value == "تقرير"
+        assert ws['A1'].style == 'export_title'
+        assert 'A1:C1' in {str(r) for r in ws.merged_cells.ranges}
+        assert ws['A2'].value.startswith("تاريخ التقرير")
+        assert [ws['A4'].value, ws['B4'].value] == ['العدد', '3']
+        assert [c.value for c in ws[6]] == ['الكود', 'الاسم', 'الكمية']
+        assert all(c.style == 'export_header' for c in ws[6])
+        assert [c.value for c in ws[9]] == ['P00002', 'منتج 2', 3.0]
+
+    def test_numbers_use_number_style(self, tmp_path):
+        """Numeric cells share the number style, text cells the text style."""
+        path = str(tmp_path / 'report.xlsx')
+        ExportService.write_excel(path, _rows(2), COLUMNS, "تقرير")
+
+        ws = load_workbook(path).active
+        code, name, qty = ws[5]
+        assert code.style == 'export_cell'
+        assert qty.style == 'export_number'
+        assert qty.number_format == '#,##0.00'
+        assert qty.border.left.style == 'thin'
+
+    def test_widths_from_sampled_rows(self, tmp_path):
+        """Column widths come from the sample window only, capped at 50."""
+        def rows():
+            yield {'code': 'A', 'name': 'x' * 20, 'quantity': 1}
+            yield {'code': 'B', 'name': 'y' * 30, 'quantity': 2}
+            yield {'code': 'C', 'name': 'z' * 200, 'quantity': 3}
+
+        path = str(tmp_path / 'report.xlsx')
+        with patch.object(export, 'EXCEL_WIDTH_SAMPLE_ROWS', 2):
+            count = ExportService.write_excel(path, rows(), COLUMNS, "تقرير")
+
+        ws = load_workbook(path).active
+        assert count == 3
+        assert ws.column_dimensions['B'].width == 32
+        assert ws['B7'].value == 'z' * 200
+
+    def test_consumes_rows_lazily(self, tmp_path):
+        """Only the sample window is pulled before writing starts."""
+        pulled = []
+
+        def rows():
+            for row in _rows(50):
+                pulled.append(row)
+                yield row
+
+        path = str(tmp_path / 'report.xlsx')
+        with patch.object(export, 'EXCEL_WIDTH_SAMPLE_ROWS', 10), \
+                patch('openpyxl.worksheet._write_only.WriteOnlyWorksheet.append',
+                      autospec=True) as append:
+            seen = []
+            append.side_effect = lambda ws, row: seen.append(len(pulled))
+            ExportService.write_excel(path, rows(), COLUMNS, "تقرير")
+
+        # Title row is written after the 10 sampled rows and before the rest
+        assert seen[0] == 10
+        assert seen[-1] == 50
+
+
+class TestIterPages:
+    """Test paginated row iteration."""
+
+    def test_follows_next_links(self):
+        pages = {
+            1: {'results': [{'id': 1}, {'id': 2}], 'next': 'page=2'},
+            2: {'results': [{'id': 3}], 'next': None},
+        }
+        calls = []
+
+        def fetch(params):
+            calls.append(dict(params))
+            return pages[params['page']]
+
+        rows = list(ExportService.iter_pages(fetch, {'product': 5}, page_size=2))
+
+        assert [r['id'] for r in rows] == [1, 2, 3]
+        assert calls[0] == {'product': 5, 'page': 1, 'page_size': 2}
+        assert len(calls) == 2
+
+    def test_accepts_plain_list_response(self):
+        rows = list(ExportService.iter_pages(lambda params: [{'id': 1}]))
+        assert rows == [{'id': 1}]
+
+
+class TestIterCursorPages:
+    """Test cursor-paginated row iteration."""
+
+    def test_passes_cursor_from_next_link(self):
+        pages = {
+            None: {'results': [{'id': 3}, {'id': 2}],
+                   'next': 'http://host/api/v1/inventory/movements/?cursor=abc%3D&pagination=cursor'},
+            'abc=': {'results': [{'id': 1}], 'next': None},
+        }
+        calls = []
+
+        def fetch(params):
+            calls.append(dict(params))
+            return pages[params.get('cursor')]
+
+        rows = list(ExportService.iter_cursor_pages(fetch, {'product': 5, 'page': 3}, page_size=2))
+
+        assert [r['id'] for r in rows] == [3, 2, 1]
+        assert calls[0] == {'product': 5, 'pagination': 'cursor', 'page_size': 2}
+        assert calls[1]['cursor'] == 'abc='
+
+
+class TestExportToExcel:
+    """Test the dialog-driven export wrapper."""
+
+    def test_empty_iterator_raises_no_data(self, qapp):
+        with pytest.raises(ExportError) as exc:
+            ExportService.export_to_excel(iter([]), COLUMNS, 'r.xlsx', "تقرير")
+        assert exc.value.error_code == 'NO_DATA'
+
+    def test_streams_generator_to_selected_file(self, qapp, tmp_path):
+        path = str(tmp_path / 'out')
+        with patch.object(export.QFileDialog, 'getSaveFileName', return_value=(path, '')):
+            assert ExportService.export_to_excel(_rows(5), COLUMNS, 'r.xlsx', "تقرير") is True
+
+        ws = load_workbook(path + '.xlsx').active
+        assert ws.max_row == 9
+        assert ws["A9"].value == "P00004"
+
+
+class TestSaveServerExport:
+    """Test saving server-generated report files."""
+
+    def test_downloads_to_selected_path(self, qapp, tmp_path):
+        path = str(tmp_path / 'expenses')
+        with patch.object(export.QFileDialog, 'getSaveFileName', return_value=(path, '')), \
+                patch('src.services.api.api.download_report_export') as download:
+            ok = ExportService.save_server_export(
+                'expenses', 'xlsx', 'r.xlsx', params={'category': 2}
+            )
+
+        assert ok is True
+        download.assert_called_once_with('expenses', 'xlsx', path + '.xlsx', {'category': 2})
+
+    def test_cancelled_dialog_skips_download(self, qapp):
+        with patch.object(export.QFileDialog, 'getSaveFileName', return_value=('', '')), \
+                patch('src.services.api.api.download_report_export') as download:
+            assert ExportService.save_server_export('sales', 'csv', 'r.csv') is False
+        download.assert_not_called()
@@ -0,0 +1,59 @@
+"""
+Unit tests for JobProgressDialog background job polling.
+"""
+from src.widgets.dialogs import JobProgressDialog
+
+
+def _job(status='running', progress=0, phase='', **extra):
+    finished = status in ('succeeded', 'failed', 'cancelled')
+    return {'id': 1, 'status': status, 'progress': progress, 'phase': phase,
+            'is_finished': finished, **extra}
+
+
+class TestJobProgressDialog:
+    def test_updates_progress_until_finished(self, qapp):
+        states = iter([
+            _job(progress=40, phase='inventory.product'),
+            _job('succeeded', 100, 'done', result={'filename': 'a.amsbackup'}),
+        ])
+        dialog = JobProgressDialog("نسخ", _job('pending'), lambda job_id: next(states))
+        assert dialog._timer.isActive()
+
+        dialog.poll()
+        assert dialog.progress_bar.value() == 40
+        assert 'inventory.product' in dialog.phase_label.text()
+
+        dialog.poll()
+        assert not dialog._timer.isActive()
+        assert dialog.job['status'] == 'succeeded'
+        assert dialog.job['result']['filename'] == 'a.amsbackup'
+
+    def test_finished_job_does_not_poll(self, qapp):
+        dialog = JobProgressDialog("نسخ", _job('failed', error='x'), lambda job_id: None)
+        assert not dialog._timer.isActive()
+
+    def test_cancel_calls_server(self, qapp):
+        cancelled = []
+
+        def cancel(job_id):
+            cancelled.append(job_id)
+            return _job('running', 10, cancel_requested=True)
+
+        dialog = JobProgressDialog("استعادة", _job(), lambda job_id: _job(), cancel)
+        dialog.reject()
+
+        assert cancelled == [1]
+        assert not dialog.cancel_btn.isEnabled()
+        assert dialog._timer.isActive()
+
+    def test_gives_up_after_repeated_poll_errors(self, qapp):
+        def broken(job_id):
+            raise ConnectionError("offline")
+
+        dialog = JobProgressDialog("نسخ", _job(), broken)
+        for _ in range(JobProgressDialog.MAX_POLL_ERRORS):
+            dialog.poll()
+
+        assert not dialog._timer.isActive()
+        assert dialog.job['status'] == 'failed'
+        assert dialog.job['error'] == 'offline'
@@ -0,0 +1,61 @@
+"""
+Unit tests for the type-ahead ProductLookupComboBox.
+"""
+from src.widgets.product_lookup import ProductLookupComboBox
+
+
+PRODUCTS = [
+    {'id': 7, 'code': 'TEA-1', 'name': 'شاي أخضر'},
+    {'id': 8, 'code': 'TEA-2', 'name': 'شاي أسود'},
+]
+
+
+class TestProductLookupComboBox:
+    """Test server-side product lookup in the filter combo."""
+
+    def test_starts_with_all_item(self, qapp):
+        combo = ProductLookupComboBox(lookup=lambda q: [])
+        assert combo.count() == 1
+        assert combo.selected_product_id() is None
+
+    def test_lookup_fills_items_and_keeps_text(self, qapp):
+        queries = []
+
+        def lookup(query):
+            queries.append(query)
+            return PRODUCTS
+
+        combo = ProductLookupComboBox(lookup=lookup)
+        combo.setEditText('TEA')
+        combo.run_lookup()
+
+        assert queries == ['TEA']
+        assert combo.count() == 3
+        assert combo.currentText() == 'TEA'
+        assert combo.itemData(2) == 8
+
+        # Unchanged text does not query again
+        combo.run_lookup()
+        assert queries == ['TEA']
+        combo.hidePopup()
+
+    def test_selection_and_reset(self, qapp):
+        combo = ProductLookupComboBox(lookup=lambda q: PRODUCTS)
+        combo.setEditText('TEA')
+        combo.run_lookup()
+        combo.hidePopup()
+        combo.setCurrentIndex(1)
+        assert combo.selected_product_id() == 7
+
+        combo.reset()
+        assert combo.count() == 1
+        assert combo.selected_product_id() is None
+
+    def test_lookup_errors_keep_items(self, qapp):
+        def lookup(query):
+            raise RuntimeError('offline')
+
+        combo = ProductLookupComboBox(lookup=lookup)
+        combo.setEditText('x')
+        combo.run_lookup()
+        assert combo.count() == 1
@@ -0,0 +1,121 @@
+"""
+Unit tests for ReceiptPrinter ESC/POS raster encoding.
+
+The vectorized encoder must produce byte-identical GS v 0 chunks to the
+original per-pixel loop, which is kept here as the reference implementation.
+"""
+import os
+import time
+
+import pytest
+from PIL import Image
+
+from src.printing.receipt import ReceiptPrinter
+
+
+GOLDEN_PATH = os.path.join(os.path.dirname(__file__), 'data', 'receipt_escpos_golden.bin')
+
+
+def _gradient_image(width: int, height: int) -> Image.Image:
+    """Deterministic grayscale pattern crossing the ink threshold."""
+    return Image.frombytes(
+        'L',
+        (width, height),
+        bytes(((x * 7 + y * 13) % 256) for y in range(height) for x in range(width))
+    )
+
+
+def _reference_escpos(img) -> bytes:
+    """Original pure-Python encoder (per-pixel loop)."""
+    img = img.convert('L')
+    width, height = img.size
+    width_bytes = (width + 7) // 8
+
+    output = bytearray()
+    output.extend(b'\x1B\x40')
+    output.extend(b'\x1B\x61\x01')
+
+    pixels = img.load()
+    xL = width_bytes & 0xFF
+    xH = (width_bytes >> 8) & 0xFF
+
+    chunk_h = 240
+    y0 = 0
+    while y0 < height:
+        h = min(chunk_h, height - y0)
+        output.extend(b'\x1D\x76\x30\x00')
+        output.extend(bytes([xL, xH, h & 0xFF, (h >> 8) & 0xFF]))
+        for y in range(y0, y0 + h):
+            for xb in range(width_bytes):
+                b = 0
+                for bit in range(8):
+                    x = xb * 8 + bit
+                    if x < width and int(pixels[x, y]) < 200:
+                        b |= (1 << (7 - bit))
+                output.append(b)
+        output.extend(b'\x0A')
+        y0 += h
+
+    output.extend(b'\x1B\x64\x04')
+    output.extend(b'\x1D\x56\x01')
+    return bytes(output)
+
+
+@pytest.fixture
+def printer():
+    return ReceiptPrinter(width=80)
+
+
+class TestImageToEscpos:
+    """Test _image_to_escpos raster output."""
+
+    def test_matches_golden_file(self, printer):
+        """Encoder output is byte-identical to the stored golden file."""
+        with open(GOLDEN_PATH, 'rb') as f:
+            golden = f.read()
+
+        assert printer._image_to_escpos(_gradient_image(100, 300)) == golden
+
+    @pytest.mark.parametrize('width,height', [
+        (576, 250),
+        (384, 240),
+        (13, 7),
+        (1, 481),
+    ])
+    def test_matches_reference_encoder(self, printer, width, height):
+        """Encoder matches the per-pixel reference for various sizes."""
+        img = _gradient_image(width, height)
+        assert printer._image_to_escpos(img) == _reference_escpos(img)
+
+    @pytest.mark.parametrize('mode', ['1', 'RGB'])
+    def test_accepts_non_grayscale_images(self, printer, mode):
+        """Bilevel and RGB images encode the same as the reference."""
+        img = _gradient_image(64, 50).point(lambda p: 0 if p < 180 else 255).convert(mode)
+        assert printer._image_to_escpos(img) == _reference_escpos(img)
+
+    def test_blank_image_has_no_ink(self, printer):
+        """A white image yields an all-zero bitmap."""
+        data = printer._image_to_escpos(Image.new('L', (576, 300), color=255))
+        assert printer._escpos_bitmap_has_ink(data) is False
+
+    def test_single_dark_pixel_has_ink(self, printer):
+        """One dark pixel in the last chunk is detected."""
+        img = Image.new('L', (576, 300), color=255)
+        img.putpixel((575, 299), 0)
+        data = printer._image_to_escpos(img)
+        assert printer._escpos_bitmap_has_ink(data) is True
+
+    def test_encoder_benchmark(self, printer):
+        """A long 80mm receipt encodes far faster than the per-pixel loop."""
+        img = _gradient_image(576, 1200)
+
+        start = time.perf_counter()
+        reference = _reference_escpos(img)
+        reference_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        fast = printer._image_to_escpos(img)
+        fast_time = time.perf_counter() - start
+
+        assert fast == reference
+        assert fast_time * 10 < reference_time
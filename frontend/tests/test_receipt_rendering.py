@@ -0,0 +1,150 @@
+"""
+Unit tests for ReceiptPrinter rendering caches and the background print queue.
+"""
+import threading
+from unittest.mock import patch
+
+import pytest
+
+from src.printing import receipt
+from src.printing.receipt import ReceiptPrinter, clear_receipt_caches
+from src.printing.print_queue import ReceiptPrintQueue
+
+
+SAMPLE_INVOICE = {
+    'invoice_number': 'INV-0001',
+    'invoice_date': '2026-01-01',
+    'total_amount': 3500,
+    'items': [
+        {'product_name': 'سكر أبيض', 'unit_name': 'كغ', 'quantity': 2, 'unit_price': 1000, 'total': 2000},
+        {'product_name': 'Tea', 'quantity': 1, 'unit_price': 1500, 'total': 1500},
+    ],
+}
+
+
+@pytest.fixture(autouse=True)
+def fresh_caches():
+    clear_receipt_caches()
+    yield
+    clear_receipt_caches()
+
+
+class TestRenderingCaches:
+    """Test process-level font, text and section caches."""
+
+    def test_fonts_loaded_once_per_width(self):
+        """Fonts are shared between printer instances of the same width."""
+        first = ReceiptPrinter(width=80)._load_fonts()
+        with patch('PIL.ImageFont.truetype') as truetype:
+            second = ReceiptPrinter(width=80)._load_fonts()
+            truetype.assert_not_called()
+        assert first is second
+
+    def test_shaped_text_is_cached(self):
+        """Shaping the same string twice reshapes it only once."""
+        printer = ReceiptPrinter(width=80)
+        with patch.object(ReceiptPrinter, '_reshape_arabic', wraps=ReceiptPrinter._reshape_arabic) as reshape:
+            a = printer._shape_text("شكراً لتعاملكم معنا")
+            b = printer._shape_text("شكراً لتعاملكم معنا")
+        assert a == b
+        assert reshape.call_count == 1
+
+    def test_static_sections_rendered_once(self):
+        """Header, table header and footer are reused across sales."""
+        printer = ReceiptPrinter(width=80)
+        printer._create_receipt_image(SAMPLE_INVOICE)
+        cached = dict(receipt._SECTION_CACHE)
+
+        with patch.object(ReceiptPrinter, '_render_ops', wraps=printer._render_ops) as render:
+            img = printer._create_receipt_image(SAMPLE_INVOICE)
+
+        # Only the info line and the item/total rows are drawn per sale
+        assert render.call_count == 2
+        assert dict(receipt._SECTION_CACHE) == cached
+        assert img.mode == '1'
+        assert printer._image_has_ink(img)
+
+    def test_cached_render_matches_first_render(self):
+        """A receipt rendered from cached sections matches the first render."""
+        printer = ReceiptPrinter(width=58)
+        first = printer._create_receipt_image(SAMPLE_INVOICE)
+        second = printer._create_receipt_image(SAMPLE_INVOICE)
+        assert first.size == second.size
+        assert first.tobytes() == second.tobytes()
+
+    def test_warm_up_populates_caches(self, qapp):
+        """warm_up pre-renders the static sections."""
+        ReceiptPrinter(width=80).warm_up()
+        assert 80 in receipt._FONT_CACHE
+        kinds = {key[0] for key in receipt._SECTION_CACHE}
+        assert kinds == {"qt", "pil"}
+
+    def test_section_cache_is_bounded(self):
+        """Old sections are evicted once the LRU limit is reached."""
+        for i in range(receipt._SECTION_CACHE_SIZE + 5):
+            receipt._put_cached_section(('test', i), object())
+        assert len(receipt._SECTION_CACHE) == receipt._SECTION_CACHE_SIZE
+        assert receipt._get_cached_section(('test', 0)) is None
+
+
+class TestReceiptPrintQueue:
+    """Test the bounded background print queue."""
+
+    def test_prints_on_worker_thread(self, qapp):
+        """Receipts are printed off the calling thread."""
+        threads = []
+        done = threading.Event()
+
+        def fake_print(self, invoice_data, printer_name=None):
+            threads.append(threading.current_thread())
+            done.set()
+            return True
+
+        with patch.object(ReceiptPrinter, 'warm_up'), \
+                patch.object(ReceiptPrinter, 'print_receipt', fake_print):
+            print_queue = ReceiptPrintQueue()
+            assert print_queue.submit(SAMPLE_INVOICE) is True
+            assert done.wait(5)
+            print_queue.stop()
+
+        assert threads and threads[0] is not threading.current_thread()
+
+    def test_rejects_when_full(self, qapp):
+        """submit returns False instead of blocking when the queue is full."""
+        release = threading.Event()
+        started = threading.Event()
+
+        def blocking_print(self, invoice_data, printer_name=None):
+            started.set()
+            release.wait(5)
+            return True
+
+        with patch.object(ReceiptPrinter, 'warm_up'), \
+                patch.object(ReceiptPrinter, 'print_receipt', blocking_print):
+            print_queue = ReceiptPrintQueue(max_pending=2)
+            assert print_queue.submit(SAMPLE_INVOICE) is True
+            assert started.wait(5)
+            assert print_queue.submit(SAMPLE_INVOICE) is True
+            assert print_queue.submit(SAMPLE_INVOICE) is True
+            assert print_queue.submit(SAMPLE_INVOICE) is False
+            release.set()
+            print_queue.stop()
+
+    def test_failure_emits_signal(self, qapp):
+        """Printer exceptions are reported through the failed signal."""
+        messages = []
+
+        def broken_print(self, invoice_data, printer_name=None):
+            raise RuntimeError("printer offline")
+
+        with patch.object(ReceiptPrinter, 'warm_up'), \
+                patch.object(ReceiptPrinter, 'print_receipt', broken_print):
+            print_queue = ReceiptPrintQueue()
+            print_queue.failed.connect(messages.append)
+            print_queue.submit(SAMPLE_INVOICE)
+            print_queue.stop()
+
+        # Queued cross-thread signal is delivered by the GUI event loop
+        qapp.processEvents()
+
+        assert messages == ["printer offline"]